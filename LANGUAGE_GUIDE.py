@@ -128,7 +128,7 @@ If language doesn't change:
 1. Check if you clicked "Apply" or "Save"
 2. Try restarting the application
 3. Check language_settings.json in config folder
-4. Verify translation keys exist in language_settings.py
+4. Verify translation keys exist in config/translations/<language>.json
 
 If Arabic text looks wrong:
 1. Change to "Arial Unicode MS" font
@@ -0,0 +1,10 @@
+"""
+Benchmarks
+==========
+
+Startup and operation benchmarks for the register.
+
+Run ``python -m benchmarks.run_benchmarks`` from the project root; see that
+module for the options. Synthetic databases are built once per size and seed
+and cached in ``benchmarks/data/``.
+"""
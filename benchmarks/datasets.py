@@ -0,0 +1,62 @@
+"""
+Benchmark Datasets
+==================
+
+Synthetic register databases of a given size, built with
+``utils.data_generator`` so the benchmarks run against the current schema
+and realistic data. Databases are reproducible from the seed and end date
+and cached, so a 1M-sale database is only built once.
+
+Datasets end on the fixed ``DATASET_END_DATE`` and the benchmarks query
+windows relative to it, so every run reads the same data. The cache key also
+holds a fingerprint of the schema and generator code, so a cached database
+is rebuilt as soon as either changes.
+"""
+
+import hashlib
+import os
+import shutil
+from datetime import date
+
+from utils.data_generator import DataGenerator
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DATASET_END_DATE = date(2025, 6, 30)
+
+# Code that defines what a dataset contains: the schema and the generator
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_SOURCES = ("database/db_manager.py", "database/stock_ledger.py", "database/user_manager.py",
+                  "database/audit_log.py", "utils/data_generator.py")
+
+def dataset_version() -> str:
+    """Fingerprint of the schema and generator code datasets are built with."""
+    digest = hashlib.sha1()
+    for source in SCHEMA_SOURCES:
+        with open(os.path.join(_ROOT, source), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:10]
+
+def dataset_path(products: int, sales: int, seed: int = 42, end_date: date = DATASET_END_DATE) -> str:
+    """Path of the cached database for a size, seed, end date and schema version."""
+    return os.path.join(DATA_DIR, f"pos_{products}p_{sales}s_seed{seed}_{end_date:%Y%m%d}_{dataset_version()}.db")
+
+def build_database(path: str, products: int, sales: int, seed: int = 42, days: int = 365,
+                   end_date: date = DATASET_END_DATE):
+    """Create a database with the given number of products and sales."""
+    if os.path.exists(path):
+        os.remove(path)
+    DataGenerator(path, seed).generate(products=products, sales=sales, days=days,
+                                       registers=2, end_date=end_date)
+
+def get_database(products: int, sales: int, seed: int, workdir: str) -> str:
+    """Copy the cached database for a size into workdir (building it if needed)."""
+    cached = dataset_path(products, sales, seed)
+    if not os.path.exists(cached):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        print(f"Building dataset: {products} products, {sales} sales (seed {seed})...")
+        build_database(cached + ".tmp", products, sales, seed)
+        os.replace(cached + ".tmp", cached)
+    
+    path = os.path.join(workdir, "pos_database.db")
+    shutil.copyfile(cached, path)
+    return path
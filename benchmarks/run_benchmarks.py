@@ -0,0 +1,329 @@
+"""
+Register Benchmark Suite
+========================
+
+Times the register's hot paths against synthetic databases and writes the
+results to a JSON file, so runs from different versions can be compared.
+
+Usage::
+    
+    python -m benchmarks.run_benchmarks                       # 1k products, 10k sales
+    python -m benchmarks.run_benchmarks --full                # 1k/10k/100k products x 10k/1M sales
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/baseline.json
+
+Everything runs headless. The Tk benchmark (add_to_cart through the real
+cart display) needs a display and is skipped without one; run the suite
+under ``xvfb-run`` to include it. Benchmarks whose optional dependency is
+missing (ReportLab, matplotlib) are reported as skipped.
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Any, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datasets import get_database, dataset_version, DATASET_END_DATE
+from database.db_manager import DatabaseManager
+from models.sale import Sale
+from models.payment import Payment, PaymentMethod, PaymentStatus
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+BASKET_LINES = 100
+
+class SkipBenchmark(Exception):
+    """Raised by a benchmark that cannot run in this environment."""
+
+class BenchmarkContext:
+    """Database and helpers shared by the benchmarks of one dataset."""
+    
+    def __init__(self, workdir: str, db_path: str, seed: int, end_date: date = DATASET_END_DATE):
+        """Initialize the context on a working copy of a dataset ending on end_date."""
+        self.workdir = workdir
+        self.end = datetime.combine(end_date, datetime.max.time())  # "Now" for date-window benchmarks
+        self.db_path = db_path
+        self.db_manager = DatabaseManager(db_path)
+        self.rng = random.Random(seed)
+        self.products = self.db_manager.get_all_products()
+    
+    def basket(self, lines: int = BASKET_LINES) -> Sale:
+        """Build a sale with distinct random products and a cash payment."""
+        sale = Sale()
+        for product in self.rng.sample(self.products, min(lines, len(self.products))):
+            sale.add_item(product, self.rng.randint(1, 3))
+        sale.payment = Payment(method=PaymentMethod.CASH, amount=sale.total, status=PaymentStatus.COMPLETED)
+        sale.cashier_id = "1"
+        return sale
+
+BENCHMARKS: List[tuple] = []
+
+def benchmark(name: str):
+    """Register a benchmark.
+    
+    The decorated function does the setup and returns the callable to time,
+    so setup is not measured. It is called again before every run.
+    """
+    def register(function: Callable[[BenchmarkContext], Callable[[], Any]]):
+        BENCHMARKS.append((name, function))
+        return function
+    return register
+
+@benchmark("catalog_load")
+def bench_catalog_load(ctx):
+    """Load the active catalog with a cold product cache."""
+    ctx.db_manager._clear_cache()
+    return ctx.db_manager.get_all_products
+
+@benchmark("barcode_lookup_x1000")
+def bench_barcode_lookup(ctx):
+    """Look up 1000 random barcodes."""
+    barcodes = [p.barcode for p in ctx.rng.choices(ctx.products, k=1000) if p.barcode]
+    return lambda: [ctx.db_manager.get_product_by_barcode(barcode) for barcode in barcodes]
+
+@benchmark("add_to_cart_100_lines_model")
+def bench_add_to_cart_model(ctx):
+    """Build a 100-line basket and compute its totals (cart logic without widgets)."""
+    products = ctx.rng.sample(ctx.products, min(BASKET_LINES, len(ctx.products)))
+    
+    def run():
+        sale = Sale()
+        for product in products:
+            sale.add_item(product)
+            sale.total  # The register refreshes totals after every scan
+        return sale
+    return run
+
+@benchmark("add_to_cart_100_lines_tk")
+def bench_add_to_cart_tk(ctx):
+    """Scan 100 products into the real register cart (needs a display)."""
+    app = _get_tk_app(ctx)
+    products = ctx.rng.sample(ctx.products, min(BASKET_LINES, len(ctx.products)))
+    app.clear_cart()
+    
+    def run():
+        for product in products:
+            app.add_to_cart(product)
+        app.root.update_idletasks()
+    return run
+
+@benchmark("complete_sale_100_lines")
+def bench_complete_sale(ctx):
+    """Commit a 100-line sale: sale rows, outbox row and stock movements."""
+    sale = ctx.basket()
+    
+    def run():
+        sale.id = None
+        sale.sync_id = None
+        ctx.db_manager.save_sale(sale, apply_stock=True)
+    return run
+
+@benchmark("order_history_open")
+def bench_order_history(ctx):
+    """Load the first order history page, unfiltered and filtered by cashier."""
+    def run():
+        ctx.db_manager.get_sales_page(limit=50)
+        ctx.db_manager.get_sales_page(limit=50, cashier_id="2", payment_method="card")
+    return run
+
+@benchmark("report_generation_30_days")
+def bench_report_generation(ctx):
+    """Generate the 30-day advanced report data."""
+    try:
+        from utils.advanced_reports import AdvancedReportsManager
+    except ImportError as e:
+        raise SkipBenchmark(f"reports dependency missing: {e.name}")
+    manager = AdvancedReportsManager(ctx.db_manager)
+    return lambda: manager.generate_report_data("month", ctx.end - timedelta(days=30), ctx.end)
+
+@benchmark("sales_history_30_days")
+def bench_sales_history(ctx):
+    """Load 30 days of sales with their lines and payments."""
+    return lambda: ctx.db_manager.get_sales_by_date_range(ctx.end - timedelta(days=30), ctx.end)
+
+@benchmark("csv_import_1000_products")
+def bench_csv_import(ctx):
+    """Import a 1000-product CSV file."""
+    from utils.csv_import import CSVProductImporter
+    prefix = f"CSV{ctx.rng.randrange(10 ** 6):06d}"
+    csv_path = os.path.join(ctx.workdir, f"{prefix}.csv")
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "description", "price", "barcode", "category", "stock", "cost"])
+        for i in range(1000):
+            writer.writerow([f"Import {prefix} {i}", "", "12.50", f"{prefix}{i:05d}", "Épicerie", "20", "8"])
+    
+    importer = CSVProductImporter(ctx.db_manager)
+    return lambda: importer.import_csv_products(csv_path)
+
+@benchmark("backup")
+def bench_backup(ctx):
+    """Create a full backup of the database."""
+    from utils.backup_manager import BackupManager
+    manager = BackupManager(db_path=ctx.db_path, backup_dir=os.path.join(ctx.workdir, "backups"),
+                            db_manager=ctx.db_manager)
+    manager.stop_scheduler()  # Time the backup itself, not scheduled ones
+    return manager.create_backup
+
+@benchmark("receipt_render_text")
+def bench_receipt_text(ctx):
+    """Render a 100-line thermal receipt as text."""
+    from utils.advanced_receipt_printer import AdvancedReceiptPrinter
+    printer = AdvancedReceiptPrinter()
+    sale = ctx.basket()
+    sale.id = 1
+    return lambda: printer.generate_thermal_receipt_text(sale)
+
+@benchmark("receipt_render_pdf")
+def bench_receipt_pdf(ctx):
+    """Render a 100-line 58mm PDF receipt."""
+    try:
+        import reportlab  # noqa: F401
+    except ImportError:
+        raise SkipBenchmark("reportlab not installed")
+    from utils.advanced_receipt_printer import AdvancedReceiptPrinter
+    printer = AdvancedReceiptPrinter()
+    sale = ctx.basket()
+    sale.id = 1
+    pdf_path = os.path.join(ctx.workdir, "receipt.pdf")
+    return lambda: printer.create_58mm_pdf_receipt(sale, pdf_path)
+
+_tk_app = None
+
+def _get_tk_app(ctx):
+    """Build the register window once, logged in, on the benchmark database."""
+    global _tk_app
+    if _tk_app is not None:
+        return _tk_app
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        raise SkipBenchmark("no display (run under xvfb-run)")
+    
+    from database.user_manager import user_manager
+    from models.user import User, UserRole
+    from pos_system import POSApplication
+    
+    # POSApplication opens pos_database.db in the working directory
+    os.chdir(ctx.workdir)
+    user_manager.current_user = User(id=1, username="bench", name="Benchmark", role=UserRole.ADMIN)
+    _tk_app = POSApplication()
+    return _tk_app
+
+def run_benchmark(function, ctx, repeat: int) -> Dict[str, Any]:
+    """Run one benchmark and summarize its timings."""
+    timings = []
+    try:
+        for _ in range(repeat):
+            run = function(ctx)
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+    except SkipBenchmark as e:
+        return {"skipped": str(e)}
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "runs": len(timings)
+    }
+
+def _git_revision() -> str:
+    """Current git commit, if the project is a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """List benchmarks that got slower than baseline by more than threshold (e.g. 0.2 = 20%)."""
+    regressions = []
+    for dataset, results in current["results"].items():
+        for name, result in results.items():
+            previous = baseline.get("results", {}).get(dataset, {}).get(name, {})
+            if "median_ms" not in result or "median_ms" not in previous or not previous["median_ms"]:
+                continue
+            change = result["median_ms"] / previous["median_ms"] - 1
+            line = f"{dataset:>20}  {name:<30} {previous['median_ms']:>10.2f} -> {result['median_ms']:>10.2f} ms ({change:+.0%})"
+            print(line)
+            if change > threshold:
+                regressions.append(line)
+    return regressions
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the register on synthetic databases")
+    parser.add_argument("--products", type=int, nargs="+", default=[1000], help="Catalog sizes")
+    parser.add_argument("--sales", type=int, nargs="+", default=[10000], help="Sales history sizes")
+    parser.add_argument("--full", action="store_true", help="1k/10k/100k products x 10k/1M sales")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark")
+    parser.add_argument("--seed", type=int, default=42, help="Dataset seed")
+    parser.add_argument("--only", nargs="+", default=None, help="Benchmark names to run")
+    parser.add_argument("--output", default=None, help="Results file (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", default=None, help="Baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown counted as a regression")
+    args = parser.parse_args()
+    
+    if args.full:
+        args.products, args.sales = [1000, 10000, 100000], [10000, 1000000]
+    
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "dataset_version": dataset_version(),
+        "dataset_end_date": DATASET_END_DATE.isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": {}
+    }
+    
+    original_cwd = os.getcwd()
+    for products in args.products:
+        for sales in args.sales:
+            dataset = f"{products}p_{sales}s"
+            with tempfile.TemporaryDirectory() as workdir:
+                db_path = get_database(products, sales, args.seed, workdir)
+                ctx = BenchmarkContext(workdir, db_path, args.seed)
+                results = {}
+                for name, function in BENCHMARKS:
+                    if args.only and name not in args.only:
+                        continue
+                    results[name] = run_benchmark(function, ctx, args.repeat)
+                    summary = results[name].get("median_ms", results[name].get("skipped", results[name].get("error")))
+                    print(f"{dataset:>20}  {name:<30} {summary}")
+                report["results"][dataset] = results
+                
+                global _tk_app
+                if _tk_app is not None:
+                    _tk_app.root.destroy()
+                    _tk_app = None
+                os.chdir(original_cwd)
+                ctx.db_manager.close_all_connections()
+    
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['timestamp'].replace(':', '')}_{report['revision']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare_results(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
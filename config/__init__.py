@@ -1 +1,9 @@
-# Config module
+"""
+Config package.
+
+The application settings (LOW_STOCK_THRESHOLD, CASH_ROUNDING, ...) live in
+``config/settings.py`` and are re-exported here, so
+``from config import LOW_STOCK_THRESHOLD`` works everywhere.
+"""
+
+from .settings import *
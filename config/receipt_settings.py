@@ -5,12 +5,12 @@ Receipt Settings Manager
 This module handles receipt printing settings and configuration.
 """
 
-import json
-import os
 from typing import Dict, Any, List
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
+from config.settings_store import settings_store
+
 @dataclass
 class ReceiptSettings:
     """Receipt printing settings."""
@@ -45,37 +45,46 @@ class ReceiptSettings:
     show_tax_number: bool = False
 
 class ReceiptSettingsManager:
-    """Manages receipt printing settings."""
+    """Manages receipt printing settings.
+    
+    Settings come from the shared settings store, so every manager (dialog,
+    receipt printer) sees a change as soon as one of them saves it.
+    """
     
     def __init__(self, settings_file: str = "config/receipt_settings.json"):
         self.settings_file = settings_file
         self.settings = ReceiptSettings()
+        self.version = 0
         self.load_settings()
+        settings_store.subscribe(self.settings_file, self._on_settings_changed)
     
     def load_settings(self) -> None:
-        """Load settings from file."""
-        try:
-            if os.path.exists(self.settings_file):
-                with open(self.settings_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # Update settings with saved values
-                    for key, value in data.items():
-                        if hasattr(self.settings, key):
-                            setattr(self.settings, key, value)
-        except Exception as e:
-            print(f"Error loading receipt settings: {e}")
+        """Load settings from the settings store snapshot."""
+        self._apply(settings_store.load(self.settings_file, asdict(ReceiptSettings())))
+        self.version = settings_store.version(self.settings_file)
+    
+    def _apply(self, data: Dict[str, Any]) -> None:
+        """Copy values onto the settings object in place (holders keep a live view)."""
+        for key, value in data.items():
+            if hasattr(self.settings, key):
+                setattr(self.settings, key, value)
+    
+    def _on_settings_changed(self, data: Dict[str, Any], version: int) -> None:
+        """Settings store callback: pick up a change saved by any manager."""
+        self._apply(data)
+        self.version = version
     
     def save_settings(self) -> None:
-        """Save settings to file."""
+        """Save settings (written to file shortly after by the settings store)."""
         try:
-            # Create config directory if it doesn't exist
-            os.makedirs(os.path.dirname(self.settings_file), exist_ok=True)
-            
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(asdict(self.settings), f, indent=2, ensure_ascii=False)
+            self.version = settings_store.update(self.settings_file, asdict(self.settings))
         except Exception as e:
             print(f"Error saving receipt settings: {e}")
     
+    def write_settings(self) -> None:
+        """Write saved settings to file now; raises OSError if the write fails."""
+        settings_store.write(self.settings_file)
+    
     def get_settings(self) -> ReceiptSettings:
         """Get current settings."""
         return self.settings
@@ -89,7 +98,7 @@ class ReceiptSettingsManager:
     
     def reset_to_defaults(self) -> None:
         """Reset settings to defaults."""
-        self.settings = ReceiptSettings()
+        self._apply(asdict(ReceiptSettings()))
         self.save_settings()
     
     def get_paper_width(self) -> int:
@@ -101,8 +110,17 @@ class ReceiptSettingsManager:
         }
         return width_map.get(self.settings.paper_size, 40)
 
-def get_available_printers() -> List[str]:
-    """Get list of available printers on the system."""
+_printer_cache: List[str] = []
+
+def get_available_printers(refresh: bool = False) -> List[str]:
+    """Get list of available printers on the system.
+    
+    Printer discovery is slow on some systems, so the list is cached after the
+    first call (the register warms it up in the background at startup).
+    """
+    if _printer_cache and not refresh:
+        return list(_printer_cache)
+    
     printers = []
     try:
         # Try to use win32print for Windows
@@ -124,4 +142,5 @@ def get_available_printers() -> List[str]:
     # Always add virtual PDF printer
     printers.append("Save as PDF")
     
-    return printers
+    _printer_cache[:] = printers
+    return list(printers)
@@ -8,6 +8,11 @@ Configuration settings for the POS system.
 # Application settings
 APP_TITLE = "Point of Sale - Système de Caisse"
 APP_VERSION = "1.0.0"
+STARTUP_BUDGET_MS = 1500  # Target time to show the login and the register screen
+UI_MONITOR_ENABLED = True  # Event-loop lag watchdog and UI operation timings
+UI_LAG_THRESHOLD_MS = 250  # Event-loop delay recorded as a stall (with stack samples)
+UI_SLOW_OPERATION_MS = 100  # Traced UI operations slower than this go to the trace file
+UI_TRACE_FILE = "ui_trace.log"  # Rotating JSON-lines trace file
 
 # Window settings
 WINDOW_WIDTH = 1400
@@ -31,6 +36,16 @@ CURRENCY_CODE = "MAD"
 DATABASE_FILE = "pos_database.db"
 BACKUP_ENABLED = True
 BACKUP_INTERVAL_HOURS = 24
+QUERY_PROFILING = False          # Per-statement timings and slow-query log (admin panel)
+SLOW_QUERY_MS = 100              # Statements slower than this are logged with their query plan
+
+# Multi-register sync settings
+REGISTER_ID = "default"          # Unique per register in the store
+SYNC_SERVER_URL = None           # e.g. "http://192.168.1.10:8765"; None works standalone
+SYNC_TOKEN = None                # Shared secret sent to the sync service
+SYNC_INTERVAL_SECONDS = 30
+OUTBOX_SINK = None               # Head office feed: "http://...", "sqlite:<path>" or "file:<directory>"; None keeps no outbox
+OUTBOX_RETENTION_DAYS = 30       # Shipped outbox rows are purged after this many days
 
 # Receipt settings
 RECEIPT_WIDTH = 40
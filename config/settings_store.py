@@ -0,0 +1,199 @@
+"""
+Settings Store
+==============
+
+One in-memory snapshot of the JSON settings files under ``config/``
+(receipt, language and backup settings).
+
+- Each file is read once; every manager of the same file shares its snapshot.
+- ``update`` bumps the file's version, notifies subscribers right away and
+  writes the file shortly after (write-behind), through a temporary file and
+  a rename so a crash never leaves half a settings file. A file whose write
+  fails stays pending and is written again by the next flush; explicit saves
+  use ``write`` to find out about the failure.
+- Subscribers are called with the new snapshot and version, so caches built
+  from settings (receipt printer, backup scheduler) refresh when a value
+  changes instead of re-reading the file.
+"""
+
+import atexit
+import copy
+import json
+import os
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional
+
+WRITE_DELAY_SECONDS = 0.5
+
+class SettingsStore:
+    """Shared snapshot of settings files with write-behind persistence."""
+    
+    def __init__(self, write_delay: float = WRITE_DELAY_SECONDS):
+        """Initialize an empty store.
+        
+        Args:
+            write_delay: Seconds to batch updates before writing; 0 writes
+                synchronously in ``update``
+        """
+        self.write_delay = write_delay
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._versions: Dict[str, int] = {}
+        self._subscribers: Dict[str, list] = {}
+        self._dirty = set()
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+    
+    @staticmethod
+    def _key(path: str) -> str:
+        """Snapshot key of a settings file."""
+        return os.path.abspath(path)
+    
+    def load(self, path: str, defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Settings of a file, read from disk on first use.
+        
+        Args:
+            path: Settings file path
+            defaults: Values for keys the file does not have
+        
+        Returns:
+            A copy of the snapshot, safe to modify
+        """
+        key = self._key(path)
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is None:
+                snapshot = self._snapshots[key] = self._read(key)
+                self._versions[key] = 0
+            for name, value in (defaults or {}).items():
+                snapshot.setdefault(name, copy.deepcopy(value))
+            return copy.deepcopy(snapshot)
+    
+    def version(self, path: str) -> int:
+        """Number of updates applied to a file's settings since it was loaded."""
+        return self._versions.get(self._key(path), 0)
+    
+    def update(self, path: str, changes: Dict[str, Any]) -> int:
+        """Apply changes to a file's settings, notify subscribers and schedule the write.
+        
+        Returns:
+            The new version
+        """
+        key = self._key(path)
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is None:
+                snapshot = self._snapshots[key] = self._read(key)
+                self._versions[key] = 0
+            snapshot.update(copy.deepcopy(changes))
+            self._versions[key] += 1
+            version = self._versions[key]
+            self._dirty.add(key)
+            settings = copy.deepcopy(snapshot)
+            callbacks = self._live_subscribers(key)
+        
+        self._schedule_write()
+        for callback in callbacks:
+            try:
+                callback(copy.deepcopy(settings), version)
+            except Exception as e:
+                print(f"Error notifying settings subscriber: {e}")
+        return version
+    
+    def subscribe(self, path: str, callback: Callable[[Dict[str, Any], int], None]) -> None:
+        """Call callback(settings, version) whenever a file's settings change.
+        
+        Bound methods are held weakly, so subscribing does not keep their
+        object alive.
+        """
+        reference = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+        with self._lock:
+            self._subscribers.setdefault(self._key(path), []).append(reference)
+    
+    def _live_subscribers(self, key: str) -> list:
+        """Subscribed callbacks of a file, forgetting garbage-collected ones."""
+        references = [reference for reference in self._subscribers.get(key, []) if reference() is not None]
+        self._subscribers[key] = references
+        return [reference() for reference in references]
+    
+    def _schedule_write(self):
+        """Write pending changes after the write delay (or now)."""
+        if self.write_delay <= 0:
+            self.flush()
+            return
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.write_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    def flush(self, path: Optional[str] = None) -> Dict[str, Exception]:
+        """Write every file with pending changes (or only path).
+        
+        Returns:
+            The error of each file that could not be written, by path; those
+            files stay pending
+        """
+        with self._write_lock:
+            with self._lock:
+                if path is None:
+                    keys = set(self._dirty)
+                    if self._timer is not None:
+                        self._timer.cancel()
+                        self._timer = None
+                else:
+                    keys = self._dirty & {self._key(path)}
+                pending = [(key, copy.deepcopy(self._snapshots[key])) for key in keys]
+                self._dirty -= keys
+            failed = {}
+            for key, snapshot in pending:
+                try:
+                    self._write(key, snapshot)
+                except Exception as e:
+                    print(f"Error saving settings file {key}: {e}")
+                    failed[key] = e
+            if failed:
+                with self._lock:
+                    self._dirty.update(failed)
+            return failed
+    
+    def write(self, path: str) -> None:
+        """Write a file's pending changes now; raises OSError if the write fails."""
+        error = self.flush(path).get(self._key(path))
+        if error is not None:
+            raise OSError(f"Could not save settings file {path}: {error}") from error
+    
+    def reload(self, path: str) -> None:
+        """Forget a file's snapshot so the next load reads it from disk again."""
+        key = self._key(path)
+        with self._lock:
+            if key not in self._dirty:
+                self._snapshots.pop(key, None)
+    
+    def _read(self, key: str) -> Dict[str, Any]:
+        """Read a settings file (empty when missing or unreadable)."""
+        try:
+            if os.path.exists(key):
+                with open(key, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Error loading settings file {key}: {e}")
+        return {}
+    
+    def _write(self, key: str, snapshot: Dict[str, Any]):
+        """Write a settings file atomically (temporary file, then rename)."""
+        temp_file = key + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(key), exist_ok=True)
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, indent=2, ensure_ascii=False)
+            os.replace(temp_file, key)
+        except Exception:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise
+
+# Shared store; pending writes are flushed when the application exits
+settings_store = SettingsStore()
+atexit.register(settings_store.flush)
@@ -0,0 +1,247 @@
+"""
+Audit Log Writer
+================
+
+Asynchronous, batched writer for the user_activities audit log.
+
+Activity records are appended to a local journal file and queued in memory;
+a background thread inserts them in batched transactions when the queue
+reaches ``batch_size`` or every ``flush_interval`` seconds. The journal is
+truncated once everything in it has been committed, and replayed on the next
+start after a crash, so logging an activity never waits on SQLite and no
+audit entry is lost.
+
+Every writer has its own journal (named after its process and instance), so
+several writers on one database never replay or delete each other's live
+journal. A writer touches its journal while it runs; journals left untouched
+for ``JOURNAL_STALE_SECONDS`` belong to a writer that crashed and are
+replayed by the next writer that starts.
+"""
+
+import atexit
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from database.query_profiler import query_profiler
+
+class AuditLogWriter:
+    """Queues activity records and writes them to SQLite in batches."""
+    
+    HEARTBEAT_SECONDS = 60  # How often a running writer touches its journal
+    JOURNAL_STALE_SECONDS = 300  # Untouched this long: the writer is gone
+    
+    def __init__(self, db_path: str = "pos_database.db", journal_path: Optional[str] = None,
+                 batch_size: int = 50, flush_interval: float = 2.0, fsync: bool = False):
+        """Initialize the writer and replay any journal left by a crash.
+        
+        Args:
+            db_path: Database holding the user_activities table
+            journal_path: Append-only journal file, replayed at start (defaults to
+                a journal of this writer's own next to the database)
+            batch_size: Queue length that triggers an immediate flush
+            flush_interval: Maximum seconds a record waits in memory
+            fsync: fsync the journal on every record (survives power loss, slower)
+        """
+        self.db_path = db_path
+        self._journal_prefix = f"{os.path.splitext(db_path)[0]}_audit"
+        self.journal_path = journal_path or f"{self._journal_prefix}.{os.getpid()}-{uuid.uuid4().hex[:8]}.journal"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        
+        self._queue = deque()
+        self._lock = threading.Lock()  # Guards the queue and the journal file
+        self._write_lock = threading.Lock()  # Serializes database flushes
+        self._wakeup = threading.Event()
+        self._running = True
+        
+        self._ensure_schema()
+        if journal_path:
+            try:
+                self._replay_journal(journal_path)
+            except sqlite3.Error as e:
+                # The journal stays ours: queue its records for the next flush
+                print(f"Error replaying audit journal {journal_path}: {e}")
+                self._queue.extend(self._read_journal(journal_path))
+        for orphan in self._orphaned_journals():
+            try:
+                self._replay_journal(orphan)
+            except Exception as e:
+                # Keep the journal; the next writer to start tries again
+                print(f"Error replaying audit journal {orphan}: {e}")
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        
+        self._thread = threading.Thread(target=self._run, name="AuditLogWriter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def _ensure_schema(self):
+        """Add the journal id column used to make replays idempotent."""
+        conn = query_profiler.connect(self.db_path, timeout=30.0)
+        try:
+            try:
+                conn.execute("ALTER TABLE user_activities ADD COLUMN journal_id TEXT")
+            except sqlite3.OperationalError:
+                pass  # Column already exists
+            conn.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_user_activities_journal
+                ON user_activities(journal_id) WHERE journal_id IS NOT NULL
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def log(self, user_id: int, activity_type: str, description: str,
+            sale_id: int = None, amount: float = None, details: str = ""):
+        """Record an activity; returns as soon as it is journaled."""
+        record = {
+            "journal_id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "activity_type": activity_type,
+            "description": description,
+            # Same format and clock (UTC) as SQLite CURRENT_TIMESTAMP
+            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "sale_id": sale_id,
+            "amount": amount,
+            "details": details
+        }
+        
+        with self._lock:
+            if not self._running:
+                raise RuntimeError("Audit log writer is closed")
+            self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            self._queue.append(record)
+            queue_length = len(self._queue)
+        
+        if queue_length >= self.batch_size:
+            self._wakeup.set()
+    
+    def _insert_batch(self, records: List[Dict]):
+        """Insert records in one transaction (duplicates from replays are ignored)."""
+        conn = query_profiler.connect(self.db_path, timeout=30.0)
+        try:
+            conn.executemany('''
+                INSERT OR IGNORE INTO user_activities
+                    (user_id, activity_type, description, timestamp, sale_id, amount, details, journal_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(r["user_id"], r["activity_type"], r["description"], r["timestamp"],
+                   r["sale_id"], r["amount"], r["details"], r["journal_id"]) for r in records])
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def flush(self):
+        """Write every queued record now (blocks until committed)."""
+        with self._write_lock:
+            while True:
+                with self._lock:
+                    batch = [self._queue.popleft() for _ in range(min(len(self._queue), self.batch_size * 10))]
+                if not batch:
+                    break
+                
+                try:
+                    self._insert_batch(batch)
+                except sqlite3.Error as e:
+                    # Put the batch back; the journal still holds it
+                    with self._lock:
+                        self._queue.extendleft(reversed(batch))
+                    print(f"Error flushing audit log: {e}")
+                    return
+            
+            # Everything journaled so far is committed: start a fresh journal
+            with self._lock:
+                if not self._queue and not self._journal.closed:
+                    self._journal.truncate(0)
+                    self._journal.seek(0)
+    
+    @contextmanager
+    def paused(self):
+        """Hold off database writes (records are still journaled), e.g. while a restore swaps the database."""
+        with self._write_lock:
+            yield
+    
+    def pending_count(self) -> int:
+        """Get the number of records not yet written to the database."""
+        with self._lock:
+            return len(self._queue)
+    
+    def _run(self):
+        """Background loop flushing on size or time triggers."""
+        while self._running:
+            self._wakeup.wait(timeout=min(self.flush_interval, self.HEARTBEAT_SECONDS))
+            self._wakeup.clear()
+            self.flush()
+            try:
+                os.utime(self.journal_path)  # Heartbeat: this journal is still in use
+            except OSError:
+                pass
+    
+    def _orphaned_journals(self) -> List[str]:
+        """Journals of this database left behind by writers that are gone."""
+        orphans = []
+        now = time.time()
+        for path in glob.glob(f"{glob.escape(self._journal_prefix)}*.journal"):
+            if os.path.abspath(path) == os.path.abspath(self.journal_path):
+                continue
+            try:
+                if now - os.path.getmtime(path) > self.JOURNAL_STALE_SECONDS:
+                    orphans.append(path)
+            except OSError:
+                pass  # Removed by another writer meanwhile
+        return orphans
+    
+    def _read_journal(self, journal_path: str) -> List[Dict]:
+        """Read the records of a journal file."""
+        records = []
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    pass  # Torn final line from the crash
+        return records
+    
+    def _replay_journal(self, journal_path: str):
+        """Insert records journaled but not committed before a crash, then remove the journal."""
+        if not os.path.exists(journal_path):
+            return
+        
+        records = self._read_journal(journal_path)
+        if records:
+            self._insert_batch(records)
+            print(f"Recovered {len(records)} audit log entries from journal")
+        
+        try:
+            os.remove(journal_path)
+        except OSError:
+            pass  # Already replayed by another writer
+    
+    def close(self):
+        """Flush remaining records and stop the background thread."""
+        if not self._running:
+            return
+        
+        with self._lock:
+            self._running = False
+        self._wakeup.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        
+        self.flush()
+        with self._lock:
+            self._journal.close()
+            if not self._queue and os.path.exists(self.journal_path):
+                os.remove(self.journal_path)  # Everything committed
+        atexit.unregister(self.close)
@@ -7,30 +7,48 @@ This module handles all database operations for the POS system with optimization
 
 import sqlite3
 import os
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from functools import lru_cache
 import threading
+import uuid
+import json
 from models.product import Product
+from config import LOW_STOCK_THRESHOLD, REGISTER_ID, OUTBOX_SINK
 from models.sale import Sale, SaleItem
+from models.rows import SaleRow, ItemRow, PaymentRow
 from models.payment import Payment, PaymentMethod, PaymentStatus
+from database.stock_ledger import StockLedger
+from database.query_profiler import query_profiler
 
 class DatabaseManager:
     """Manages database operations for the POS system with optimizations."""
     
-    def __init__(self, db_path: str = "pos_database.db"):
+    PRODUCT_COLUMNS = ("id, name, description, price, barcode, category, stock_quantity, is_active, "
+                       "supplier, cost_price, reorder_threshold, version")
+    
+    # Sales per IN (...) query when loading history lines and payments
+    ROW_CHUNK_SIZE = 500
+    
+    def __init__(self, db_path: str = "pos_database.db", register_id: str = REGISTER_ID,
+                 use_outbox: bool = OUTBOX_SINK is not None):
         """Initialize database manager with connection pooling."""
         self.db_path = db_path
+        self.register_id = register_id  # Stamped on every sale for multi-register sync
+        self.use_outbox = use_outbox  # Queue sales for the head office feed (nothing drains it without a sink)
         self._local = threading.local()  # Thread-local storage for connections
+        self._connections = []  # All pooled connections, so they can be closed together
+        self._connections_lock = threading.Lock()
         self._product_cache = {}  # Cache for frequently accessed products
         self._cache_timeout = 300  # 5 minutes cache timeout
         self._last_cache_update = datetime.now()
         self.init_database()
+        self.stock_ledger = StockLedger(db_path)
     
     def _get_connection(self):
         """Get a thread-local database connection."""
         if not hasattr(self._local, 'connection'):
-            self._local.connection = sqlite3.connect(
+            self._local.connection = query_profiler.connect(
                 self.db_path,
                 timeout=30.0,  # 30 second timeout
                 check_same_thread=False
@@ -40,8 +58,27 @@ class DatabaseManager:
             self._local.connection.execute("PRAGMA synchronous=NORMAL")
             self._local.connection.execute("PRAGMA cache_size=10000")
             self._local.connection.execute("PRAGMA temp_store=MEMORY")
+            with self._connections_lock:
+                self._connections.append(self._local.connection)
         return self._local.connection
     
+    def close_all_connections(self):
+        """Close every pooled connection (all threads), e.g. before a restore."""
+        with self._connections_lock:
+            connections = self._connections
+            self._connections = []
+        
+        for connection in connections:
+            try:
+                connection.close()
+            except sqlite3.Error as e:
+                print(f"Error closing database connection: {e}")
+        
+        # Fresh thread-local storage so every thread reconnects on next use
+        self._local = threading.local()
+        self._clear_cache()
+        self.get_daily_sales_summary.cache_clear()
+    
     def _clear_cache(self):
         """Clear the product cache."""
         self._product_cache.clear()
@@ -56,7 +93,7 @@ class DatabaseManager:
             cursor.execute("PRAGMA foreign_keys=ON")
             
             # Create products table with indexes
-            cursor.execute('''
+            cursor.execute(f'''
                 CREATE TABLE IF NOT EXISTS products (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     name TEXT NOT NULL,
@@ -69,14 +106,74 @@ class DatabaseManager:
                     supplier TEXT,
                     cost_price REAL DEFAULT 0.0,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    reorder_threshold INTEGER NOT NULL DEFAULT {LOW_STOCK_THRESHOLD},
+                    version INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            
+            # Per-product reorder threshold (databases created before it existed)
+            try:
+                cursor.execute(f"ALTER TABLE products ADD COLUMN reorder_threshold INTEGER NOT NULL DEFAULT {LOW_STOCK_THRESHOLD}")
+            except sqlite3.OperationalError:
+                pass  # Column already exists
+            
+            # Catalog change number: registers pull products with a version above their last one
+            try:
+                cursor.execute("ALTER TABLE products ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+                cursor.execute("UPDATE products SET version = id")
+            except sqlite3.OperationalError:
+                pass  # Column already exists
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_version ON products(version)")
+            # Deleted products, so registers pulling the catalog drop them too
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS product_tombstones (
+                    product_id INTEGER PRIMARY KEY,
+                    version INTEGER NOT NULL
                 )
             ''')
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_tombstones_version ON product_tombstones(version)")
+            # Every write bumps the version unless it sets one itself (catalog pulled from the hub);
+            # deletions take a version too. Recreated so older databases count tombstones.
+            next_version = '''(SELECT MAX(version) + 1 FROM (
+                SELECT MAX(version) AS version FROM products
+                UNION ALL SELECT MAX(version) FROM product_tombstones))'''
+            for trigger in ("trg_products_version_insert", "trg_products_version_update"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            cursor.execute(f'''
+                CREATE TRIGGER trg_products_version_insert
+                AFTER INSERT ON products WHEN NEW.version = 0
+                BEGIN
+                    UPDATE products SET version = {next_version} WHERE id = NEW.id;
+                END
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER trg_products_version_update
+                AFTER UPDATE ON products WHEN NEW.version = OLD.version
+                BEGIN
+                    UPDATE products SET version = {next_version} WHERE id = NEW.id;
+                END
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_products_tombstone
+                AFTER DELETE ON products
+                BEGIN
+                    INSERT OR REPLACE INTO product_tombstones (product_id, version)
+                    VALUES (OLD.id, MAX(OLD.version, COALESCE((SELECT MAX(version) FROM products), 0),
+                                       COALESCE((SELECT MAX(version) FROM product_tombstones), 0)) + 1);
+                END
+            ''')
             
             # Create indexes for better performance
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_barcode ON products(barcode)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_active ON products(is_active)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_category ON products(category)")
+            # Partial index holding only the products at or below their reorder threshold
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_products_low_stock
+                ON products(stock_quantity, id)
+                WHERE is_active = 1 AND stock_quantity <= reorder_threshold
+            ''')
             
             # Add new columns if they don't exist (for existing databases)
             try:
@@ -103,14 +200,35 @@ class DatabaseManager:
                     notes TEXT,
                     cashier_id TEXT,
                     customer_id TEXT,
-                    status TEXT DEFAULT 'completed'
+                    status TEXT DEFAULT 'completed',
+                    register_id TEXT,
+                    sync_id TEXT,
+                    rounding REAL DEFAULT 0.0
                 )
             ''')
             
+            # Register and replication id (databases created before multi-register sync)
+            for column in ("register_id", "sync_id"):
+                try:
+                    cursor.execute(f"ALTER TABLE sales ADD COLUMN {column} TEXT")
+                except sqlite3.OperationalError:
+                    pass  # Column already exists
+            
+            # Cash rounding of the amount paid (databases created before cash rounding)
+            try:
+                cursor.execute("ALTER TABLE sales ADD COLUMN rounding REAL DEFAULT 0.0")
+            except sqlite3.OperationalError:
+                pass  # Column already exists
+            cursor.execute("UPDATE sales SET sync_id = lower(hex(randomblob(16))) WHERE sync_id IS NULL")
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_sales_sync_id ON sales(sync_id) WHERE sync_id IS NOT NULL")
+            
             # Create indexes for sales
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_timestamp ON sales(timestamp)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_cashier ON sales(cashier_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_status ON sales(status)")
+            # Order history filters: cashier within a date range, amount ranges
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_cashier_time ON sales(cashier_id, timestamp)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_total ON sales(total)")
             
             # Create sale_items table with indexes
             cursor.execute('''
@@ -153,8 +271,31 @@ class DatabaseManager:
             # Create indexes for payments
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_payments_sale_id ON payments(sale_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_payments_method ON payments(method)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_payments_method_sale ON payments(method, sale_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_payments_timestamp ON payments(timestamp)")
             
+            # Outbox of committed sales waiting to be shipped to head office
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sale_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sale_id INTEGER NOT NULL,
+                    idempotency_key TEXT NOT NULL UNIQUE,
+                    payload TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    shipped_at TIMESTAMP,
+                    rejections INTEGER NOT NULL DEFAULT 0,
+                    parked_at TIMESTAMP
+                )
+            ''')
+            # Only unshipped rows are indexed, so the shipper's scan stays small
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_sale_outbox_pending
+                ON sale_outbox(next_attempt_at, id) WHERE shipped_at IS NULL
+            ''')
+            
             conn.commit()
             
             # Insert sample products if table is empty
@@ -184,6 +325,23 @@ class DatabaseManager:
             VALUES (?, ?, ?, ?, ?, 50, 1)
         ''', sample_products)
     
+    def _row_to_product(self, row) -> Product:
+        """Build a Product from a row selected with PRODUCT_COLUMNS."""
+        return Product(
+            id=row[0],
+            name=row[1],
+            description=row[2] or "",
+            price=row[3],
+            barcode=row[4],
+            category=row[5],
+            stock_quantity=row[6],
+            is_active=bool(row[7]),
+            supplier=row[8],
+            cost_price=row[9] or 0.0,
+            reorder_threshold=row[10],
+            version=row[11]
+        )
+    
     def get_all_products(self) -> List[Product]:
         """Get all active products with caching."""
         # Check if cache is still valid
@@ -196,29 +354,14 @@ class DatabaseManager:
         
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, name, description, price, barcode, category, stock_quantity, is_active,
-                       supplier, cost_price
+            cursor.execute(f'''
+                SELECT {self.PRODUCT_COLUMNS}
                 FROM products
                 WHERE is_active = 1
                 ORDER BY name
             ''')
             
-            products = []
-            for row in cursor.fetchall():
-                product = Product(
-                    id=row[0],
-                    name=row[1],
-                    description=row[2] or "",
-                    price=row[3],
-                    barcode=row[4],
-                    category=row[5],
-                    stock_quantity=row[6],
-                    is_active=bool(row[7]),
-                    supplier=row[8],
-                    cost_price=row[9] or 0.0
-                )
-                products.append(product)
+            products = [self._row_to_product(row) for row in cursor.fetchall()]
             
             # Cache the results
             self._product_cache[cache_key] = products
@@ -228,83 +371,87 @@ class DatabaseManager:
     
     def get_all_products_for_inventory(self) -> List[Product]:
         """Get all products (including inactive ones) for inventory management."""
-        with sqlite3.connect(self.db_path) as conn:
+        with query_profiler.connect(self.db_path) as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, name, description, price, barcode, category, stock_quantity, is_active,
-                       supplier, cost_price
+            cursor.execute(f'''
+                SELECT {self.PRODUCT_COLUMNS}
                 FROM products
                 ORDER BY name
             ''')
             
-            products = []
-            for row in cursor.fetchall():
-                product = Product(
-                    id=row[0],
-                    name=row[1],
-                    description=row[2] or "",
-                    price=row[3],
-                    barcode=row[4],
-                    category=row[5],
-                    stock_quantity=row[6],
-                    is_active=bool(row[7]),
-                    supplier=row[8],
-                    cost_price=row[9] or 0.0
-                )
-                products.append(product)
+            products = [self._row_to_product(row) for row in cursor.fetchall()]
             
             return products
     
+    def get_low_stock_products(self, limit: int = None) -> List[Product]:
+        """Get active products at or below their reorder threshold, lowest stock first.
+        
+        Reads the idx_products_low_stock partial index (forced, since the
+        planner would otherwise pick the is_active index), so the cost depends
+        on the number of low-stock products, not on the catalog size.
+        """
+        with query_profiler.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {self.PRODUCT_COLUMNS}
+                FROM products INDEXED BY idx_products_low_stock
+                WHERE is_active = 1 AND stock_quantity <= reorder_threshold
+                ORDER BY stock_quantity, id
+                LIMIT ?
+            ''', (-1 if limit is None else limit,))
+            
+            return [self._row_to_product(row) for row in cursor.fetchall()]
+    
+    def get_low_stock_count(self) -> int:
+        """Count active products at or below their reorder threshold."""
+        with query_profiler.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT COUNT(*)
+                FROM products INDEXED BY idx_products_low_stock
+                WHERE is_active = 1 AND stock_quantity <= reorder_threshold
+            ''')
+            return cursor.fetchone()[0]
+    
     def get_product_by_id(self, product_id: int) -> Optional[Product]:
         """Get product by ID."""
-        with sqlite3.connect(self.db_path) as conn:
+        with query_profiler.connect(self.db_path) as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, name, description, price, barcode, category, stock_quantity, is_active
+            cursor.execute(f'''
+                SELECT {self.PRODUCT_COLUMNS}
                 FROM products
                 WHERE id = ?
             ''', (product_id,))
             
             row = cursor.fetchone()
             if row:
-                return Product(
-                    id=row[0],
-                    name=row[1],
-                    description=row[2] or "",
-                    price=row[3],
-                    barcode=row[4],
-                    category=row[5],
-                    stock_quantity=row[6],
-                    is_active=bool(row[7])
-                )
+                return self._row_to_product(row)
             return None
     
     def get_product_by_barcode(self, barcode: str) -> Optional[Product]:
         """Get product by barcode."""
-        with sqlite3.connect(self.db_path) as conn:
+        with query_profiler.connect(self.db_path) as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, name, description, price, barcode, category, stock_quantity, is_active
+            cursor.execute(f'''
+                SELECT {self.PRODUCT_COLUMNS}
                 FROM products
                 WHERE barcode = ? AND is_active = 1
             ''', (barcode,))
             
             row = cursor.fetchone()
             if row:
-                return Product(
-                    id=row[0],
-                    name=row[1],
-                    description=row[2] or "",
-                    price=row[3],
-                    barcode=row[4],
-                    category=row[5],
-                    stock_quantity=row[6],
-                    is_active=bool(row[7])
-                )
+                return self._row_to_product(row)
             return None
     
-    def save_product(self, product: Product) -> int:
-        """Save a product to database and clear cache."""
+    def save_product(self, product: Product, movement_type: str = "adjustment",
+                     previous_stock: Optional[int] = None) -> int:
+        """Save a product to database and clear cache.
+        
+        Stock changes are recorded in the stock ledger. When previous_stock
+        (the quantity the editor started from) is given, only the edit is
+        applied on top of the current stock, so sales made on other registers
+        in the meantime are not overwritten.
+        """
         with self._get_connection() as conn:
             cursor = conn.cursor()
             
@@ -312,30 +459,44 @@ class DatabaseManager:
                 # Insert new product
                 cursor.execute('''
                     INSERT INTO products (name, description, price, barcode, category, stock_quantity, 
-                                        is_active, supplier, cost_price)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                        is_active, supplier, cost_price, reorder_threshold)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (product.name, product.description, product.price, product.barcode,
                       product.category, product.stock_quantity, product.is_active,
-                      product.supplier, product.cost_price))
+                      product.supplier, product.cost_price, product.reorder_threshold))
                 
                 product.id = cursor.lastrowid
+                self.stock_ledger.record_initial(cursor, product.id, product.stock_quantity)
                 conn.commit()
                 
                 # Clear cache after modification
                 self._clear_cache()
                 return product.id
             else:
-                # Update existing product
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("SELECT stock_quantity FROM products WHERE id = ?", (product.id,))
+                row = cursor.fetchone()
+                current_stock = row[0] if row else product.stock_quantity
+                base_stock = current_stock if previous_stock is None else previous_stock
+                delta = product.stock_quantity - base_stock
+                
+                # Update existing product (stock goes through the ledger)
                 cursor.execute('''
                     UPDATE products
                     SET name = ?, description = ?, price = ?, barcode = ?, 
-                        category = ?, stock_quantity = ?, is_active = ?,
-                        supplier = ?, cost_price = ?,
+                        category = ?, is_active = ?,
+                        supplier = ?, cost_price = ?, reorder_threshold = ?,
                         updated_at = CURRENT_TIMESTAMP
                     WHERE id = ?
                 ''', (product.name, product.description, product.price, product.barcode,
-                      product.category, product.stock_quantity, product.is_active,
-                      product.supplier, product.cost_price, product.id))
+                      product.category, product.is_active,
+                      product.supplier, product.cost_price, product.reorder_threshold, product.id))
+                
+                if delta:
+                    product.set_stock_quantity(self.stock_ledger.apply_delta(
+                        cursor, product.id, delta, movement_type))
+                else:
+                    product.set_stock_quantity(current_stock)
                 
                 conn.commit()
                 
@@ -345,7 +506,7 @@ class DatabaseManager:
     
     def delete_product(self, product_id: int) -> bool:
         """Permanently delete a product from database."""
-        with sqlite3.connect(self.db_path) as conn:
+        with query_profiler.connect(self.db_path) as conn:
             cursor = conn.cursor()
             
             # First check if product exists in any sales
@@ -372,140 +533,296 @@ class DatabaseManager:
             conn.commit()
             return cursor.rowcount > 0
     
-    def update_product_stock(self, product_id: int, new_stock: int) -> bool:
-        """Update product stock quantity."""
-        with sqlite3.connect(self.db_path) as conn:
+    def update_product_stock(self, product_id: int, new_stock: int,
+                             movement_type: str = "adjustment", reason: str = None) -> bool:
+        """Set a product's stock quantity (a stock count) and record the difference."""
+        conn = query_profiler.connect(self.db_path, timeout=30.0)
+        try:
             cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE products 
-                SET stock_quantity = ?,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (new_stock, product_id))
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT stock_quantity FROM products WHERE id = ?", (product_id,))
+            row = cursor.fetchone()
+            if not row:
+                conn.rollback()
+                return False
+            
+            if new_stock != row[0]:
+                self.stock_ledger.apply_delta(cursor, product_id, new_stock - row[0],
+                                              movement_type, reason=reason)
             conn.commit()
-            return cursor.rowcount > 0
+            self._clear_cache()
+            return True
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
     
-    def save_sale(self, sale: Sale) -> int:
-        """Save a sale to database."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Insert sale
-            cursor.execute('''
-                INSERT INTO sales (timestamp, subtotal, tax_rate, tax_amount, discount, 
-                                 total, item_count, notes, cashier_id, customer_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (sale.timestamp, sale.subtotal, sale.tax_rate, sale.tax_amount,
-                  sale.discount, sale.total, sale.item_count, sale.notes,
-                  sale.cashier_id, sale.customer_id))
-            
-            sale_id = cursor.lastrowid
-            sale.id = sale_id
-            
-            # Insert sale items
-            for item in sale.items:
-                cursor.execute('''
-                    INSERT INTO sale_items (sale_id, product_id, product_name, quantity,
-                                          unit_price, discount, subtotal, total)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (sale_id, item.product.id, item.product.name, item.quantity,
-                      item.unit_price, item.discount, item.subtotal, item.total))
-            
-            # Insert payment if exists
-            if sale.payment:
-                cursor.execute('''
-                    INSERT INTO payments (sale_id, method, amount, status, timestamp,
-                                        transaction_id, reference_number, change_amount, notes)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (sale_id, sale.payment.method.value, sale.payment.amount,
-                      sale.payment.status.value, sale.payment.timestamp,
-                      sale.payment.transaction_id, sale.payment.reference_number,
-                      sale.payment.change_amount, sale.payment.notes))
-            
+    def adjust_product_stock(self, product_id: int, delta: int, movement_type: str = "adjustment",
+                             reference: str = None, reason: str = None) -> Optional[int]:
+        """Change a product's stock by delta (e.g. a delivery) and return the new balance."""
+        conn = query_profiler.connect(self.db_path, timeout=30.0)
+        try:
+            balance = self.stock_ledger.apply_delta(conn.cursor(), product_id, delta,
+                                                    movement_type, reference, reason)
             conn.commit()
-            return sale_id
+            self._clear_cache()
+            return balance
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
     
-    def get_sales_by_date(self, date: datetime) -> List[Sale]:
-        """Get sales for a specific date."""
-        with sqlite3.connect(self.db_path) as conn:
+    def apply_sale_stock(self, sale: Sale) -> Dict[int, int]:
+        """Decrement stock for every item of a sale in one transaction.
+        
+        Decrements are relative, so registers selling the same product at
+        the same time never lose each other's updates.
+        
+        Returns:
+            The new stock balance per product id
+        """
+        conn = query_profiler.connect(self.db_path, timeout=30.0)
+        try:
+            balances = self._apply_sale_stock(conn.cursor(), sale)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        self._clear_cache()
+        return balances
+    
+    def _apply_sale_stock(self, cursor, sale: Sale) -> Dict[int, int]:
+        """Record the stock movements of a sale on the caller's transaction."""
+        balances = {}
+        for item in sale.items:
+            if item.product.id is None:
+                continue
+            balance = self.stock_ledger.apply_delta(cursor, item.product.id, -item.quantity,
+                                                    "sale", reference=sale.id)
+            if balance is not None:
+                balances[item.product.id] = balance
+        return balances
+    
+    def save_sale(self, sale: Sale, apply_stock: bool = False) -> int:
+        """Save a sale to database.
+        
+        Args:
+            sale: Sale to save; its id is set
+            apply_stock: Also decrement stock for the sold items, in the same
+                transaction, and update the items' product stock_quantity
+        """
+        sale.register_id = sale.register_id or self.register_id
+        sale.sync_id = sale.sync_id or uuid.uuid4().hex
+        
+        conn = query_profiler.connect(self.db_path, timeout=30.0)
+        try:
             cursor = conn.cursor()
-            
-            start_date = date.replace(hour=0, minute=0, second=0, microsecond=0)
-            end_date = date.replace(hour=23, minute=59, second=59, microsecond=999999)
-            
+            # One write transaction: the sale, its outbox row and its stock movements commit together
+            cursor.execute("BEGIN IMMEDIATE")
+            sale_id = self._insert_sale(cursor, sale)
+            balances = self._apply_sale_stock(cursor, sale) if apply_stock else {}
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        if apply_stock:
+            for item in sale.items:
+                if item.product.id in balances:
+                    item.product.set_stock_quantity(balances[item.product.id])
+            self._clear_cache()
+        return sale_id
+    
+    def _insert_sale(self, cursor, sale: Sale) -> int:
+        """Insert a sale, its items, payment and outbox row on the caller's transaction."""
+        # Insert sale
+        cursor.execute('''
+            INSERT INTO sales (timestamp, subtotal, tax_rate, tax_amount, discount, 
+                             total, item_count, notes, cashier_id, customer_id,
+                             register_id, sync_id, rounding)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (sale.timestamp, sale.subtotal, sale.tax_rate, sale.tax_amount,
+              sale.discount, sale.total, sale.item_count, sale.notes,
+              sale.cashier_id, sale.customer_id, sale.register_id, sale.sync_id,
+              sale.rounding))
+        
+        sale_id = cursor.lastrowid
+        sale.id = sale_id
+        
+        # Insert sale items
+        for item in sale.items:
             cursor.execute('''
-                SELECT id, timestamp, subtotal, tax_rate, tax_amount, discount,
-                       total, item_count, notes, cashier_id, customer_id
-                FROM sales
-                WHERE timestamp BETWEEN ? AND ?
-                ORDER BY timestamp DESC
-            ''', (start_date, end_date))
-            
-            sales = []
+                INSERT INTO sale_items (sale_id, product_id, product_name, quantity,
+                                      unit_price, discount, subtotal, total)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (sale_id, item.product.id, item.product.name, item.quantity,
+                  item.unit_price, item.discount, item.subtotal, item.total))
+        
+        # Insert payment if exists
+        if sale.payment:
+            cursor.execute('''
+                INSERT INTO payments (sale_id, method, amount, status, timestamp,
+                                    transaction_id, reference_number, change_amount, notes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (sale_id, sale.payment.method.value, sale.payment.amount,
+                  sale.payment.status.value, sale.payment.timestamp,
+                  sale.payment.transaction_id, sale.payment.reference_number,
+                  sale.payment.change_amount, sale.payment.notes))
+        
+        # Outbox row in the same transaction: shipped later, never lost or duplicated
+        if self.use_outbox:
+            cursor.execute('''
+                INSERT INTO sale_outbox (sale_id, idempotency_key, payload) VALUES (?, ?, ?)
+            ''', (sale_id, sale.sync_id, json.dumps(sale.to_dict(), ensure_ascii=False)))
+        return sale_id
+    
+    def get_sales_by_date(self, date: datetime) -> List[SaleRow]:
+        """Get sales for a specific date."""
+        start_date = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        end_date = date.replace(hour=23, minute=59, second=59, microsecond=999999)
+        return self.get_sales_by_date_range(start_date, end_date)
+    
+    def get_all_sales(self) -> List[SaleRow]:
+        """Get the 100 most recent sales."""
+        with query_profiler.connect(self.db_path) as conn:
+            return self._load_sale_rows(conn.cursor(), limit=100)
+    
+    def _load_sale_rows(self, cursor, where: str = "", params: tuple = (),
+                        limit: Optional[int] = None) -> List[SaleRow]:
+        """Load sales as read models, newest first, with their lines and payments.
+        
+        Lines and payments are read with one query per chunk of sales instead
+        of two queries per sale.
+        """
+        query = f"SELECT {SaleRow.COLUMNS} FROM sales s"
+        if where:
+            query += f" WHERE {where}"
+        query += " ORDER BY s.timestamp DESC, s.id DESC"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        cursor.execute(query, params)
+        sales = [SaleRow(row) for row in cursor.fetchall()]
+        
+        by_id = {sale.id: sale for sale in sales}
+        ids = list(by_id)
+        for offset in range(0, len(ids), self.ROW_CHUNK_SIZE):
+            chunk = ids[offset:offset + self.ROW_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f'''
+                SELECT {ItemRow.COLUMNS} FROM sale_items si
+                WHERE si.sale_id IN ({placeholders}) ORDER BY si.id
+            ''', chunk)
             for row in cursor.fetchall():
-                sale = Sale(
-                    id=row[0],
-                    timestamp=datetime.fromisoformat(row[1]),
-                    tax_rate=row[3],
-                    discount=row[5],
-                    notes=row[8] or "",
-                    cashier_id=row[9],
-                    customer_id=row[10]
-                )
-                
-                # Load sale items
-                sale.items = self._get_sale_items(cursor, sale.id)
-                
-                # Load payment
-                sale.payment = self._get_sale_payment(cursor, sale.id)
-                
-                sales.append(sale)
+                by_id[row[0]].items.append(ItemRow(row))
             
-            return sales
+            cursor.execute(f'''
+                SELECT {PaymentRow.COLUMNS} FROM payments p
+                WHERE p.sale_id IN ({placeholders}) ORDER BY p.id
+            ''', chunk)
+            for row in cursor.fetchall():
+                sale = by_id[row[0]]
+                if sale.payment is None:
+                    sale.payment = PaymentRow(row)
+        
+        return sales
     
-    def get_all_sales(self) -> List[Sale]:
-        """Get all sales."""
-        with sqlite3.connect(self.db_path) as conn:
+    def get_sales_page(self, limit: int = 50, after: Optional[Tuple[str, int]] = None,
+                       start_date: datetime = None, end_date: datetime = None,
+                       cashier_id=None, payment_method: str = None,
+                       min_total: float = None, max_total: float = None) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, int]]]:
+        """Get one page of sale headers, newest first, using keyset pagination.
+        
+        Only header columns are read; items and payment details are loaded
+        with get_sale_by_id when an order is opened.
+        
+        Args:
+            limit: Maximum number of sales to return
+            after: Cursor returned by the previous page (timestamp, id)
+            start_date: Only sales at or after this time
+            end_date: Only sales at or before this time
+            cashier_id: Only sales of this cashier
+            payment_method: Only sales paid with this method (PaymentMethod value)
+            min_total: Minimum sale total
+            max_total: Maximum sale total
+        
+        Returns:
+            (sale headers, cursor for the next page or None when exhausted)
+        """
+        query = '''
+            SELECT s.id, s.timestamp, s.total, s.item_count, s.cashier_id,
+                   (SELECT p.method FROM payments p WHERE p.sale_id = s.id LIMIT 1)
+            FROM sales s
+            WHERE 1=1
+        '''
+        params = []
+        
+        if start_date:
+            query += " AND s.timestamp >= ?"
+            params.append(start_date)
+        
+        if end_date:
+            query += " AND s.timestamp <= ?"
+            params.append(end_date)
+        
+        if cashier_id is not None:
+            query += " AND s.cashier_id = ?"
+            params.append(str(cashier_id))
+        
+        if payment_method:
+            query += " AND s.id IN (SELECT sale_id FROM payments WHERE method = ?)"
+            params.append(payment_method)
+        
+        if min_total is not None:
+            query += " AND s.total >= ?"
+            params.append(min_total)
+        
+        if max_total is not None:
+            query += " AND s.total <= ?"
+            params.append(max_total)
+        
+        if after:
+            # Continue strictly after the last row of the previous page
+            query += " AND (s.timestamp < ? OR (s.timestamp = ? AND s.id < ?))"
+            params.extend([after[0], after[0], after[1]])
+        
+        query += " ORDER BY s.timestamp DESC, s.id DESC LIMIT ?"
+        params.append(limit)
+        
+        with query_profiler.connect(self.db_path) as conn:
             cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, timestamp, subtotal, tax_rate, tax_amount, discount,
-                       total, item_count, notes, cashier_id, customer_id
-                FROM sales
-                ORDER BY timestamp DESC
-                LIMIT 100
-            ''')
+            cursor.execute(query, params)
             
             sales = []
             for row in cursor.fetchall():
-                sale = Sale(
-                    id=row[0],
-                    timestamp=datetime.fromisoformat(row[1]),
-                    tax_rate=row[3],
-                    discount=row[5],
-                    notes=row[8] or "",
-                    cashier_id=row[9],
-                    customer_id=row[10]
-                )
-                
-                # Load sale items
-                sale.items = self._get_sale_items(cursor, sale.id)
-                
-                # Load payment
-                sale.payment = self._get_sale_payment(cursor, sale.id)
-                
-                sales.append(sale)
-            
-            return sales
+                sales.append({
+                    "id": row[0],
+                    "timestamp": datetime.fromisoformat(row[1]) if row[1] else None,
+                    "raw_timestamp": row[1],
+                    "total": row[2],
+                    "item_count": row[3],
+                    "cashier_id": row[4],
+                    "payment_method": row[5]
+                })
+        
+        next_cursor = (sales[-1]["raw_timestamp"], sales[-1]["id"]) if len(sales) == limit else None
+        return sales, next_cursor
     
     def get_sale_by_id(self, sale_id: int) -> Optional[Sale]:
         """Get a specific sale by ID."""
-        with sqlite3.connect(self.db_path) as conn:
+        with query_profiler.connect(self.db_path) as conn:
             cursor = conn.cursor()
             
             cursor.execute('''
                 SELECT id, timestamp, subtotal, tax_rate, tax_amount, discount,
-                       total, item_count, notes, cashier_id, customer_id
+                       total, item_count, notes, cashier_id, customer_id,
+                       register_id, sync_id
                 FROM sales
                 WHERE id = ?
             ''', (sale_id,))
@@ -516,22 +833,209 @@ class DatabaseManager:
                 
             sale = Sale(
                 id=row[0],
+                items=self._get_sale_items(cursor, row[0]),
                 timestamp=datetime.fromisoformat(row[1]),
                 tax_rate=row[3],
                 discount=row[5],
                 notes=row[8] or "",
                 cashier_id=row[9],
-                customer_id=row[10]
+                customer_id=row[10],
+                register_id=row[11],
+                sync_id=row[12]
             )
             
-            # Load sale items
-            sale.items = self._get_sale_items(cursor, sale.id)
-            
             # Load payment
             sale.payment = self._get_sale_payment(cursor, sale.id)
             
             return sale
     
+    def get_sales_after(self, sale_id: int, limit: int = 100) -> List[Sale]:
+        """Get full sales with an id above sale_id, oldest first (used to push sales)."""
+        with query_profiler.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id FROM sales WHERE id > ? ORDER BY id LIMIT ?
+            ''', (sale_id, limit))
+            sale_ids = [row[0] for row in cursor.fetchall()]
+        
+        return [self.get_sale_by_id(sale_id) for sale_id in sale_ids]
+    
+    def import_sale(self, sale: Sale) -> bool:
+        """Store a sale rung up on another register and decrement stock.
+        
+        Sales are matched on sync_id, so pushing the same sale twice is harmless.
+        
+        Returns:
+            True if the sale was new
+        """
+        sale.register_id = sale.register_id or self.register_id
+        conn = query_profiler.connect(self.db_path, timeout=30.0)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT 1 FROM sales WHERE sync_id = ?", (sale.sync_id,))
+            if cursor.fetchone():
+                conn.rollback()
+                return False
+            
+            sale.id = None
+            self._insert_sale(cursor, sale)
+            self._apply_sale_stock(cursor, sale)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        self._clear_cache()
+        return True
+    
+    def get_products_changed_since(self, version: int, limit: int = 500) -> List[Product]:
+        """Get products (active or not) changed after a catalog version, in version order."""
+        with query_profiler.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {self.PRODUCT_COLUMNS}
+                FROM products
+                WHERE version > ?
+                ORDER BY version
+                LIMIT ?
+            ''', (version, limit))
+            return [self._row_to_product(row) for row in cursor.fetchall()]
+    
+    def get_products_deleted_since(self, version: int, limit: int = 500) -> List[Tuple[int, int]]:
+        """Get (product id, version) of products deleted after a catalog version, in version order."""
+        with query_profiler.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT product_id, version
+                FROM product_tombstones
+                WHERE version > ?
+                ORDER BY version
+                LIMIT ?
+            ''', (version, limit))
+            return cursor.fetchall()
+    
+    def apply_catalog_changes(self, products: List[Product], unpushed_after_sale_id: int = None,
+                              deleted: List[Tuple[int, int]] = ()) -> int:
+        """Apply products pulled from the hub catalog to this register.
+        
+        The hub's stock already includes every sale this register has pushed;
+        sales above unpushed_after_sale_id are still local only, so their
+        quantities are taken off the hub's figures. Stock differences go
+        through the stock ledger as "sync" movements.
+        
+        The hub catalog wins conflicts with products created on this register:
+        a hub product replaces a local row with the same id, and a local
+        product holding one of the hub's barcodes loses that barcode. A
+        product that still cannot be stored is skipped and reported, without
+        failing the rest of the page.
+        
+        Products deleted on the hub (``deleted``, as (id, version) pairs) are
+        deleted here too, or only deactivated if this register has sold them.
+        
+        Returns:
+            The number of products applied (updated or deleted)
+        """
+        if not products and not deleted:
+            return 0
+        
+        conn = query_profiler.connect(self.db_path, timeout=30.0)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            
+            pending = {}
+            if unpushed_after_sale_id is not None:
+                cursor.execute('''
+                    SELECT si.product_id, SUM(si.quantity)
+                    FROM sale_items si
+                    WHERE si.sale_id > ?
+                    GROUP BY si.product_id
+                ''', (unpushed_after_sale_id,))
+                pending = dict(cursor.fetchall())
+            
+            applied = 0
+            for product in products:
+                cursor.execute("SAVEPOINT catalog_product")
+                try:
+                    self._apply_catalog_product(cursor, product,
+                                                product.stock_quantity - pending.get(product.id, 0))
+                    applied += 1
+                except sqlite3.IntegrityError as e:
+                    cursor.execute("ROLLBACK TO catalog_product")
+                    print(f"Skipped hub product #{product.id} ({product.name}): {e}")
+                cursor.execute("RELEASE catalog_product")
+            
+            versions = {product.id: product.version for product in products}
+            for product_id, version in deleted:
+                if versions.get(product_id, 0) > version:
+                    continue  # Recreated later in the same page
+                self._apply_catalog_deletion(cursor, product_id, version)
+                applied += 1
+            
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        self._clear_cache()
+        return applied
+    
+    def _apply_catalog_product(self, cursor, product: Product, stock: int):
+        """Insert or update one hub product on the caller's transaction."""
+        if product.barcode:
+            cursor.execute("SELECT id, name FROM products WHERE barcode = ? AND id != ?",
+                           (product.barcode, product.id))
+            conflict = cursor.fetchone()
+            if conflict:
+                print(f"Barcode {product.barcode} moved from local product #{conflict[0]} "
+                      f"({conflict[1]}) to hub product #{product.id}")
+                cursor.execute("UPDATE products SET barcode = NULL WHERE id = ?", (conflict[0],))
+        
+        cursor.execute("SELECT stock_quantity FROM products WHERE id = ?", (product.id,))
+        row = cursor.fetchone()
+        
+        if row is None:
+            cursor.execute('''
+                INSERT INTO products (id, name, description, price, barcode, category, stock_quantity,
+                                      is_active, supplier, cost_price, reorder_threshold, version)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (product.id, product.name, product.description, product.price, product.barcode,
+                  product.category, stock, product.is_active, product.supplier,
+                  product.cost_price, product.reorder_threshold, product.version))
+            self.stock_ledger.record_initial(cursor, product.id, stock)
+            return
+        
+        if stock != row[0]:
+            self.stock_ledger.apply_delta(cursor, product.id, stock - row[0], "sync")
+        
+        # Setting the version explicitly keeps the hub's number
+        cursor.execute('''
+            UPDATE products
+            SET name = ?, description = ?, price = ?, barcode = ?, category = ?, is_active = ?,
+                supplier = ?, cost_price = ?, reorder_threshold = ?, version = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (product.name, product.description, product.price, product.barcode,
+              product.category, product.is_active, product.supplier, product.cost_price,
+              product.reorder_threshold, product.version, product.id))
+    
+    def _apply_catalog_deletion(self, cursor, product_id: int, version: int):
+        """Remove a product deleted on the hub, on the caller's transaction."""
+        cursor.execute("SELECT 1 FROM sale_items WHERE product_id = ? LIMIT 1", (product_id,))
+        if cursor.fetchone():
+            # Sold here: keep the row for the sales history, like delete_product
+            cursor.execute('''
+                UPDATE products SET is_active = 0, version = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (version, product_id))
+        else:
+            cursor.execute("DELETE FROM products WHERE id = ?", (product_id,))
+    
     def _get_sale_items(self, cursor, sale_id: int) -> List[SaleItem]:
         """Get sale items for a sale."""
         cursor.execute('''
@@ -607,7 +1111,8 @@ class DatabaseManager:
                     COUNT(*) as total_sales,
                     COALESCE(SUM(total), 0) as total_revenue,
                     COALESCE(SUM(item_count), 0) as total_items,
-                    COALESCE(AVG(total), 0) as average_sale
+                    COALESCE(AVG(total), 0) as average_sale,
+                    COALESCE(SUM(rounding), 0) as total_rounding
                 FROM sales
                 WHERE timestamp BETWEEN ? AND ?
                     AND status = 'completed'
@@ -619,6 +1124,7 @@ class DatabaseManager:
                 'total_revenue': row[1] or 0.0,
                 'total_items': row[2] or 0,
                 'average_sale': row[3] or 0.0,
+                'total_rounding': row[4] or 0.0,
                 'date': date.strftime('%Y-%m-%d')
             }
     
@@ -627,80 +1133,7 @@ class DatabaseManager:
         """Original method wrapper for the cached version."""
         return self.get_daily_sales_summary(date.isoformat())
     
-    def get_sales_by_date_range(self, start_date: datetime, end_date: datetime) -> List[Sale]:
-        """Get all sales within a date range."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, total, tax_amount, timestamp, cashier_id, register_id, item_count
-                FROM sales
-                WHERE timestamp BETWEEN ? AND ?
-                ORDER BY timestamp DESC
-            ''', (start_date, end_date))
-            
-            sales = []
-            for row in cursor.fetchall():
-                # Get sale items
-                cursor.execute('''
-                    SELECT si.quantity, si.unit_price, si.total_price, si.discount,
-                           p.id, p.name, p.description, p.price, p.barcode, p.category, p.stock_quantity, p.is_active
-                    FROM sale_items si
-                    JOIN products p ON si.product_id = p.id
-                    WHERE si.sale_id = ?
-                ''', (row[0],))
-                
-                items = []
-                for item_row in cursor.fetchall():
-                    product = Product(
-                        id=item_row[4],
-                        name=item_row[5],
-                        description=item_row[6],
-                        price=item_row[7],
-                        barcode=item_row[8],
-                        category=item_row[9],
-                        stock_quantity=item_row[10],
-                        is_active=bool(item_row[11])
-                    )
-                    
-                    sale_item = SaleItem(
-                        product=product,
-                        quantity=item_row[0],
-                        unit_price=item_row[1],
-                        total=item_row[2],
-                        discount=item_row[3]
-                    )
-                    items.append(sale_item)
-                
-                # Get payment info
-                cursor.execute('''
-                    SELECT id, amount, payment_method, change_amount, status, transaction_id
-                    FROM payments
-                    WHERE sale_id = ?
-                ''', (row[0],))
-                
-                payment_row = cursor.fetchone()
-                payment = None
-                if payment_row:
-                    payment = Payment(
-                        id=payment_row[0],
-                        amount=payment_row[1],
-                        method=PaymentMethod(payment_row[2]),
-                        change_amount=payment_row[3],
-                        status=PaymentStatus(payment_row[4]),
-                        transaction_id=payment_row[5]
-                    )
-                
-                sale = Sale(
-                    id=row[0],
-                    items=items,
-                    total=row[1],
-                    tax_amount=row[2],
-                    timestamp=datetime.fromisoformat(row[3]) if row[3] else None,
-                    cashier_id=row[4],
-                    register_id=row[5],
-                    payment=payment
-                )
-                sales.append(sale)
-            
-            return sales
+    def get_sales_by_date_range(self, start_date: datetime, end_date: datetime) -> List[SaleRow]:
+        """Get all sales within a date range (read models, for reports)."""
+        with query_profiler.connect(self.db_path) as conn:
+            return self._load_sale_rows(conn.cursor(), "s.timestamp BETWEEN ? AND ?", (start_date, end_date))
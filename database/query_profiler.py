@@ -0,0 +1,284 @@
+"""
+Query Profiler
+==============
+
+Opt-in per-statement timing for the SQLite connections opened by
+``DatabaseManager``, ``UserManager`` and the modules they use.
+
+Those modules open connections with ``query_profiler.connect()``. While the
+profiler is disabled that is a plain ``sqlite3.connect()``, so the cost is
+one attribute check per connection. Enabled, connections use cursors that
+record, per statement, the number of calls, total and p95 latency (execute
+plus fetching the rows) and rows returned. Statements slower than the
+threshold are kept in a slow-query log together with their
+``EXPLAIN QUERY PLAN`` output.
+
+Enable it with ``QUERY_PROFILING = True`` in ``config/settings.py``,
+``python main.py --profile-queries`` or from the admin panel. Connections
+that are already open (the ``DatabaseManager`` pool) keep their type until
+they are reopened; ``DatabaseManager.close_all_connections()`` does that.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import QUERY_PROFILING, SLOW_QUERY_MS
+
+SAMPLES_PER_STATEMENT = 1000  # Latest latencies kept per statement for the p95
+SLOW_LOG_SIZE = 200
+EXPLAINABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|REPLACE|WITH)\b", re.IGNORECASE)
+
+class StatementStats:
+    """Aggregated timings of one SQL statement."""
+    
+    __slots__ = ("sql", "calls", "total_time", "max_time", "rows", "samples")
+    
+    def __init__(self, sql: str):
+        """Initialize empty statistics for a statement."""
+        self.sql = sql
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=SAMPLES_PER_STATEMENT)
+    
+    def p95(self) -> float:
+        """95th percentile latency in seconds over the kept samples."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the statistics to a dictionary (times in milliseconds)."""
+        return {
+            "sql": self.sql,
+            "calls": self.calls,
+            "total_ms": round(self.total_time * 1000, 3),
+            "avg_ms": round(self.total_time * 1000 / self.calls, 3) if self.calls else 0.0,
+            "p95_ms": round(self.p95() * 1000, 3),
+            "max_ms": round(self.max_time * 1000, 3),
+            "rows": self.rows
+        }
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor that reports each statement's latency and rows to the profiler.
+    
+    A statement is recorded when it is finished: its rows are exhausted, the
+    cursor runs another statement, or the cursor is closed or released.
+    """
+    
+    _sql = None
+    _parameters = None
+    _elapsed = 0.0
+    _rows = 0
+    
+    def _start(self, sql: str, parameters, explain: bool):
+        """Finish the previous statement and start timing a new one."""
+        self._finish()
+        self._sql = sql
+        self._parameters = parameters if explain else None
+        self._elapsed = 0.0
+        self._rows = 0
+    
+    def _finish(self):
+        """Report the current statement, if any."""
+        if self._sql is not None:
+            sql, self._sql = self._sql, None
+            query_profiler.record(self.connection, sql, self._parameters, self._elapsed, self._rows)
+    
+    def execute(self, sql, parameters=()):
+        """Execute a statement, timing it."""
+        self._start(sql, parameters, True)
+        started = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        finally:
+            self._elapsed += time.perf_counter() - started
+        if self.description is None:
+            self._finish()  # No rows to fetch
+        return self
+    
+    def executemany(self, sql, seq_of_parameters):
+        """Execute a statement for each parameter set, timing the whole batch."""
+        self._start(sql, None, False)
+        started = time.perf_counter()
+        try:
+            super().executemany(sql, seq_of_parameters)
+        finally:
+            self._elapsed += time.perf_counter() - started
+        self._finish()
+        return self
+    
+    def fetchone(self):
+        """Fetch the next row, timing it."""
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._elapsed += time.perf_counter() - started
+        if row is None:
+            self._finish()
+        else:
+            self._rows += 1
+        return row
+    
+    def fetchmany(self, size=None):
+        """Fetch the next rows, timing them."""
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._elapsed += time.perf_counter() - started
+        self._rows += len(rows)
+        if not rows:
+            self._finish()
+        return rows
+    
+    def fetchall(self):
+        """Fetch the remaining rows, timing them."""
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._elapsed += time.perf_counter() - started
+        self._rows += len(rows)
+        self._finish()
+        return rows
+    
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+    
+    def close(self):
+        """Report the current statement and close the cursor."""
+        self._finish()
+        super().close()
+    
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass  # Interpreter shutdown or a closed connection
+
+class ProfiledConnection(sqlite3.Connection):
+    """Connection whose cursors (including implicit ones) are profiled."""
+    
+    def cursor(self, factory=ProfiledCursor):
+        """Open a profiled cursor."""
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        """Execute a statement on a new profiled cursor."""
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        """Execute a statement for each parameter set on a new profiled cursor."""
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+class QueryProfiler:
+    """Collects per-statement statistics and the slow-query log."""
+    
+    def __init__(self, enabled: bool = False, slow_query_ms: float = 100):
+        """Initialize the profiler."""
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self._stats: Dict[str, StatementStats] = {}
+        self._slow_queries = deque(maxlen=SLOW_LOG_SIZE)
+        self._lock = threading.Lock()
+        self.started_at = datetime.now()
+    
+    def connect(self, database: str, **kwargs) -> sqlite3.Connection:
+        """Open a connection, profiled while the profiler is enabled."""
+        if self.enabled:
+            kwargs["factory"] = ProfiledConnection
+        return sqlite3.connect(database, **kwargs)
+    
+    def enable(self, slow_query_ms: float = None):
+        """Profile connections opened from now on."""
+        if slow_query_ms is not None:
+            self.slow_query_ms = slow_query_ms
+        self.enabled = True
+    
+    def disable(self):
+        """Stop profiling new connections (collected statistics are kept)."""
+        self.enabled = False
+    
+    def reset(self):
+        """Clear the statistics and the slow-query log."""
+        with self._lock:
+            self._stats.clear()
+            self._slow_queries.clear()
+            self.started_at = datetime.now()
+    
+    @staticmethod
+    def normalize(sql: str) -> str:
+        """Collapse whitespace so one statement is one entry however it is indented."""
+        return " ".join(sql.split())
+    
+    def record(self, connection, sql: str, parameters, elapsed: float, rows: int):
+        """Add one finished statement to the statistics."""
+        key = self.normalize(sql)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StatementStats(key)
+            stats.calls += 1
+            stats.total_time += elapsed
+            stats.rows += rows
+            stats.samples.append(elapsed)
+            if elapsed > stats.max_time:
+                stats.max_time = elapsed
+        
+        if elapsed * 1000 >= self.slow_query_ms:
+            self._slow_queries.append({
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "duration_ms": round(elapsed * 1000, 3),
+                "rows": rows,
+                "sql": key,
+                "parameters": repr(parameters)[:200] if parameters is not None else None,
+                "plan": self._explain(connection, sql, parameters)
+            })
+    
+    @staticmethod
+    def _explain(connection, sql: str, parameters) -> Optional[List[str]]:
+        """EXPLAIN QUERY PLAN of a statement (not profiled itself)."""
+        if parameters is None or not EXPLAINABLE.match(sql):
+            return None
+        try:
+            cursor = sqlite3.Cursor(connection)
+            sqlite3.Cursor.execute(cursor, f"EXPLAIN QUERY PLAN {sql}", parameters)
+            return [row[3] for row in sqlite3.Cursor.fetchall(cursor)]
+        except sqlite3.Error as e:
+            return [f"EXPLAIN failed: {e}"]
+    
+    def get_statistics(self, order_by: str = "total_ms") -> List[Dict[str, Any]]:
+        """Per-statement statistics, most expensive first."""
+        with self._lock:
+            statistics = [stats.to_dict() for stats in self._stats.values()]
+        return sorted(statistics, key=lambda stats: stats[order_by], reverse=True)
+    
+    def get_slow_queries(self) -> List[Dict[str, Any]]:
+        """Slow-query log entries, newest first."""
+        return list(reversed(self._slow_queries))
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Everything collected so far, as exported to JSON."""
+        return {
+            "enabled": self.enabled,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "exported_at": datetime.now().isoformat(timespec="seconds"),
+            "slow_query_ms": self.slow_query_ms,
+            "statements": self.get_statistics(),
+            "slow_queries": self.get_slow_queries()
+        }
+    
+    def export_json(self, path: str):
+        """Write the statistics and slow-query log to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+
+# Shared profiler used by the database layer
+query_profiler = QueryProfiler(QUERY_PROFILING, SLOW_QUERY_MS)
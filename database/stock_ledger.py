@@ -0,0 +1,395 @@
+"""
+Stock Ledger
+============
+
+Append-only ledger of stock movements.
+
+Every change to ``products.stock_quantity`` is applied as a relative update
+and recorded in ``stock_movements`` in the same transaction, with the
+quantity delta and the balance after the movement. Concurrent registers
+therefore never overwrite each other's decrements, and the history of every
+product can be audited.
+
+Periodic snapshots in ``stock_snapshots`` store stock quantities at a point
+in time, so catalog-wide stock levels and valuations at any date are read as
+the nearest snapshot plus the movements after it, never by replaying the
+whole history. The opening snapshot holds every product; later ones only
+hold the products that moved since the previous snapshot, and a product's
+level at a snapshot is its entry in the latest snapshot holding it. Snapshots
+are taken by a background thread (see ``start``), never on a checkout.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any
+
+from database.query_profiler import query_profiler
+
+class StockLedger:
+    """Records stock movements and answers point-in-time stock queries."""
+    
+    MOVEMENT_TYPES = ("initial", "sale", "receipt", "adjustment", "import", "return", "sync")
+    SNAPSHOT_INTERVAL = timedelta(days=1)
+    SNAPSHOT_CHECK_SECONDS = 3600  # How often the background thread checks whether a snapshot is due
+    
+    def __init__(self, db_path: str = "pos_database.db"):
+        """Initialize the ledger tables (the products table must exist)."""
+        self.db_path = db_path
+        self._last_snapshot_time: Optional[datetime] = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._init_tables()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the ledger database."""
+        return query_profiler.connect(self.db_path, timeout=30.0)
+    
+    @staticmethod
+    def _format_time(value: datetime) -> str:
+        """Format a timestamp the way it is stored."""
+        return value.isoformat(sep=" ")
+    
+    def _init_tables(self):
+        """Create ledger tables and take the opening snapshot."""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS stock_movements (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    product_id INTEGER NOT NULL,
+                    timestamp TIMESTAMP NOT NULL,
+                    movement_type TEXT NOT NULL,
+                    quantity_delta INTEGER NOT NULL,
+                    balance_after INTEGER NOT NULL,
+                    reference TEXT,
+                    reason TEXT
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS stock_snapshots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    snapshot_time TIMESTAMP NOT NULL,
+                    last_movement_id INTEGER NOT NULL
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS stock_snapshot_items (
+                    snapshot_id INTEGER NOT NULL,
+                    product_id INTEGER NOT NULL,
+                    quantity INTEGER NOT NULL,
+                    PRIMARY KEY (snapshot_id, product_id),
+                    FOREIGN KEY (snapshot_id) REFERENCES stock_snapshots (id)
+                )
+            ''')
+            
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_stock_movements_product_time ON stock_movements(product_id, timestamp, id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_stock_movements_time ON stock_movements(timestamp, product_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_stock_snapshots_time ON stock_snapshots(snapshot_time)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_stock_snapshot_items_product ON stock_snapshot_items(product_id, snapshot_id)")
+            conn.commit()
+            
+            cursor.execute("SELECT MAX(snapshot_time) FROM stock_snapshots")
+            last_snapshot = cursor.fetchone()[0]
+        finally:
+            conn.close()
+        
+        if last_snapshot:
+            self._last_snapshot_time = datetime.fromisoformat(last_snapshot)
+        else:
+            # Capture the stock that existed before the ledger
+            self.create_snapshot()
+    
+    def apply_delta(self, cursor, product_id: int, delta: int, movement_type: str,
+                    reference: str = None, reason: str = None) -> Optional[int]:
+        """Change a product's stock by delta and record the movement.
+        
+        Runs on the caller's cursor so the movement commits (or rolls back)
+        with the caller's transaction.
+        
+        Returns:
+            The balance after the movement, or None if the product does not exist
+        """
+        if movement_type not in self.MOVEMENT_TYPES:
+            raise ValueError(f"Unknown stock movement type: {movement_type}")
+        
+        # Relative update: concurrent decrements from other registers add up
+        cursor.execute('''
+            UPDATE products
+            SET stock_quantity = stock_quantity + ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (delta, product_id))
+        if cursor.rowcount == 0:
+            return None
+        
+        cursor.execute("SELECT stock_quantity FROM products WHERE id = ?", (product_id,))
+        balance = cursor.fetchone()[0]
+        
+        cursor.execute('''
+            INSERT INTO stock_movements
+                (product_id, timestamp, movement_type, quantity_delta, balance_after, reference, reason)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (product_id, self._format_time(datetime.now()), movement_type, delta, balance,
+              str(reference) if reference is not None else None, reason))
+        return balance
+    
+    def record_initial(self, cursor, product_id: int, quantity: int):
+        """Record the opening stock of a newly created product."""
+        cursor.execute('''
+            INSERT INTO stock_movements
+                (product_id, timestamp, movement_type, quantity_delta, balance_after)
+            VALUES (?, ?, 'initial', ?, ?)
+        ''', (product_id, self._format_time(datetime.now()), quantity, quantity))
+    
+    def create_snapshot(self) -> Optional[int]:
+        """Store the current quantity of the products that moved since the last snapshot.
+        
+        The first snapshot stores every product.
+        
+        Returns:
+            The snapshot id, or None if nothing moved since the last snapshot
+        """
+        now = datetime.now()
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            # Freeze writers so the quantities match last_movement_id exactly
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM stock_movements")
+            last_movement_id = cursor.fetchone()[0]
+            cursor.execute("SELECT last_movement_id FROM stock_snapshots ORDER BY id DESC LIMIT 1")
+            previous = cursor.fetchone()
+            
+            if previous and previous[0] == last_movement_id:
+                conn.rollback()
+                snapshot_id = None
+            else:
+                cursor.execute('''
+                    INSERT INTO stock_snapshots (snapshot_time, last_movement_id) VALUES (?, ?)
+                ''', (self._format_time(now), last_movement_id))
+                snapshot_id = cursor.lastrowid
+                
+                if previous:
+                    cursor.execute('''
+                        INSERT INTO stock_snapshot_items (snapshot_id, product_id, quantity)
+                        SELECT ?, id, stock_quantity FROM products
+                        WHERE id IN (SELECT product_id FROM stock_movements WHERE id > ?)
+                    ''', (snapshot_id, previous[0]))
+                else:
+                    cursor.execute('''
+                        INSERT INTO stock_snapshot_items (snapshot_id, product_id, quantity)
+                        SELECT ?, id, stock_quantity FROM products
+                    ''', (snapshot_id,))
+                conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        self._last_snapshot_time = now
+        return snapshot_id
+    
+    def snapshot_if_due(self) -> Optional[int]:
+        """Take a snapshot if the last one is older than SNAPSHOT_INTERVAL."""
+        if self._last_snapshot_time and datetime.now() - self._last_snapshot_time < self.SNAPSHOT_INTERVAL:
+            return None
+        try:
+            return self.create_snapshot()
+        except sqlite3.Error as e:
+            print(f"Error creating stock snapshot: {e}")
+            return None
+    
+    def _run(self):
+        """Background loop taking a snapshot whenever one is due."""
+        while not self._stop.wait(self.SNAPSHOT_CHECK_SECONDS):
+            self.snapshot_if_due()
+    
+    def start(self):
+        """Take due snapshots in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="StockSnapshots", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+    
+    def _snapshot_before(self, cursor, at: datetime):
+        """Get (id, last_movement_id) of the latest snapshot taken at or before a time."""
+        cursor.execute('''
+            SELECT id, last_movement_id
+            FROM stock_snapshots
+            WHERE snapshot_time <= ?
+            ORDER BY snapshot_time DESC, id DESC
+            LIMIT 1
+        ''', (self._format_time(at),))
+        return cursor.fetchone()
+    
+    def get_stock_at(self, product_id: int, at: datetime) -> int:
+        """Get a product's stock quantity at a point in time."""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            # The latest movement carries the running balance
+            cursor.execute('''
+                SELECT balance_after
+                FROM stock_movements
+                WHERE product_id = ? AND timestamp <= ?
+                ORDER BY timestamp DESC, id DESC
+                LIMIT 1
+            ''', (product_id, self._format_time(at)))
+            row = cursor.fetchone()
+            if row:
+                return row[0]
+            
+            # No movement yet: the stock is whatever a snapshot captured
+            snapshot = self._snapshot_before(cursor, at)
+            if not snapshot:
+                return 0
+            cursor.execute('''
+                SELECT quantity FROM stock_snapshot_items
+                WHERE product_id = ? AND snapshot_id <= ?
+                ORDER BY snapshot_id DESC
+                LIMIT 1
+            ''', (product_id, snapshot[0]))
+            row = cursor.fetchone()
+            return row[0] if row else 0
+        finally:
+            conn.close()
+    
+    def get_stock_levels_at(self, at: datetime) -> Dict[int, int]:
+        """Get every product's stock quantity at a point in time.
+        
+        Reads the nearest earlier snapshot (each product's entry in the
+        latest snapshot holding it) plus the movements recorded after it.
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            snapshot = self._snapshot_before(cursor, at)
+            levels = {}
+            last_movement_id = 0
+            
+            if snapshot:
+                snapshot_id, last_movement_id = snapshot
+                cursor.execute('''
+                    SELECT i.product_id, i.quantity
+                    FROM stock_snapshot_items i
+                    JOIN (SELECT product_id, MAX(snapshot_id) AS snapshot_id
+                          FROM stock_snapshot_items
+                          WHERE snapshot_id <= ?
+                          GROUP BY product_id) latest
+                      ON latest.product_id = i.product_id AND latest.snapshot_id = i.snapshot_id
+                ''', (snapshot_id,))
+                levels = dict(cursor.fetchall())
+            
+            cursor.execute('''
+                SELECT product_id, SUM(quantity_delta)
+                FROM stock_movements
+                WHERE id > ? AND timestamp <= ?
+                GROUP BY product_id
+            ''', (last_movement_id, self._format_time(at)))
+            for product_id, delta in cursor.fetchall():
+                levels[product_id] = levels.get(product_id, 0) + delta
+            
+            return levels
+        finally:
+            conn.close()
+    
+    def get_stock_valuation(self, at: datetime) -> Dict[str, Any]:
+        """Value the stock held at a point in time at current cost prices."""
+        levels = self.get_stock_levels_at(at)
+        
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, name, cost_price FROM products")
+            products = {row[0]: (row[1], row[2] or 0.0) for row in cursor.fetchall()}
+        finally:
+            conn.close()
+        
+        items = []
+        for product_id, quantity in levels.items():
+            if product_id not in products or quantity == 0:
+                continue
+            name, cost_price = products[product_id]
+            items.append({"product_id": product_id, "name": name, "quantity": quantity,
+                          "cost_price": cost_price, "value": quantity * cost_price})
+        
+        return {
+            "at": at,
+            "total_value": sum(item["value"] for item in items),
+            "total_quantity": sum(item["quantity"] for item in items),
+            "items": sorted(items, key=lambda item: item["value"], reverse=True)
+        }
+    
+    def get_movement_summary(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Sum stock movements per product and movement type over a period."""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT m.product_id, p.name, m.movement_type, SUM(m.quantity_delta), COUNT(*)
+                FROM stock_movements m
+                LEFT JOIN products p ON p.id = m.product_id
+                WHERE m.timestamp >= ? AND m.timestamp <= ?
+                GROUP BY m.product_id, m.movement_type
+                ORDER BY m.product_id, m.movement_type
+            ''', (self._format_time(start), self._format_time(end)))
+            return [
+                {"product_id": row[0], "name": row[1], "movement_type": row[2],
+                 "quantity": row[3], "movements": row[4]}
+                for row in cursor.fetchall()
+            ]
+        finally:
+            conn.close()
+    
+    def get_shrinkage(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Get stock lost through negative adjustments over a period, by product."""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT m.product_id, p.name, -SUM(m.quantity_delta), -SUM(m.quantity_delta) * COALESCE(p.cost_price, 0)
+                FROM stock_movements m
+                LEFT JOIN products p ON p.id = m.product_id
+                WHERE m.timestamp >= ? AND m.timestamp <= ?
+                  AND m.movement_type = 'adjustment' AND m.quantity_delta < 0
+                GROUP BY m.product_id
+                ORDER BY 4 DESC
+            ''', (self._format_time(start), self._format_time(end)))
+            return [
+                {"product_id": row[0], "name": row[1], "quantity": row[2], "value": row[3]}
+                for row in cursor.fetchall()
+            ]
+        finally:
+            conn.close()
+    
+    def get_movements(self, product_id: int, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get a product's most recent stock movements."""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, timestamp, movement_type, quantity_delta, balance_after, reference, reason
+                FROM stock_movements
+                WHERE product_id = ?
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ?
+            ''', (product_id, limit))
+            return [
+                {"id": row[0], "timestamp": row[1], "movement_type": row[2], "quantity": row[3],
+                 "balance": row[4], "reference": row[5], "reason": row[6]}
+                for row in cursor.fetchall()
+            ]
+        finally:
+            conn.close()
@@ -5,29 +5,58 @@ User Management Database Operations
 This module handles database operations for user management, authentication, and activity tracking.
 """
 
+import os
 import sqlite3
-import hashlib
 import secrets
-from datetime import datetime, timedelta
-from typing import List, Optional, Tuple
+import threading
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple, Dict
 
 from models.user import User, UserRole, UserStatus, UserSession, UserActivity
 from database.db_manager import DatabaseManager
+from database.audit_log import AuditLogWriter
+from database.query_profiler import query_profiler
+from utils.password_hasher import get_password_hasher
 
 class UserManager:
     """Manages user accounts, authentication, and activity tracking."""
     
-    def __init__(self, db_path: str = "pos_database.db"):
-        """Initialize the user manager."""
+    ACTIVITY_COLUMNS = "id, user_id, activity_type, description, timestamp, sale_id, amount, details"
+    
+    def __init__(self, db_path: str = "pos_database.db", archive_db_path: str = "pos_archive.db",
+                 async_activity_log: bool = True):
+        """Initialize the user manager.
+        
+        Args:
+            db_path: POS database path
+            archive_db_path: Database receiving archived activities
+            async_activity_log: Write activities through the batched background
+                AuditLogWriter instead of one synchronous transaction each
+        """
         self.db_path = db_path
+        self.archive_db_path = archive_db_path
         self.current_user: Optional[User] = None
         self.current_session: Optional[UserSession] = None
+        self.password_hasher = get_password_hasher()
+        
+        # User directory cache: loaded on first lookup, dropped on any user change
+        self._users_by_id: Optional[Dict[int, User]] = None
+        self._users_by_username: Dict[str, User] = {}
+        self._user_cache_lock = threading.Lock()
+        
         self._init_tables()
+        self.audit_writer = None
+        if async_activity_log:
+            try:
+                self.audit_writer = AuditLogWriter(db_path)
+            except Exception as e:
+                print(f"Error starting audit log writer, writing activities directly: {e}")
         self._create_default_admin()
     
     def _init_tables(self):
         """Initialize user management tables."""
-        conn = sqlite3.connect(self.db_path)
+        conn = query_profiler.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -76,6 +105,11 @@ class UserManager:
                 )
             ''')
             
+            # Indexes for per-user timelines, date-range scans and session lookups
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_activities_user_time ON user_activities(user_id, timestamp)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_activities_time ON user_activities(timestamp)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_sessions_user_login ON user_sessions(user_id, login_time)")
+            
             conn.commit()
             
         except Exception as e:
@@ -98,22 +132,16 @@ class UserManager:
             print("Default admin user created (username: admin, password: admin123)")
     
     def _hash_password(self, password: str) -> str:
-        """Hash a password using SHA-256 with salt."""
-        salt = secrets.token_hex(16)
-        password_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-        return f"{salt}:{password_hash}"
+        """Hash a password with the configured key-derivation function."""
+        return self.password_hasher.hash(password)
     
     def _verify_password(self, password: str, password_hash: str) -> bool:
-        """Verify a password against its hash."""
-        try:
-            salt, hash_value = password_hash.split(':')
-            return hashlib.sha256((password + salt).encode()).hexdigest() == hash_value
-        except:
-            return False
+        """Verify a password against its hash (current or legacy format)."""
+        return self.password_hasher.verify(password, password_hash)
     
     def create_user(self, user: User, created_by_id: int = None) -> bool:
         """Create a new user account."""
-        conn = sqlite3.connect(self.db_path)
+        conn = query_profiler.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -131,6 +159,7 @@ class UserManager:
             
             user.id = cursor.lastrowid
             conn.commit()
+            self.invalidate_user_cache()
             
             # Log user creation activity
             if created_by_id:
@@ -154,7 +183,7 @@ class UserManager:
     
     def authenticate(self, username: str, password: str) -> Optional[User]:
         """Authenticate a user and return user object if successful."""
-        conn = sqlite3.connect(self.db_path)
+        conn = query_profiler.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -174,11 +203,19 @@ class UserManager:
             if not self._verify_password(password, password_hash):
                 return None
             
+            # Upgrade legacy or weaker hashes now that the plain password is known
+            if self.password_hasher.needs_rehash(password_hash):
+                password_hash = self._hash_password(password)
+                cursor.execute('''
+                    UPDATE users SET password_hash = ? WHERE id = ?
+                ''', (password_hash, user_id))
+            
             # Update last login
             cursor.execute('''
                 UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?
             ''', (user_id,))
             conn.commit()
+            self.invalidate_user_cache()
             
             # Create user object
             user = User(
@@ -251,7 +288,7 @@ class UserManager:
     
     def _create_session(self, session: UserSession) -> bool:
         """Create a new user session."""
-        conn = sqlite3.connect(self.db_path)
+        conn = query_profiler.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -273,7 +310,7 @@ class UserManager:
     
     def _end_session(self, session_id: int) -> bool:
         """End a user session."""
-        conn = sqlite3.connect(self.db_path)
+        conn = query_profiler.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -295,8 +332,19 @@ class UserManager:
     
     def log_activity(self, user_id: int, activity_type: str, description: str, 
                      sale_id: int = None, amount: float = None, details: str = "") -> bool:
-        """Log user activity."""
-        conn = sqlite3.connect(self.db_path)
+        """Log user activity.
+        
+        With the audit log writer enabled this only journals and queues the
+        record; it reaches the database in the next batch.
+        """
+        if self.audit_writer:
+            try:
+                self.audit_writer.log(user_id, activity_type, description, sale_id, amount, details)
+                return True
+            except Exception as e:
+                print(f"Error queuing activity, writing directly: {e}")
+        
+        conn = query_profiler.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -315,9 +363,14 @@ class UserManager:
         finally:
             conn.close()
     
-    def get_all_users(self) -> List[User]:
-        """Get all users in the system."""
-        conn = sqlite3.connect(self.db_path)
+    def flush_activity_log(self):
+        """Write queued activities so queries see every logged entry."""
+        if self.audit_writer:
+            self.audit_writer.flush()
+    
+    def _load_users(self) -> List[User]:
+        """Load all users from the database, newest first."""
+        conn = query_profiler.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -345,16 +398,74 @@ class UserManager:
             
             return users
             
+        finally:
+            conn.close()
+    
+    def _get_user_directory(self) -> Dict[int, User]:
+        """Get the cached id -> user index, loading it if needed."""
+        with self._user_cache_lock:
+            if self._users_by_id is None:
+                users = self._load_users()
+                self._users_by_id = {user.id: user for user in users}
+                self._users_by_username = {user.username: user for user in users}
+            return self._users_by_id
+    
+    def invalidate_user_cache(self):
+        """Drop the cached user directory (reloaded on the next lookup)."""
+        with self._user_cache_lock:
+            self._users_by_id = None
+            self._users_by_username = {}
+    
+    def get_all_users(self) -> List[User]:
+        """Get all users in the system."""
+        try:
+            # Copies, so dialogs editing a user never touch the cache
+            return [replace(user) for user in self._get_user_directory().values()]
         except Exception as e:
             print(f"Error getting users: {e}")
             return []
-        finally:
-            conn.close()
+    
+    def get_user_by_id(self, user_id: int) -> Optional[User]:
+        """Get a user by id from the user directory cache."""
+        try:
+            user = self._get_user_directory().get(user_id)
+        except Exception as e:
+            print(f"Error getting user: {e}")
+            return None
+        return replace(user) if user else None
+    
+    def get_user_by_username(self, username: str) -> Optional[User]:
+        """Get a user by username from the user directory cache."""
+        try:
+            self._get_user_directory()
+            user = self._users_by_username.get(username)
+        except Exception as e:
+            print(f"Error getting user: {e}")
+            return None
+        return replace(user) if user else None
+    
+    def get_user_name(self, user_id: int, default: str = None) -> Optional[str]:
+        """Resolve a user id to a display name without a database query."""
+        try:
+            user = self._get_user_directory().get(user_id)
+        except Exception as e:
+            print(f"Error getting user: {e}")
+            user = None
+        return user.name if user else default
+    
+    def get_user_names(self) -> Dict[int, str]:
+        """Get a user id -> name mapping from the user directory cache."""
+        try:
+            return {user_id: user.name for user_id, user in self._get_user_directory().items()}
+        except Exception as e:
+            print(f"Error getting users: {e}")
+            return {}
     
     def get_user_activities(self, user_id: int = None, start_date: datetime = None, 
                            end_date: datetime = None) -> List[UserActivity]:
         """Get user activities with optional filtering."""
-        conn = sqlite3.connect(self.db_path)
+        self.flush_activity_log()
+        conn = query_profiler.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -374,11 +485,11 @@ class UserManager:
             
             if start_date:
                 query += " AND ua.timestamp >= ?"
-                params.append(start_date.isoformat())
+                params.append(self._format_timestamp(start_date))
             
             if end_date:
                 query += " AND ua.timestamp <= ?"
-                params.append(end_date.isoformat())
+                params.append(self._format_timestamp(end_date))
             
             query += " ORDER BY ua.timestamp DESC"
             
@@ -393,7 +504,7 @@ class UserManager:
                     user_id=user_id,
                     activity_type=activity_type,
                     description=description,
-                    timestamp=datetime.fromisoformat(timestamp) if timestamp else None,
+                    timestamp=self._parse_timestamp(timestamp) if timestamp else None,
                     sale_id=sale_id,
                     amount=amount,
                     details=details
@@ -412,10 +523,186 @@ class UserManager:
         finally:
             conn.close()
     
+    def get_user_activities_page(self, user_id: int = None, start_date: datetime = None,
+                                 end_date: datetime = None, limit: int = 50,
+                                 after: Optional[Tuple[str, int]] = None,
+                                 archive_month: str = None) -> Tuple[List[UserActivity], Optional[Tuple[str, int]]]:
+        """Get one page of activities, newest first, using keyset pagination.
+        
+        Args:
+            user_id: Only activities of this user
+            start_date: Only activities at or after this time
+            end_date: Only activities at or before this time
+            limit: Page size
+            after: Cursor returned by the previous page, or None for the first page
+            archive_month: "YYYY-MM" to read archived activities instead of live ones
+        
+        Returns:
+            (activities, next_cursor); next_cursor is None on the last page
+        """
+        if not archive_month:
+            self.flush_activity_log()
+        
+        conn = query_profiler.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        try:
+            table = "user_activities"
+            if archive_month:
+                table = f"archive.{self._archive_table_name(archive_month)}"
+                cursor.execute("ATTACH DATABASE ? AS archive", (self.archive_db_path,))
+            
+            query = f'''
+                SELECT {self.ACTIVITY_COLUMNS}
+                FROM {table}
+                WHERE 1=1
+            '''
+            params = []
+            
+            if user_id:
+                query += " AND user_id = ?"
+                params.append(user_id)
+            
+            if start_date:
+                query += " AND timestamp >= ?"
+                params.append(self._format_timestamp(start_date))
+            
+            if end_date:
+                query += " AND timestamp <= ?"
+                params.append(self._format_timestamp(end_date))
+            
+            if after:
+                # Seek past the last row of the previous page (no OFFSET scan)
+                query += " AND (timestamp < ? OR (timestamp = ? AND id < ?))"
+                params.extend([after[0], after[0], after[1]])
+            
+            query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+            params.append(limit)
+            
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            
+            activities = [
+                UserActivity(
+                    id=row[0],
+                    user_id=row[1],
+                    activity_type=row[2],
+                    description=row[3],
+                    timestamp=self._parse_timestamp(row[4]) if row[4] else None,
+                    sale_id=row[5],
+                    amount=row[6],
+                    details=row[7] or ""
+                )
+                for row in rows
+            ]
+            
+            next_cursor = (rows[-1][4], rows[-1][0]) if len(rows) == limit else None
+            return activities, next_cursor
+            
+        except Exception as e:
+            print(f"Error getting user activities page: {e}")
+            return [], None
+        finally:
+            conn.close()
+    
+    def _format_timestamp(self, value: datetime) -> str:
+        """Format a datetime the way activities are stored: UTC, like SQLite CURRENT_TIMESTAMP.
+        
+        Naive datetimes (dates picked in the UI) are local time.
+        """
+        return value.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    
+    def _parse_timestamp(self, value: str) -> datetime:
+        """Parse a stored UTC activity timestamp into naive local time for display."""
+        return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    
+    def _archive_table_name(self, month: str) -> str:
+        """Get the archive table name for a "YYYY-MM" month."""
+        datetime.strptime(month, "%Y-%m")  # Validate before using in SQL
+        return f"user_activities_{month.replace('-', '_')}"
+    
+    def archive_activities(self, older_than_days: int = 365) -> Dict[str, int]:
+        """Move old activities into monthly tables of the archive database.
+        
+        Rows older than the cutoff are copied into ``user_activities_YYYY_MM``
+        tables in ``archive_db_path`` and removed from the live table in a
+        single transaction, keeping the live table (and its indexes) small.
+        Months are local calendar months; timestamps stay in UTC.
+        
+        Returns:
+            Number of archived rows per month
+        """
+        cutoff = self._format_timestamp(datetime.now() - timedelta(days=older_than_days))
+        archived = {}
+        self.flush_activity_log()
+        
+        conn = query_profiler.connect(self.db_path, timeout=30.0)
+        try:
+            conn.execute("ATTACH DATABASE ? AS archive", (self.archive_db_path,))
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT DISTINCT strftime('%Y-%m', timestamp, 'localtime')
+                FROM user_activities
+                WHERE timestamp < ?
+            ''', (cutoff,))
+            months = [row[0] for row in cursor.fetchall()]
+            
+            cursor.execute("BEGIN IMMEDIATE")
+            for month in months:
+                table = self._archive_table_name(month)
+                cursor.execute(f'''
+                    CREATE TABLE IF NOT EXISTS archive.{table} (
+                        id INTEGER PRIMARY KEY,
+                        user_id INTEGER NOT NULL,
+                        activity_type TEXT NOT NULL,
+                        description TEXT NOT NULL,
+                        timestamp TIMESTAMP,
+                        sale_id INTEGER,
+                        amount REAL,
+                        details TEXT
+                    )
+                ''')
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS archive.idx_{table}_user_time ON {table}(user_id, timestamp)")
+                
+                month_filter = "timestamp < ? AND strftime('%Y-%m', timestamp, 'localtime') = ?"
+                cursor.execute(f'''
+                    INSERT OR IGNORE INTO archive.{table} ({self.ACTIVITY_COLUMNS})
+                    SELECT {self.ACTIVITY_COLUMNS} FROM user_activities WHERE {month_filter}
+                ''', (cutoff, month))
+                cursor.execute(f"DELETE FROM user_activities WHERE {month_filter}", (cutoff, month))
+                archived[month] = cursor.rowcount
+            
+            conn.commit()
+            return archived
+            
+        except Exception as e:
+            print(f"Error archiving user activities: {e}")
+            conn.rollback()
+            return {}
+        finally:
+            conn.close()
+    
+    def get_archived_activity_months(self) -> List[str]:
+        """List the "YYYY-MM" months available in the activity archive."""
+        if not os.path.exists(self.archive_db_path):
+            return []
+        
+        conn = query_profiler.connect(self.archive_db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT name FROM sqlite_master
+                WHERE type = 'table' AND name LIKE 'user_activities_%'
+            ''')
+            months = [name[len("user_activities_"):].replace('_', '-') for name, in cursor.fetchall()]
+            return sorted(months, reverse=True)
+        finally:
+            conn.close()
+    
     def get_user_sales_summary(self, user_id: int = None, start_date: datetime = None, 
                               end_date: datetime = None) -> dict:
         """Get sales summary by user."""
-        conn = sqlite3.connect(self.db_path)
+        conn = query_profiler.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -470,7 +757,7 @@ class UserManager:
         if not self.current_user or self.current_user.role != UserRole.ADMIN:
             return False
         
-        conn = sqlite3.connect(self.db_path)
+        conn = query_profiler.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -481,6 +768,7 @@ class UserManager:
             ''', (user.name, user.role.value, user.status.value, user.id))
             
             conn.commit()
+            self.invalidate_user_cache()
             
             # Log activity
             self.log_activity(
@@ -507,7 +795,7 @@ class UserManager:
         if self.current_user.role != UserRole.ADMIN and self.current_user.id != user_id:
             return False
         
-        conn = sqlite3.connect(self.db_path)
+        conn = query_profiler.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -519,6 +807,7 @@ class UserManager:
             ''', (password_hash, user_id))
             
             conn.commit()
+            self.invalidate_user_cache()
             
             # Log activity
             self.log_activity(
@@ -545,7 +834,10 @@ class UserManager:
         if self.current_user.id == user_id:
             return False
         
-        conn = sqlite3.connect(self.db_path)
+        # Queued activities of this user must be written before they are removed
+        self.flush_activity_log()
+        
+        conn = query_profiler.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -567,6 +859,7 @@ class UserManager:
             cursor.execute('DELETE FROM users WHERE id = ?', (user_id,))
             
             conn.commit()
+            self.invalidate_user_cache()
             
             # Log activity
             self.log_activity(
@@ -588,6 +881,10 @@ class UserManager:
         """Check if current user is admin."""
         return self.current_user and self.current_user.role == UserRole.ADMIN
     
+    def is_manager(self) -> bool:
+        """Check if current user is a manager or an admin."""
+        return self.current_user and self.current_user.role in (UserRole.ADMIN, UserRole.MANAGER)
+    
     def get_current_user(self) -> Optional[User]:
         """Get currently logged in user."""
         return self.current_user
@@ -596,5 +893,25 @@ class UserManager:
         """Check if a user is currently logged in."""
         return self.current_user is not None
 
-# Global user manager instance
-user_manager = UserManager()
+_user_manager: Optional[UserManager] = None
+_user_manager_lock = threading.Lock()
+
+def get_user_manager() -> UserManager:
+    """Get the shared user manager, creating it (and its tables) on first use."""
+    global _user_manager
+    with _user_manager_lock:
+        if _user_manager is None:
+            _user_manager = UserManager()
+        return _user_manager
+
+class _UserManagerProxy:
+    """Forwards to the shared user manager, so importing this module touches no database."""
+    
+    def __getattr__(self, name):
+        return getattr(get_user_manager(), name)
+    
+    def __setattr__(self, name, value):
+        setattr(get_user_manager(), name, value)
+
+# Global user manager instance (created on first use)
+user_manager = _UserManagerProxy()
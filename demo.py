@@ -50,7 +50,7 @@ def demo_pos_system():
     # Create cash payment
     payment_amount = sale.total + 10.0  # Pay with extra for change
     payment = Payment(PaymentMethod.CASH, payment_amount)
-    payment.calculate_change(sale.total)
+    payment.calculate_change(sale.amount_due(payment.method))
     payment.mark_completed()
     
     sale.payment = payment
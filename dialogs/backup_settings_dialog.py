@@ -150,6 +150,11 @@ class BackupSettingsDialog:
         ttk.Checkbutton(storage_frame, text=get_text("backup_compression"), 
                        variable=self.compression_var).pack(anchor="w", pady=(0, 5))
         
+        # Deduplicated store
+        self.deduplicated_store_var = tk.BooleanVar()
+        ttk.Checkbutton(storage_frame, text=get_text("deduplicated_backups"), 
+                       variable=self.deduplicated_store_var).pack(anchor="w", pady=(0, 5))
+        
         # Include images
         self.include_images_var = tk.BooleanVar()
         ttk.Checkbutton(storage_frame, text=get_text("include_images"), 
@@ -189,19 +194,19 @@ class BackupSettingsDialog:
     def check_scheduler_status(self):
         """Check if scheduler is running and show next scheduled backup."""
         try:
-            if hasattr(self.backup_manager, 'scheduler_thread') and \
-               self.backup_manager.scheduler_thread and \
-               self.backup_manager.scheduler_thread.is_alive():
+            status = self.backup_manager.get_scheduler_status()
+            if status.get("thread_alive"):
+                next_run = status.get("next_run") or "Not scheduled"
                 
-                # Get next run time if available
-                import schedule
-                jobs = schedule.jobs
-                next_run = "Unknown"
-                if jobs:
-                    next_run = str(jobs[0].next_run) if jobs[0].next_run else "Not scheduled"
+                # Include the latest backup cost so its impact is visible
+                last_metrics = ""
+                if status.get("recent_metrics"):
+                    metrics = status["recent_metrics"][-1]
+                    last_metrics = (f"\nLast backup: {metrics['duration_seconds']:.1f}s, "
+                                    f"{metrics['size_bytes'] / (1024 * 1024):.1f} MB")
                 
                 messagebox.showinfo(get_text("info"), 
-                                  f"Scheduler Status: Running\nNext backup: {next_run}")
+                                  f"Scheduler Status: Running\nNext backup: {next_run}{last_metrics}")
             else:
                 messagebox.showinfo(get_text("info"), 
                                   "Scheduler Status: Not running\nEnable auto backup to start scheduler")
@@ -293,6 +298,7 @@ class BackupSettingsDialog:
         self.max_backups_var.set(str(self.settings.get("max_backups", 30)))
         self.compression_var.set(self.settings.get("compression", True))
         self.include_images_var.set(self.settings.get("include_images", False))
+        self.deduplicated_store_var.set(self.settings.get("deduplicated_store", False))
     
     @staticmethod
     def convert_24h_to_12h(time_24h: str) -> tuple:
@@ -348,7 +354,8 @@ class BackupSettingsDialog:
                 "backup_time": time_24h,  # Store in 24-hour format
                 "max_backups": max_backups,
                 "compression": self.compression_var.get(),
-                "include_images": self.include_images_var.get()
+                "include_images": self.include_images_var.get(),
+                "deduplicated_store": self.deduplicated_store_var.get()
             }
             
             # Save settings
@@ -509,7 +516,7 @@ class BackupSettingsDialog:
             # Get selected backup path
             item = self.backup_tree.item(selection[0])
             filename = item["values"][0]
-            backup_path = Path("backups") / filename
+            backup_path = self.backup_manager.get_backup_path(filename)
             
             # Restore backup
             self.backup_manager.restore_backup(str(backup_path))
@@ -540,11 +547,9 @@ class BackupSettingsDialog:
             # Get selected backup path
             item = self.backup_tree.item(selection[0])
             filename = item["values"][0]
-            backup_path = Path("backups") / filename
             
-            # Delete backup file
-            if backup_path.exists():
-                backup_path.unlink()
+            # Delete backup file (and its index entry)
+            if self.backup_manager.delete_backup(filename):
                 messagebox.showinfo(get_text("success"), "Backup deleted successfully")
                 self.refresh_backup_list()
             
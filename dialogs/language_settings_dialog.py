@@ -235,6 +235,7 @@ class LanguageSettingsDialog:
                 font_size=int(self.size_var.get()),
                 arabic_font_family=self.arabic_font_var.get()
             )
+            self.language_manager.write_settings()
             
             # Show success message
             messagebox.showinfo(get_text("success"), 
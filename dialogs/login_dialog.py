@@ -5,6 +5,7 @@ Login Dialog
 This module provides a login interface for user authentication.
 """
 
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Optional, Callable
@@ -16,12 +17,16 @@ from config.language_settings import get_text, language_manager
 class LoginDialog:
     """Login dialog for user authentication."""
     
+    LOGIN_POLL_MS = 50
+    
     def __init__(self, parent=None, on_login_success: Callable = None):
         """Initialize the login dialog."""
         self.parent = parent
         self.on_login_success = on_login_success
         self.user: Optional[User] = None
         self.root = None
+        self._login_thread: Optional[threading.Thread] = None
+        self._login_result = None
         
     def show(self) -> Optional[User]:
         """Show the login dialog and return the authenticated user."""
@@ -144,6 +149,9 @@ You can create up to 2 additional accounts from the admin panel."""
     
     def _login(self):
         """Handle login attempt."""
+        if self._login_thread and self._login_thread.is_alive():
+            return  # Already verifying (e.g. Return pressed twice)
+        
         username = self.username_entry.get().strip()
         password = self.password_entry.get()
         
@@ -154,11 +162,34 @@ You can create up to 2 additional accounts from the admin panel."""
         # Disable login button during authentication
         self.login_btn.config(state="disabled")
         self.status_label.config(text=get_text("authenticating"))
-        self.root.update()
         
+        # Password verification is deliberately slow; keep it off the Tk thread
+        self._login_result = None
+        self._login_thread = threading.Thread(
+            target=self._login_worker, args=(username, password), daemon=True)
+        self._login_thread.start()
+        self.root.after(self.LOGIN_POLL_MS, self._check_login)
+    
+    def _login_worker(self, username: str, password: str):
+        """Run the login on a worker thread and store the outcome."""
+        try:
+            self._login_result = ("ok", user_manager.login(username, password))
+        except Exception as e:
+            self._login_result = ("error", e)
+    
+    def _check_login(self):
+        """Poll the worker from the Tk thread and apply its result."""
+        if not self.root or not self.root.winfo_exists():
+            return
+        if self._login_thread.is_alive():
+            self.root.after(self.LOGIN_POLL_MS, self._check_login)
+            return
+        
+        outcome, value = self._login_result or ("error", RuntimeError("Login failed"))
         try:
-            # Attempt login
-            if user_manager.login(username, password):
+            if outcome == "error":
+                self.status_label.config(text=f"Error: {str(value)}")
+            elif value:
                 self.user = user_manager.get_current_user()
                 
                 # Call success callback if provided
@@ -187,9 +218,10 @@ You can create up to 2 additional accounts from the admin panel."""
 class UserManagementDialog:
     """Dialog for managing user accounts (admin only)."""
     
-    def __init__(self, parent):
+    def __init__(self, parent, db_manager=None):
         """Initialize the user management dialog."""
         self.parent = parent
+        self.db_manager = db_manager
         self.root = None
         
     def show(self):
@@ -257,6 +289,12 @@ class UserManagementDialog:
             command=self._load_users
         ).pack(side=tk.RIGHT)
         
+        ttk.Button(
+            buttons_frame,
+            text=get_text("query_profiler"),
+            command=self._show_query_profiler
+        ).pack(side=tk.RIGHT, padx=(0, 10))
+        
         # Users tree
         self.users_tree = ttk.Treeview(
             main_frame,
@@ -283,6 +321,11 @@ class UserManagementDialog:
         self.users_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
     
+    def _show_query_profiler(self):
+        """Open the database query profiler."""
+        from dialogs.query_profiler_dialog import QueryProfilerDialog
+        QueryProfilerDialog(self.root, self.db_manager).show()
+    
     def _load_users(self):
         """Load and display users."""
         # Clear existing items
@@ -328,12 +371,7 @@ class UserManagementDialog:
         user_id = int(selection[0])
         
         # Get the user data
-        users = user_manager.get_all_users()
-        user_to_edit = None
-        for user in users:
-            if user.id == user_id:
-                user_to_edit = user
-                break
+        user_to_edit = user_manager.get_user_by_id(user_id)
         
         if not user_to_edit:
             messagebox.showerror("Error", "User not found")
@@ -365,11 +403,7 @@ class UserManagementDialog:
         
         # Get the user data to check if it's the current user or default admin
         users = user_manager.get_all_users()
-        user_to_remove = None
-        for user in users:
-            if user.id == user_id:
-                user_to_remove = user
-                break
+        user_to_remove = user_manager.get_user_by_id(user_id)
         
         if not user_to_remove:
             messagebox.showerror("Error", "User not found")
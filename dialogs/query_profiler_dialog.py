@@ -0,0 +1,164 @@
+"""
+Query Profiler Dialog
+=====================
+
+Admin view of the database query profiler: per-statement statistics, the
+slow-query log with query plans, and JSON export.
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from datetime import datetime
+
+from database.query_profiler import query_profiler
+from config.language_settings import get_text
+
+class QueryProfilerDialog:
+    """Dialog showing the query profiler statistics."""
+    
+    def __init__(self, parent, db_manager=None):
+        """Initialize the query profiler dialog.
+        
+        Args:
+            parent: Parent window
+            db_manager: Register's DatabaseManager, whose pooled connections
+                are reopened when profiling is switched on or off
+        """
+        self.parent = parent
+        self.db_manager = db_manager
+        self.dialog = None
+        self.slow_queries = []
+    
+    def show(self):
+        """Show the query profiler dialog."""
+        self.dialog = tk.Toplevel(self.parent)
+        self.dialog.title(get_text("query_profiler"))
+        self.dialog.geometry("1000x600")
+        self.dialog.transient(self.parent)
+        
+        self.create_widgets()
+        self.refresh()
+    
+    def create_widgets(self):
+        """Create dialog widgets."""
+        main_frame = ttk.Frame(self.dialog, padding="10")
+        main_frame.pack(fill="both", expand=True)
+        
+        # Controls
+        controls = ttk.Frame(main_frame)
+        controls.pack(fill="x", pady=(0, 10))
+        
+        self.enabled_var = tk.BooleanVar(value=query_profiler.enabled)
+        ttk.Checkbutton(controls, text=get_text("query_profiling_enabled"), variable=self.enabled_var,
+                        command=self.toggle_profiling).pack(side="left")
+        
+        ttk.Label(controls, text=get_text("slow_query_threshold_ms")).pack(side="left", padx=(20, 5))
+        self.threshold_var = tk.StringVar(value=f"{query_profiler.slow_query_ms:g}")
+        threshold_entry = ttk.Entry(controls, textvariable=self.threshold_var, width=8)
+        threshold_entry.pack(side="left")
+        threshold_entry.bind("<Return>", lambda e: self.apply_threshold())
+        
+        ttk.Button(controls, text=get_text("close"), command=self.dialog.destroy).pack(side="right")
+        ttk.Button(controls, text=get_text("export_json"), command=self.export_json).pack(side="right", padx=(0, 5))
+        ttk.Button(controls, text=get_text("reset_statistics"), command=self.reset).pack(side="right", padx=(0, 5))
+        ttk.Button(controls, text=get_text("refresh"), command=self.refresh).pack(side="right", padx=(0, 5))
+        
+        notebook = ttk.Notebook(main_frame)
+        notebook.pack(fill="both", expand=True)
+        
+        # Statements tab
+        statements_frame = ttk.Frame(notebook, padding="5")
+        notebook.add(statements_frame, text=get_text("query_statements"))
+        columns = ("calls", "total_ms", "avg_ms", "p95_ms", "max_ms", "rows")
+        self.statements_tree = ttk.Treeview(statements_frame, columns=columns, show="tree headings")
+        self.statements_tree.heading("#0", text="SQL")
+        self.statements_tree.column("#0", width=480)
+        for column in columns:
+            self.statements_tree.heading(column, text=column)
+            self.statements_tree.column(column, width=80, anchor="e")
+        scrollbar = ttk.Scrollbar(statements_frame, orient="vertical", command=self.statements_tree.yview)
+        self.statements_tree.configure(yscrollcommand=scrollbar.set)
+        self.statements_tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        
+        # Slow queries tab: log on top, selected entry's SQL and plan below
+        slow_frame = ttk.Frame(notebook, padding="5")
+        notebook.add(slow_frame, text=get_text("slow_queries"))
+        self.slow_tree = ttk.Treeview(slow_frame, columns=("duration_ms", "rows"), show="tree headings", height=10)
+        self.slow_tree.heading("#0", text=get_text("time"))
+        self.slow_tree.heading("duration_ms", text="ms")
+        self.slow_tree.heading("rows", text="rows")
+        self.slow_tree.column("#0", width=160)
+        self.slow_tree.column("duration_ms", width=80, anchor="e")
+        self.slow_tree.column("rows", width=80, anchor="e")
+        self.slow_tree.pack(fill="x")
+        self.slow_tree.bind("<<TreeviewSelect>>", self.show_slow_query)
+        
+        self.plan_text = tk.Text(slow_frame, height=12, wrap="word", font=("Courier", 9))
+        self.plan_text.pack(fill="both", expand=True, pady=(5, 0))
+    
+    def refresh(self):
+        """Reload the statistics and the slow-query log."""
+        self.statements_tree.delete(*self.statements_tree.get_children())
+        for stats in query_profiler.get_statistics():
+            self.statements_tree.insert("", "end", text=stats["sql"][:200],
+                                        values=(stats["calls"], stats["total_ms"], stats["avg_ms"],
+                                                stats["p95_ms"], stats["max_ms"], stats["rows"]))
+        
+        self.slow_tree.delete(*self.slow_tree.get_children())
+        self.slow_queries = query_profiler.get_slow_queries()
+        for index, entry in enumerate(self.slow_queries):
+            self.slow_tree.insert("", "end", iid=str(index), text=entry["timestamp"],
+                                  values=(entry["duration_ms"], entry["rows"]))
+        self.plan_text.delete("1.0", "end")
+    
+    def show_slow_query(self, event=None):
+        """Show the SQL, parameters and query plan of the selected slow query."""
+        selection = self.slow_tree.selection()
+        if not selection:
+            return
+        entry = self.slow_queries[int(selection[0])]
+        lines = [entry["sql"], "", f"Parameters: {entry['parameters']}", "", "EXPLAIN QUERY PLAN:"]
+        lines.extend(f"  {step}" for step in entry["plan"] or ["-"])
+        self.plan_text.delete("1.0", "end")
+        self.plan_text.insert("1.0", "\n".join(lines))
+    
+    def toggle_profiling(self):
+        """Switch profiling on or off for new connections."""
+        if self.enabled_var.get():
+            self.apply_threshold()
+            query_profiler.enable()
+        else:
+            query_profiler.disable()
+        # Reopen the pooled connections so the change applies to them too
+        if self.db_manager:
+            self.db_manager.close_all_connections()
+    
+    def apply_threshold(self):
+        """Apply the slow-query threshold typed in."""
+        try:
+            query_profiler.slow_query_ms = max(0.0, float(self.threshold_var.get()))
+        except ValueError:
+            messagebox.showerror(get_text("error"), get_text("invalid_amount"), parent=self.dialog)
+            self.threshold_var.set(f"{query_profiler.slow_query_ms:g}")
+    
+    def reset(self):
+        """Clear the collected statistics."""
+        query_profiler.reset()
+        self.refresh()
+    
+    def export_json(self):
+        """Export the statistics and slow-query log to a JSON file."""
+        file_path = filedialog.asksaveasfilename(
+            parent=self.dialog,
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json")],
+            initialfile=f"query_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+        if not file_path:
+            return
+        try:
+            query_profiler.export_json(file_path)
+            messagebox.showinfo(get_text("success"), file_path, parent=self.dialog)
+        except OSError as e:
+            messagebox.showerror(get_text("error"), str(e), parent=self.dialog)
@@ -368,6 +368,7 @@ class ReceiptSettingsDialog:
             self.save_current_to_settings()
             self.settings_manager.settings = self.settings
             self.settings_manager.save_settings()
+            self.settings_manager.write_settings()
             messagebox.showinfo("Succès", "Paramètres sauvegardés avec succès!")
             self.dialog.destroy()
         except Exception as e:
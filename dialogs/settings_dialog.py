@@ -276,11 +276,9 @@ class SettingsDialog:
         """Quickly change the application language."""
         try:
             language_manager.set_language(language_code)
-            messagebox.showinfo("Language Changed", 
-                              f"Language changed to {language_code}. Some changes may require restart.")
             
-            # Update the current language display
-            current_lang = language_manager.settings.current_language
+            # Re-text the register window in place
+            language_manager.notify_language_change()
             
             # Refresh the dialog if it's still open
             if self.dialog and self.dialog.winfo_exists():
@@ -0,0 +1,130 @@
+"""
+UI Diagnostics Dialog
+=====================
+
+Manager view of the UI monitor: event-loop lag, timings of the traced UI
+operations, and recent stalls with the main thread's stack samples.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+from utils.ui_monitor import ui_monitor
+from config.language_settings import get_text
+
+class UIDiagnosticsDialog:
+    """Dialog showing event-loop lag and UI operation timings."""
+    
+    REFRESH_MS = 2000
+    
+    def __init__(self, parent):
+        """Initialize the UI diagnostics dialog."""
+        self.parent = parent
+        self.dialog = None
+        self.stalls = []
+        self._refresh_job = None
+    
+    def show(self):
+        """Show the diagnostics dialog; it refreshes itself while open."""
+        self.dialog = tk.Toplevel(self.parent)
+        self.dialog.title(get_text("ui_diagnostics"))
+        self.dialog.geometry("900x600")
+        self.dialog.transient(self.parent)
+        self.dialog.protocol("WM_DELETE_WINDOW", self.close)
+        
+        self.create_widgets()
+        self.refresh()
+    
+    def create_widgets(self):
+        """Create dialog widgets."""
+        main_frame = ttk.Frame(self.dialog, padding="10")
+        main_frame.pack(fill="both", expand=True)
+        
+        # Lag summary
+        summary_frame = ttk.LabelFrame(main_frame, text=get_text("event_loop_lag"), padding="10")
+        summary_frame.pack(fill="x", pady=(0, 10))
+        self.summary_label = ttk.Label(summary_frame, font=("Arial", 10))
+        self.summary_label.pack(side="left")
+        ttk.Button(summary_frame, text=get_text("close"), command=self.close).pack(side="right")
+        ttk.Button(summary_frame, text=get_text("refresh"), command=self.refresh).pack(side="right", padx=(0, 5))
+        
+        notebook = ttk.Notebook(main_frame)
+        notebook.pack(fill="both", expand=True)
+        
+        # Operation timings
+        operations_frame = ttk.Frame(notebook, padding="5")
+        notebook.add(operations_frame, text=get_text("ui_operations"))
+        columns = ("count", "avg_ms", "p95_ms", "max_ms", "total_ms")
+        self.operations_tree = ttk.Treeview(operations_frame, columns=columns, show="tree headings")
+        self.operations_tree.heading("#0", text=get_text("ui_operations"))
+        self.operations_tree.column("#0", width=250)
+        for column in columns:
+            self.operations_tree.heading(column, text=column)
+            self.operations_tree.column(column, width=90, anchor="e")
+        self.operations_tree.pack(fill="both", expand=True)
+        
+        # Stalls with the stack samples taken while the loop was blocked
+        stalls_frame = ttk.Frame(notebook, padding="5")
+        notebook.add(stalls_frame, text=get_text("ui_stalls"))
+        self.stalls_tree = ttk.Treeview(stalls_frame, columns=("lag_ms", "operations"),
+                                        show="tree headings", height=8)
+        self.stalls_tree.heading("#0", text=get_text("time"))
+        self.stalls_tree.heading("lag_ms", text="ms")
+        self.stalls_tree.heading("operations", text=get_text("ui_operations"))
+        self.stalls_tree.column("#0", width=200)
+        self.stalls_tree.column("lag_ms", width=80, anchor="e")
+        self.stalls_tree.column("operations", width=400)
+        self.stalls_tree.pack(fill="x")
+        self.stalls_tree.bind("<<TreeviewSelect>>", self.show_stall)
+        
+        self.stack_text = tk.Text(stalls_frame, height=14, wrap="none", font=("Courier", 9))
+        self.stack_text.pack(fill="both", expand=True, pady=(5, 0))
+    
+    def refresh(self):
+        """Reload the monitor data and schedule the next refresh."""
+        if not self.dialog or not self.dialog.winfo_exists():
+            return
+        summary = ui_monitor.get_lag_summary()
+        if ui_monitor.enabled:
+            self.summary_label.config(text=(
+                f"p50 {summary['p50_lag_ms']} ms   p95 {summary['p95_lag_ms']} ms   "
+                f"max {summary['max_lag_ms']} ms   "
+                f"{get_text('ui_stalls')}: {summary['stalls']} (> {ui_monitor.lag_threshold_ms:g} ms)"
+            ))
+        else:
+            self.summary_label.config(text=get_text("ui_monitor_disabled"))
+        
+        self.operations_tree.delete(*self.operations_tree.get_children())
+        for row in ui_monitor.get_operation_stats():
+            self.operations_tree.insert("", "end", text=row["operation"],
+                                        values=(row["count"], row["avg_ms"], row["p95_ms"],
+                                                row["max_ms"], row["total_ms"]))
+        
+        stalls = ui_monitor.get_recent_stalls()
+        if len(stalls) != len(self.stalls) or stalls[:1] != self.stalls[:1]:
+            # Only rebuilt when a stall was added, so the selection survives refreshes
+            self.stalls = stalls
+            self.stalls_tree.delete(*self.stalls_tree.get_children())
+            for index, stall in enumerate(stalls):
+                self.stalls_tree.insert("", "end", iid=str(index), text=stall["time"],
+                                        values=(stall["lag_ms"], ", ".join(stall["operations"])))
+        
+        self._refresh_job = self.dialog.after(self.REFRESH_MS, self.refresh)
+    
+    def show_stall(self, event=None):
+        """Show the stack samples of the selected stall."""
+        selection = self.stalls_tree.selection()
+        if not selection:
+            return
+        stall = self.stalls[int(selection[0])]
+        text = "\n".join(f"--- blocked {sample['blocked_ms']} ms ---\n{sample['stack']}"
+                         for sample in stall["stacks"]) or "-"
+        self.stack_text.delete("1.0", "end")
+        self.stack_text.insert("1.0", text)
+    
+    def close(self):
+        """Stop refreshing and close the dialog."""
+        if self._refresh_job:
+            self.dialog.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        self.dialog.destroy()
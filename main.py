@@ -16,6 +16,8 @@ Requirements:
 
 Usage:
     python main.py
+    python main.py --profile-startup   # print an import/init time breakdown
+    python main.py --profile-queries   # time every SQL statement, saved to query_profile.json on exit
 
 Author: GitHub Copilot
 License: MIT
@@ -23,14 +25,41 @@ License: MIT
 
 import sys
 import os
-from pos_system import POSApplication
+import argparse
+from utils.startup_profiler import startup_profiler
 
 def main():
     """Main entry point for the POS system."""
+    parser = argparse.ArgumentParser(description="Point of Sale system")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print an import-time and init-time breakdown of startup")
+    parser.add_argument("--profile-queries", action="store_true",
+                        help="Profile database queries and write query_profile.json on exit")
+    args = parser.parse_args()
+    
+    if args.profile_startup:
+        startup_profiler.enable()
+    if args.profile_queries:
+        from database.query_profiler import query_profiler
+        query_profiler.enable()
+    
     try:
+        with startup_profiler.phase("import pos_system"):
+            from pos_system import POSApplication
+        
         # Create and run the POS application
         app = POSApplication()
+        
+        if args.profile_startup:
+            from config import STARTUP_BUDGET_MS
+            startup_profiler.disable()
+            print(startup_profiler.report(STARTUP_BUDGET_MS))
+        
         app.run()
+        
+        if args.profile_queries:
+            query_profiler.export_json("query_profile.json")
+            print("Query profile written to query_profile.json")
     except Exception as e:
         print(f"Erreur lors du démarrage de l'application: {e}")
         import traceback
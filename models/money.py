@@ -0,0 +1,63 @@
+"""
+Money
+=====
+
+Exact money arithmetic in integer minor units (centimes).
+
+Amounts coming from the UI or the database are converted once with
+``to_cents`` (rounded half up); sums, tax and cash rounding are then integer
+operations, and ``from_cents`` gives back the amount for display and storage.
+``BasketTotals`` keeps the running sums of a basket, so reading a total does
+not re-add the items.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from config import CASH_ROUNDING, ROUNDING_PRECISION
+
+MINOR_UNITS = 100
+
+def to_cents(amount) -> int:
+    """Amount in centimes, rounded half up."""
+    if isinstance(amount, int):
+        return amount * MINOR_UNITS
+    return int((Decimal(str(amount)) * MINOR_UNITS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def from_cents(cents: int) -> float:
+    """Amount in currency units."""
+    return cents / MINOR_UNITS
+
+def multiply(cents: int, rate: float) -> int:
+    """cents * rate (tax, percentage discounts), rounded half up to the centime."""
+    if not rate:
+        return 0
+    return int((cents * Decimal(str(rate))).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def round_cash(cents: int, precision: float = ROUNDING_PRECISION, enabled: bool = CASH_ROUNDING) -> int:
+    """Round an amount handed over in cash to the smallest coin (half up)."""
+    step = to_cents(precision)
+    if not enabled or step <= 1:
+        return cents
+    sign = -1 if cents < 0 else 1
+    return sign * ((abs(cents) + step // 2) // step * step)
+
+class BasketTotals:
+    """Running item sums of a basket, in centimes."""
+    
+    __slots__ = ("subtotal_cents", "discount_cents", "item_count")
+    
+    def __init__(self):
+        """Initialize empty totals."""
+        self.subtotal_cents = 0
+        self.discount_cents = 0
+        self.item_count = 0
+    
+    def add(self, subtotal_cents: int, discount_cents: int, quantity: int, sign: int = 1):
+        """Add (sign=1) or remove (sign=-1) one line's amounts."""
+        self.subtotal_cents += sign * subtotal_cents
+        self.discount_cents += sign * discount_cents
+        self.item_count += sign * quantity
+    
+    def reset(self):
+        """Back to an empty basket."""
+        self.subtotal_cents = self.discount_cents = self.item_count = 0
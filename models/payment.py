@@ -10,6 +10,8 @@ from typing import Optional
 from dataclasses import dataclass
 from datetime import datetime
 
+from .money import to_cents, from_cents
+
 class PaymentMethod(Enum):
     """Payment method enumeration."""
     CASH = "cash"
@@ -64,9 +66,10 @@ class Payment:
         self.status = PaymentStatus.FAILED
     
     def calculate_change(self, total_due: float) -> float:
-        """Calculate change amount."""
-        if self.is_cash_payment and self.amount > total_due:
-            self.change_amount = self.amount - total_due
+        """Calculate change amount from the amount due (``Sale.amount_due``, already rounded for cash)."""
+        change_cents = to_cents(self.amount) - to_cents(total_due)
+        if self.is_cash_payment and change_cents > 0:
+            self.change_amount = from_cents(change_cents)
         else:
             self.change_amount = 0.0
         return self.change_amount
@@ -6,7 +6,9 @@ This module defines the Product class for the POS system.
 """
 
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from config import LOW_STOCK_THRESHOLD
 
 @dataclass
 class Product:
@@ -18,10 +20,14 @@ class Product:
     price: float  # Selling price
     barcode: Optional[str] = None
     category: Optional[str] = None
-    stock_quantity: int = 0
+    stock_quantity: int = 0  # Change with set_stock_quantity so stock_status follows
     is_active: bool = True
     supplier: Optional[str] = None
     cost_price: float = 0.0  # Cost price (without tax)
+    reorder_threshold: int = LOW_STOCK_THRESHOLD  # Low stock at or below this quantity
+    version: int = 0  # Catalog change number, used by register sync
+    # Stock bucket: "out_of_stock", "low_stock" or "in_stock"
+    stock_status: str = field(default="in_stock", init=False, compare=False)
     
     def __post_init__(self):
         """Validate product data after initialization."""
@@ -31,6 +37,26 @@ class Product:
             raise ValueError("Cost price cannot be negative")
         if not self.name or not self.name.strip():
             raise ValueError("Product name cannot be empty")
+        self._update_stock_status()
+    
+    def _update_stock_status(self):
+        """Recompute stock_status from the stock and the reorder threshold."""
+        if self.stock_quantity <= 0:
+            self.stock_status = "out_of_stock"
+        elif self.stock_quantity <= self.reorder_threshold:
+            self.stock_status = "low_stock"
+        else:
+            self.stock_status = "in_stock"
+    
+    def set_stock_quantity(self, quantity: int):
+        """Set the stock quantity and update stock_status."""
+        self.stock_quantity = quantity
+        self._update_stock_status()
+    
+    def set_reorder_threshold(self, threshold: int):
+        """Set the reorder threshold and update stock_status."""
+        self.reorder_threshold = threshold
+        self._update_stock_status()
     
     def __str__(self) -> str:
         return f"{self.name} - {self.price:.2f} د.م"
@@ -47,7 +73,9 @@ class Product:
             'stock_quantity': self.stock_quantity,
             'is_active': self.is_active,
             'supplier': self.supplier,
-            'cost_price': self.cost_price
+            'cost_price': self.cost_price,
+            'reorder_threshold': self.reorder_threshold,
+            'version': self.version
         }
     
     @classmethod
@@ -63,5 +91,7 @@ class Product:
             stock_quantity=data.get('stock_quantity', 0),
             is_active=data.get('is_active', True),
             supplier=data.get('supplier'),
-            cost_price=float(data.get('cost_price', 0.0))
+            cost_price=float(data.get('cost_price', 0.0)),
+            reorder_threshold=int(data.get('reorder_threshold', LOW_STOCK_THRESHOLD)),
+            version=int(data.get('version', 0))
         )
@@ -0,0 +1,103 @@
+"""
+Row Models
+==========
+
+Lightweight read models for sales history and reports.
+
+``SaleRow``, ``ItemRow`` and ``PaymentRow`` are slotted objects filled
+straight from database rows. They skip the validation of the full models (the
+rows were validated when the sale was saved), read totals from the stored
+columns instead of recomputing them, and an ``ItemRow`` does not build a
+``Product`` from a join. They expose the attributes that reports and history
+read from ``Sale``, ``SaleItem`` and ``Payment``; ``SaleRow.to_sale()`` builds
+the full model when a sale is printed or edited.
+"""
+
+from collections import namedtuple
+from datetime import datetime
+from typing import List, Optional
+
+from .payment import Payment, PaymentMethod, PaymentStatus
+from .product import Product
+from .sale import Sale, SaleItem
+
+# Product as seen from a sale line (id and name at the time of sale)
+ProductRef = namedtuple("ProductRef", "id name")
+
+class ItemRow:
+    """A sale line read from sale_items."""
+    
+    __slots__ = ("sale_id", "product_id", "product_name", "quantity", "unit_price",
+                 "discount", "subtotal", "total")
+    
+    # Columns in constructor order, for SELECTs over sale_items aliased "si"
+    COLUMNS = "si.sale_id, si.product_id, si.product_name, si.quantity, si.unit_price, si.discount, si.subtotal, si.total"
+    
+    def __init__(self, row: tuple):
+        """Initialize from a row of COLUMNS."""
+        (self.sale_id, self.product_id, self.product_name, self.quantity, self.unit_price,
+         self.discount, self.subtotal, self.total) = row
+    
+    @property
+    def product(self) -> ProductRef:
+        """Product id and name, for code written against SaleItem."""
+        return ProductRef(self.product_id, self.product_name)
+    
+    def to_sale_item(self) -> SaleItem:
+        """Full SaleItem (with a Product priced at the sale's unit price)."""
+        product = Product(id=self.product_id, name=self.product_name, description="", price=self.unit_price)
+        return SaleItem(product=product, quantity=self.quantity, unit_price=self.unit_price,
+                        discount=self.discount or 0.0)
+
+class PaymentRow:
+    """A payment read from payments."""
+    
+    __slots__ = ("sale_id", "method", "amount", "status", "change_amount", "transaction_id")
+    
+    COLUMNS = "p.sale_id, p.method, p.amount, p.status, p.change_amount, p.transaction_id"
+    
+    def __init__(self, row: tuple):
+        """Initialize from a row of COLUMNS."""
+        self.sale_id, method, self.amount, self.status, self.change_amount, self.transaction_id = row
+        self.method = PaymentMethod(method)
+    
+    @property
+    def is_cash_payment(self) -> bool:
+        """Check if this is a cash payment."""
+        return self.method == PaymentMethod.CASH
+    
+    def to_payment(self) -> Payment:
+        """Full Payment model."""
+        return Payment(method=self.method, amount=self.amount,
+                       status=PaymentStatus(self.status or "completed"),
+                       transaction_id=self.transaction_id, change_amount=self.change_amount or 0.0)
+
+class SaleRow:
+    """A sale header read from sales, with its lines and payment attached."""
+    
+    __slots__ = ("id", "timestamp", "subtotal", "tax_rate", "tax_amount", "discount", "total",
+                 "item_count", "notes", "cashier_id", "customer_id", "register_id", "sync_id",
+                 "rounding", "items", "payment")
+    
+    COLUMNS = ("s.id, s.timestamp, s.subtotal, s.tax_rate, s.tax_amount, s.discount, s.total, "
+               "s.item_count, s.notes, s.cashier_id, s.customer_id, s.register_id, s.sync_id, "
+               "s.rounding")
+    
+    def __init__(self, row: tuple):
+        """Initialize from a row of COLUMNS; items and payment are attached by the loader."""
+        (self.id, timestamp, self.subtotal, self.tax_rate, self.tax_amount, self.discount, self.total,
+         self.item_count, notes, self.cashier_id, self.customer_id, self.register_id, self.sync_id,
+         rounding) = row
+        self.rounding = rounding or 0.0
+        self.timestamp = datetime.fromisoformat(timestamp) if timestamp else None
+        self.notes = notes or ""
+        self.items: List[ItemRow] = []
+        self.payment: Optional[PaymentRow] = None
+    
+    def to_sale(self) -> Sale:
+        """Full Sale model, e.g. to reprint the receipt."""
+        return Sale(id=self.id, items=[item.to_sale_item() for item in self.items],
+                    timestamp=self.timestamp, payment=self.payment.to_payment() if self.payment else None,
+                    tax_rate=self.tax_rate or 0.0, discount=self.discount or 0.0, notes=self.notes,
+                    cashier_id=self.cashier_id, customer_id=self.customer_id,
+                    register_id=self.register_id, sync_id=self.sync_id)
@@ -3,13 +3,19 @@ Sale Models
 ===========
 
 This module defines the Sale and SaleItem classes for the POS system.
+
+Amounts are computed in integer centimes (see ``models.money``). A sale keeps
+the running totals of its lines in a ``BasketTotals``; lines are changed
+through ``add_item``, ``remove_item`` and ``set_quantity``, which adjust the
+totals, so reading ``Sale.total`` does not re-add the basket.
 """
 
-from typing import List, Optional
-from dataclasses import dataclass, field
+from dataclasses import InitVar, dataclass, field, replace
 from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
 from .product import Product
-from .payment import Payment
+from .payment import Payment, PaymentMethod
+from .money import BasketTotals, to_cents, from_cents, multiply, round_cash
 
 @dataclass
 class SaleItem:
@@ -27,15 +33,30 @@ class SaleItem:
         if self.quantity <= 0:
             raise ValueError("Quantity must be positive")
     
+    @property
+    def subtotal_cents(self) -> int:
+        """Line amount before discount, in centimes."""
+        return to_cents(self.unit_price) * self.quantity
+    
+    @property
+    def discount_cents(self) -> int:
+        """Line discount, in centimes."""
+        return to_cents(self.discount)
+    
+    @property
+    def total_cents(self) -> int:
+        """Line total after discount, in centimes."""
+        return self.subtotal_cents - self.discount_cents
+    
     @property
     def subtotal(self) -> float:
         """Calculate subtotal for this item."""
-        return self.unit_price * self.quantity
+        return from_cents(self.subtotal_cents)
     
     @property
     def total(self) -> float:
         """Calculate total after discount."""
-        return self.subtotal - self.discount
+        return from_cents(self.total_cents)
     
     def to_dict(self) -> dict:
         """Convert sale item to dictionary."""
@@ -51,10 +72,15 @@ class SaleItem:
 
 @dataclass
 class Sale:
-    """Represents a complete sale transaction."""
+    """Represents a complete sale transaction.
+    
+    ``items`` is a read-only view of the lines. A line is never changed in
+    place: ``set_quantity`` swaps in a copy, so lines can be shared between
+    sales (the cart and the sale it becomes) without touching the other's totals.
+    """
     
     id: Optional[int] = None
-    items: List[SaleItem] = field(default_factory=list)
+    items: InitVar[Iterable[SaleItem]] = ()
     timestamp: Optional[datetime] = None
     payment: Optional[Payment] = None
     tax_rate: float = 0.0
@@ -62,60 +88,131 @@ class Sale:
     notes: str = ""
     cashier_id: Optional[str] = None
     customer_id: Optional[str] = None
+    register_id: Optional[str] = None  # Register that rang the sale up
+    sync_id: Optional[str] = None  # Globally unique id used when replicating the sale
+    _items: List[SaleItem] = field(default_factory=list, init=False, repr=False)
+    _totals: BasketTotals = field(default_factory=BasketTotals, init=False, repr=False, compare=False)
     
-    def __post_init__(self):
-        """Set timestamp if not provided."""
+    def __post_init__(self, items: Iterable[SaleItem]):
+        """Set timestamp if not provided and count the initial lines."""
         if self.timestamp is None:
             self.timestamp = datetime.now()
+        for item in items:
+            self._add_line(item)
+    
+    def _add_line(self, item: SaleItem):
+        """Append a line and add it to the totals."""
+        self._items.append(item)
+        self._totals.add(item.subtotal_cents, item.discount_cents, item.quantity)
+    
+    def _replace_line(self, index: int, item: Optional[SaleItem]):
+        """Swap the line at index for item (None removes it), adjusting the totals."""
+        old = self._items[index]
+        self._totals.add(old.subtotal_cents, old.discount_cents, old.quantity, sign=-1)
+        if item is None:
+            del self._items[index]
+        else:
+            self._items[index] = item
+            self._totals.add(item.subtotal_cents, item.discount_cents, item.quantity)
+    
+    def _line_index(self, product_id: int) -> Optional[int]:
+        """Index of the line for a product, if any."""
+        return next((index for index, item in enumerate(self._items) if item.product.id == product_id), None)
+    
+    @property
+    def subtotal_cents(self) -> int:
+        """Subtotal of all items after their line discounts, in centimes."""
+        return self._totals.subtotal_cents - self._totals.discount_cents
+    
+    @property
+    def tax_cents(self) -> int:
+        """Tax on the subtotal, in centimes."""
+        return multiply(self.subtotal_cents, self.tax_rate)
+    
+    @property
+    def total_cents(self) -> int:
+        """Total amount, in centimes."""
+        return self.subtotal_cents + self.tax_cents - to_cents(self.discount)
     
     @property
     def subtotal(self) -> float:
         """Calculate subtotal of all items."""
-        return sum(item.subtotal for item in self.items)
+        return from_cents(self.subtotal_cents)
     
     @property
     def tax_amount(self) -> float:
         """Calculate tax amount."""
-        return self.subtotal * self.tax_rate
+        return from_cents(self.tax_cents)
     
     @property
     def total(self) -> float:
         """Calculate total amount."""
-        return self.subtotal + self.tax_amount - self.discount
+        return from_cents(self.total_cents)
+    
+    @property
+    def cash_total_cents(self) -> int:
+        """Total due in cash, rounded to the smallest coin (see CASH_ROUNDING), in centimes."""
+        return round_cash(self.total_cents)
+    
+    @property
+    def cash_total(self) -> float:
+        """Total due in cash, rounded to the smallest coin."""
+        return from_cents(self.cash_total_cents)
+    
+    @property
+    def rounding_cents(self) -> int:
+        """Cash rounding of the amount paid (amount due - total), in centimes; 0 unless paid in cash."""
+        if self.payment and self.payment.is_cash_payment:
+            return self.cash_total_cents - self.total_cents
+        return 0
+    
+    @property
+    def rounding(self) -> float:
+        """Cash rounding of the amount paid, so total + rounding is what the drawer received."""
+        return from_cents(self.rounding_cents)
+    
+    def amount_due(self, method: PaymentMethod) -> float:
+        """Get the amount due for a payment method (cash is rounded, card is exact)."""
+        return self.cash_total if method == PaymentMethod.CASH else self.total
     
     @property
     def item_count(self) -> int:
         """Get total number of items."""
-        return sum(item.quantity for item in self.items)
+        return self._totals.item_count
     
     def add_item(self, product: Product, quantity: int = 1):
-        """Add an item to the sale."""
-        # Check if product already exists in sale
-        for item in self.items:
-            if item.product.id == product.id:
-                item.quantity += quantity
-                return
-        
-        # Add new item
-        self.items.append(SaleItem(product, quantity))
+        """Add an item to the sale (adds to the product's line if it has one)."""
+        index = self._line_index(product.id)
+        if index is None:
+            self._add_line(SaleItem(product, quantity))
+        else:
+            item = self._items[index]
+            self._replace_line(index, replace(item, quantity=item.quantity + quantity))
     
     def remove_item(self, product_id: int):
         """Remove an item from the sale."""
-        self.items = [item for item in self.items if item.product.id != product_id]
+        index = self._line_index(product_id)
+        if index is not None:
+            self._replace_line(index, None)
+    
+    def set_quantity(self, product_id: int, quantity: int):
+        """Set the quantity of an item (0 or less removes it)."""
+        index = self._line_index(product_id)
+        if index is None:
+            return
+        if quantity <= 0:
+            self._replace_line(index, None)
+        else:
+            self._replace_line(index, replace(self._items[index], quantity=quantity))
     
     def update_item_quantity(self, product_id: int, quantity: int):
         """Update quantity of an item."""
-        for item in self.items:
-            if item.product.id == product_id:
-                if quantity <= 0:
-                    self.remove_item(product_id)
-                else:
-                    item.quantity = quantity
-                break
+        self.set_quantity(product_id, quantity)
     
     def clear_items(self):
         """Clear all items from the sale."""
-        self.items.clear()
+        self._items.clear()
+        self._totals.reset()
     
     def to_dict(self) -> dict:
         """Convert sale to dictionary."""
@@ -129,8 +226,42 @@ class Sale:
             'tax_amount': self.tax_amount,
             'discount': self.discount,
             'total': self.total,
+            'rounding': self.rounding,
             'item_count': self.item_count,
             'notes': self.notes,
             'cashier_id': self.cashier_id,
-            'customer_id': self.customer_id
+            'customer_id': self.customer_id,
+            'register_id': self.register_id,
+            'sync_id': self.sync_id
         }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Sale':
+        """Create sale from dictionary (as produced by to_dict)."""
+        items = [
+            SaleItem(
+                product=Product(id=item['product_id'], name=item['product_name'],
+                                description="", price=float(item['unit_price'])),
+                quantity=int(item['quantity']),
+                unit_price=float(item['unit_price']),
+                discount=float(item.get('discount', 0.0))
+            )
+            for item in data.get('items', [])
+        ]
+        return cls(
+            id=data.get('id'),
+            items=items,
+            timestamp=datetime.fromisoformat(data['timestamp']) if data.get('timestamp') else None,
+            payment=Payment.from_dict(data['payment']) if data.get('payment') else None,
+            tax_rate=float(data.get('tax_rate', 0.0)),
+            discount=float(data.get('discount', 0.0)),
+            notes=data.get('notes', ''),
+            cashier_id=data.get('cashier_id'),
+            customer_id=data.get('customer_id'),
+            register_id=data.get('register_id'),
+            sync_id=data.get('sync_id')
+        )
+
+# Assigned after the class body, where "items" is the constructor argument
+Sale.items = property(lambda self: tuple(self._items),
+                      doc="Lines of the sale (read-only; see add_item/remove_item/set_quantity).")
@@ -4,57 +4,100 @@ POS System GUI Application
 
 This module contains the main GUI application for the Point of Sale system.
 It provides a modern interface similar to the reference images with French localization.
+
+Startup is staged: only what the login and the register screen need is
+imported and built before the first frame. Receipt PDF generation
+(ReportLab), reports (matplotlib/pandas), CSV import, the backup manager and
+printer discovery are loaded on first use or warmed up after the window is
+shown.
 """
 
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from datetime import datetime
 import sqlite3
-from typing import List, Dict, Optional
+import threading
+from typing import List, Dict, Optional, Tuple
 from models.product import Product
 from models.sale import Sale, SaleItem
 from models.payment import Payment, PaymentMethod
 from database.db_manager import DatabaseManager
 from database.user_manager import user_manager
 from utils.receipt_printer import ReceiptPrinter
-from utils.advanced_receipt_printer import AdvancedReceiptPrinter
 from utils.session_manager import SessionManager
-from dialogs.receipt_settings_dialog import ReceiptSettingsDialog
-from dialogs.language_settings_dialog import LanguageSettingsDialog
-from dialogs.login_dialog import LoginDialog, UserManagementDialog
-from dialogs.settings_dialog import SettingsDialog
-from config.language_settings import language_manager, get_text
+from utils.helpers import collation_key
+from utils.startup_profiler import startup_profiler
+from utils.ui_monitor import ui_monitor
+from config import LOW_STOCK_THRESHOLD, REGISTER_ID, SYNC_SERVER_URL, SYNC_TOKEN, OUTBOX_SINK, OUTBOX_RETENTION_DAYS, UI_MONITOR_ENABLED
+from dialogs.login_dialog import LoginDialog
+from config.language_settings import language_manager, get_text, bind_text
 
 class POSApplication:
     """Main POS Application class with GUI interface."""
     
+    ORDER_HISTORY_PAGE_SIZE = 50
+    WARMUP_DELAY_MS = 500  # Let the first frame settle before warming up deferred modules
+    
+    # Modules preloaded in the background after the first frame (missing optional ones are skipped)
+    WARMUP_MODULES = (
+        "reportlab.platypus", "reportlab.lib.styles", "reportlab.lib.units",
+        "utils.csv_import", "dialogs.backup_settings_dialog",
+        "numpy", "pandas", "matplotlib.dates"
+    )
+    
+    # Product card style per stock bucket: background, border, indicator, status colour, status text
+    STOCK_CARD_STYLES = {
+        "out_of_stock": ("#ffebee", "#f44336", "🔴", "#d32f2f", "Rupture de stock"),
+        "low_stock": ("#fff3e0", "#ff9800", "🟠", "#f57c00", "Stock faible ({})"),
+        "in_stock": ("#e8f5e8", "#4caf50", "🟢", "#388e3c", "En stock ({})")
+    }
+    
     def __init__(self):
         """Initialize the POS application."""
-        self.root = tk.Tk()
-        self.setup_window()
+        with startup_profiler.phase("create Tk root"):
+            self.root = tk.Tk()
+            self.setup_window()
         
         # Initialize database
-        self.db_manager = DatabaseManager()
+        with startup_profiler.phase("open database"):
+            self.db_manager = DatabaseManager()
+        self.db_manager.stock_ledger.start()  # Daily stock snapshots, off the checkout path
         self.receipt_printer = ReceiptPrinter()
-        self.advanced_receipt_printer = AdvancedReceiptPrinter()
         
-        # Initialize backup manager
-        from utils.backup_manager import BackupManager
-        self.backup_manager = BackupManager()
+        # Built on first use or by the warm-up after the first frame
+        self._advanced_receipt_printer = None
+        self._backup_manager = None
+        self._lazy_lock = threading.Lock()
+        
+        # Multi-register sync: sales are pushed to the store hub and the catalog pulled from it
+        self.sync_client = None
+        if SYNC_SERVER_URL:
+            from utils.sync_service import SyncClient
+            self.sync_client = SyncClient(self.db_manager, SYNC_SERVER_URL, REGISTER_ID, token=SYNC_TOKEN)
+            self.sync_client.start()
+        
+        # Head office feed: committed sales are shipped from the outbox in the background
+        self.outbox_shipper = None
+        if OUTBOX_SINK:
+            from utils.outbox_shipper import OutboxShipper, create_sink
+            self.outbox_shipper = OutboxShipper(self.db_manager.db_path, create_sink(OUTBOX_SINK, SYNC_TOKEN),
+                                                retention_days=OUTBOX_RETENTION_DAYS)
+            self.outbox_shipper.start()
         
         # Set up language change callback
         language_manager.refresh_ui_callback(self.refresh_ui_language)
         
         # Initialize session manager with error handling
         try:
-            self.session_manager = SessionManager()
+            with startup_profiler.phase("session manager"):
+                self.session_manager = SessionManager(register_id=REGISTER_ID)
+                self.session_manager.migrate_json_sessions()
         except Exception as e:
             print(f"Warning: Session manager initialization failed: {e}")
             self.session_manager = None
         
         # Current sale and cart
-        self.current_sale = Sale()
-        self.cart_items: List[SaleItem] = []
+        self.current_sale = Sale()  # The cart; keeps its running totals
         self.products = []  # Initialize products list for barcode scanning
         
         # Store and register info
@@ -69,14 +112,23 @@ class POSApplication:
                 return
         
         # GUI components
-        self.create_widgets()
+        with startup_profiler.phase("build register screen"):
+            self.create_widgets()
+            
+            # Show main window first
+            self.root.update()
+            self.root.deiconify()
+            
+            # Setup layout first
+            self.setup_layout()
+        startup_profiler.mark("register screen shown")
         
-        # Show main window first
-        self.root.update()
-        self.root.deiconify()
+        # Event-loop lag watchdog: stalls and slow UI operations go to the trace file
+        if UI_MONITOR_ENABLED:
+            ui_monitor.start(self.root)
         
-        # Setup layout first
-        self.setup_layout()
+        # Deferred work runs once the register is usable
+        self.root.after(self.WARMUP_DELAY_MS, self._start_warmup)
         
         # Note: Cash drawer opening is handled in on_login_success after user login
         # No need to check here as well
@@ -84,12 +136,58 @@ class POSApplication:
         # Store and register info (moved to __init__)
         # These are now set in __init__ method
     
+    @property
+    def advanced_receipt_printer(self):
+        """Receipt printer for PDF and thermal output (built on first use)."""
+        if self._advanced_receipt_printer is None:
+            with self._lazy_lock:
+                if self._advanced_receipt_printer is None:
+                    from utils.advanced_receipt_printer import AdvancedReceiptPrinter
+                    self._advanced_receipt_printer = AdvancedReceiptPrinter()
+        return self._advanced_receipt_printer
+    
+    @property
+    def backup_manager(self):
+        """Backup manager and scheduler (built on first use)."""
+        if self._backup_manager is None:
+            with self._lazy_lock:
+                if self._backup_manager is None:
+                    from utils.backup_manager import BackupManager
+                    writers = [writer for writer in (self.outbox_shipper, self.sync_client,
+                                                     user_manager.audit_writer) if writer]
+                    self._backup_manager = BackupManager(db_manager=self.db_manager, writers=writers)
+        return self._backup_manager
+    
+    def _start_warmup(self):
+        """Start deferred services and preload slow modules in the background."""
+        with startup_profiler.phase("backup manager (deferred)"):
+            self.backup_manager  # Starts the backup scheduler
+        
+        threading.Thread(target=self._warmup_worker, name="StartupWarmup", daemon=True).start()
+    
+    def _warmup_worker(self):
+        """Preload receipt, report and import modules and discover printers."""
+        import importlib
+        for module in self.WARMUP_MODULES:
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                pass  # Optional dependency not installed; the feature reports it when used
+        
+        try:
+            self.advanced_receipt_printer.get_available_printers()
+        except Exception as e:
+            print(f"Printer discovery failed: {e}")
+    
     def show_login(self) -> bool:
         """Show login dialog. Returns True if login successful, False if cancelled."""
         self.root.withdraw()  # Hide main window
         
-        login_dialog = LoginDialog(None, self.on_login_success)
-        user = login_dialog.show()
+        with startup_profiler.phase("build login dialog"):
+            login_dialog = LoginDialog(None, self.on_login_success)
+        startup_profiler.mark("login shown")
+        with startup_profiler.phase("login", user_wait=True):
+            user = login_dialog.show()
         
         if not user:
             # User cancelled login
@@ -116,6 +214,11 @@ class POSApplication:
             if needs_drawer:
                 self.root.after(500, self._show_cash_drawer_delayed)
     
+    def _user_label_text(self) -> str:
+        """Text of the header's current user label."""
+        current_user = user_manager.get_current_user()
+        return f"{get_text('logged_in_as')}: {current_user.name}" if current_user else get_text("admin")
+    
     def update_user_display(self):
         """Update the display to show current user."""
         if hasattr(self, 'user_label') and user_manager.current_user:
@@ -152,9 +255,19 @@ class POSApplication:
             messagebox.showerror("Access Denied", "Only administrators can manage users")
             return
         
-        dialog = UserManagementDialog(self.root)
+        from dialogs.login_dialog import UserManagementDialog
+        dialog = UserManagementDialog(self.root, self.db_manager)
         dialog.show()
         
+    def show_ui_diagnostics(self):
+        """Show event-loop lag and UI operation timings (managers only)."""
+        if not user_manager.is_manager():
+            messagebox.showerror("Access Denied", "Only managers can view diagnostics")
+            return
+        
+        from dialogs.ui_diagnostics_dialog import UIDiagnosticsDialog
+        UIDiagnosticsDialog(self.root).show()
+    
     def setup_window(self):
         """Configure the main window with responsive behavior."""
         self.root.title(get_text("app_title"))
@@ -396,10 +509,10 @@ class POSApplication:
         
         # Current language indicator
         self.current_lang_indicator = tk.Label(self.sidebar_scrollable_frame, 
-                                              text=f"• {get_text('current_language')}: Français",
                                               bg="#e3f2fd", fg="#757575",  # Changed to soft blue bg with gray text
                                               font=("Arial", 8),
                                               anchor="w")
+        bind_text(self.current_lang_indicator, self._current_language_text)
         self.current_lang_indicator.pack(fill="x", padx=10, pady=(10, 20))
     
     def toggle_sidebar(self):
@@ -587,6 +700,12 @@ class POSApplication:
             # Silently handle any layout refresh errors
             pass
     
+    def _current_language_text(self) -> str:
+        """Text of the sidebar's current language indicator."""
+        lang_names = {"FR": "Français", "AR": "العربية", "EN": "English"}
+        lang_code = language_manager.settings.current_language
+        return f"• {get_text('current_language')}: {lang_names.get(lang_code, lang_code)}"
+    
     def quick_change_language(self, lang_code):
         """Quick change language and refresh UI."""
         try:
@@ -600,12 +719,6 @@ class POSApplication:
             self.refresh_ui_language()
             self.update_sidebar_display()
             
-            # Update current language indicator
-            lang_names = {"FR": "Français", "AR": "العربية", "EN": "English"}
-            current_name = lang_names.get(lang_code, lang_code)
-            if hasattr(self, 'current_lang_indicator'):
-                self.current_lang_indicator.config(text=f"• {get_text('current_language')}: {current_name}")
-            
             print(f"Language changed to: {language_manager.settings.current_language}")
             
         except Exception as e:
@@ -655,14 +768,14 @@ class POSApplication:
         logo_frame = ttk.Frame(header_frame)
         logo_frame.grid(row=0, column=0, sticky="w")
         
-        title_label = ttk.Label(logo_frame, text=get_text("point_of_sale"), 
-                               font=("Arial", 14, "bold"),  # Reduced from 16 to 14
+        title_label = ttk.Label(logo_frame, font=("Arial", 14, "bold"),  # Reduced from 16 to 14
                                foreground="#1976d2")  # Changed to soft blue
+        bind_text(title_label, "point_of_sale")
         title_label.pack()
         
-        subtitle_label = ttk.Label(logo_frame, text=get_text("pos"),
-                                  font=("Arial", 10),  # Reduced from 12 to 10
+        subtitle_label = ttk.Label(logo_frame, font=("Arial", 10),  # Reduced from 12 to 10
                                   foreground="#424242")  # Changed to dark gray
+        bind_text(subtitle_label, "pos")
         subtitle_label.pack()
         
         # Store and register info - more compact
@@ -682,33 +795,39 @@ class POSApplication:
         user_frame.grid(row=0, column=2, sticky="e")
         
         # Settings button - positioned at top right
-        settings_btn = ttk.Button(user_frame, text="⚙️ " + get_text("settings"),
-                                command=self.open_settings_dialog,
+        settings_btn = ttk.Button(user_frame, command=self.open_settings_dialog,
                                 style="Accent.TButton")
+        bind_text(settings_btn, lambda: "⚙️ " + get_text("settings"))
         settings_btn.pack(side="right", padx=(5, 0))
         
         # Current user display
-        current_user = user_manager.get_current_user()
-        user_text = f"{get_text('logged_in_as')}: {current_user.name}" if current_user else get_text("admin")
-        self.user_label = ttk.Label(user_frame, text=user_text, font=("Arial", 10))  # Reduced from 12 to 10
+        self.user_label = ttk.Label(user_frame, font=("Arial", 10))  # Reduced from 12 to 10
+        bind_text(self.user_label, self._user_label_text)
         self.user_label.pack(side="right", padx=(0, 10))
         
         # Admin panel button (only for admins) - more compact
         if user_manager.is_admin():
-            admin_btn = ttk.Button(user_frame, text=get_text("admin_panel"),
-                                  command=self.show_user_management,
+            admin_btn = ttk.Button(user_frame, command=self.show_user_management,
                                   style="Info.TButton")
+            bind_text(admin_btn, "admin_panel")
             admin_btn.pack(side="right", padx=(0, 5))
         
+        # UI diagnostics (managers and admins)
+        if user_manager.is_manager():
+            diagnostics_btn = ttk.Button(user_frame, command=self.show_ui_diagnostics,
+                                        style="Info.TButton")
+            bind_text(diagnostics_btn, "ui_diagnostics")
+            diagnostics_btn.pack(side="right", padx=(0, 5))
+        
         # Cash management button - more compact
-        cash_mgmt_btn = ttk.Button(user_frame, text=get_text("manage_cash").upper(),
-                                  command=self.manage_cash,
+        cash_mgmt_btn = ttk.Button(user_frame, command=self.manage_cash,
                                   style="Warning.TButton")
+        bind_text(cash_mgmt_btn, lambda: get_text("manage_cash").upper())
         cash_mgmt_btn.pack(side="right", padx=(0, 5))
         
-        logout_btn = ttk.Button(user_frame, text=get_text("logout"),
-                               command=self.logout_user,
+        logout_btn = ttk.Button(user_frame, command=self.logout_user,
                                style="Danger.TButton")
+        bind_text(logout_btn, "logout")
         logout_btn.pack(side="right", padx=(0, 5))
         
     def show_register_screen(self):
@@ -745,17 +864,17 @@ class POSApplication:
         btn_frame.grid(row=0, column=0, sticky="ew", pady=(0, 5))  # Reduced from 10 to 5
         
         buttons_data = [
-            (get_text("all"), "#90a4ae", self.show_all_products),     # Soft gray
-            (get_text("inventory"), "#64b5f6", self.show_inventory),  # Soft blue
-            (get_text("scan_product"), "#81c784", self.scan_product)  # Soft green
+            ("all", "#90a4ae", self.show_all_products),     # Soft gray
+            ("inventory", "#64b5f6", self.show_inventory),  # Soft blue
+            ("scan_product", "#81c784", self.scan_product)  # Soft green
         ]
         
-        for i, (text, color, command) in enumerate(buttons_data):
-            btn = tk.Button(btn_frame, text=text, 
-                           command=command,
+        for i, (text_key, color, command) in enumerate(buttons_data):
+            btn = tk.Button(btn_frame, command=command,
                            bg=color, fg="black",  # Changed to black text
                            font=("Arial", 9),  # Slightly smaller font
                            padx=12, pady=4)    # Reduced padding
+            bind_text(btn, text_key)
             btn.grid(row=0, column=i, padx=3, sticky="ew")  # Reduced padx from 5 to 3
             
     def create_products_area(self, parent):
@@ -773,9 +892,9 @@ class POSApplication:
         header_frame.columnconfigure(1, weight=1)
         
         # Products title (smaller)
-        products_title = tk.Label(header_frame, text="🛍️ Produits", 
-                                 font=("Arial", 12, "bold"),  # Reduced from 14 to 12
+        products_title = tk.Label(header_frame, font=("Arial", 12, "bold"),  # Reduced from 14 to 12
                                  bg="#64b5f6", fg="black")  # Changed to black text
+        bind_text(products_title, lambda: f"🛍️ {get_text('products')}")
         products_title.grid(row=0, column=0, padx=10, pady=8, sticky="w")  # Reduced padding
         
         # Product count indicator (will be updated dynamically)
@@ -784,6 +903,13 @@ class POSApplication:
                                             bg="#64b5f6", fg="#1a237e")  # Dark blue text
         self.products_count_label.grid(row=0, column=1, padx=10, pady=8, sticky="e")  # Reduced padding
         
+        # Low stock banner (click to show only low-stock products)
+        self.low_stock_label = tk.Label(header_frame, text="",
+                                       font=("Arial", 9, "bold"),
+                                       bg="#64b5f6", fg="#b71c1c", cursor="hand2")
+        self.low_stock_label.grid(row=0, column=2, padx=(0, 10), pady=8, sticky="e")
+        self.low_stock_label.bind("<Button-1>", lambda e: self.show_low_stock_products())
+        
         # Scrollable frame for products with improved responsiveness
         self.products_canvas = tk.Canvas(products_container, bg="white", highlightthickness=0)  # Changed to white
         scrollbar = ttk.Scrollbar(products_container, orient="vertical", command=self.products_canvas.yview)
@@ -854,9 +980,9 @@ class POSApplication:
         header_frame.grid(row=0, column=0, sticky="ew", padx=0, pady=0)
         header_frame.grid_propagate(False)
         
-        cart_header = tk.Label(header_frame, text=f"🛒 {get_text('cart_header')}", 
-                              font=("Arial", 14, "bold"),  # Reduced from 16 to 14
+        cart_header = tk.Label(header_frame, font=("Arial", 14, "bold"),  # Reduced from 16 to 14
                               bg="#64b5f6", fg="black")  # Changed to black text
+        bind_text(cart_header, lambda: f"🛒 {get_text('cart_header')}")
         cart_header.pack(pady=10)  # Reduced from 15 to 10
         
         # Items count indicator
@@ -877,9 +1003,9 @@ class POSApplication:
                              bg="white", fg="#e0e0e0")  # Changed to white bg with light gray icon
         empty_icon.pack(pady=(50, 10))
         
-        empty_text = tk.Label(self.empty_cart_frame, text=get_text("cart_empty"),
-                             font=("Arial", 12),
+        empty_text = tk.Label(self.empty_cart_frame, font=("Arial", 12),
                              bg="white", fg="#757575")  # Changed to white bg with gray text
+        bind_text(empty_text, "cart_empty")
         empty_text.pack()
         
         # Quick actions frame (appears when cart has items)
@@ -943,8 +1069,8 @@ class POSApplication:
         items_frame = tk.Frame(totals_frame, bg="#e3f2fd")
         items_frame.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 8))  # Reduced from 10 to 8
         
-        tk.Label(items_frame, text="Articles:", font=("Arial", 10),  # Reduced from 11 to 10
-                bg="#e3f2fd", fg="#555").pack(side="left")
+        bind_text(tk.Label(items_frame, font=("Arial", 10),  # Reduced from 11 to 10
+                           bg="#e3f2fd", fg="#555"), lambda: f"{get_text('items')}:").pack(side="left")
         self.items_count_label = tk.Label(items_frame, text="0", 
                                          font=("Arial", 10, "bold"),  # Reduced from 11 to 10
                                          bg="#e3f2fd", fg="#1976d2")
@@ -954,9 +1080,8 @@ class POSApplication:
         subtotal_frame = tk.Frame(totals_frame, bg="#e3f2fd")
         subtotal_frame.grid(row=1, column=0, columnspan=2, sticky="ew", pady=3)  # Reduced from 5 to 3
         
-        tk.Label(subtotal_frame, text=get_text("subtotal_label"), 
-                font=("Arial", 11),  # Reduced from 12 to 11
-                bg="#e3f2fd", fg="#333").pack(side="left")
+        bind_text(tk.Label(subtotal_frame, font=("Arial", 11),  # Reduced from 12 to 11
+                           bg="#e3f2fd", fg="#333"), "subtotal_label").pack(side="left")
         self.subtotal_label = tk.Label(subtotal_frame, text="0,00 DH", 
                                       font=("Arial", 11, "bold"),  # Reduced from 12 to 11
                                       bg="#e3f2fd", fg="#666")
@@ -970,9 +1095,8 @@ class POSApplication:
         total_frame = tk.Frame(totals_frame, bg="#e3f2fd")
         total_frame.grid(row=3, column=0, columnspan=2, sticky="ew")
         
-        tk.Label(total_frame, text=get_text("total_label"), 
-                font=("Arial", 16, "bold"),  # Reduced from 18 to 16
-                bg="#e3f2fd", fg="#1976d2").pack(side="left")
+        bind_text(tk.Label(total_frame, font=("Arial", 16, "bold"),  # Reduced from 18 to 16
+                           bg="#e3f2fd", fg="#1976d2"), "total_label").pack(side="left")
         self.total_label = tk.Label(total_frame, text="0,00 DH", 
                                    font=("Arial", 16, "bold"),  # Reduced from 18 to 16
                                    bg="#e3f2fd", fg="#1976d2")
@@ -983,21 +1107,21 @@ class POSApplication:
         payment_frame.grid(row=1, column=0, sticky="ew")
         
         # Payment button
-        self.pay_button = tk.Button(payment_frame, text=f"💳 {get_text('pay').upper()}",
-                                   command=self.process_payment,
+        self.pay_button = tk.Button(payment_frame, command=self.process_payment,
                                    bg="#64b5f6", fg="black",  # Changed to soft blue with black text
                                    font=("Arial", 14, "bold"),
                                    relief="flat", padx=30, pady=12,
                                    cursor="hand2", state="disabled")
+        bind_text(self.pay_button, lambda: f"💳 {get_text('pay').upper()}")
         self.pay_button.pack(fill="x", padx=20, pady=(0, 5))
         
         # Suspend cart button
-        suspend_button = tk.Button(payment_frame, text=f"⏸️ {get_text('suspend_cart')}",
-                                  command=self.suspend_cart,
+        suspend_button = tk.Button(payment_frame, command=self.suspend_cart,
                                   bg="#ffb74d", fg="black",  # Changed to soft orange with black text
                                   font=("Arial", 11, "bold"),
                                   relief="flat", padx=20, pady=8,
                                   cursor="hand2")
+        bind_text(suspend_button, lambda: f"⏸️ {get_text('suspend_cart')}")
         suspend_button.pack(fill="x", padx=20)
         
         # Add hover effects for buttons with soft theme
@@ -1034,7 +1158,20 @@ class POSApplication:
         self.products = products  # Store products for barcode scanning
         self.current_products = products  # Store for responsive resizing
         self.display_products(products)
+        self.update_low_stock_banner()
+        
+    def update_low_stock_banner(self):
+        """Show how many products are at or below their reorder threshold."""
+        if not hasattr(self, 'low_stock_label'):
+            return
+        count = self.db_manager.get_low_stock_count()
+        self.low_stock_label.config(text=f"⚠️ {get_text('low_stock')}: {count}" if count else "")
+    
+    def show_low_stock_products(self):
+        """Display only the products that need reordering."""
+        self.display_products(self.db_manager.get_low_stock_products())
         
+    @ui_monitor.trace("display_products")
     def display_products(self, products: List[Product]):
         """Display products in a responsive 3-column grid with dynamic sizing."""
         # Store current products for responsive resizing
@@ -1099,22 +1236,10 @@ class POSApplication:
                 self.products_scrollable_frame.rowconfigure(row, weight=0, minsize=120)  # Fixed height for compactness
                 current_row = row
             
-            # Determine product card styling based on stock
-            if product.stock_quantity == 0:
-                card_bg = "#ffebee"  # Light red background
-                card_border = "#f44336"  # Red border
-                stock_indicator = "🔴"
-                stock_status = "Rupture de stock"
-            elif product.stock_quantity <= 3:
-                card_bg = "#fff3e0"  # Light orange background  
-                card_border = "#ff9800"  # Orange border
-                stock_indicator = "🟠"
-                stock_status = f"Stock faible ({product.stock_quantity})"
-            else:
-                card_bg = "#e8f5e8"  # Light green background
-                card_border = "#4caf50"  # Green border
-                stock_indicator = "🟢"
-                stock_status = f"En stock ({product.stock_quantity})"
+            # Determine product card styling based on the product's stock bucket
+            card_bg, card_border, stock_indicator, status_color, status_format = \
+                self.STOCK_CARD_STYLES[product.stock_status]
+            stock_status = status_format.format(product.stock_quantity)
             
             # Create responsive product card - more compact
             product_frame = tk.Frame(self.products_scrollable_frame, 
@@ -1170,7 +1295,6 @@ class POSApplication:
             price_label.grid(row=2, column=0, pady=(0, 4))  # Reduced padding
             
             # Stock status with responsive text - more compact
-            status_color = {"🔴": "#d32f2f", "🟠": "#f57c00", "🟢": "#388e3c"}[stock_indicator]
             status_label = tk.Label(product_frame, text=stock_status,
                                    font=("Arial", 8, "bold"),  # Reduced font size
                                    bg=card_bg, fg=status_color,
@@ -1229,28 +1353,23 @@ class POSApplication:
         # Schedule width update after layout is complete
         self.products_canvas.after(100, update_frame_width)
     
+    @ui_monitor.trace("add_to_cart")
     def add_to_cart(self, product: Product):
         """Add a product to the cart."""
-        # Check if product already in cart
-        for item in self.cart_items:
-            if item.product.id == product.id:
-                item.quantity += 1
-                break
-        else:
-            # Add new item
-            sale_item = SaleItem(product, 1)
-            self.cart_items.append(sale_item)
+        # Adds to the product's line if it is already in the cart
+        self.current_sale.add_item(product, 1)
         
         self.update_cart_display()
         self.update_totals()
     
+    @ui_monitor.trace("update_cart_display")
     def update_cart_display(self):
         """Update the modern cart display."""
         # Clear existing cart items
         for widget in self.cart_scrollable_frame.winfo_children():
             widget.destroy()
             
-        total_items = sum(item.quantity for item in self.cart_items)
+        total_items = self.current_sale.item_count
         
         # Update cart count in header
         if hasattr(self, 'cart_count_label'):
@@ -1286,7 +1405,7 @@ class POSApplication:
     
     def create_cart_item_card(self, idx, item):
         """Create a modern cart item card."""
-        total_price = item.product.price * item.quantity
+        total_price = item.total  # Same centime arithmetic as the basket totals
         
         # Main item card frame
         card_frame = tk.Frame(self.cart_scrollable_frame, 
@@ -1311,7 +1430,7 @@ class POSApplication:
         name_label.grid(row=0, column=0, sticky="w")
         
         # Unit price
-        price_label = tk.Label(info_frame, text=f"{item.product.price:.2f} DH/unité",
+        price_label = tk.Label(info_frame, text=f"{item.unit_price:.2f} DH/unité",
                               font=("Arial", 10),
                               bg="#ffffff", fg="#666",
                               anchor="e")
@@ -1397,7 +1516,7 @@ class POSApplication:
                 self.remove_cart_item(item_index)
             elif new_quantity <= item.product.stock_quantity:
                 # Update quantity if stock is available
-                item.quantity = new_quantity
+                self.current_sale.set_quantity(item.product.id, new_quantity)
                 self.update_cart_display()
             else:
                 # Show stock limit message
@@ -1409,7 +1528,8 @@ class POSApplication:
     def remove_cart_item(self, item_index):
         """Remove item from cart with confirmation."""
         if 0 <= item_index < len(self.cart_items):
-            removed_item = self.cart_items.pop(item_index)
+            removed_item = self.cart_items[item_index]
+            self.current_sale.remove_item(removed_item.product.id)
             self.update_cart_display()
             
             # Show confirmation message
@@ -1417,13 +1537,17 @@ class POSApplication:
                               f"{removed_item.product.name} {get_text('removed_from_cart')}")
             self.qty_label.config(text=str(self.cart_items[self.selected_cart_index].quantity))
     
+    @property
+    def cart_items(self) -> Tuple[SaleItem, ...]:
+        """Lines in the cart (change them through current_sale)."""
+        return self.current_sale.items
+    
     def update_totals(self):
         """Update the totals display."""
-        subtotal = sum(item.product.price * item.quantity for item in self.cart_items)
-        total = subtotal  # Add tax, discounts, etc. here
+        sale = self.current_sale
         
-        self.subtotal_label.config(text=f"{subtotal:.2f} DH")
-        self.total_label.config(text=f"{total:.2f} DH")
+        self.subtotal_label.config(text=f"{sale.subtotal:.2f} DH")
+        self.total_label.config(text=f"{sale.total:.2f} DH")
     
     def process_payment(self):
         """Process payment for the current sale."""
@@ -1431,10 +1555,10 @@ class POSApplication:
             messagebox.showwarning(get_text("empty_cart"), get_text("add_products_before_payment"))
             return
             
-        total = sum(item.product.price * item.quantity for item in self.cart_items)
+        sale = self.current_sale
         
-        # Open payment dialog
-        payment_window = PaymentWindow(self.root, total, self.complete_sale)
+        # Open payment dialog (cash pays the rounded total)
+        payment_window = PaymentWindow(self.root, sale.total, self.complete_sale, cash_total=sale.cash_total)
     
     def complete_sale(self, payment: Payment):
         """Complete the sale after payment."""
@@ -1444,22 +1568,19 @@ class POSApplication:
                 messagebox.showerror(get_text("error"), get_text("cart_empty_error"))
                 return
             
-            # Calculate total
-            total = sum(item.product.price * item.quantity for item in self.cart_items)
+            # Create sale record from the cart's lines
+            sale = Sale(items=self.cart_items)
+            amount_due = sale.amount_due(payment.method)
             
             # Validate payment amount
-            if payment.amount < total:
+            if payment.amount < amount_due:
                 messagebox.showerror(get_text("error"), get_text("insufficient_payment"))
                 return
             
             # Calculate change for cash payments
             if payment.is_cash_payment:
-                payment.calculate_change(total)
+                payment.calculate_change(amount_due)
             
-            # Create sale record
-            sale = Sale()
-            sale.items = self.cart_items.copy()
-            # Note: sale.total is a computed property, no need to set it manually
             sale.payment = payment
             sale.timestamp = datetime.now()
             
@@ -1467,19 +1588,7 @@ class POSApplication:
             current_user = user_manager.get_current_user()
             sale.cashier_id = current_user.id if current_user else 1
         
-            # Save to database
-            sale_id = self.db_manager.save_sale(sale)
-            sale.id = sale_id
-            
-            # Update stock quantities - subtract sold items from inventory
-            for item in sale.items:
-                new_stock = item.product.stock_quantity - item.quantity
-                self.db_manager.update_product_stock(item.product.id, new_stock)
-                # Update the local product object as well
-                item.product.stock_quantity = new_stock
-            
-            # Refresh product display to show updated stock
-            self.load_products()
+            sale_id = self._commit_sale(sale)
             
             # Log sale activity
             if current_user:
@@ -1537,9 +1646,27 @@ class POSApplication:
             messagebox.showerror(get_text("error"), f"{get_text('sale_finalization_error')}: {str(e)}")
             print(f"Error in complete_sale: {e}")  # For debugging
     
+    @ui_monitor.trace("commit_sale")
+    def _commit_sale(self, sale: Sale) -> int:
+        """Save a paid sale and its stock changes, then refresh the product grid.
+        
+        Traced on its own so the metric excludes the receipt dialogs that follow.
+        """
+        # Save to database (scheduled backups wait until this completes)
+        with self.backup_manager.sale_transaction():
+            # Sale and stock decrements commit together (local products updated too)
+            sale_id = self.db_manager.save_sale(sale, apply_stock=True)
+        
+        if self.outbox_shipper:
+            self.outbox_shipper.notify()
+        
+        # Refresh product display to show updated stock
+        self.load_products()
+        return sale_id
+    
     def clear_cart(self):
         """Clear the current cart."""
-        self.cart_items.clear()
+        self.current_sale.clear_items()
         self.update_cart_display()
         self.update_totals()
     
@@ -1622,6 +1749,7 @@ class POSApplication:
         self.root.wait_window(dialog.window)
         
     # Navigation methods for sidebar
+    @ui_monitor.trace("show_order_history")
     def show_order_history(self):
         """Show the order history screen."""
         # Clear the content area
@@ -1783,104 +1911,204 @@ class POSApplication:
         filter_frame = ttk.LabelFrame(main_frame, text=get_text("filters"), padding="10")
         filter_frame.pack(fill="x", pady=(0, 20))
         
-        ttk.Label(filter_frame, text=get_text("all_registers")).pack(anchor="w")
+        ttk.Label(filter_frame, text=get_text("all_registers")).grid(row=0, column=0, columnspan=8, sticky="w", pady=(0, 5))
+        
+        ttk.Label(filter_frame, text=get_text("from_date")).grid(row=1, column=0, sticky="w")
+        from_date_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=from_date_var, width=12).grid(row=1, column=1, padx=(5, 15))
+        
+        ttk.Label(filter_frame, text=get_text("to_date")).grid(row=1, column=2, sticky="w")
+        to_date_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=to_date_var, width=12).grid(row=1, column=3, padx=(5, 15))
+        
+        ttk.Label(filter_frame, text=get_text("cashier")).grid(row=1, column=4, sticky="w")
+        cashier_names = {get_text("all"): None}
+        for user_id, name in user_manager.get_user_names().items():
+            cashier_names[name] = user_id
+        cashier_var = tk.StringVar(value=get_text("all"))
+        ttk.Combobox(filter_frame, textvariable=cashier_var, values=list(cashier_names),
+                     state="readonly", width=15).grid(row=1, column=5, padx=(5, 15))
+        
+        ttk.Label(filter_frame, text=get_text("payment_method")).grid(row=1, column=6, sticky="w")
+        method_names = {get_text("all"): None,
+                        get_text("pay_cash"): PaymentMethod.CASH.value,
+                        get_text("pay_card"): PaymentMethod.CARD.value}
+        method_var = tk.StringVar(value=get_text("all"))
+        ttk.Combobox(filter_frame, textvariable=method_var, values=list(method_names),
+                     state="readonly", width=12).grid(row=1, column=7, padx=(5, 15))
+        
+        ttk.Label(filter_frame, text=get_text("min_amount")).grid(row=2, column=0, sticky="w", pady=(5, 0))
+        min_total_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=min_total_var, width=12).grid(row=2, column=1, padx=(5, 15), pady=(5, 0))
+        
+        ttk.Label(filter_frame, text=get_text("max_amount")).grid(row=2, column=2, sticky="w", pady=(5, 0))
+        max_total_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=max_total_var, width=12).grid(row=2, column=3, padx=(5, 15), pady=(5, 0))
         
         # Orders list
         orders_frame = ttk.Frame(main_frame)
         orders_frame.pack(fill="both", expand=True)
         
-        # Get sales from database
-        sales = self.db_manager.get_all_sales()
+        no_orders_label = ttk.Label(orders_frame,
+                                   text=get_text("no_orders_found"),
+                                   font=("Arial", 14),
+                                   foreground="#666")
         
-        if not sales:
-            no_orders_label = ttk.Label(orders_frame, 
-                                       text=get_text("no_orders_found"),
-                                       font=("Arial", 14),
-                                       foreground="#666")
-            no_orders_label.pack(pady=50)
-        else:
-            # Create orders list with treeview
-            columns = ("Commande", "Heure", "Client", "Total", "Statut")
-            orders_tree = ttk.Treeview(orders_frame, columns=columns, show="headings", height=12)
-            
-            # Configure columns
-            orders_tree.heading("Commande", text=get_text("order"))
-            orders_tree.heading("Heure", text=get_text("time"))
-            orders_tree.heading("Client", text=get_text("client"))
-            orders_tree.heading("Total", text=get_text("total"))
-            orders_tree.heading("Statut", text=get_text("status"))
-            
-            orders_tree.column("Commande", width=100)
-            orders_tree.column("Heure", width=150)
-            orders_tree.column("Client", width=150)
-            orders_tree.column("Total", width=100)
-            orders_tree.column("Statut", width=120)
-            
-            # Add sales data
-            self.sales_data = {}  # Store sales by item ID for easy retrieval
+        # Create orders list with treeview
+        columns = ("Commande", "Heure", "Client", "Total", "Statut")
+        orders_tree = ttk.Treeview(orders_frame, columns=columns, show="headings", height=12)
+        
+        # Configure columns
+        orders_tree.heading("Commande", text=get_text("order"))
+        orders_tree.heading("Heure", text=get_text("time"))
+        orders_tree.heading("Client", text=get_text("client"))
+        orders_tree.heading("Total", text=get_text("total"))
+        orders_tree.heading("Statut", text=get_text("status"))
+        
+        orders_tree.column("Commande", width=100)
+        orders_tree.column("Heure", width=150)
+        orders_tree.column("Client", width=150)
+        orders_tree.column("Total", width=100)
+        orders_tree.column("Statut", width=120)
+        
+        # Create frame for treeview and scrollbar
+        tree_frame = ttk.Frame(orders_frame)
+        tree_frame.pack(fill="both", expand=True, pady=(0, 20))
+        
+        # Scrollbar for orders
+        orders_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=orders_tree.yview)
+        
+        def on_tree_scroll(first, last):
+            """Update the scrollbar and fetch the next page near the bottom."""
+            orders_scrollbar.set(first, last)
+            # Scroll callbacks keep coming while a page is queued; schedule it only once
+            if float(last) >= 0.95 and self.order_history_cursor and not self.order_history_page_pending:
+                self.order_history_page_pending = True
+                orders_tree.after_idle(load_orders_page)
+        
+        orders_tree.configure(yscrollcommand=on_tree_scroll)
+        
+        orders_tree.pack(side="left", fill="both", expand=True)
+        orders_scrollbar.pack(side="right", fill="y")
+        
+        self.sales_data = {}  # Store sales by item ID for easy retrieval
+        self.order_history_cursor = None
+        self.order_history_filters = {}
+        self.order_history_page_pending = False  # Set from scheduling until the page's rows are shown
+        
+        def load_orders_page():
+            """Append the next page of order headers to the list."""
+            self.order_history_page_pending = True
+            try:
+                show_orders_page()
+            finally:
+                self.order_history_page_pending = False
+        
+        def show_orders_page():
+            """Fetch the page after the cursor, insert its rows and advance the cursor."""
+            sales, self.order_history_cursor = self.db_manager.get_sales_page(
+                limit=self.ORDER_HISTORY_PAGE_SIZE,
+                after=self.order_history_cursor,
+                **self.order_history_filters
+            )
+            
             for sale in sales:
-                time_str = sale.timestamp.strftime("%d/%m/%Y %H:%M") if sale.timestamp else ""
-                payment_method = get_text("cash") if sale.payment and sale.payment.is_cash_payment else get_text("card")
+                time_str = sale["timestamp"].strftime("%d/%m/%Y %H:%M") if sale["timestamp"] else ""
+                payment_method = get_text("cash") if sale["payment_method"] == PaymentMethod.CASH.value else get_text("card")
                 item_id = orders_tree.insert("", "end", values=(
-                    f"#{sale.id}",
+                    f"#{sale['id']}",
                     time_str,
                     "Client invité",
-                    f"{sale.total:.2f} DH",
+                    f"{sale['total']:.2f} DH",
                     f"Payé en : {payment_method} - Terminée"
                 ))
                 # Store sale ID mapping for later retrieval
-                self.sales_data[item_id] = sale.id
-            
-            # Create frame for treeview and scrollbar
-            tree_frame = ttk.Frame(orders_frame)
-            tree_frame.pack(fill="both", expand=True, pady=(0, 20))
-            
-            # Scrollbar for orders
-            orders_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=orders_tree.yview)
-            orders_tree.configure(yscrollcommand=orders_scrollbar.set)
-            
-            orders_tree.pack(side="left", fill="both", expand=True)
-            orders_scrollbar.pack(side="right", fill="y")
+                self.sales_data[item_id] = sale["id"]
             
-            # Action buttons frame
-            actions_frame = ttk.Frame(orders_frame)
-            actions_frame.pack(fill="x")
+            if self.sales_data:
+                no_orders_label.pack_forget()
+            else:
+                no_orders_label.pack(before=tree_frame, pady=50)
+            load_more_btn.config(state="normal" if self.order_history_cursor else "disabled")
+        
+        def parse_date(value, end_of_day=False):
+            """Parse a YYYY-MM-DD filter value."""
+            if not value.strip():
+                return None
+            parsed = datetime.strptime(value.strip(), "%Y-%m-%d")
+            return parsed.replace(hour=23, minute=59, second=59, microsecond=999999) if end_of_day else parsed
+        
+        def parse_amount(value):
+            """Parse an amount filter value."""
+            return float(value.replace(",", ".")) if value.strip() else None
+        
+        def apply_filters():
+            """Reload the list from the first page with the current filters."""
+            try:
+                self.order_history_filters = {
+                    "start_date": parse_date(from_date_var.get()),
+                    "end_date": parse_date(to_date_var.get(), end_of_day=True),
+                    "cashier_id": cashier_names.get(cashier_var.get()),
+                    "payment_method": method_names.get(method_var.get()),
+                    "min_total": parse_amount(min_total_var.get()),
+                    "max_total": parse_amount(max_total_var.get())
+                }
+            except ValueError:
+                messagebox.showerror(get_text("error"), get_text("invalid_filter_value"))
+                return
             
-            def get_selected_sale_id():
-                """Get the selected sale ID from the treeview."""
-                selection = orders_tree.selection()
-                if not selection:
-                    messagebox.showwarning(get_text("warning"), get_text("no_order_selected"))
-                    return None
-                
-                # Get sale ID from our stored mapping
-                item_id = selection[0]
-                if item_id in self.sales_data:
-                    return self.sales_data[item_id]
-                else:
-                    messagebox.showerror(get_text("error"), "ID de commande non trouvé")
-                    return None
-            
-            def on_view_details():
-                """Handle view details button click."""
-                sale_id = get_selected_sale_id()
-                if sale_id:
-                    self.show_order_details(sale_id)
-            
-            def on_print_order():
-                """Handle print order button click."""
-                sale_id = get_selected_sale_id()
-                if sale_id:
-                    self.print_order_from_history(sale_id)
-            
-            # Add action buttons
-            ttk.Button(actions_frame, text=get_text("view_order"),
-                      command=on_view_details, style="Info.TButton").pack(side="left", padx=(0, 10))
-            ttk.Button(actions_frame, text=get_text("reprint_receipt"),
-                      command=on_print_order, style="Success.TButton").pack(side="left", padx=(0, 10))
-            
-            # Double-click to view details
-            orders_tree.bind("<Double-1>", lambda e: on_view_details())
+            orders_tree.delete(*orders_tree.get_children())
+            self.sales_data = {}
+            self.order_history_cursor = None
+            load_orders_page()
+        
+        ttk.Button(filter_frame, text=get_text("apply_filter"),
+                  command=apply_filters, style="Info.TButton").grid(row=2, column=7, sticky="e", pady=(5, 0))
+        
+        # Action buttons frame
+        actions_frame = ttk.Frame(orders_frame)
+        actions_frame.pack(fill="x")
+        
+        def get_selected_sale_id():
+            """Get the selected sale ID from the treeview."""
+            selection = orders_tree.selection()
+            if not selection:
+                messagebox.showwarning(get_text("warning"), get_text("no_order_selected"))
+                return None
+            
+            # Get sale ID from our stored mapping
+            item_id = selection[0]
+            if item_id in self.sales_data:
+                return self.sales_data[item_id]
+            else:
+                messagebox.showerror(get_text("error"), "ID de commande non trouvé")
+                return None
+        
+        def on_view_details():
+            """Handle view details button click."""
+            sale_id = get_selected_sale_id()
+            if sale_id:
+                self.show_order_details(sale_id)
+        
+        def on_print_order():
+            """Handle print order button click."""
+            sale_id = get_selected_sale_id()
+            if sale_id:
+                self.print_order_from_history(sale_id)
+        
+        # Add action buttons
+        ttk.Button(actions_frame, text=get_text("view_order"),
+                  command=on_view_details, style="Info.TButton").pack(side="left", padx=(0, 10))
+        ttk.Button(actions_frame, text=get_text("reprint_receipt"),
+                  command=on_print_order, style="Success.TButton").pack(side="left", padx=(0, 10))
+        load_more_btn = ttk.Button(actions_frame, text=get_text("load_more"),
+                                  command=load_orders_page, state="disabled")
+        load_more_btn.pack(side="right")
+        
+        # Double-click to view details
+        orders_tree.bind("<Double-1>", lambda e: on_view_details())
+        
+        load_orders_page()
 
     def logout(self):
         """Logout and close application."""
@@ -1893,6 +2121,7 @@ class POSApplication:
     def open_settings_dialog(self):
         """Open the comprehensive settings dialog."""
         try:
+            from dialogs.settings_dialog import SettingsDialog
             dialog = SettingsDialog(self.root, self)
             dialog.show()
         except Exception as e:
@@ -1901,6 +2130,7 @@ class POSApplication:
     def open_receipt_settings(self):
         """Open receipt settings dialog."""
         try:
+            from dialogs.receipt_settings_dialog import ReceiptSettingsDialog
             dialog = ReceiptSettingsDialog(self.root)
             self.root.wait_window(dialog.dialog)
         except Exception as e:
@@ -1909,6 +2139,7 @@ class POSApplication:
     def open_language_settings(self):
         """Open language settings dialog."""
         try:
+            from dialogs.language_settings_dialog import LanguageSettingsDialog
             dialog = LanguageSettingsDialog(self.root, callback=self.on_language_changed)
             dialog.show()
         except Exception as e:
@@ -1934,17 +2165,20 @@ class POSApplication:
         # Refresh UI elements that need translation updates
         self.refresh_ui_language()
         
+    @ui_monitor.trace("refresh_ui_language")
     def refresh_ui_language(self):
-        """Refresh UI elements with current language."""
+        """Refresh UI elements with current language.
+        
+        Re-texts the widgets bound with ``bind_text`` in place, so the cart,
+        the product grid and its scroll position are kept. Screens built on
+        demand (order history, dialogs) use the new language when next opened.
+        """
         try:
             # Update window title
             self.root.title(get_text("app_title"))
             
-            # Recreate the entire interface with new language
-            self.recreate_interface()
-            
-            messagebox.showinfo(get_text("success"), 
-                              get_text("operation_completed") + "!")
+            # Update every bound widget in one pass
+            language_manager.registry.apply()
             
         except Exception as e:
             print(f"Error refreshing UI language: {e}")
@@ -1955,6 +2189,7 @@ class POSApplication:
         # Main content area without sidebar
         self.create_main_content_area_full()
     
+    @ui_monitor.trace("recreate_interface")
     def recreate_interface(self):
         """Recreate the interface with current language."""
         try:
@@ -2075,13 +2310,15 @@ class POSApplication:
     def run(self):
         """Run the application."""
         self.root.mainloop()
+        ui_monitor.stop()
 
 
 class PaymentWindow:
     """Payment processing window."""
     
-    def __init__(self, parent, total: float, callback):
-        self.total = total
+    def __init__(self, parent, total: float, callback, cash_total: Optional[float] = None):
+        self.card_total = total
+        self.cash_total = total if cash_total is None else cash_total
         self.callback = callback
         self.result = None
         
@@ -2147,10 +2384,10 @@ class PaymentWindow:
                                 font=("Arial", 14, "bold"))
         header_label.pack(pady=(0, 10))
         
-        total_label = ttk.Label(main_frame, text=f"{self.total:.2f} DH", 
-                               font=("Arial", 18, "bold"),
-                               foreground="#20B2AA")
-        total_label.pack(pady=(0, 15))
+        self.total_label = ttk.Label(main_frame, text=f"{self.total:.2f} DH", 
+                                    font=("Arial", 18, "bold"),
+                                    foreground="#20B2AA")
+        self.total_label.pack(pady=(0, 15))
         
         # Payment details frame - more compact
         details_frame = ttk.LabelFrame(main_frame, text=get_text("payment_details"), padding="8")
@@ -2205,11 +2442,13 @@ class PaymentWindow:
         
         self.payment_method = tk.StringVar(value="cash")
         cash_radio = ttk.Radiobutton(method_selection_frame, text=f"💰 {get_text('cash')}", 
-                                    variable=self.payment_method, value="cash")
+                                    variable=self.payment_method, value="cash",
+                                    command=self.on_method_changed)
         cash_radio.pack(side="left")
         
         card_radio = ttk.Radiobutton(method_selection_frame, text=f"💳 {get_text('card')}", 
-                                    variable=self.payment_method, value="card")
+                                    variable=self.payment_method, value="card",
+                                    command=self.on_method_changed)
         card_radio.pack(side="left", padx=(20, 0))
         
         # Numpad
@@ -2299,6 +2538,19 @@ class PaymentWindow:
         # Initialize payment details
         self.update_payment_details()
     
+    @property
+    def total(self) -> float:
+        """Amount due for the selected payment method (cash is rounded to the smallest coin)."""
+        method = getattr(self, "payment_method", None)
+        if method is not None and method.get() == "card":
+            return self.card_total
+        return self.cash_total
+    
+    def on_method_changed(self):
+        """Show the amount due for the newly selected payment method."""
+        self.total_label.config(text=f"{self.total:.2f} DH")
+        self.update_payment_details()
+    
     def update_payment_details(self, *args):
         """Update payment details in real-time."""
         try:
@@ -2370,7 +2622,7 @@ class PaymentWindow:
             
             # Show confirmation for cash payments with change
             if payment.is_cash_payment and amount > self.total:
-                change = amount - self.total
+                change = payment.calculate_change(self.total)
                 result = messagebox.askyesno("Confirmer le paiement", 
                                            f"Montant payé: {amount:.2f} DH\n" +
                                            f"Total: {self.total:.2f} DH\n" +
@@ -2469,7 +2721,19 @@ class ProductDialog:
 
 
 class InventoryManagementWindow:
-    """Advanced inventory management window."""
+    """Advanced inventory management window.
+    
+    The product list is virtual: the Treeview holds one row per visible line
+    and scrolling rewrites those rows from ``filtered_products``, so the cost
+    of a redraw does not depend on the size of the catalog.
+    """
+    
+    FILTER_DEBOUNCE_MS = 200
+    # Product field behind each list column, in column order
+    SORT_FIELDS = ("id", "name", "category", "supplier", "cost_price", "price", "stock_quantity", "is_active")
+    TEXT_SORT_FIELDS = ("name", "category", "supplier")
+    DEFAULT_ROW_HEIGHT = 20
+    WHEEL_STEP_ROWS = 3
     
     def __init__(self, parent, db_manager):
         self.parent = parent
@@ -2477,6 +2741,25 @@ class InventoryManagementWindow:
         self.products = []
         self.filtered_products = []
         
+        # Virtual list state
+        self.view_offset = 0  # Index in filtered_products of the first visible row
+        self.visible_rows = 20
+        self.row_slots = []  # Treeview item per visible line
+        self.slot_values = []  # Values currently shown in each slot
+        self.selected_product_id = None
+        self.form_loaded_stock = None  # Stock shown when the product was loaded into the form
+        
+        # Filtering state
+        self._search_text = {}  # Product id -> lowercase searchable text
+        self._last_filter = (None, None)  # (search text, category) of filtered_products
+        self._filter_job = None
+        
+        # Sorting state
+        self.sort_field = None
+        self.sort_descending = False
+        self._sort_orders = {}  # (field, descending) -> sorted products (cleared on reload)
+        self.column_titles = {}
+        
         # Create window
         self.window = tk.Toplevel(parent)
         self.window.title("Gestion d'Inventaire")
@@ -2596,23 +2879,32 @@ class InventoryManagementWindow:
                         get_text("cost_price"): 80, get_text("sell_price"): 80, 
                         get_text("stock"): 60, get_text("status"): 80}
         
-        for col in columns:
-            self.products_tree.heading(col, text=col, command=lambda c=col: self.sort_products(c))
+        for col, field in zip(columns, self.SORT_FIELDS):
+            self.column_titles[field] = col
+            self.products_tree.heading(col, text=col, command=lambda f=field: self.sort_products(f))
             self.products_tree.column(col, width=column_widths.get(col, 100))
             
-        # Scrollbars
-        v_scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.products_tree.yview)
+        # Scrollbars (the vertical one spans filtered_products, not the Treeview rows)
+        self.v_scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.on_scrollbar)
         h_scrollbar = ttk.Scrollbar(list_frame, orient="horizontal", command=self.products_tree.xview)
-        self.products_tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.products_tree.configure(xscrollcommand=h_scrollbar.set)
         
         # Grid scrollbars and treeview
         self.products_tree.grid(row=0, column=0, sticky="nsew")
-        v_scrollbar.grid(row=0, column=1, sticky="ns")
+        self.v_scrollbar.grid(row=0, column=1, sticky="ns")
         h_scrollbar.grid(row=1, column=0, sticky="ew")
         
         # Bind selection
         self.products_tree.bind('<<TreeviewSelect>>', self.on_product_select)
         
+        # Virtual scrolling
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.products_tree.bind(sequence, self.on_mouse_wheel)
+        self.products_tree.bind("<Up>", lambda e: self.on_arrow_key(-1))
+        self.products_tree.bind("<Down>", lambda e: self.on_arrow_key(1))
+        self.products_tree.bind("<Configure>", self.on_tree_resize)
+        self.products_tree.tag_configure("inactive", foreground="gray")
+        
     def create_product_details(self, parent):
         """Create the product details/edit panel."""
         details_frame = ttk.LabelFrame(parent, text=get_text("product_details"), padding="10")
@@ -2707,6 +2999,15 @@ class InventoryManagementWindow:
         stock_entry.pack(side="left", fill="x", expand=True)
         KeyboardButton(stock_frame, stock_entry).pack(side="right", padx=(5, 0))
         
+        # Reorder threshold
+        ttk.Label(form_frame, text=get_text("reorder_threshold"), font=("Arial", 10, "bold")).pack(anchor="w", pady=(0, 5))
+        self.reorder_threshold_var = tk.StringVar(value=str(LOW_STOCK_THRESHOLD))
+        reorder_frame = ttk.Frame(form_frame)
+        reorder_frame.pack(fill="x", pady=(0, 15))
+        reorder_entry = ttk.Entry(reorder_frame, textvariable=self.reorder_threshold_var, width=40)
+        reorder_entry.pack(side="left", fill="x", expand=True)
+        KeyboardButton(reorder_frame, reorder_entry).pack(side="right", padx=(5, 0))
+        
         # Description
         ttk.Label(form_frame, text=get_text("description"), font=("Arial", 10, "bold")).pack(anchor="w", pady=(0, 5))
         self.description_var = tk.StringVar()
@@ -2762,7 +3063,12 @@ class InventoryManagementWindow:
             all_products = self.db_manager.get_all_products_for_inventory()
             # Filter out inactive products by default
             self.products = [p for p in all_products if p.is_active]
-            self.filtered_products = self.products.copy()
+            self._sort_orders = {}
+            self.apply_sort()
+            self._search_text = {
+                p.id: f"{p.name} {p.description or ''} {p.supplier or ''} {p.barcode or ''}".lower()
+                for p in self.products
+            }
             
             # Update category filter
             categories = set([get_text("all_categories")])
@@ -2772,61 +3078,161 @@ class InventoryManagementWindow:
             
             self.category_combo['values'] = sorted(list(categories))
             
-            self.update_products_display()
-            self.update_count_label()
+            # Re-apply the current search to the fresh product list
+            self._last_filter = (None, None)
+            self.apply_filter()
             
         except Exception as e:
             messagebox.showerror(get_text("error"), f"{get_text('error_loading_products')}: {e}")
-            
+    
+    def _product_row_values(self, product):
+        """Get the Treeview values of a product row."""
+        status = "Actif" if product.is_active else "Inactif"
+        return (
+            product.id or "",
+            product.name,
+            product.category or "",
+            product.supplier or "",
+            f"{product.cost_price:.2f} DH",
+            f"{product.price:.2f} DH",
+            product.stock_quantity,
+            status
+        )
+    
     def update_products_display(self):
-        """Update the products treeview display."""
-        # Clear existing items
-        for item in self.products_tree.get_children():
-            self.products_tree.delete(item)
-            
-        # Add filtered products
-        for product in self.filtered_products:
-            status = "Actif" if product.is_active else "Inactif"
-            values = (
-                product.id or "",
-                product.name,
-                product.category or "",
-                product.supplier or "",
-                f"{product.cost_price:.2f} DH",
-                f"{product.price:.2f} DH",
-                product.stock_quantity,
-                status
-            )
-            
-            item = self.products_tree.insert("", "end", values=values)
-            
-            # Color inactive products
-            if not product.is_active:
-                self.products_tree.item(item, tags=("inactive",))
-                
-        # Configure tags
-        self.products_tree.tag_configure("inactive", foreground="gray")
+        """Update the products treeview display.
+        
+        Shows the filtered products from view_offset on. Rows are reused in
+        place and only rows whose content changed are rewritten.
+        """
+        total = len(self.filtered_products)
+        self.view_offset = max(0, min(self.view_offset, total - self.visible_rows))
+        window = self.filtered_products[self.view_offset:self.view_offset + self.visible_rows]
+        
+        # Grow or shrink the row pool to the number of rows to show
+        while len(self.row_slots) < len(window):
+            self.row_slots.append(self.products_tree.insert("", "end"))
+            self.slot_values.append(None)
+        while len(self.row_slots) > len(window):
+            self.products_tree.delete(self.row_slots.pop())
+            self.slot_values.pop()
+        
+        selected_slot = None
+        for slot, product in enumerate(window):
+            values = self._product_row_values(product)
+            if self.slot_values[slot] != values:
+                self.products_tree.item(self.row_slots[slot], values=values,
+                                        tags=() if product.is_active else ("inactive",))
+                self.slot_values[slot] = values
+            if product.id == self.selected_product_id:
+                selected_slot = self.row_slots[slot]
+        
+        # The selection follows the product, not the screen line
+        if selected_slot:
+            if self.products_tree.selection() != (selected_slot,):
+                self.products_tree.selection_set(selected_slot)
+        elif self.products_tree.selection():
+            self.products_tree.selection_remove(self.products_tree.selection())
+        
+        if total:
+            self.v_scrollbar.set(self.view_offset / total, (self.view_offset + len(window)) / total)
+        else:
+            self.v_scrollbar.set(0.0, 1.0)
+    
+    def scroll_to(self, offset):
+        """Scroll the virtual list so that offset is the first visible row."""
+        self.view_offset = offset
+        self.update_products_display()
+    
+    def on_scrollbar(self, *args):
+        """Handle vertical scrollbar commands (moveto/scroll)."""
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.filtered_products)))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.visible_rows if args[2] == "pages" else 1)
+            self.scroll_to(self.view_offset + step)
+    
+    def on_mouse_wheel(self, event):
+        """Scroll the virtual list with the mouse wheel."""
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.view_offset - self.WHEEL_STEP_ROWS)
+        else:
+            self.scroll_to(self.view_offset + self.WHEEL_STEP_ROWS)
+        return "break"
+    
+    def on_arrow_key(self, step):
+        """Move the selection by one product, scrolling past the visible rows."""
+        if not self.filtered_products:
+            return "break"
+        
+        selection = self.products_tree.selection()
+        if selection and selection[0] in self.row_slots:
+            index = self.view_offset + self.row_slots.index(selection[0]) + step
+        else:
+            index = self.view_offset
+        index = max(0, min(index, len(self.filtered_products) - 1))
         
+        self.select_product(self.filtered_products[index].id)
+        return "break"
+    
+    def on_tree_resize(self, event):
+        """Match the row pool to the number of lines the Treeview can show."""
+        try:
+            row_height = int(ttk.Style().lookup("Treeview", "rowheight") or self.DEFAULT_ROW_HEIGHT)
+        except (ValueError, tk.TclError):
+            row_height = self.DEFAULT_ROW_HEIGHT
+        
+        # One row height is taken by the column headings
+        rows = max(1, event.height // row_height - 1)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.update_products_display()
+    
+    def select_product(self, product_id):
+        """Select a product, scrolling it into view, and load it into the form."""
+        index = next((i for i, p in enumerate(self.filtered_products) if p.id == product_id), None)
+        if index is None:
+            return
+        
+        if not self.view_offset <= index < self.view_offset + self.visible_rows:
+            # Bring the row into view, keeping the scroll direction natural
+            self.view_offset = index if index < self.view_offset else index - self.visible_rows + 1
+        
+        self.selected_product_id = product_id
+        self.update_products_display()
+        self.load_product_to_form(self.filtered_products[index])
+    
     def filter_products(self, *args):
-        """Filter products based on search and category."""
+        """Filter products based on search and category.
+        
+        Filtering is debounced so a burst of keystrokes runs one pass.
+        """
+        if self._filter_job:
+            self.window.after_cancel(self._filter_job)
+        self._filter_job = self.window.after(self.FILTER_DEBOUNCE_MS, self.apply_filter)
+    
+    def apply_filter(self):
+        """Recompute filtered_products and refresh the visible rows."""
+        self._filter_job = None
         search_text = self.search_var.get().lower()
         category = self.category_var.get()
+        all_categories = get_text("all_categories")
         
-        self.filtered_products = []
+        # Typing more characters can only narrow the result: refine the previous set
+        previous_search, previous_category = self._last_filter
+        if previous_search is not None and category == previous_category and search_text.startswith(previous_search):
+            candidates = self.filtered_products
+        else:
+            candidates = self.products
         
-        for product in self.products:
-            # Category filter
-            if category != "Toutes" and product.category != category:
-                continue
-                
-            # Search filter
-            if search_text:
-                searchable_text = f"{product.name} {product.description or ''} {product.supplier or ''} {product.barcode or ''}".lower()
-                if search_text not in searchable_text:
-                    continue
-                    
-            self.filtered_products.append(product)
-            
+        self.filtered_products = [
+            p for p in candidates
+            if (category == all_categories or p.category == category)
+            and (not search_text or search_text in self._search_text.get(p.id, ""))
+        ]
+        self._last_filter = (search_text, category)
+        
+        self.view_offset = 0
         self.update_products_display()
         self.update_count_label()
         
@@ -2838,10 +3244,54 @@ class InventoryManagementWindow:
         
         self.count_label.config(text=f"Affichage: {filtered}/{total} produits ({active} actifs)")
         
-    def sort_products(self, column):
-        """Sort products by column."""
-        # This is a placeholder for sorting functionality
-        pass
+    def sort_products(self, field):
+        """Sort products by a column; clicking the same column again reverses it."""
+        if field == self.sort_field:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_field = field
+            self.sort_descending = False
+        
+        self.apply_sort()
+        
+        # Show the sort direction in the column headings
+        for column_field, title in self.column_titles.items():
+            arrow = (" ▼" if self.sort_descending else " ▲") if column_field == self.sort_field else ""
+            self.products_tree.heading(title, text=title + arrow)
+        
+        # Filtering preserves order, so re-filter the sorted list
+        self._last_filter = (None, None)
+        self.apply_filter()
+    
+    def _sort_key(self, product, field):
+        """Get the sort key of a product for a field."""
+        value = getattr(product, field)
+        if field in self.TEXT_SORT_FIELDS:
+            return collation_key(value)
+        return value or 0
+    
+    def apply_sort(self):
+        """Order self.products by the current sort field.
+        
+        Each field and direction is sorted once per load (keys are built once
+        per product). Ties are broken by ascending product id in both
+        directions, so equal rows keep the same order when the column is
+        flipped.
+        """
+        if not self.sort_field:
+            return
+        
+        cache_key = (self.sort_field, self.sort_descending)
+        order = self._sort_orders.get(cache_key)
+        if order is None:
+            keyed = [(self._sort_key(p, self.sort_field), p.id or 0, p) for p in self.products]
+            keyed.sort(key=lambda entry: entry[1])
+            # Stable sort, so reverse=True keeps equal keys in ascending id order
+            keyed.sort(key=lambda entry: entry[0], reverse=self.sort_descending)
+            order = [entry[2] for entry in keyed]
+            self._sort_orders[cache_key] = order
+        
+        self.products = list(order)
         
     def on_product_select(self, event):
         """Handle product selection."""
@@ -2851,10 +3301,13 @@ class InventoryManagementWindow:
             
         item = self.products_tree.item(selection[0])
         product_id = item['values'][0]
+        if str(product_id) == str(self.selected_product_id):
+            return  # Selection restored after scrolling; keep any form edits
         
         # Find the product
         product = next((p for p in self.products if str(p.id) == str(product_id)), None)
         if product:
+            self.selected_product_id = product.id
             self.load_product_to_form(product)
             
     def load_product_to_form(self, product):
@@ -2867,6 +3320,8 @@ class InventoryManagementWindow:
         self.cost_price_var.set(str(product.cost_price))
         self.selling_price_var.set(str(product.price))
         self.stock_var.set(str(product.stock_quantity))
+        self.form_loaded_stock = product.stock_quantity
+        self.reorder_threshold_var.set(str(product.reorder_threshold))
         self.description_var.set(product.description or "")
         self.status_var.set(product.is_active)
         
@@ -2880,12 +3335,15 @@ class InventoryManagementWindow:
         self.cost_price_var.set("0.0")
         self.selling_price_var.set("0.0")
         self.stock_var.set("0")
+        self.form_loaded_stock = None
+        self.reorder_threshold_var.set(str(LOW_STOCK_THRESHOLD))
         self.description_var.set("")
         self.status_var.set(True)
         
     def new_product(self):
         """Prepare form for new product."""
         self.clear_form()
+        self.selected_product_id = None
         self.products_tree.selection_remove(self.products_tree.selection())
         
     def save_product(self):
@@ -2907,23 +3365,20 @@ class InventoryManagementWindow:
                 stock_quantity=int(self.stock_var.get() or 0),
                 is_active=self.status_var.get(),
                 supplier=self.supplier_var.get().strip() or None,
-                cost_price=float(self.cost_price_var.get() or 0)
+                cost_price=float(self.cost_price_var.get() or 0),
+                reorder_threshold=int(self.reorder_threshold_var.get() or LOW_STOCK_THRESHOLD)
             )
             
-            # Save to database
-            product_id = self.db_manager.save_product(product)
+            # Save to database (only the stock edit is applied, not the stale quantity)
+            previous_stock = self.form_loaded_stock if product.id is not None else None
+            product_id = self.db_manager.save_product(product, previous_stock=previous_stock)
             product.id = product_id
             
             # Reload products
             self.load_products()
             
             # Select the saved product
-            for item in self.products_tree.get_children():
-                values = self.products_tree.item(item)['values']
-                if str(values[0]) == str(product_id):
-                    self.products_tree.selection_set(item)
-                    self.products_tree.see(item)
-                    break
+            self.select_product(product_id)
                     
             messagebox.showinfo("Succès", "Produit sauvegardé avec succès!")
             
@@ -2946,7 +3401,10 @@ class InventoryManagementWindow:
                 if success:
                     # Remove from local lists
                     self.products = [p for p in self.products if str(p.id) != str(product_id)]
-                    self.filter_products()  # This will update filtered_products and display
+                    self._sort_orders = {}  # Cached sort orders still hold the product
+                    self._last_filter = (None, None)  # Previous results still hold the product
+                    self.selected_product_id = None
+                    self.apply_filter()  # This will update filtered_products and display
                     self.clear_form()
                     messagebox.showinfo("Succès", "Produit supprimé avec succès!")
                 else:
@@ -3354,7 +3812,7 @@ class CashManagementDialog:
     def show_history(self):
         """Show cash transaction history."""
         current_session = self.session_manager.get_current_session()
-        transactions = current_session.get('cash_transactions', []) if current_session else []
+        transactions = self.session_manager.get_cash_transactions() if current_session else []
         
         if not transactions:
             messagebox.showinfo("Historique", "Aucune transaction trouvée pour aujourd'hui.")
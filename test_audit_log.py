@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test the asynchronous, batched audit log writer
+"""
+
+import json
+import os
+import sys
+import sqlite3
+import subprocess
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.user_manager import UserManager
+from database.audit_log import AuditLogWriter
+
+def _count_activities(db_path, activity_type):
+    """Count activities of a type directly in the database."""
+    conn = sqlite3.connect(db_path)
+    count = conn.execute("SELECT COUNT(*) FROM user_activities WHERE activity_type = ?",
+                         (activity_type,)).fetchone()[0]
+    conn.close()
+    return count
+
+def test_batched_writes():
+    """Test that activities are queued, then written in batches."""
+    print("=== Testing Batched Audit Log ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = UserManager(os.path.join(tmp, "pos.db"), os.path.join(tmp, "archive.db"))
+        manager.audit_writer.flush_interval = 60  # Only size/explicit triggers in this test
+        
+        for i in range(10):
+            assert manager.log_activity(1, "SALE_COMPLETED", f"Sale {i}", sale_id=i, amount=10.0)
+        assert manager.audit_writer.pending_count() == 10
+        print("✓ Activities queued without touching the database")
+        
+        # Queries flush first, so they always see every logged entry
+        activities = manager.get_user_activities(user_id=1)
+        assert len([a for a in activities if a.activity_type == "SALE_COMPLETED"]) == 10
+        assert os.path.getsize(manager.audit_writer.journal_path) == 0
+        print("✓ Flushed batch visible and journal truncated")
+        
+        manager.audit_writer.close()
+        assert not os.path.exists(manager.audit_writer.journal_path)
+        print("✓ Writer closed cleanly")
+
+def test_journal_recovery():
+    """Test that journaled but uncommitted entries survive a crash."""
+    print("=== Testing Journal Recovery ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "pos.db")
+        UserManager(db_path, async_activity_log=False)
+        journal_path = os.path.join(tmp, "pos_audit.journal")
+        
+        # Simulate a crash: two complete entries and a torn final line
+        record = {"journal_id": "abc", "user_id": 1, "activity_type": "CRASH_TEST",
+                  "description": "Before crash", "timestamp": "2025-08-01 10:00:00",
+                  "sale_id": None, "amount": None, "details": ""}
+        with open(journal_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+            f.write(json.dumps(dict(record, journal_id="def")) + "\n")
+            f.write('{"journal_id": "tor')
+        
+        writer = AuditLogWriter(db_path, journal_path)
+        assert _count_activities(db_path, "CRASH_TEST") == 2
+        
+        # Replaying the same entries again must not duplicate them
+        with open(journal_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+        writer.close()
+        AuditLogWriter(db_path, journal_path).close()
+        assert _count_activities(db_path, "CRASH_TEST") == 2
+        print("✓ Journal replayed once, torn line ignored")
+
+def test_writers_share_database():
+    """Test that a second writer leaves a live writer's journal alone and adopts stale ones."""
+    print("=== Testing Writers Sharing a Database ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "pos.db")
+        UserManager(db_path, async_activity_log=False)
+        
+        first = AuditLogWriter(db_path, flush_interval=60)
+        first.log(1, "FIRST_WRITER", "Pending entry")
+        second = AuditLogWriter(db_path, flush_interval=60)
+        assert first.journal_path != second.journal_path
+        assert os.path.getsize(first.journal_path) > 0 and first.pending_count() == 1
+        print("✓ Live journal of another writer not replayed or removed")
+        
+        # A writer that crashed: its journal is no longer touched
+        orphan = os.path.join(tmp, "pos_audit.999999-deadbeef.journal")
+        record = {"journal_id": "orphan", "user_id": 1, "activity_type": "ORPHANED",
+                  "description": "From a crashed writer", "timestamp": "2025-08-01 10:00:00",
+                  "sale_id": None, "amount": None, "details": ""}
+        with open(orphan, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+        stale = os.path.getmtime(orphan) - AuditLogWriter.JOURNAL_STALE_SECONDS - 1
+        os.utime(orphan, (stale, stale))
+        
+        third = AuditLogWriter(db_path, flush_interval=60)
+        assert _count_activities(db_path, "ORPHANED") == 1 and not os.path.exists(orphan)
+        assert os.path.exists(first.journal_path)
+        print("✓ Stale journal of a crashed writer replayed")
+        
+        for writer in (first, second, third):
+            writer.close()
+        assert _count_activities(db_path, "FIRST_WRITER") == 1
+        print("✓ Pending entries of the first writer committed")
+
+def test_failed_replay_does_not_block_startup():
+    """Test that a journal that cannot be replayed is kept instead of failing the constructor."""
+    print("=== Testing Failed Journal Replay ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "pos.db")
+        UserManager(db_path, async_activity_log=False)
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+            CREATE TRIGGER reject_replay BEFORE INSERT ON user_activities
+            WHEN NEW.activity_type = 'REJECTED' BEGIN SELECT RAISE(ABORT, 'rejected'); END
+        """)
+        conn.commit()
+        conn.close()
+        
+        # Journal of a crashed writer holding a record the database rejects
+        orphan = os.path.join(tmp, "pos_audit.999999-deadbeef.journal")
+        record = {"journal_id": "bad", "user_id": 1, "activity_type": "REJECTED",
+                  "description": "Rejected by a trigger", "timestamp": "2025-08-01 10:00:00",
+                  "sale_id": None, "amount": None, "details": ""}
+        with open(orphan, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+        stale = os.path.getmtime(orphan) - AuditLogWriter.JOURNAL_STALE_SECONDS - 1
+        os.utime(orphan, (stale, stale))
+        
+        manager = UserManager(db_path, os.path.join(tmp, "archive.db"))
+        assert manager.audit_writer is not None and os.path.exists(orphan)
+        assert manager.log_activity(1, "AFTER_FAILED_REPLAY", "Still logging")
+        manager.audit_writer.close()
+        assert _count_activities(db_path, "AFTER_FAILED_REPLAY") == 1
+        print("✓ Unreplayable journal kept, writer started")
+
+def test_import_touches_no_database():
+    """Test that importing the user manager module does not create or change a database."""
+    print("=== Testing Lazy Global User Manager ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        code = "import database.user_manager as um, pos_system; assert um._user_manager is None"
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, "-c", code], cwd=tmp, env=env, check=True)
+        assert os.listdir(tmp) == []
+        print("✓ No database or journal created on import")
+
+if __name__ == "__main__":
+    test_batched_writes()
+    test_journal_recovery()
+    test_writers_share_database()
+    test_failed_replay_does_not_block_startup()
+    test_import_touches_no_database()
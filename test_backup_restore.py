@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test backup verification, atomic restore and the sidecar backup index
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import threading
+import zipfile
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from utils.backup_manager import BackupManager
+from utils.outbox_shipper import OutboxShipper
+from models.sale import Sale, SaleItem
+
+class GatedSink:
+    """Sink that holds each batch until released, like a slow head office."""
+    
+    def __init__(self):
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.received = []
+    
+    def send(self, records):
+        self.entered.set()
+        self.release.wait(10)
+        self.received.extend(record["key"] for record in records)
+
+def test_backup_restore():
+    """Test that restore swaps in a verified copy and rejects corrupt backups."""
+    print("=== Testing Backup Restore ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "pos.db")
+        db_manager = DatabaseManager(db_path)
+        manager = BackupManager(db_path, os.path.join(tmp, "backups"), db_manager=db_manager)
+        manager.backup_settings["max_backups"] = 100
+        
+        original_count = len(db_manager.get_all_products())
+        backup_path = manager.create_backup()
+        print(f"✓ Backup created: {Path(backup_path).name}")
+        
+        # Change the live database after the backup was taken
+        conn = db_manager._get_connection()
+        conn.execute("DELETE FROM products")
+        conn.commit()
+        
+        assert manager.restore_backup(backup_path)
+        assert len(db_manager.get_all_products_for_inventory()) == original_count
+        assert not os.path.exists(f"{db_path}.restore.tmp")
+        print(f"✓ Restored {original_count} products")
+        
+        # A corrupt archive must never replace the live database
+        corrupt_path = Path(tmp) / "backups" / "backup_corrupt.zip"
+        with zipfile.ZipFile(corrupt_path, 'w') as zipf:
+            zipf.writestr("database.db", b"not a database" * 100)
+        try:
+            manager.restore_backup(str(corrupt_path))
+            raise AssertionError("Corrupt backup was restored")
+        except ValueError as e:
+            print(f"✓ Corrupt backup rejected: {e}")
+        
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM products").fetchone()[0] == original_count
+        conn.close()
+        db_manager.close_all_connections()
+
+def test_restore_pauses_writers():
+    """Test that a restore waits for background writers and keeps them off the database during the swap."""
+    print("=== Testing Restore With Background Writers ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "pos.db")
+        db_manager = DatabaseManager(db_path, use_outbox=True)
+        sink = GatedSink()
+        shipper = OutboxShipper(db_path, sink)
+        manager = BackupManager(db_path, os.path.join(tmp, "backups"), db_manager=db_manager, writers=[shipper])
+        manager.backup_settings["max_backups"] = 100
+        backup_path = manager.create_backup()
+        
+        product = db_manager.get_all_products()[0]
+        db_manager.save_sale(Sale(items=[SaleItem(product=product, quantity=1)]))
+        draining = threading.Thread(target=shipper.drain)
+        draining.start()
+        assert sink.entered.wait(5)
+        
+        restoring = threading.Thread(target=manager.restore_backup, args=(backup_path,))
+        restoring.start()
+        restoring.join(0.3)
+        assert restoring.is_alive()  # Waits for the batch in flight
+        sink.release.set()
+        draining.join(5)
+        restoring.join(10)
+        assert not restoring.is_alive() and len(sink.received) == 1
+        print("✓ Restore waited for the running drain")
+        
+        # The drain's commit is in the pre-restore backup, the live database is the restored one
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        assert conn.execute("SELECT COUNT(*) FROM sale_outbox").fetchone()[0] == 0
+        conn.close()
+        pre_restore = [b for b in manager.get_backup_list() if b["filename"].startswith("pre_restore")]
+        assert manager.restore_backup(str(manager.get_backup_path(pre_restore[0]["filename"])))
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM sale_outbox WHERE shipped_at IS NOT NULL").fetchone()[0] == 1
+        conn.close()
+        print("✓ Shipped sale kept in the pre-restore backup")
+        db_manager.close_all_connections()
+
+def test_backup_index():
+    """Test that backup listing is served from the sidecar index."""
+    print("=== Testing Backup Index ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "pos.db")
+        DatabaseManager(db_path).close_all_connections()
+        manager = BackupManager(db_path, os.path.join(tmp, "backups"))
+        
+        backup_path = Path(manager.create_backup())
+        assert manager.index_file.exists()
+        
+        backups = manager.get_backup_list()
+        assert backups[0]["filename"] == backup_path.name
+        assert backups[0]["backup_type"] == "manual"
+        print(f"✓ Listed {len(backups)} backup(s) with metadata")
+        
+        assert manager.delete_backup(backup_path.name)
+        assert manager.get_backup_list() == []
+        assert backup_path.name not in manager._load_index()
+        print("✓ Deleted backup removed from index")
+
+if __name__ == "__main__":
+    test_backup_restore()
+    test_restore_pauses_writers()
+    test_backup_index()
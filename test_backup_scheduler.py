@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Test the event-driven backup scheduler
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from utils.backup_manager import BackupManager
+
+def _make_manager(tmp):
+    """Create a backup manager on a scratch database with auto-backup off."""
+    db_path = os.path.join(tmp, "pos.db")
+    DatabaseManager(db_path).close_all_connections()
+    manager = BackupManager(db_path, os.path.join(tmp, "backups"))
+    manager.stop_scheduler()
+    manager.backup_settings.update({"auto_backup_enabled": False, "backup_time": "02:00",
+                                    "backup_frequency": "daily"})
+    manager.last_backup_time = manager.last_scheduled_backup_time = None
+    return manager
+
+def test_compute_next_run():
+    """Test next-run computation for each frequency."""
+    print("=== Testing Next Run Computation ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = _make_manager(tmp)
+        now = datetime(2025, 8, 1, 14, 30)
+        
+        assert manager.compute_next_run(now) == datetime(2025, 8, 2, 2, 0)
+        assert manager.compute_next_run(datetime(2025, 8, 1, 1, 0)) == datetime(2025, 8, 1, 2, 0)
+        print("✓ Daily schedule")
+        
+        manager.backup_settings["backup_frequency"] = "weekly"
+        manager.last_scheduled_backup_time = datetime(2025, 8, 1, 2, 0)
+        assert manager.compute_next_run(now) == datetime(2025, 8, 8, 2, 0)
+        print("✓ Weekly schedule follows the last backup")
+        
+        # A wake-up a few seconds early must not re-run the same slot
+        manager.backup_settings["backup_frequency"] = "daily"
+        manager.last_scheduled_backup_time = datetime(2025, 8, 1, 2, 0, 1)
+        assert manager.compute_next_run(datetime(2025, 8, 1, 2, 0, 5)) == datetime(2025, 8, 2, 2, 0)
+        print("✓ No double run after an early wake-up")
+        
+        # A manual backup in the afternoon does not skip the nightly run
+        manager.last_backup_time = datetime(2025, 8, 1, 15, 0)
+        assert manager.compute_next_run(datetime(2025, 8, 1, 15, 0, 5)) == datetime(2025, 8, 2, 2, 0)
+        print("✓ Manual backups leave the schedule alone")
+
+def test_metrics_and_sale_tracking():
+    """Test backup metrics and the sale-in-progress gate."""
+    print("=== Testing Backup Metrics ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = _make_manager(tmp)
+        
+        with manager.sale_transaction():
+            assert manager.get_scheduler_status()["sale_in_progress"]
+        assert not manager.get_scheduler_status()["sale_in_progress"]
+        print("✓ Sale transaction gates backups")
+        
+        manager.create_backup()
+        metrics = manager.backup_metrics[-1]
+        assert metrics["trigger"] == "manual" and manager.last_scheduled_backup_time is None
+        assert metrics["size_bytes"] > 0
+        assert metrics["duration_seconds"] >= 0
+        assert manager.metrics_file.exists()
+        print(f"✓ Backup took {metrics['duration_seconds']}s, {metrics['size_bytes']} bytes")
+        
+        # The last backup time survives a restart through the metrics log
+        reloaded = BackupManager(manager.db_path, str(manager.backup_dir))
+        reloaded.stop_scheduler()
+        assert reloaded.last_backup_time is not None and reloaded.last_scheduled_backup_time is None
+        
+        backup_name = os.path.basename(manager.create_backup("auto", trigger="automatic"))
+        indexed = manager._load_index()[backup_name]
+        assert indexed["backup_type"] == manager.backup_metrics[-1]["trigger"] == "automatic"
+        reloaded = BackupManager(manager.db_path, str(manager.backup_dir))
+        reloaded.stop_scheduler()
+        assert reloaded.last_scheduled_backup_time == manager.last_scheduled_backup_time
+        print("✓ Last backup and last scheduled backup times reloaded")
+
+def test_scheduler_wakes_on_settings_change():
+    """Test that the scheduler thread responds to settings changes promptly."""
+    print("=== Testing Scheduler Wake-up ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = _make_manager(tmp)
+        manager.backup_settings["auto_backup_enabled"] = True
+        manager.start_scheduler()
+        
+        # Wait until the thread has computed its first slot
+        for _ in range(100):
+            if manager.next_run:
+                break
+            threading.Event().wait(0.01)
+        first_run = manager.next_run
+        
+        due = datetime.now() + timedelta(hours=3)
+        manager.backup_settings["backup_time"] = due.strftime("%H:%M")
+        manager.start_scheduler()
+        for _ in range(100):
+            if manager.next_run != first_run:
+                break
+            threading.Event().wait(0.01)
+        
+        assert manager.next_run.strftime("%H:%M") == due.strftime("%H:%M")
+        manager.stop_scheduler()
+        assert not manager.scheduler_thread.is_alive()
+        print(f"✓ Rescheduled to {manager.next_run}")
+
+def test_stop_while_deferred():
+    """Test that stopping the scheduler does not wait out a run deferred by a sale."""
+    print("=== Testing Stop During Deferred Backup ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = _make_manager(tmp)
+        manager.backup_settings["auto_backup_enabled"] = True
+        manager.compute_next_run = lambda now=None: datetime.now()  # Always due
+        
+        with manager.sale_transaction():
+            manager.start_scheduler()
+            threading.Event().wait(0.2)  # Let the thread reach the sale gate
+            manager.stop_scheduler()
+            assert not manager.scheduler_thread.is_alive()
+        assert not manager.backup_metrics and manager.get_backup_list() == []
+        print("✓ Scheduler stopped without waiting for the sale to finish")
+
+def test_scheduled_backups_pruned():
+    """Test that scheduled and pre-restore snapshots are listed and pruned with their chunks."""
+    print("=== Testing Scheduled Backup Retention ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = _make_manager(tmp)
+        manager.backup_settings.update({"deduplicated_store": True, "max_backups": 1})
+        manager.store.GC_GRACE_SECONDS = 0
+        manager._lower_thread_priority = lambda: None
+        manager._log_backup_event = lambda level, message: None
+        
+        manager.create_backup("pre_restore", trigger="pre_restore")
+        assert [b["filename"] for b in manager.get_backup_list()][0].startswith("pre_restore_")
+        
+        # New data, so the scheduled snapshot has chunks of its own
+        conn = sqlite3.connect(manager.db_path)
+        conn.execute("CREATE TABLE filler (payload TEXT)")
+        conn.executemany("INSERT INTO filler VALUES (?)", [("x" * 500,) for _ in range(500)])
+        conn.commit()
+        conn.close()
+        
+        manager._scheduled_backup()
+        backups = manager.get_backup_list()
+        assert len(backups) == 1 and backups[0]["filename"].startswith("auto_")
+        print("✓ Scheduled snapshot listed, older pre-restore snapshot pruned")
+        
+        referenced = set(manager.store.load_manifest(backups[0]["filename"][:-len(".manifest")])["chunks"])
+        stored = {path.name for path in manager.store.chunk_dir.glob("*/*")}
+        assert stored == referenced
+        print(f"✓ Chunk store holds only the {len(stored)} chunks still referenced")
+
+if __name__ == "__main__":
+    test_compute_next_run()
+    test_metrics_and_sale_tracking()
+    test_scheduler_wakes_on_settings_change()
+    test_stop_while_deferred()
+    test_scheduled_backups_pruned()
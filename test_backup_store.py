@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test the content-deduplicated backup store
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.backup_store import BackupStore
+
+def _make_database(path, rows):
+    """Create a database with some bulky rows."""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY, payload TEXT)")
+    conn.executemany("INSERT INTO history (payload) VALUES (?)",
+                     [(f"row-{i}-" + "x" * 200,) for i in range(rows)])
+    conn.commit()
+    conn.close()
+
+def test_backup_store_dedup():
+    """Test that unchanged pages are stored once and snapshots restore exactly."""
+    print("=== Testing Backup Store ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "pos.db")
+        store = BackupStore(os.path.join(tmp, "store"))
+        
+        _make_database(db_path, 5000)
+        first = store.create_snapshot(db_path, "backup_day1")
+        print(f"✓ Day 1: {first['chunk_count']} chunks, {first['new_chunks']} new")
+        
+        # A day of trading only appends a few rows
+        _make_database(db_path, 20)
+        second = store.create_snapshot(db_path, "backup_day2")
+        print(f"✓ Day 2: {second['chunk_count']} chunks, {second['new_chunks']} new")
+        assert second["new_chunks"] < second["chunk_count"] / 2
+        
+        restored = os.path.join(tmp, "restored.db")
+        store.restore_snapshot("backup_day2", restored)
+        with open(db_path, 'rb') as a, open(restored, 'rb') as b:
+            assert a.read() == b.read()
+        print("✓ Snapshot restored byte for byte")
+        
+        stats = store.get_stats()
+        assert stats["snapshots"] == 2
+        assert stats["dedup_ratio"] > 1.5
+        print(f"✓ Dedup ratio: {stats['dedup_ratio']:.1f}x")
+        
+        # Dropping the first snapshot keeps every chunk the second one needs
+        store.delete_snapshot("backup_day1")
+        store.restore_snapshot("backup_day2", restored)
+        assert store.list_snapshots() == ["backup_day2"]
+        print("✓ Retention keeps shared chunks")
+        
+        # Chunks of a snapshot still being written (no manifest yet) survive a sweep
+        in_flight = store.chunk_dir / "ff" / ("f" * 64)
+        in_flight.parent.mkdir(exist_ok=True)
+        in_flight.write_bytes(b"chunk")
+        store.garbage_collect()
+        assert in_flight.exists()
+        assert store.garbage_collect(grace_seconds=0) > 0 and not in_flight.exists()
+        store.restore_snapshot("backup_day2", restored)
+        print("✓ Sweeps leave recent unreferenced chunks alone")
+
+if __name__ == "__main__":
+    test_backup_store_dedup()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test the benchmark datasets and runner
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import shutil
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.datasets import build_database, dataset_path, dataset_version
+from benchmarks.run_benchmarks import BENCHMARKS, BenchmarkContext, run_benchmark, compare_results
+from database.db_manager import DatabaseManager
+
+def test_build_database():
+    """Test that a synthetic dataset has the requested size and current schema."""
+    print("=== Testing Benchmark Dataset ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, "bench.db")
+        build_database(path, products=50, sales=200, seed=7)
+        
+        db = DatabaseManager(path)
+        generated = [p for p in db.get_all_products() if p.supplier]
+        assert len(generated) == 50
+        db.close_all_connections()
+        
+        conn = sqlite3.connect(path)
+        assert conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0] == 200
+        assert conn.execute("SELECT COUNT(*) FROM payments").fetchone()[0] == 200
+        conn.close()
+        print("✓ Dataset built with the application schema")
+        
+        assert dataset_path(50, 200, 7) != dataset_path(50, 200, 7, end_date=date(2026, 1, 1))
+        assert dataset_version() in dataset_path(50, 200, 7)
+        print("✓ Cache key includes the end date and schema version")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_run_and_compare():
+    """Test timing a few benchmarks and flagging regressions."""
+    print("=== Testing Benchmark Runner ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, "pos_database.db")
+        build_database(path, products=50, sales=100, seed=7)
+        ctx = BenchmarkContext(workdir, path, seed=7)
+        
+        benchmarks = dict(BENCHMARKS)
+        results = {name: run_benchmark(benchmarks[name], ctx, repeat=2)
+                   for name in ("catalog_load", "complete_sale_100_lines", "order_history_open")}
+        for name, result in results.items():
+            assert result.get("runs") == 2, f"{name}: {result}"
+        assert ctx.db_manager.get_sales_by_date_range(ctx.end - timedelta(days=30), ctx.end)
+        ctx.db_manager.close_all_connections()
+        print("✓ Benchmarks timed on a small dataset")
+        
+        baseline = {"results": {"small": {"catalog_load": {"median_ms": results["catalog_load"]["median_ms"] / 2}}}}
+        current = {"results": {"small": {"catalog_load": results["catalog_load"]}}}
+        assert len(compare_results(current, baseline, threshold=0.2)) == 1
+        assert compare_results(current, current, threshold=0.2) == []
+        print("✓ Regressions over the threshold are reported")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_build_database()
+    test_run_and_compare()
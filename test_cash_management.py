@@ -34,13 +34,14 @@ def test_cash_management():
     
     # Show transaction history
     print("\n4. Transaction History:")
-    if 'cash_transactions' in session:
-        for i, trans in enumerate(session['cash_transactions'], 1):
-            print(f"   {i}. {trans['type']}: {trans['amount']:.2f} د.م")
-            print(f"      Nouveau solde: {trans['new_balance']:.2f} د.م")
-            print(f"      Motif: {trans['reason']}")
-            print(f"      Heure: {trans['timestamp']}")
-            print()
+    transactions = sm.get_cash_transactions()
+    assert len(transactions) >= 2, "Cash movements were not recorded"
+    for i, trans in enumerate(transactions, 1):
+        print(f"   {i}. {trans['type']}: {trans['amount']:.2f} د.م")
+        print(f"      Nouveau solde: {trans['new_balance']:.2f} د.م")
+        print(f"      Motif: {trans['reason']}")
+        print(f"      Heure: {trans['timestamp']}")
+        print()
     
     print("✅ Cash management test completed successfully!")
 
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test SQLite-backed cash session storage and the legacy JSON migration
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.session_manager import SessionManager
+
+def test_cash_session_storage():
+    """Test that cash movements are appended rows, not file rewrites."""
+    print("=== Testing Cash Session Storage ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        sm = SessionManager(os.path.join(tmp, "pos_session.json"), os.path.join(tmp, "pos.db"))
+        sm.logout_flag_file = os.path.join(tmp, "logout_flag.txt")
+        
+        assert sm.needs_cash_drawer_opening()
+        sm.start_session(1000.0, "Opening")
+        assert not sm.needs_cash_drawer_opening()
+        print("✓ Session opened")
+        
+        sm.update_cash_amount(1500.0, "Ajout", "Paiement client", 500.0)
+        sm.update_cash_amount(1300.0, "Retrait", "Dépôt banque", 200.0)
+        assert sm.get_today_cash_amount() == 1300.0
+        
+        transactions = sm.get_cash_transactions()
+        assert [t['type'] for t in transactions] == ["Ajout", "Retrait"]
+        assert transactions[-1]['new_balance'] == 1300.0
+        print(f"✓ {len(transactions)} cash movements recorded")
+        
+        # A new manager (app restart) sees the same open session
+        restarted = SessionManager(sm.session_file, sm.db_path)
+        restarted.logout_flag_file = sm.logout_flag_file
+        assert restarted.get_today_cash_amount() == 1300.0
+        
+        restarted.end_session("Test")
+        assert restarted.needs_cash_drawer_opening()
+        restarted.start_session(800.0, "Restart")
+        assert restarted.get_current_session()['restart_reason'] == "Restart"
+        print("✓ Session closed and restarted")
+
+def test_reopen_unclosed_session():
+    """Test that opening over an unclosed session starts a fresh one."""
+    print("=== Testing Reopening an Unclosed Session ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        sm = SessionManager(os.path.join(tmp, "pos_session.json"), os.path.join(tmp, "pos.db"))
+        sm.logout_flag_file = os.path.join(tmp, "logout_flag.txt")
+        
+        first = sm.start_session(1000.0, "Opening")
+        sm.update_cash_amount(1500.0, "Ajout", "Paiement client", 500.0)
+        
+        # Reopened without a logout (e.g. after a crash): nothing carries over
+        session = sm.start_session(200.0, "Reopening")
+        assert session['id'] != first['id']
+        assert session['cash_drawer_amount'] == 200.0
+        assert session['opening_reason'] == "Reopening"
+        assert sm.get_cash_transactions() == []
+        print("✓ Previous cash movements not attached to the new session")
+        
+        # The replaced session is closed but keeps its movements
+        data = sm.load_session_data()
+        movements = sm.get_cash_transactions(session_id=first['id'])
+        assert [t['amount'] for t in movements] == [500.0]
+        assert data[sm.get_today_date()]['id'] == session['id']
+        
+        sm.end_session("Test")
+        with sqlite3.connect(sm.db_path) as conn:
+            statuses = conn.execute("SELECT status FROM cash_sessions ORDER BY id").fetchall()
+        assert statuses == [("replaced",), ("closed",)]
+        print("✓ Replaced session kept with its cash movements")
+
+def test_json_migration():
+    """Test that the legacy JSON file is imported exactly once."""
+    print("=== Testing JSON Migration ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        session_file = os.path.join(tmp, "pos_session.json")
+        legacy = {
+            "2025-07-31": {
+                "date": "2025-07-31",
+                "start_time": "2025-07-31T19:37:20",
+                "cash_drawer_amount": 1250.0,
+                "opening_reason": "Opening",
+                "status": "closed",
+                "logout_time": "2025-07-31T23:00:00",
+                "cashier": "Admin",
+                "cash_transactions": [
+                    {"timestamp": "2025-07-31T19:40:00", "type": "Ajout", "amount": 250.0,
+                     "new_balance": 1250.0, "reason": "Customer payment"}
+                ]
+            }
+        }
+        with open(session_file, 'w', encoding='utf-8') as f:
+            json.dump(legacy, f)
+        
+        sm = SessionManager(session_file, os.path.join(tmp, "pos.db"))
+        assert os.path.exists(session_file)  # Only the register's startup migrates
+        sm.migrate_json_sessions()
+        assert not os.path.exists(session_file)
+        assert os.path.exists(session_file + ".migrated")
+        
+        data = sm.load_session_data()
+        assert data["2025-07-31"]["cash_drawer_amount"] == 1250.0
+        assert len(sm.get_cash_transactions("2025-07-31")) == 1
+        print("✓ Legacy sessions imported")
+
+if __name__ == "__main__":
+    test_cash_session_storage()
+    test_reopen_unclosed_session()
+    test_json_migration()
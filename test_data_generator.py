@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the synthetic data generator
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import shutil
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.data_generator import DataGenerator
+from database.db_manager import DatabaseManager
+from database.user_manager import UserManager
+
+END_DATE = date(2026, 6, 30)
+
+def _generate(workdir, name, seed=7):
+    """Generate a small database and return its path and row counts."""
+    path = os.path.join(workdir, name)
+    counts = DataGenerator(path, seed).generate(products=200, sales=2000, days=90, cashiers=4,
+                                                registers=2, end_date=END_DATE)
+    return path, counts
+
+def test_generated_volumes():
+    """Test row counts, indexes and that the application reads the data."""
+    print("=== Testing Generated Volumes ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        path, counts = _generate(workdir, "load.db")
+        assert counts["products"] == 200 and counts["users"] == 4
+        assert counts["sales"] == counts["payments"] == 2000
+        assert counts["sale_items"] > 2000
+        assert counts["user_activities"] > 2000  # Sales plus logins and logouts
+        
+        conn = sqlite3.connect(path)
+        assert conn.execute("SELECT COUNT(*) FROM sale_items").fetchone()[0] == counts["sale_items"]
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_sales_timestamp", "idx_sale_items_sale_id", "idx_user_activities_time"} <= indexes
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        mismatched = conn.execute('''
+            SELECT COUNT(*) FROM sales s
+            WHERE ABS(s.total - (SELECT SUM(total) FROM sale_items WHERE sale_id = s.id)) > 0.01
+        ''').fetchone()[0]
+        assert mismatched == 0
+        conn.close()
+        print("✓ Tables filled, totals consistent and indexes rebuilt")
+        
+        db = DatabaseManager(path)
+        sales = db.get_sales_page(limit=20)[0]
+        assert len(sales) == 20
+        db.close_all_connections()
+        users = UserManager(path, async_activity_log=False)
+        assert users.authenticate("cashier001", "cashier123") is not None
+        print("✓ Register reads generated sales and cashiers log in")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_distributions():
+    """Test rush hours, opening hours and Zipf-like popularity."""
+    print("=== Testing Distributions ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        path, _ = _generate(workdir, "load.db")
+        conn = sqlite3.connect(path)
+        by_hour = dict(conn.execute("SELECT CAST(substr(timestamp, 12, 2) AS INTEGER), COUNT(*) FROM sales GROUP BY 1"))
+        assert min(by_hour) >= 8 and max(by_hour) <= 21
+        assert by_hour[12] > 2 * by_hour[8]
+        print("✓ Sales fall in opening hours with a lunch rush")
+        
+        lines = [row[0] for row in conn.execute("SELECT COUNT(*) FROM sale_items GROUP BY product_id ORDER BY 1 DESC")]
+        top_share = sum(lines[:10]) / sum(lines)
+        assert top_share > 0.3, top_share
+        conn.close()
+        print(f"✓ Top 10 products make {top_share:.0%} of lines")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_reproducible():
+    """Test that the same seed gives the same rows and another seed does not."""
+    print("=== Testing Reproducibility ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        dumps = []
+        for name, seed in (("a.db", 7), ("b.db", 7), ("c.db", 8)):
+            path, _ = _generate(workdir, name, seed)
+            conn = sqlite3.connect(path)
+            dumps.append(conn.execute("SELECT * FROM sales ORDER BY id").fetchall() +
+                         conn.execute("SELECT * FROM sale_items ORDER BY id").fetchall())
+            conn.close()
+        assert dumps[0] == dumps[1]
+        assert dumps[0] != dumps[2]
+        print("✓ Same seed, same data")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_generated_volumes()
+    test_distributions()
+    test_reproducible()
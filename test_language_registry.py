@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test hot language switching through the translation registry
+"""
+
+import os
+import sys
+import tempfile
+import shutil
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.language_settings import LanguageManager
+
+class FakeWidget:
+    """Stand-in for a Tk widget: options through config/cget, destroy/winfo_exists."""
+    
+    def __init__(self, **options):
+        """Initialize with widget options."""
+        self.options = {"text": "", **options}
+        self.alive = True
+        self.updates = 0
+    
+    def config(self, **options):
+        """Set widget options."""
+        if not self.alive:
+            raise RuntimeError("invalid command name")
+        self.options.update(options)
+        self.updates += 1
+    
+    def cget(self, name):
+        """Get a widget option."""
+        if name not in self.options:
+            raise ValueError(f'unknown option "-{name}"')
+        return self.options[name]
+    
+    def winfo_exists(self):
+        """Whether the widget was not destroyed."""
+        return self.alive
+    
+    def destroy(self):
+        """Destroy the widget."""
+        self.alive = False
+
+def new_manager(workdir):
+    """Language manager with its own settings file, in French."""
+    manager = LanguageManager(os.path.join(workdir, "language_settings.json"))
+    manager.apply_language_immediately("FR")
+    return manager
+
+def test_switch_language_in_place():
+    """Test that bound widgets are re-texted and mirrored for Arabic."""
+    print("=== Testing Language Switch ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        manager = new_manager(workdir)
+        registry = manager.registry
+        
+        title = registry.bind(FakeWidget(), "logout")
+        pay = registry.bind(FakeWidget(justify="left"), lambda: f"💳 {manager.get_text('pay').upper()}")
+        header = registry.bind(FakeWidget(anchor="w"), "cart_header")
+        assert title.cget("text") == "Se déconnecter"
+        assert pay.cget("text") == f"💳 {manager.get_text('pay').upper()}"
+        print("✓ Widgets rendered when bound")
+        
+        manager.apply_language_immediately("AR")
+        assert registry.apply() == 3
+        assert title.cget("text") == "خروج"
+        assert header.cget("text") == "🛒 السلة"
+        assert header.cget("anchor") == "e" and pay.cget("justify") == "right"
+        print("✓ Arabic text applied with mirrored anchor and justification")
+        
+        manager.apply_language_immediately("EN")
+        registry.apply()
+        assert title.cget("text") == "Logout"
+        assert header.cget("anchor") == "w" and pay.cget("justify") == "left"
+        print("✓ Original orientation restored for left-to-right languages")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_destroyed_widgets_dropped():
+    """Test that destroyed widgets are skipped and forgotten."""
+    print("=== Testing Destroyed Widgets ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        manager = new_manager(workdir)
+        registry = manager.registry
+        kept = registry.bind(FakeWidget(), "logout")
+        cards = [registry.bind(FakeWidget(), "cart_empty") for _ in range(10)]
+        for card in cards:
+            card.destroy()
+        
+        manager.apply_language_immediately("EN")
+        assert registry.apply() == 1 and len(registry) == 1
+        assert kept.cget("text") == "Logout"
+        print("✓ Destroyed widgets skipped and removed on apply")
+        
+        for _ in range(registry.PRUNE_EVERY * 2):
+            registry.bind(FakeWidget(), "logout").destroy()
+        assert len(registry) <= registry.PRUNE_EVERY + 1
+        print("✓ Registry pruned while binding")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_custom_setter():
+    """Test bindings for widgets that are not re-texted through text=."""
+    print("=== Testing Custom Setter ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        manager = new_manager(workdir)
+        window = FakeWidget()
+        manager.registry.bind(window, "app_title", setter=lambda widget, text: widget.config(title=text))
+        manager.apply_language_immediately("EN")
+        manager.registry.apply()
+        assert window.cget("title") == manager.get_text("app_title") and window.cget("text") == ""
+        print("✓ Custom setter used")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_switch_language_in_place()
+    test_destroyed_widgets_dropped()
+    test_custom_setter()
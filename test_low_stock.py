@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test per-product reorder thresholds and the low-stock index
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from models.product import Product
+
+def test_low_stock_products():
+    """Test that low stock follows each product's threshold and uses the partial index."""
+    print("=== Testing Low Stock Products ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "pos.db")
+        db_manager = DatabaseManager(db_path)
+        baseline = {p.id for p in db_manager.get_low_stock_products()}
+        
+        milk = db_manager.save_product(Product(id=None, name="Lait", description="", price=7.0,
+                                               stock_quantity=15, reorder_threshold=20))
+        rice = db_manager.save_product(Product(id=None, name="Riz", description="", price=12.0,
+                                               stock_quantity=8, reorder_threshold=5))
+        salt = db_manager.save_product(Product(id=None, name="Sel", description="", price=2.0,
+                                               stock_quantity=0))
+        
+        low_ids = [p.id for p in db_manager.get_low_stock_products() if p.id not in baseline]
+        assert low_ids == [salt, milk]  # Lowest stock first; rice is above its own threshold
+        assert db_manager.get_low_stock_count() == len(baseline) + 2
+        print("✓ Low stock follows per-product thresholds")
+        
+        assert db_manager.get_product_by_id(salt).stock_status == "out_of_stock"
+        assert db_manager.get_product_by_id(milk).stock_status == "low_stock"
+        assert db_manager.get_product_by_id(rice).stock_status == "in_stock"
+        product = db_manager.get_product_by_id(rice)
+        product.set_reorder_threshold(10)
+        assert product.stock_status == "low_stock"
+        product.set_stock_quantity(0)
+        assert product.stock_status == "out_of_stock"
+        print("✓ Stock status buckets")
+        
+        db_manager.update_product_stock(rice, 3)
+        assert rice in [p.id for p in db_manager.get_low_stock_products()]
+        print("✓ Stock updates move products into the low-stock set")
+        
+        conn = sqlite3.connect(db_path)
+        plan = conn.execute('''
+            EXPLAIN QUERY PLAN SELECT id FROM products INDEXED BY idx_products_low_stock
+            WHERE is_active = 1 AND stock_quantity <= reorder_threshold
+            ORDER BY stock_quantity, id
+        ''').fetchall()
+        conn.close()
+        assert "idx_products_low_stock" in str(plan)
+        print("✓ Low stock query reads the partial index")
+        
+        db_manager.close_all_connections()
+
+if __name__ == "__main__":
+    test_low_stock_products()
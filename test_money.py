@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test integer-cents money arithmetic and running sale totals
+"""
+
+import os
+import sys
+import random
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.money import to_cents, from_cents, multiply, round_cash
+from models.product import Product
+from models.sale import Sale, SaleItem
+from models.payment import Payment, PaymentMethod
+from database.db_manager import DatabaseManager
+
+def make_product(product_id, price):
+    """Product with a price."""
+    return Product(id=product_id, name=f"Product {product_id}", description="", price=price)
+
+def test_cents_conversion_and_rounding():
+    """Test conversion, tax and cash rounding in centimes."""
+    print("=== Testing Money Arithmetic ===")
+    
+    assert to_cents(0.1) + to_cents(0.2) == to_cents(0.3) == 30
+    assert to_cents(2.675) == 268 and to_cents("19.99") == 1999 and to_cents(3) == 300
+    assert from_cents(1999) == 19.99
+    assert multiply(1999, 0.20) == 400 and multiply(1999, 0) == 0
+    print("✓ Exact conversion, half-up tax")
+    
+    assert round_cash(1237, 0.05) == 1235 and round_cash(1238, 0.05) == 1240
+    assert round_cash(-1238, 0.05) == -1240
+    assert round_cash(1237, 0.05, enabled=False) == 1237
+    print("✓ Cash rounding to the nearest 5 centimes")
+    
+    payment = Payment(PaymentMethod.CASH, 20.0)
+    assert payment.calculate_change(12.35) == 7.65
+    card = Payment(PaymentMethod.CARD, 20.0)
+    assert card.calculate_change(12.37) == 0.0
+    print("✓ Change is the tendered amount less the amount due")
+
+def test_cash_amount_due():
+    """Test that cash pays the rounded total and change is not rounded again."""
+    print("=== Testing Cash Amount Due ===")
+    
+    sale = Sale(items=[SaleItem(make_product(1, 10.02), 1)])
+    assert sale.total == 10.02 and sale.cash_total_cents == 1000 and sale.cash_total == 10.0
+    assert sale.amount_due(PaymentMethod.CASH) == 10.0
+    assert sale.amount_due(PaymentMethod.CARD) == 10.02
+    print("✓ Cash total rounds down, card pays the exact total")
+    
+    exact = Payment(PaymentMethod.CASH, 10.0)
+    assert exact.amount >= sale.amount_due(exact.method)
+    assert exact.calculate_change(sale.amount_due(exact.method)) == 0.0
+    tendered = Payment(PaymentMethod.CASH, 20.0)
+    assert tendered.calculate_change(sale.amount_due(tendered.method)) == 10.0
+    print("✓ Paying the rounded total is accepted and 20.00 gets 10.00 back")
+    
+    sale = Sale(items=[SaleItem(make_product(2, 10.03), 1)])
+    assert sale.cash_total == 10.05
+    assert Payment(PaymentMethod.CASH, 20.0).calculate_change(sale.cash_total) == 9.95
+    print("✓ Cash total rounds up to the nearest coin")
+
+def test_rounding_recorded():
+    """Test that the cash rounding of a sale is saved so reports reconcile with the drawer."""
+    print("=== Testing Recorded Cash Rounding ===")
+    
+    sale = Sale(items=[SaleItem(make_product(1, 10.02), 1)])
+    assert sale.rounding == 0.0  # Not paid yet
+    sale.payment = Payment(PaymentMethod.CARD, 10.02)
+    assert sale.rounding == 0.0
+    sale.payment = Payment(PaymentMethod.CASH, 10.0)
+    assert sale.rounding_cents == -2 and sale.to_dict()['rounding'] == -0.02
+    print("✓ Cash sale records the rounding, card sale records none")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "pos.db"))
+        db.save_sale(sale)
+        later = Sale(items=[SaleItem(make_product(2, 10.03), 1)], payment=Payment(PaymentMethod.CASH, 20.0))
+        db.save_sale(later)
+        
+        rows = db.get_all_sales()
+        assert sorted(row.rounding for row in rows) == [-0.02, 0.02]
+        drawer = sum(to_cents(row.total) + to_cents(row.rounding) for row in rows)
+        assert drawer == sale.cash_total_cents + later.cash_total_cents
+        summary = db.get_daily_sales_summary(sale.timestamp.isoformat())
+        assert summary['total_rounding'] == 0.0
+        db.close_all_connections()
+    print("✓ Saved totals plus rounding match the cash received")
+
+def test_running_totals():
+    """Test that basket totals follow item changes without re-summing."""
+    print("=== Testing Running Totals ===")
+    
+    coffee, tea = make_product(1, 0.1), make_product(2, 0.2)
+    sale = Sale(items=[SaleItem(coffee, 1)])
+    assert isinstance(sale.items, tuple)
+    sale.add_item(tea, 1)
+    sale.add_item(coffee, 2)  # Increments the existing line
+    assert sale.subtotal == 0.5 and sale.item_count == 4 and len(sale.items) == 2
+    print("✓ Totals exact and updated when lines are added")
+    
+    sale.set_quantity(2, 5)
+    assert sale.subtotal_cents == 130 and sale.item_count == 8
+    sale.remove_item(1)
+    assert sale.subtotal == 1.0 and sale.item_count == 5
+    sale.set_quantity(2, 0)
+    assert sale.items == () and sale.subtotal_cents == 0 and sale.item_count == 0
+    print("✓ Totals follow quantity changes and removals")
+    
+    sale = Sale(items=[SaleItem(coffee, 3, discount=0.05), SaleItem(tea, 5)], tax_rate=0.2, discount=0.1)
+    assert sale.subtotal == 1.25 and sale.tax_amount == 0.25 and sale.total == 1.4
+    assert sale.subtotal_cents == sum(item.total_cents for item in sale.items)
+    print("✓ Line discounts, tax and sale discount applied in centimes")
+    
+    cart = Sale(items=[SaleItem(coffee, 1)])
+    copy = Sale(items=cart.items)
+    cart.set_quantity(1, 10)  # Swaps the line, the copy keeps its own
+    assert cart.subtotal_cents == 100 and copy.subtotal_cents == 10
+    cart.clear_items()
+    assert cart.item_count == 0 and copy.item_count == 1
+    print("✓ Sales sharing lines keep their own totals")
+
+def test_totals_match_resum():
+    """Test running totals against a full re-sum after random basket edits."""
+    print("=== Testing Random Basket Edits ===")
+    
+    rng = random.Random(7)
+    products = [make_product(i, round(rng.uniform(0.5, 99.99), 2)) for i in range(1, 50)]
+    cart = Sale()
+    for _ in range(2000):
+        action = rng.random()
+        if action < 0.5 or not cart.items:
+            cart.add_item(rng.choice(products), rng.randint(1, 5))
+        elif action < 0.8:
+            cart.set_quantity(rng.choice(cart.items).product.id, rng.randint(0, 9))
+        else:
+            cart.remove_item(rng.choice(cart.items).product.id)
+    expected = sum(to_cents(item.unit_price) * item.quantity for item in cart.items)
+    assert cart.subtotal_cents == expected
+    assert cart.item_count == sum(item.quantity for item in cart.items)
+    print(f"✓ Running totals match a re-sum over {len(cart.items)} lines")
+
+if __name__ == "__main__":
+    test_cents_conversion_and_rounding()
+    test_cash_amount_due()
+    test_rounding_recorded()
+    test_running_totals()
+    test_totals_match_resum()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test keyset-paginated order history headers and filters
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from models.sale import Sale, SaleItem
+from models.payment import Payment, PaymentMethod
+
+def _make_sales(db_manager, count):
+    """Save sales spread over several days, alternating payment methods."""
+    product = db_manager.get_all_products()[0]
+    start = datetime(2024, 1, 1, 9, 0)
+    for i in range(count):
+        sale = Sale(timestamp=start + timedelta(hours=i), cashier_id=str(1 + i % 2))
+        sale.add_item(product, 1 + i % 3)
+        method = PaymentMethod.CASH if i % 2 == 0 else PaymentMethod.CARD
+        sale.payment = Payment(method=method, amount=sale.total)
+        db_manager.save_sale(sale)
+
+def test_order_history_paging():
+    """Test that pages cover every sale once, newest first, with filters."""
+    print("=== Testing Order History Paging ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager = DatabaseManager(os.path.join(tmp, "pos.db"))
+        _make_sales(db_manager, 120)
+        
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            sales, cursor = db_manager.get_sales_page(limit=50, after=cursor)
+            seen.extend(sale["id"] for sale in sales)
+            pages += 1
+            if not cursor:
+                break
+        
+        assert len(seen) == 120 and len(set(seen)) == 120
+        assert seen == sorted(seen, reverse=True)
+        assert pages == 3
+        assert "items" not in sales[0]
+        print(f"✓ {len(seen)} sales in {pages} pages, newest first")
+        
+        cash_sales, _ = db_manager.get_sales_page(limit=200, payment_method=PaymentMethod.CASH.value)
+        assert len(cash_sales) == 60
+        assert all(sale["payment_method"] == "cash" for sale in cash_sales)
+        print("✓ Payment method filter")
+        
+        cashier_sales, _ = db_manager.get_sales_page(limit=200, cashier_id=2)
+        assert len(cashier_sales) == 60
+        assert all(sale["cashier_id"] == "2" for sale in cashier_sales)
+        print("✓ Cashier filter")
+        
+        day_sales, _ = db_manager.get_sales_page(limit=200, start_date=datetime(2024, 1, 2),
+                                                 end_date=datetime(2024, 1, 2, 23, 59, 59))
+        assert len(day_sales) == 24
+        assert all(sale["timestamp"].date() == datetime(2024, 1, 2).date() for sale in day_sales)
+        print("✓ Date range filter")
+        
+        totals = sorted(sale["total"] for sale in cash_sales)
+        ranged, _ = db_manager.get_sales_page(limit=200, min_total=totals[-1])
+        assert ranged and all(sale["total"] >= totals[-1] for sale in ranged)
+        print("✓ Amount range filter")
+        
+        db_manager.close_all_connections()
+
+if __name__ == "__main__":
+    test_order_history_paging()
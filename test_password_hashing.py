@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test KDF password hashing, legacy rehash on login and cost benchmarking
+"""
+
+import os
+import sys
+import hashlib
+import sqlite3
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.user_manager import UserManager
+from utils.password_hasher import PasswordHasher
+
+def test_password_hasher():
+    """Test hashing and verification in every supported format."""
+    print("=== Testing Password Hasher ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        hasher = PasswordHasher(os.path.join(tmp, "password_settings.json"))
+        
+        for scheme in PasswordHasher.SCHEMES:
+            hasher.settings["scheme"] = scheme
+            password_hash = hasher.hash("secret")
+            assert password_hash.startswith(scheme + "$")
+            assert hasher.verify("secret", password_hash)
+            assert not hasher.verify("wrong", password_hash)
+            assert not hasher.needs_rehash(password_hash)
+            print(f"✓ {scheme} hash verified")
+        
+        legacy_hash = "abcd:" + hashlib.sha256(b"secretabcd").hexdigest()
+        assert hasher.verify("secret", legacy_hash)
+        assert hasher.needs_rehash(legacy_hash)
+        assert not hasher.verify("secret", "garbage")
+        print("✓ Legacy hash verified and flagged for rehash")
+        
+        result = hasher.benchmark(target_ms=20, scheme="pbkdf2_sha256")
+        assert result["pbkdf2_iterations"] >= PasswordHasher.MIN_PBKDF2_ITERATIONS
+        assert os.path.exists(hasher.settings_file)
+        print(f"✓ Benchmark picked {result['pbkdf2_iterations']} iterations ({result['measured_ms']} ms)")
+
+def test_rehash_on_login():
+    """Test that a legacy password hash is upgraded on successful login."""
+    print("=== Testing Rehash On Login ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "pos.db")
+        manager = UserManager(db_path, os.path.join(tmp, "archive.db"), async_activity_log=False)
+        
+        legacy_hash = "abcd:" + hashlib.sha256(b"admin123abcd").hexdigest()
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE users SET password_hash = ? WHERE username = 'admin'", (legacy_hash,))
+        conn.commit()
+        
+        assert manager.authenticate("admin", "wrong") is None
+        assert manager.authenticate("admin", "admin123") is not None
+        new_hash = conn.execute("SELECT password_hash FROM users WHERE username = 'admin'").fetchone()[0]
+        conn.close()
+        
+        assert new_hash != legacy_hash
+        assert not manager.password_hasher.needs_rehash(new_hash)
+        assert manager.authenticate("admin", "admin123") is not None
+        print(f"✓ Legacy hash upgraded to {new_hash.split('$')[0]}")
+
+if __name__ == "__main__":
+    test_password_hasher()
+    test_rehash_on_login()
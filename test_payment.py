@@ -37,7 +37,7 @@ def test_payment_system():
     # Test cash payment with exact amount
     print(f"\n3. Test paiement espèces (montant exact)...")
     cash_payment = Payment(PaymentMethod.CASH, sale.total)
-    cash_payment.calculate_change(sale.total)
+    cash_payment.calculate_change(sale.amount_due(cash_payment.method))
     print(f"   - Montant payé: {cash_payment.amount:.2f} د.م")
     print(f"   - Monnaie: {cash_payment.change_amount:.2f} د.م")
     print(f"   - Statut: {cash_payment.status.value}")
@@ -45,14 +45,14 @@ def test_payment_system():
     # Test cash payment with extra money
     print(f"\n4. Test paiement espèces (avec monnaie)...")
     cash_payment_extra = Payment(PaymentMethod.CASH, 50.00)
-    cash_payment_extra.calculate_change(sale.total)
+    cash_payment_extra.calculate_change(sale.amount_due(cash_payment_extra.method))
     print(f"   - Montant payé: {cash_payment_extra.amount:.2f} د.م")
     print(f"   - Monnaie: {cash_payment_extra.change_amount:.2f} د.م")
     
     # Test card payment
     print(f"\n5. Test paiement carte...")
     card_payment = Payment(PaymentMethod.CARD, sale.total)
-    card_payment.calculate_change(sale.total)
+    card_payment.calculate_change(sale.amount_due(card_payment.method))
     print(f"   - Montant payé: {card_payment.amount:.2f} د.م")
     print(f"   - Monnaie: {card_payment.change_amount:.2f} د.م")
     print(f"   - Carte: {card_payment.is_card_payment}")
@@ -60,10 +60,10 @@ def test_payment_system():
     # Test insufficient payment (should fail in real system)
     print(f"\n6. Test paiement insuffisant...")
     insufficient_payment = Payment(PaymentMethod.CASH, 20.00)
-    insufficient_payment.calculate_change(sale.total)
+    insufficient_payment.calculate_change(sale.amount_due(insufficient_payment.method))
     print(f"   - Montant payé: {insufficient_payment.amount:.2f} د.م")
-    print(f"   - Total dû: {sale.total:.2f} د.م")
-    print(f"   - Suffisant: {'Oui' if insufficient_payment.amount >= sale.total else 'Non'}")
+    print(f"   - Total dû: {sale.cash_total:.2f} د.م")
+    print(f"   - Suffisant: {'Oui' if insufficient_payment.amount >= sale.cash_total else 'Non'}")
     
     print(f"\n" + "=" * 50)
     print("TESTS TERMINÉS AVEC SUCCÈS!")
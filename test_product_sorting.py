@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test locale-aware sort keys and inventory sorting
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.product import Product
+from utils.helpers import collation_key
+
+def test_collation_key():
+    """Test French and Arabic aware ordering."""
+    print("=== Testing Collation Key ===")
+    
+    names = ["Zèbre", "école", "Eau", "Ému", "ecrou"]
+    assert sorted(names, key=collation_key) == ["Eau", "école", "ecrou", "Ému", "Zèbre"]
+    print("✓ French accents and case ignored on the first level")
+    
+    # Diacritics and hamza forms sort with the base letter
+    assert collation_key("أحمد")[0] == collation_key("احمد")[0]
+    assert collation_key("مُحَمَّد")[0] == collation_key("محمد")[0]
+    assert sorted(["بطاطس", "أرز", "تمر"], key=collation_key) == ["أرز", "بطاطس", "تمر"]
+    print("✓ Arabic diacritics and alef variants folded")
+
+def test_inventory_sort_ties():
+    """Test that equal sort keys stay in ascending id order in both directions."""
+    print("=== Testing Inventory Sort Ties ===")
+    
+    from pos_system import InventoryManagementWindow
+    
+    window = object.__new__(InventoryManagementWindow)  # Sorting needs no Tk widgets
+    window.products = [Product(id=i, name=f"Produit {i}", description="", price=float(i % 3))
+                       for i in (5, 1, 4, 2, 3, 6)]
+    window._sort_orders = {}
+    window.sort_field = "price"
+    
+    window.sort_descending = False
+    window.apply_sort()
+    assert [p.id for p in window.products] == [3, 6, 1, 4, 2, 5]
+    window.sort_descending = True
+    window.apply_sort()
+    assert [p.id for p in window.products] == [2, 5, 1, 4, 3, 6]
+    print("✓ Ties broken by ascending id whichever way the column is sorted")
+
+if __name__ == "__main__":
+    test_collation_key()
+    test_inventory_sort_ties()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test the query profiler and slow-query log
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import tempfile
+import shutil
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.query_profiler import query_profiler, ProfiledConnection
+from database.db_manager import DatabaseManager
+from database.user_manager import UserManager
+
+def test_disabled_is_plain_sqlite():
+    """Test that connections are plain sqlite3 connections while disabled."""
+    print("=== Testing Disabled Profiler ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        query_profiler.disable()
+        query_profiler.reset()
+        conn = query_profiler.connect(os.path.join(workdir, "plain.db"))
+        assert type(conn) is sqlite3.Connection
+        conn.execute("SELECT 1").fetchall()
+        conn.close()
+        assert query_profiler.get_statistics() == []
+        print("✓ No wrapper and nothing recorded when disabled")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_statement_statistics():
+    """Test call counts, rows and latencies for DatabaseManager and UserManager."""
+    print("=== Testing Statement Statistics ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(workdir, "pos.db")
+        query_profiler.enable(slow_query_ms=10000)
+        query_profiler.reset()
+        db = DatabaseManager(db_path)
+        users = UserManager(db_path, async_activity_log=False)
+        assert isinstance(db._get_connection(), ProfiledConnection)
+        
+        for _ in range(5):
+            db._clear_cache()
+            db.get_all_products()
+        users.get_all_users()
+        
+        statistics = query_profiler.get_statistics()
+        products = [s for s in statistics if s["sql"].startswith("SELECT") and "FROM products" in s["sql"]
+                    and "is_active = 1" in s["sql"] and s["calls"] == 5]
+        assert products, [s["sql"] for s in statistics]
+        assert products[0]["rows"] == 5 * 8  # Eight sample products per call
+        assert products[0]["p95_ms"] > 0 and products[0]["total_ms"] >= products[0]["p95_ms"]
+        assert any("FROM users" in s["sql"] for s in statistics)
+        assert query_profiler.get_slow_queries() == []
+        db.close_all_connections()
+        print("✓ Calls, rows and p95 recorded per statement")
+    finally:
+        query_profiler.disable()
+        query_profiler.reset()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_slow_query_log_and_export():
+    """Test that slow statements are logged with their query plan and exported."""
+    print("=== Testing Slow Query Log ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(workdir, "pos.db")
+        query_profiler.enable(slow_query_ms=0)  # Everything counts as slow
+        query_profiler.reset()
+        db = DatabaseManager(db_path)
+        assert db.get_product_by_barcode("CAFE001") is not None
+        
+        entries = [e for e in query_profiler.get_slow_queries() if "WHERE barcode = ?" in e["sql"]]
+        assert entries, query_profiler.get_slow_queries()
+        assert "'CAFE001'" in entries[0]["parameters"]
+        assert any("INDEX" in step for step in entries[0]["plan"]), entries[0]["plan"]
+        print("✓ Slow statements logged with EXPLAIN QUERY PLAN")
+        
+        export_path = os.path.join(workdir, "profile.json")
+        query_profiler.export_json(export_path)
+        with open(export_path, encoding="utf-8") as f:
+            exported = json.load(f)
+        assert exported["statements"] and exported["slow_queries"]
+        assert exported["slow_query_ms"] == 0
+        db.close_all_connections()
+        print("✓ Profile exported as JSON")
+    finally:
+        query_profiler.disable()
+        query_profiler.reset()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_disabled_is_plain_sqlite()
+    test_statement_statistics()
+    test_slow_query_log_and_export()
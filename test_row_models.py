@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test slotted row models for sales history and reports
+"""
+
+import os
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from models.rows import SaleRow, ItemRow
+from models.sale import Sale, SaleItem
+from models.payment import Payment, PaymentMethod
+
+def _make_sales(db_manager, count):
+    """Save sales one hour apart, alternating payment methods."""
+    products = db_manager.get_all_products()[:3]
+    start = datetime(2024, 3, 1, 9, 0)
+    for i in range(count):
+        sale = Sale(timestamp=start + timedelta(hours=i), cashier_id=str(1 + i % 2), tax_rate=0.2)
+        for offset, product in enumerate(products):
+            sale.add_item(product, 1 + (i + offset) % 3)
+        method = PaymentMethod.CASH if i % 2 == 0 else PaymentMethod.CARD
+        sale.payment = Payment(method=method, amount=sale.total)
+        db_manager.save_sale(sale)
+    return start
+
+def test_history_rows():
+    """Test that history and report loads return complete row models."""
+    print("=== Testing Sale Rows ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager = DatabaseManager(os.path.join(tmp, "pos.db"))
+        db_manager.ROW_CHUNK_SIZE = 7  # Several IN (...) chunks
+        start = _make_sales(db_manager, 40)
+        
+        sales = db_manager.get_sales_by_date_range(start, start + timedelta(hours=29, minutes=30))
+        assert len(sales) == 30 and all(isinstance(sale, SaleRow) for sale in sales)
+        assert [sale.timestamp for sale in sales] == sorted((sale.timestamp for sale in sales), reverse=True)
+        assert all(len(sale.items) == 3 and sale.payment for sale in sales)
+        assert not hasattr(sales[0], "__dict__") and not hasattr(sales[0].items[0], "__dict__")
+        print("✓ Date range loaded as slotted rows with lines and payments")
+        
+        row = sales[-1]
+        stored = db_manager.get_sale_by_id(row.id)
+        assert row.timestamp == start and row.payment.method == PaymentMethod.CASH
+        assert row.payment.is_cash_payment and row.payment.amount == stored.total
+        assert row.total == stored.total and row.item_count == stored.item_count
+        assert [item.product_name for item in row.items] == [item.product.name for item in stored.items]
+        assert [item.product.id for item in row.items] == [item.product.id for item in stored.items]
+        print("✓ Rows match the full sale read by id")
+        
+        sale = row.to_sale()
+        assert isinstance(sale, Sale) and sale.total == stored.total and sale.tax_amount == stored.tax_amount
+        assert sale.payment.method == PaymentMethod.CASH and sale.sync_id == stored.sync_id
+        print("✓ Row converts back to a full Sale")
+        
+        day = db_manager.get_sales_by_date(start)
+        assert len(day) == 15 and all(sale.timestamp.date() == start.date() for sale in day)
+        recent = db_manager.get_all_sales()
+        assert len(recent) == 40 and recent[0].timestamp == start + timedelta(hours=39)
+        print("✓ Day and recent history use the same loader")
+
+def test_row_memory():
+    """Test that rows take less memory than full models for the same history."""
+    print("=== Testing Row Memory ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager = DatabaseManager(os.path.join(tmp, "pos.db"))
+        start = _make_sales(db_manager, 200)
+        end = start + timedelta(days=30)
+        
+        tracemalloc.start()
+        rows = db_manager.get_sales_by_date_range(start, end)
+        row_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        
+        ids = [row.id for row in rows]
+        tracemalloc.start()
+        sales = [db_manager.get_sale_by_id(sale_id) for sale_id in ids]  # Full models with their products
+        sale_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        
+        assert len(rows) == len(sales) == 200
+        assert isinstance(rows[0].items[0], ItemRow)
+        assert row_bytes < sale_bytes
+        print(f"✓ 200 sales: {row_bytes // 1024} KiB as rows, {sale_bytes // 1024} KiB as models")
+
+if __name__ == "__main__":
+    test_history_rows()
+    test_row_memory()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Test the sale outbox and its shipper
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import tempfile
+import urllib.error
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from models.sale import Sale, SaleItem
+from utils.outbox_shipper import OutboxShipper, FileDropSink, SQLiteSink, is_rejection
+
+class FlakySink:
+    """Sink that fails a given number of times before delivering to another sink."""
+    
+    def __init__(self, sink, failures):
+        self.sink = sink
+        self.failures = failures
+    
+    def send(self, records):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("head office unreachable")
+        self.sink.send(records)
+
+class RejectingSink:
+    """Sink that rejects every batch holding a given sale, like a hub answering 400."""
+    
+    def __init__(self, sink, bad_key, online=True):
+        self.sink = sink
+        self.bad_key = bad_key
+        self.online = online
+        self.batch_sizes = []
+    
+    def send(self, records):
+        self.batch_sizes.append(len(records))
+        if not self.online:
+            raise ConnectionError("head office unreachable")
+        if any(record["key"] == self.bad_key for record in records):
+            raise ValueError("invalid sales batch")
+        self.sink.send(records)
+
+def test_rejected_sale_isolated():
+    """Test that a sale the sink keeps rejecting is isolated and parked, not holding back the rest."""
+    print("=== Testing Rejected Sale Isolation ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "pos.db")
+        db_manager = DatabaseManager(db_path, use_outbox=True)
+        product = db_manager.get_all_products()[0]
+        sales = [Sale(items=[SaleItem(product=product, quantity=1)]) for _ in range(10)]
+        for sale in sales:
+            db_manager.save_sale(sale)
+        
+        sink = RejectingSink(SQLiteSink(os.path.join(tmp, "head_office.db")), sales[0].sync_id, online=False)
+        shipper = OutboxShipper(db_path, sink, batch_size=10, base_backoff=0.0, max_rejections=5)
+        
+        # Offline: one request per drain, and the batch keeps its full size
+        for _ in range(10):
+            assert shipper.drain() == 0
+        assert sink.batch_sizes == [10] * 10 and shipper.parked_count() == 0
+        print("✓ Unreachable sink neither shrinks batches nor parks anything")
+        
+        sink.online = True
+        shipped = sum(shipper.drain() for _ in range(4))
+        assert shipped == 9 and shipper.pending_count() == 1 and shipper.parked_count() == 0
+        assert sink.batch_sizes[10] == 10 and sink.batch_sizes[-1] == 1
+        
+        shipper.drain()
+        assert shipper.pending_count() == 1 and shipper.parked_count() == 1
+        conn = sqlite3.connect(db_path)
+        rejections = conn.execute("SELECT rejections FROM sale_outbox WHERE parked_at IS NOT NULL").fetchone()[0]
+        conn.close()
+        assert rejections == 5
+        print("✓ Good sales shipped around the rejected one, which is parked")
+        
+        assert shipper.drain() == 0  # Parked sales are not retried
+        sink.bad_key = None
+        assert shipper.requeue_parked() == 1 and shipper.drain() == 1
+        assert shipper.pending_count() == 0
+        print("✓ Requeued parked sale shipped")
+        
+        rejected, unavailable = (urllib.error.HTTPError("http://hub/sales", code, "", {}, None) for code in (400, 503))
+        assert is_rejection(rejected) and not is_rejection(unavailable)
+        assert not is_rejection(ConnectionError()) and not is_rejection(sqlite3.OperationalError("locked"))
+        print("✓ Refused batches told apart from an unavailable sink")
+        
+        db_manager.close_all_connections()
+
+def test_sale_outbox():
+    """Test that sales are queued with the commit and shipped exactly once."""
+    print("=== Testing Sale Outbox ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "pos.db")
+        db_manager = DatabaseManager(db_path, use_outbox=True)
+        product = db_manager.get_all_products()[0]
+        for quantity in (1, 2, 3):
+            db_manager.save_sale(Sale(items=[SaleItem(product=product, quantity=quantity)]))
+        
+        target = os.path.join(tmp, "head_office.db")
+        sink = FlakySink(SQLiteSink(target), failures=1)
+        shipper = OutboxShipper(db_path, sink, batch_size=2, base_backoff=0.0)
+        assert shipper.pending_count() == 3
+        print("✓ Every committed sale has an outbox row")
+        
+        assert shipper.drain() == 0
+        conn = sqlite3.connect(db_path)
+        attempts, error = conn.execute("SELECT attempts, last_error FROM sale_outbox ORDER BY id LIMIT 1").fetchone()
+        conn.close()
+        assert attempts == 1 and "unreachable" in error
+        print("✓ Failed batch scheduled for retry")
+        
+        assert shipper.drain() == 3
+        assert shipper.pending_count() == 0
+        print("✓ Outbox drained in batches after the retry")
+        
+        # Resending the same sales (e.g. lost acknowledgement) is ignored by the sink
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE sale_outbox SET shipped_at = NULL")
+        conn.commit()
+        conn.close()
+        shipper.drain()
+        conn = sqlite3.connect(target)
+        keys = conn.execute("SELECT idempotency_key, total FROM replicated_sales").fetchall()
+        conn.close()
+        assert len(keys) == 3 and sorted(total for _, total in keys) == [product.price * q for q in (1, 2, 3)]
+        print("✓ Idempotency keys prevent duplicates")
+        
+        drop = os.path.join(tmp, "drop")
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE sale_outbox SET shipped_at = NULL")
+        conn.commit()
+        conn.close()
+        OutboxShipper(db_path, FileDropSink(drop), batch_size=2).drain()
+        files = sorted(os.listdir(drop))
+        assert len(files) == 3
+        with open(os.path.join(drop, files[0]), encoding='utf-8') as f:
+            assert len(json.load(f)["sales"]) == 1
+        print("✓ File drop sink writes one file per sale")
+        
+        # Crash before the batch was marked shipped: the resend is regrouped with a newer sale
+        db_manager.save_sale(Sale(items=[SaleItem(product=product, quantity=4)]))
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE sale_outbox SET shipped_at = NULL WHERE id > 1")
+        conn.commit()
+        conn.close()
+        OutboxShipper(db_path, FileDropSink(drop), batch_size=10).drain()
+        assert len(os.listdir(drop)) == 4 and set(files) < set(os.listdir(drop))
+        print("✓ Regrouped resends do not duplicate dropped sales")
+        
+        shipper = OutboxShipper(db_path, FileDropSink(drop), retention_days=30)
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE sale_outbox SET shipped_at = datetime('now', 'localtime', '-40 days') WHERE id <= 2")
+        conn.commit()
+        conn.close()
+        assert shipper.purge_if_due() == 2 and shipper.purge_if_due() == 0
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM sale_outbox").fetchone()[0] == 2
+        conn.close()
+        print("✓ Shipped rows purged once past retention, at most once per interval")
+        
+        db_manager.close_all_connections()
+        
+        # Without a sink nothing drains the outbox, so no rows are kept
+        db_manager = DatabaseManager(os.path.join(tmp, "standalone.db"), use_outbox=False)
+        db_manager.save_sale(Sale(items=[SaleItem(product=product, quantity=1)]))
+        assert OutboxShipper(db_manager.db_path, FileDropSink(drop)).pending_count() == 0
+        print("✓ No outbox rows without a sink")
+        
+        db_manager.close_all_connections()
+
+if __name__ == "__main__":
+    test_sale_outbox()
+    test_rejected_sale_isolated()
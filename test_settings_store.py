@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test the shared settings store
+"""
+
+import gc
+import os
+import sys
+import json
+import tempfile
+import shutil
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings_store import SettingsStore, settings_store
+from config.receipt_settings import ReceiptSettingsManager
+
+class Listener:
+    """Records the settings versions it was notified of."""
+    
+    def __init__(self):
+        """Initialize with no notifications."""
+        self.versions = []
+    
+    def on_change(self, settings, version):
+        """Settings store callback."""
+        self.versions.append((version, settings.get("store_name")))
+
+def test_write_behind_and_versions():
+    """Test that updates are versioned, notified at once and written later, atomically."""
+    print("=== Testing Write-Behind ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, "config", "receipt_settings.json")
+        store = SettingsStore(write_delay=60)
+        assert store.load(path, {"store_name": "Shop", "print_copies": 1}) == {"store_name": "Shop", "print_copies": 1}
+        
+        listener = Listener()
+        store.subscribe(path, listener.on_change)
+        assert store.update(path, {"store_name": "Rimal"}) == 1
+        assert store.update(path, {"print_copies": 2}) == 2
+        assert listener.versions == [(1, "Rimal"), (2, "Rimal")]
+        assert store.load(path) == {"store_name": "Rimal", "print_copies": 2}
+        assert not os.path.exists(path)
+        print("✓ Subscribers notified at once, file not written yet")
+        
+        store.flush()
+        with open(path, encoding='utf-8') as f:
+            assert json.load(f) == {"store_name": "Rimal", "print_copies": 2}
+        assert os.listdir(os.path.dirname(path)) == ["receipt_settings.json"]
+        print("✓ Both updates written in one atomic write")
+        
+        del listener
+        gc.collect()
+        store.update(path, {"print_copies": 3})
+        assert store._subscribers[store._key(path)] == []
+        print("✓ Subscribers held weakly")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_failed_write_stays_pending():
+    """Test that a failed write is reported and retried by the next flush."""
+    print("=== Testing Failed Writes ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        blocker = os.path.join(workdir, "config")
+        with open(blocker, 'w', encoding='utf-8') as f:
+            f.write("not a directory")
+        path = os.path.join(blocker, "backup_settings.json")
+        store = SettingsStore(write_delay=60)
+        store.update(path, {"max_backups": 5})
+        
+        assert list(store.flush()) == [store._key(path)]
+        try:
+            store.write(path)
+            assert False, "write should have failed"
+        except OSError:
+            pass
+        assert store._key(path) in store._dirty
+        print("✓ Failure reported and the file kept pending")
+        
+        os.remove(blocker)
+        assert store.flush() == {} and not store._dirty
+        with open(path, encoding='utf-8') as f:
+            assert json.load(f) == {"max_backups": 5}
+        print("✓ Next flush writes the pending change")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_managers_share_snapshot():
+    """Test that a receipt printer's settings follow a save made by another manager."""
+    print("=== Testing Shared Snapshot ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, "receipt_settings.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"store_name": "Shop", "paper_size": "58mm"}, f)
+        
+        printer_manager = ReceiptSettingsManager(path)
+        printer_settings = printer_manager.get_settings()  # Held by the receipt printer
+        dialog_manager = ReceiptSettingsManager(path)
+        assert printer_settings.store_name == "Shop" and dialog_manager.get_paper_width() == 32
+        
+        os.remove(path)  # Not read again: the snapshot is in memory
+        dialog_manager.update_settings(store_name="Rimal", paper_size="80mm")
+        assert printer_settings.store_name == "Rimal" and printer_manager.get_paper_width() == 40
+        assert printer_manager.version == dialog_manager.version == 1
+        print("✓ Change visible to every manager without re-reading the file")
+        
+        settings_store.flush()
+        with open(path, encoding='utf-8') as f:
+            saved = json.load(f)
+        assert saved["store_name"] == "Rimal" and saved["paper_size"] == "80mm"
+        assert saved["print_copies"] == 1  # Defaults filled in
+        print("✓ Snapshot persisted")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_write_behind_and_versions()
+    test_failed_write_stays_pending()
+    test_managers_share_snapshot()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test the staged startup and the startup profiler
+"""
+
+import os
+import sys
+import subprocess
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.startup_profiler import StartupProfiler
+
+def test_lazy_startup_imports():
+    """Test that importing the register does not load deferred modules."""
+    print("=== Testing Lazy Startup Imports ===")
+    
+    script = (
+        "import sys, pos_system\n"
+        "deferred = ('reportlab', 'matplotlib', 'pandas', 'utils.advanced_receipt_printer',\n"
+        "            'utils.csv_import', 'utils.backup_manager', 'dialogs.settings_dialog',\n"
+        "            'dialogs.receipt_settings_dialog', 'dialogs.language_settings_dialog')\n"
+        "print(','.join(m for m in sys.modules if m.startswith(deferred)))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.returncode == 0, result.stderr
+    loaded = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ""
+    assert loaded == "", f"Loaded at startup: {loaded}"
+    print("✓ ReportLab, reports, CSV, backup and settings dialogs are deferred")
+
+def test_startup_profiler():
+    """Test phases, user-wait exclusion and import timing."""
+    print("=== Testing Startup Profiler ===")
+    
+    profiler = StartupProfiler()
+    profiler.enable()
+    with profiler.phase("init"):
+        import xml.dom.minidom  # Not imported by the test runner
+    with profiler.phase("login", user_wait=True):
+        time.sleep(0.2)
+    profiler.mark("register screen shown")
+    profiler.disable()
+    
+    assert "xml.dom.minidom" in profiler.import_times
+    assert profiler.marks[0][1] < 0.2  # Login wait is not counted
+    report = profiler.report(budget_ms=10000)
+    assert "waiting for user" in report and "OK" in report
+    print("✓ Profiler reports phases, imports and budget")
+
+if __name__ == "__main__":
+    test_lazy_startup_imports()
+    test_startup_profiler()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test the stock movement ledger
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from models.product import Product
+from models.sale import Sale, SaleItem
+
+def test_stock_ledger():
+    """Test movements, concurrent decrements and point-in-time stock."""
+    print("=== Testing Stock Ledger ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "pos.db")
+        db_manager = DatabaseManager(db_path, use_outbox=True)
+        ledger = db_manager.stock_ledger
+        
+        tea = Product(id=None, name="Thé", description="", price=15.0, stock_quantity=100, cost_price=9.0)
+        db_manager.save_product(tea)
+        after_creation = datetime.now()
+        
+        # Four registers selling the same product at once
+        def sell(quantity):
+            for _ in range(10):
+                db_manager.apply_sale_stock(Sale(items=[SaleItem(product=tea, quantity=quantity)]))
+        
+        threads = [threading.Thread(target=sell, args=(1,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert db_manager.get_product_by_id(tea.id).stock_quantity == 60
+        print("✓ Concurrent sale decrements are not lost")
+        
+        after_sales = datetime.now()
+        db_manager.adjust_product_stock(tea.id, 24, "receipt", reference="BL-001")
+        db_manager.update_product_stock(tea.id, 80, reason="Inventaire")  # 4 units missing
+        
+        assert ledger.get_stock_at(tea.id, after_creation) == 100
+        assert ledger.get_stock_at(tea.id, after_sales) == 60
+        assert ledger.get_stock_at(tea.id, datetime.now()) == 80
+        print("✓ Point-in-time stock from running balances")
+        
+        # An inventory edit started before more sales only applies the edit
+        tea.set_stock_quantity(90)
+        db_manager.apply_sale_stock(Sale(items=[SaleItem(product=tea, quantity=5)]))
+        db_manager.save_product(tea, previous_stock=80)
+        assert db_manager.get_product_by_id(tea.id).stock_quantity == 85
+        print("✓ Inventory edits do not overwrite concurrent sales")
+        
+        ledger.create_snapshot()
+        db_manager.apply_sale_stock(Sale(items=[SaleItem(product=tea, quantity=5)]))
+        levels = ledger.get_stock_levels_at(datetime.now())
+        assert levels[tea.id] == 80
+        assert ledger.get_stock_levels_at(after_sales)[tea.id] == 60
+        valuation = ledger.get_stock_valuation(after_sales)
+        tea_value = next(item for item in valuation["items"] if item["product_id"] == tea.id)
+        assert tea_value["value"] == 60 * 9.0
+        print("✓ Stock levels and valuation from snapshots plus movements")
+        
+        summary = {row["movement_type"]: row["quantity"]
+                   for row in ledger.get_movement_summary(after_creation, datetime.now())
+                   if row["product_id"] == tea.id}
+        assert summary["sale"] == -50 and summary["receipt"] == 24
+        shrinkage = [row for row in ledger.get_shrinkage(after_creation, datetime.now())
+                     if row["product_id"] == tea.id]
+        assert shrinkage[0]["quantity"] == 4 and shrinkage[0]["value"] == 36.0
+        print("✓ Movement summary and shrinkage")
+        
+        # A sale and its stock movements commit together or not at all
+        sale = Sale(items=[SaleItem(product=tea, quantity=2)])
+        db_manager.save_sale(sale, apply_stock=True)
+        assert tea.stock_quantity == 78 and db_manager.get_product_by_id(tea.id).stock_quantity == 78
+        
+        def fail(*args, **kwargs):
+            raise sqlite3.OperationalError("database is locked")
+        ledger.apply_delta = fail
+        sale = Sale(items=[SaleItem(product=tea, quantity=2)])
+        try:
+            db_manager.save_sale(sale, apply_stock=True)
+            assert False, "save_sale should have failed"
+        except sqlite3.OperationalError:
+            pass
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM sales WHERE sync_id = ?", (sale.sync_id,)).fetchone()[0] == 0
+            assert conn.execute("SELECT COUNT(*) FROM sale_outbox WHERE idempotency_key = ?", (sale.sync_id,)).fetchone()[0] == 0
+        del ledger.apply_delta
+        print("✓ Sale, outbox row and stock movements are one transaction")
+        
+        db_manager.close_all_connections()
+
+def test_incremental_snapshots():
+    """Test that snapshots only store moved products and are not taken on checkout."""
+    print("=== Testing Incremental Snapshots ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "pos.db")
+        db_manager = DatabaseManager(db_path)
+        ledger = db_manager.stock_ledger
+        
+        products = []
+        for index in range(20):
+            product = Product(id=None, name=f"Article {index}", description="", price=2.0,
+                              stock_quantity=50, cost_price=1.0)
+            db_manager.save_product(product)
+            products.append(product)
+        assert ledger.create_snapshot() is not None
+        
+        def snapshot_rows():
+            with sqlite3.connect(db_path) as conn:
+                return conn.execute("SELECT COUNT(*) FROM stock_snapshot_items").fetchone()[0]
+        
+        rows = snapshot_rows()
+        assert ledger.create_snapshot() is None
+        assert snapshot_rows() == rows
+        print("✓ No snapshot when nothing moved")
+        
+        ledger._last_snapshot_time = None  # A snapshot would be due
+        db_manager.save_sale(Sale(items=[SaleItem(product=products[0], quantity=3)]), apply_stock=True)
+        assert snapshot_rows() == rows
+        print("✓ Checkouts do not take snapshots")
+        
+        before_second = datetime.now()
+        assert ledger.create_snapshot() is not None
+        assert snapshot_rows() == rows + 1
+        db_manager.adjust_product_stock(products[1].id, 10, "receipt")
+        assert ledger.create_snapshot() is not None
+        assert snapshot_rows() == rows + 2
+        print("✓ Snapshots only store products that moved")
+        
+        levels = ledger.get_stock_levels_at(datetime.now())
+        assert levels[products[0].id] == 47 and levels[products[1].id] == 60
+        assert all(levels[product.id] == 50 for product in products[2:])
+        assert ledger.get_stock_levels_at(before_second)[products[1].id] == 50
+        assert ledger.get_stock_at(products[5].id, datetime.now()) == 50
+        print("✓ Stock levels across incremental snapshots")
+        
+        ledger.SNAPSHOT_CHECK_SECONDS = 0.05
+        ledger._last_snapshot_time = None
+        db_manager.adjust_product_stock(products[2].id, -1, "adjustment")
+        ledger.start()
+        deadline = time.monotonic() + 5
+        while snapshot_rows() == rows + 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        ledger.stop()
+        assert snapshot_rows() == rows + 3
+        print("✓ Background thread takes due snapshots")
+        
+        db_manager.close_all_connections()
+
+if __name__ == "__main__":
+    test_stock_ledger()
+    test_incremental_snapshots()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test multi-register sync through the store hub
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from models.product import Product
+from models.sale import Sale, SaleItem
+from utils.sync_service import SyncServer, SyncClient
+
+def _sell(db_manager, product_id, quantity):
+    """Ring up and commit a sale on a register."""
+    product = db_manager.get_product_by_id(product_id)
+    sale = Sale(items=[SaleItem(product=product, quantity=quantity)])
+    db_manager.save_sale(sale, apply_stock=True)
+    return sale
+
+def test_sync_service():
+    """Test pushing sales, pulling catalog changes and working offline."""
+    print("=== Testing Sync Service ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        hub = SyncServer(os.path.join(tmp, "store.db"), port=0, token="secret")
+        hub.start()
+        
+        registers = {}
+        for register_id in ("caisse-1", "caisse-2"):
+            db_manager = DatabaseManager(os.path.join(tmp, f"{register_id}.db"), register_id=register_id)
+            client = SyncClient(db_manager, hub.url, register_id, token="secret")
+            registers[register_id] = (db_manager, client)
+            assert client.sync_once()["online"]
+        
+        coffee = hub.db_manager.get_all_products()[0]
+        coffee.price = 16.0
+        hub.db_manager.save_product(coffee)
+        
+        # Both registers sell while the hub is unreachable
+        for db_manager, client in registers.values():
+            client.server_url = "http://127.0.0.1:1"
+            _sell(db_manager, coffee.id, 2)
+            assert client.sync_once()["online"] is False
+        print("✓ Registers keep selling offline")
+        
+        for db_manager, client in registers.values():
+            client.server_url = hub.url
+            result = client.sync_once()
+            assert result["online"] and result["pushed"] == 1
+        
+        hub_sales = hub.db_manager.get_sales_after(0)
+        assert sorted(sale.register_id for sale in hub_sales) == ["caisse-1", "caisse-2"]
+        assert hub.db_manager.get_product_by_id(coffee.id).stock_quantity == coffee.stock_quantity - 4
+        print("✓ Hub has combined sales and stock")
+        
+        # Stock and price converge on every register
+        for db_manager, client in registers.values():
+            client.sync_once()
+            local = db_manager.get_product_by_id(coffee.id)
+            assert local.price == 16.0
+            assert local.stock_quantity == coffee.stock_quantity - 4
+        print("✓ Catalog changes pulled by version")
+        
+        # A batch replayed after a lost reply is not counted twice
+        db_manager, client = registers["caisse-1"]
+        client._set_state("sales_pushed_through", 0)
+        client.sync_once()
+        assert len(hub.db_manager.get_sales_after(0)) == 2
+        print("✓ Pushing the same sales again is idempotent")
+        
+        # A product created on the register collides with a hub product's barcode
+        db_manager.save_product(Product(id=None, name="Local 1", description="", price=4.0))  # Local ids run ahead
+        local = Product(id=None, name="Local 2", description="", price=5.0, barcode="6111000000017")
+        db_manager.save_product(local)
+        hub_product = Product(id=None, name="Hub", description="", price=6.0, barcode="6111000000017")
+        hub.db_manager.save_product(hub_product)
+        result = client.sync_once()
+        assert result["online"] and client.last_error is None
+        assert db_manager.get_product_by_id(hub_product.id).barcode == "6111000000017"
+        assert local.id != hub_product.id and db_manager.get_product_by_id(local.id).barcode is None
+        print("✓ Hub catalog wins barcode conflicts with local products")
+        
+        # Deleting the newest hub product must neither go unnoticed nor let the next write reuse its version
+        assert hub.db_manager.delete_product(hub_product.id)
+        tea = hub.db_manager.get_all_products()[-1]
+        tea.price = 9.5
+        hub.db_manager.save_product(tea)
+        client.sync_once()
+        assert db_manager.get_product_by_id(hub_product.id) is None
+        assert db_manager.get_product_by_id(tea.id).price == 9.5
+        print("✓ Products deleted on the hub are deleted on registers")
+        
+        # Sold offline before the deletion reached the register: kept for its sales, inactive
+        client.server_url = "http://127.0.0.1:1"
+        _sell(db_manager, tea.id, 1)
+        assert hub.db_manager.delete_product(tea.id)
+        client.server_url = hub.url
+        client.sync_once()
+        assert db_manager.get_product_by_id(tea.id).is_active is False
+        print("✓ Products already sold on the register are deactivated instead")
+        
+        # Small pages still deliver deletions and updates exactly once
+        assert hub.get_catalog(0, 1)["more"]
+        reply = hub.get_catalog(hub.get_catalog(0, 10 ** 6)["version"] - 2, 1)
+        assert len(reply["products"]) + len(reply["deleted"]) == 1
+        
+        def locked(*args, **kwargs):
+            raise sqlite3.OperationalError("database is locked")
+        db_manager.apply_catalog_changes = locked
+        result = client.sync_once()
+        assert "database is locked" in result["error"] and "database is locked" in client.last_error
+        del db_manager.apply_catalog_changes
+        assert client.sync_once()["online"] and client.last_error is None
+        print("✓ Local database errors are reported, not fatal")
+        
+        hub.stop()
+        for db_manager, client in registers.values():
+            db_manager.close_all_connections()
+
+if __name__ == "__main__":
+    test_sync_service()
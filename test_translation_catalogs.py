@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test the compiled per-language translation catalogs
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import shutil
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.language_settings import LanguageManager, CATALOG_DIR, LANGUAGES
+
+def make_catalogs(workdir):
+    """Write small source catalogs; English lacks one key."""
+    catalog_dir = os.path.join(workdir, "translations")
+    os.makedirs(catalog_dir)
+    catalogs = {
+        "fr": {"logout": "Déconnexion", "print_order": "Imprimer la commande"},
+        "ar": {"logout": "خروج", "print_order": "طباعة الطلب"},
+        "en": {"logout": "Logout"}
+    }
+    for code, catalog in catalogs.items():
+        with open(os.path.join(catalog_dir, f"{code}.json"), 'w', encoding='utf-8') as f:
+            json.dump(catalog, f, ensure_ascii=False)
+    return catalog_dir
+
+def test_shipped_catalogs():
+    """Test that every language ships a catalog with the same keys as French."""
+    print("=== Testing Shipped Catalogs ===")
+    
+    with open(os.path.join(CATALOG_DIR, "fr.json"), encoding='utf-8') as f:
+        french = json.load(f)
+    for code in LANGUAGES:
+        with open(os.path.join(CATALOG_DIR, f"{code.lower()}.json"), encoding='utf-8') as f:
+            catalog = json.load(f)
+        assert catalog and set(catalog) <= set(french), code
+    assert french["logout"] and "app_title" in french
+    print("✓ FR/AR/EN catalogs present, no keys missing from French")
+
+def test_compiled_fallback_and_lazy_loading():
+    """Test French fallback merged at compile time and on-demand loading."""
+    print("=== Testing Compiled Catalogs ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        catalog_dir = make_catalogs(workdir)
+        manager = LanguageManager(os.path.join(workdir, "language_settings.json"), catalog_dir=catalog_dir)
+        manager.apply_language_immediately("EN")
+        
+        assert manager.get_text("logout") == "Logout"
+        assert manager.get_text("print_order") == "Imprimer la commande"  # French fallback
+        assert manager.get_text("unknown_key") == "unknown_key"
+        assert list(manager.catalogs) == ["EN"]
+        print("✓ Only the active language loaded, fallback resolved")
+        
+        with open(os.path.join(catalog_dir, "compiled", "en.json"), encoding='utf-8') as f:
+            assert json.load(f) == {"logout": "Logout", "print_order": "Imprimer la commande"}
+        print("✓ Compiled catalog written pre-merged")
+        
+        manager.apply_language_immediately("AR")
+        assert manager.get_text("logout") == "خروج"
+        assert sorted(manager.catalogs) == ["AR", "EN"]
+        print("✓ Other languages loaded when switched to")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_stale_compiled_catalog_rebuilt():
+    """Test that editing a source catalog recompiles it."""
+    print("=== Testing Catalog Recompilation ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        catalog_dir = make_catalogs(workdir)
+        settings_file = os.path.join(workdir, "language_settings.json")
+        manager = LanguageManager(settings_file, catalog_dir=catalog_dir)
+        manager.apply_language_immediately("EN")
+        assert manager.get_text("logout") == "Logout"
+        
+        compiled_path = os.path.join(catalog_dir, "compiled", "en.json")
+        past = time.time() - 60
+        os.utime(compiled_path, (past, past))
+        with open(os.path.join(catalog_dir, "en.json"), 'w', encoding='utf-8') as f:
+            json.dump({"logout": "Sign out"}, f)
+        
+        manager = LanguageManager(settings_file, catalog_dir=catalog_dir)
+        manager.apply_language_immediately("EN")
+        assert manager.get_text("logout") == "Sign out"
+        assert manager.get_text("print_order") == "Imprimer la commande"
+        print("✓ Stale compiled catalog rebuilt from source")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_shipped_catalogs()
+    test_compiled_fallback_and_lazy_loading()
+    test_stale_compiled_catalog_rebuilt()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test the event-loop lag watchdog and UI operation tracing
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import shutil
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import utils.ui_monitor as ui_monitor_module
+from utils.ui_monitor import UIMonitor
+
+class EventLoop:
+    """Minimal stand-in for Tk's after() scheduling, run on the calling thread."""
+    
+    def __init__(self):
+        """Initialize an empty loop."""
+        self.pending = []
+    
+    def after(self, delay_ms, callback):
+        """Schedule callback after delay_ms."""
+        self.pending.append((time.perf_counter() + delay_ms / 1000, callback))
+    
+    def run_for(self, seconds, work=None):
+        """Run due callbacks for a while; work() runs once as if from an event handler."""
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            if work:
+                work()
+                work = None
+            now = time.perf_counter()
+            due = [item for item in self.pending if item[0] <= now]
+            self.pending = [item for item in self.pending if item[0] > now]
+            for _, callback in due:
+                callback()
+            time.sleep(0.005)
+
+def blocking_handler():
+    """Simulate a handler that freezes the screen."""
+    time.sleep(0.6)
+
+def test_stall_detection():
+    """Test that a blocked loop is recorded as a stall with the blocking stack."""
+    print("=== Testing Stall Detection ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        trace_file = os.path.join(workdir, "ui_trace.log")
+        monitor = UIMonitor(trace_file=trace_file, lag_threshold_ms=200, slow_operation_ms=50)
+        loop = EventLoop()
+        monitor.start(loop)
+        loop.run_for(0.5)
+        assert monitor.heartbeats >= 3 and not monitor.stalls
+        
+        loop.run_for(0.5, work=blocking_handler)
+        monitor.stop()
+        
+        stalls = monitor.get_recent_stalls()
+        assert len(stalls) == 1 and stalls[0]["lag_ms"] >= 300, stalls
+        assert stalls[0]["stacks"] and "blocking_handler" in stalls[0]["stacks"][0]["stack"]
+        assert monitor.get_lag_summary()["max_lag_ms"] >= 300
+        print("✓ Stall recorded with the main thread's stack")
+        
+        with open(trace_file, encoding="utf-8") as f:
+            events = [json.loads(line)["event"] for line in f]
+        assert "stall_sample" in events and "stall" in events
+        print("✓ Stall written to the trace file")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_operation_tracing():
+    """Test timing of decorated UI operations, and no-op while stopped."""
+    print("=== Testing Operation Tracing ===")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        monitor = UIMonitor(trace_file=os.path.join(workdir, "ui_trace.log"), slow_operation_ms=50)
+        
+        @monitor.trace("update_cart_display")
+        def update_cart_display(delay):
+            time.sleep(delay)
+            return "done"
+        
+        assert update_cart_display(0) == "done"
+        assert monitor.get_operation_stats() == []  # Not started: not recorded
+        
+        monitor.enabled = True
+        update_cart_display(0.01)
+        update_cart_display(0.08)
+        stats = monitor.get_operation_stats()[0]
+        assert stats["operation"] == "update_cart_display" and stats["count"] == 2
+        assert stats["max_ms"] >= 80 and stats["avg_ms"] >= 40
+        with open(monitor.trace_file, encoding="utf-8") as f:
+            assert json.loads(f.readline())["operation"] == "update_cart_display"
+        print("✓ Operation count, average and max recorded; slow ones traced")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_trace_rotation():
+    """Test that the trace file is rotated and old files are capped."""
+    print("=== Testing Trace Rotation ===")
+    
+    workdir = tempfile.mkdtemp()
+    original_max = ui_monitor_module.TRACE_MAX_BYTES
+    try:
+        ui_monitor_module.TRACE_MAX_BYTES = 500
+        monitor = UIMonitor(trace_file=os.path.join(workdir, "ui_trace.log"))
+        for i in range(100):
+            monitor._write({"event": "slow_operation", "operation": f"op {i}", "duration_ms": 120.0})
+        files = sorted(os.listdir(workdir))
+        assert files == ["ui_trace.log", "ui_trace.log.1", "ui_trace.log.2", "ui_trace.log.3"], files
+        assert all(os.path.getsize(os.path.join(workdir, name)) <= 500 for name in files)
+        print("✓ Trace file rotated with 3 backups")
+    finally:
+        ui_monitor_module.TRACE_MAX_BYTES = original_max
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_stall_detection()
+    test_operation_tracing()
+    test_trace_rotation()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test keyset-paginated user activities and activity archival
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.user_manager import UserManager
+
+def _make_manager(tmp):
+    """Create a user manager on a scratch database."""
+    return UserManager(os.path.join(tmp, "pos.db"), os.path.join(tmp, "archive.db"))
+
+def _insert_activities(manager, rows):
+    """Insert activities with explicit timestamps."""
+    conn = sqlite3.connect(manager.db_path)
+    conn.executemany('''
+        INSERT INTO user_activities (user_id, activity_type, description, timestamp)
+        VALUES (1, 'SALE_COMPLETED', ?, ?)
+    ''', rows)
+    conn.commit()
+    conn.close()
+
+def test_activity_pagination():
+    """Test that pages are disjoint, ordered and complete."""
+    print("=== Testing Activity Pagination ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = _make_manager(tmp)
+        # Several rows share a timestamp to exercise the id tie-breaker
+        _insert_activities(manager, [(f"Sale {i}", f"2025-08-01 10:{i // 3:02d}:00") for i in range(25)])
+        
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = manager.get_user_activities_page(user_id=1, limit=10, after=cursor)
+            seen.extend(page)
+            if not cursor:
+                break
+        
+        sales = [a for a in seen if a.activity_type == 'SALE_COMPLETED']
+        assert len(sales) == 25
+        assert len({a.id for a in seen}) == len(seen)
+        assert all(seen[i].timestamp >= seen[i + 1].timestamp for i in range(len(seen) - 1))
+        print(f"✓ {len(seen)} activities paged without gaps or duplicates")
+        
+        conn = sqlite3.connect(manager.db_path)
+        plan = conn.execute('''
+            EXPLAIN QUERY PLAN
+            SELECT id FROM user_activities WHERE user_id = 1 ORDER BY timestamp DESC, id DESC LIMIT 10
+        ''').fetchall()
+        conn.close()
+        assert any("idx_user_activities_user_time" in row[-1] for row in plan)
+        print("✓ Query uses idx_user_activities_user_time")
+
+def test_activity_archival():
+    """Test that old activities move to monthly archive tables."""
+    print("=== Testing Activity Archival ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = _make_manager(tmp)
+        _insert_activities(manager, [
+            ("Old sale 1", "2020-01-05 09:00:00"),
+            ("Old sale 2", "2020-01-20 09:00:00"),
+            ("Old sale 3", "2020-02-03 09:00:00"),
+        ])
+        
+        archived = manager.archive_activities(older_than_days=365)
+        assert archived == {"2020-01": 2, "2020-02": 1}
+        assert manager.get_archived_activity_months() == ["2020-02", "2020-01"]
+        
+        live = manager.get_user_activities(user_id=1)
+        assert not any(a.description.startswith("Old sale") for a in live)
+        
+        page, _ = manager.get_user_activities_page(archive_month="2020-01")
+        assert [a.description for a in page] == ["Old sale 2", "Old sale 1"]
+        print(f"✓ Archived {sum(archived.values())} activities into {len(archived)} months")
+
+def test_local_time_filters():
+    """Test that local date filters and archive months line up with UTC-stored timestamps."""
+    print("=== Testing Activity Time Zones ===")
+    
+    previous_tz = os.environ.get("TZ")
+    os.environ["TZ"] = "Etc/GMT-2"  # UTC+2 all year
+    time.tzset()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = _make_manager(tmp)
+            manager.log_activity(1, "TZ_TEST", "Logged just now")
+            
+            page, _ = manager.get_user_activities_page(user_id=1, start_date=datetime.now() - timedelta(minutes=5))
+            logged = [a for a in page if a.activity_type == "TZ_TEST"]
+            assert len(logged) == 1
+            assert abs(logged[0].timestamp - datetime.now()) < timedelta(minutes=5)
+            assert not manager.get_user_activities(user_id=1, end_date=datetime.now() - timedelta(minutes=5))
+            print("✓ Local filters match UTC timestamps, shown in local time")
+            
+            # 23:30 UTC on 31 January is already February in UTC+2
+            _insert_activities(manager, [("Month edge", "2020-01-31 23:30:00")])
+            assert manager.archive_activities(older_than_days=365) == {"2020-02": 1}
+            page, _ = manager.get_user_activities_page(archive_month="2020-02")
+            assert page[0].timestamp == datetime(2020, 2, 1, 1, 30)
+            print("✓ Archive months follow the local calendar")
+    finally:
+        if previous_tz is None:
+            del os.environ["TZ"]
+        else:
+            os.environ["TZ"] = previous_tz
+        time.tzset()
+
+if __name__ == "__main__":
+    test_activity_pagination()
+    test_activity_archival()
+    test_local_time_filters()
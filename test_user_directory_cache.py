@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test the in-memory user directory cache of UserManager
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.user_manager import UserManager
+from models.user import User, UserRole, UserStatus
+
+def test_user_directory_cache():
+    """Test cached lookups and invalidation on every user change."""
+    print("=== Testing User Directory Cache ===")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = UserManager(os.path.join(tmp, "pos.db"), os.path.join(tmp, "archive.db"),
+                              async_activity_log=False)
+        assert manager.login("admin", "admin123")
+        admin_id = manager.current_user.id
+        
+        cashier = User(username="cashier1", password_hash=manager._hash_password("pw"),
+                       name="Cashier One", role=UserRole.CASHIER, status=UserStatus.ACTIVE)
+        assert manager.create_user(cashier, admin_id)
+        assert manager.get_user_by_username("cashier1").id == cashier.id
+        assert manager.get_user_names()[cashier.id] == "Cashier One"
+        print("✓ Created user visible through id and username indexes")
+        
+        # Lookups are served from memory until a change invalidates them
+        cached = manager._users_by_id
+        manager.get_user_name(cashier.id)
+        manager.get_all_users()
+        assert manager._users_by_id is cached
+        print("✓ Repeated lookups reuse the cache")
+        
+        # Editing a returned copy must not leak into the cache
+        edited = manager.get_user_by_id(cashier.id)
+        edited.name = "Renamed"
+        assert manager.get_user_name(cashier.id) == "Cashier One"
+        assert manager.update_user(edited)
+        assert manager.get_user_name(cashier.id) == "Renamed"
+        print("✓ update_user refreshes names")
+        
+        old_hash = manager.get_user_by_id(cashier.id).password_hash
+        assert manager.change_password(cashier.id, "new-password")
+        assert manager.get_user_by_id(cashier.id).password_hash != old_hash
+        print("✓ change_password refreshes the cache")
+        
+        assert manager.remove_user(cashier.id)
+        assert manager.get_user_by_id(cashier.id) is None
+        assert manager.get_user_by_username("cashier1") is None
+        assert manager.get_user_name(cashier.id, "Unknown") == "Unknown"
+        print("✓ remove_user drops the user from the cache")
+
+if __name__ == "__main__":
+    test_user_directory_cache()
@@ -3,6 +3,9 @@ Enhanced Receipt Printer
 =========================
 
 This module handles advanced receipt generation and printing with customizable templates.
+
+ReportLab is imported by the PDF builders only, so importing this module (and
+starting the register) does not load the ReportLab stack.
 """
 
 import os
@@ -11,15 +14,6 @@ import subprocess
 import webbrowser
 from typing import TextIO, Optional
 from datetime import datetime
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import mm, inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from reportlab.lib import colors
-from reportlab.pdfgen import canvas
-from reportlab.graphics.shapes import Drawing, Rect
-from io import BytesIO
 import tempfile
 
 from models.sale import Sale
@@ -75,6 +69,11 @@ class AdvancedReceiptPrinter:
     
     def create_58mm_pdf_receipt(self, sale: Sale, pdf_path: str):
         """Create a professional 58mm PDF receipt with proper formatting and print capability."""
+        from reportlab.lib.units import mm
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.enums import TA_CENTER
+        
         # Create PDF document with metadata for 58mm thermal size
         doc = SimpleDocTemplate(
             pdf_path,
@@ -373,6 +372,12 @@ class AdvancedReceiptPrinter:
     
     def generate_pdf_receipt(self, sale: Sale) -> str:
         """Generate PDF receipt."""
+        from reportlab.lib.units import mm
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.enums import TA_CENTER, TA_LEFT
+        from reportlab.lib import colors
+        
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f"receipts/receipt_{sale.id}_{timestamp}.pdf"
         os.makedirs("receipts", exist_ok=True)
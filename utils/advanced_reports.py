@@ -19,7 +19,7 @@ from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 from collections import defaultdict
 
-from models.sale import Sale
+from models.rows import SaleRow
 from models.product import Product
 from database.db_manager import DatabaseManager
 from database.user_manager import user_manager
@@ -55,8 +55,8 @@ class AdvancedReportsManager:
         plt.style.use('seaborn-v0_8-whitegrid')
         sns.set_palette("husl")
         
-    def get_sales_data(self, start_date: datetime, end_date: datetime) -> List[Sale]:
-        """Get sales data for the specified date range."""
+    def get_sales_data(self, start_date: datetime, end_date: datetime) -> List[SaleRow]:
+        """Get sales data (read models) for the specified date range."""
         try:
             return self.db_manager.get_sales_by_date_range(start_date, end_date)
         except:
@@ -72,9 +72,8 @@ class AdvancedReportsManager:
     def generate_report_data(self, period: str, start_date: datetime, end_date: datetime) -> ReportData:
         """Generate comprehensive report data for the specified period."""
         
-        # Get sales and products data
+        # Get sales data
         sales = self.get_sales_data(start_date, end_date)
-        products = self.get_products_data()
         
         # Calculate basic metrics
         total_sales = sum(sale.total for sale in sales)
@@ -90,8 +89,8 @@ class AdvancedReportsManager:
         product_sales = defaultdict(lambda: {"quantity": 0, "revenue": 0})
         for sale in sales:
             for item in sale.items:
-                product_sales[item.product.name]["quantity"] += item.quantity
-                product_sales[item.product.name]["revenue"] += item.total
+                product_sales[item.product_name]["quantity"] += item.quantity
+                product_sales[item.product_name]["revenue"] += item.total
         
         # Top products
         top_products = sorted(
@@ -100,15 +99,15 @@ class AdvancedReportsManager:
             reverse=True
         )[:10]
         
-        # Low stock products
+        # Low stock products (at or below each product's reorder threshold)
         low_stock = [
             {
                 "name": product.name,
                 "current_stock": product.stock_quantity,
+                "reorder_threshold": product.reorder_threshold,
                 "price": product.price
             }
-            for product in products
-            if product.stock_quantity <= 10  # Low stock threshold
+            for product in self.db_manager.get_low_stock_products()
         ]
         
         # Daily breakdown
@@ -132,7 +131,7 @@ class AdvancedReportsManager:
             user_sales_data=user_sales_data
         )
     
-    def _calculate_daily_breakdown(self, sales: List[Sale], start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+    def _calculate_daily_breakdown(self, sales: List[SaleRow], start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
         """Calculate daily breakdown of sales."""
         daily_data = defaultdict(lambda: {"sales": 0, "orders": 0, "items": 0})
         
@@ -157,7 +156,7 @@ class AdvancedReportsManager:
         
         return result
     
-    def _get_user_sales_data(self, sales: List[Sale]) -> List[Dict[str, Any]]:
+    def _get_user_sales_data(self, sales: List[SaleRow]) -> List[Dict[str, Any]]:
         """Get user sales data from sales."""
         user_sales = defaultdict(lambda: {"sales": 0, "orders": 0, "revenue": 0})
         
@@ -168,9 +167,8 @@ class AdvancedReportsManager:
                 user_sales[user_id]["orders"] += 1
                 user_sales[user_id]["revenue"] += sale.total
         
-        # Get user names from user manager
-        users = user_manager.get_all_users()
-        user_names = {user.id: user.name for user in users}
+        # Resolve names from the user manager's cached directory
+        user_names = user_manager.get_user_names()
         
         result = []
         for user_id, data in user_sales.items():
@@ -361,6 +359,8 @@ class AdvancedReportsManager:
 class AdvancedReportsDialog:
     """Advanced reports dialog with comprehensive analytics."""
     
+    ACTIVITY_PAGE_SIZE = 50
+    
     def __init__(self, parent, db_manager: DatabaseManager):
         self.parent = parent
         self.db_manager = db_manager
@@ -798,6 +798,13 @@ class AdvancedReportsDialog:
         activity_scrollbar = ttk.Scrollbar(right_frame, orient="vertical", command=self.activity_tree.yview)
         self.activity_tree.configure(yscrollcommand=activity_scrollbar.set)
         
+        # Older activities are fetched one page at a time
+        self.activity_cursor = None
+        self.load_more_activities_button = ttk.Button(right_frame, text=get_text("load_more"),
+                                                      command=self.load_more_activities,
+                                                      state="disabled")
+        self.load_more_activities_button.pack(side="bottom", fill="x", pady=(5, 0))
+        
         self.activity_tree.pack(side="left", fill="both", expand=True)
         activity_scrollbar.pack(side="right", fill="y")
         
@@ -830,25 +837,36 @@ class AdvancedReportsDialog:
                     )
                 )
         
-        # Update user activities
+        # Update user activities (first page only; older pages load on demand)
+        self.activity_cursor = None
+        self.load_more_activities()
+    
+    def load_more_activities(self):
+        """Append the next page of user activities to the activities tree."""
+        if not self.current_report_data:
+            return
+        
         try:
-            activities = user_manager.get_user_activities(
+            activities, self.activity_cursor = user_manager.get_user_activities_page(
                 start_date=self.current_report_data.start_date,
-                end_date=self.current_report_data.end_date
+                end_date=self.current_report_data.end_date,
+                limit=self.ACTIVITY_PAGE_SIZE,
+                after=self.activity_cursor
             )
+            user_names = user_manager.get_user_names()
             
-            for activity in activities[:50]:  # Show last 50 activities
-                user_name = activity.details.split('\n')[-1].replace('User: ', '') if activity.details else "Unknown"
-                
+            for activity in activities:
                 self.activity_tree.insert(
                     "",
                     "end",
-                    text=user_name.split(' (')[0] if ' (' in user_name else user_name,
+                    text=user_names.get(activity.user_id, "Unknown"),
                     values=(
                         activity.timestamp.strftime("%Y-%m-%d %H:%M") if activity.timestamp else "",
                         activity.activity_type.replace('_', ' ').title(),
                         activity.description[:50] + "..." if len(activity.description) > 50 else activity.description
                     )
                 )
+            
+            self.load_more_activities_button.config(state="normal" if self.activity_cursor else "disabled")
         except Exception as e:
             print(f"Error loading user activities: {e}")
@@ -11,75 +11,128 @@ import shutil
 import json
 import zipfile
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Tuple
 from pathlib import Path
-import schedule
+from collections import deque
+from contextlib import contextmanager, ExitStack
 import threading
 import time
+from utils.backup_store import BackupStore
+from config.settings_store import settings_store
 
 class BackupManager:
     """Manages database backup and restoration operations."""
     
-    def __init__(self, db_path: str = "pos_database.db", backup_dir: str = "backups"):
-        """Initialize backup manager."""
+    INDEX_FILENAME = "index.json"
+    ARCHIVE_SUFFIXES = (".zip", ".db")  # Backup files in backup_dir, whatever their name prefix
+    FREQUENCY_DAYS = {"daily": 1, "weekly": 7, "monthly": 30}
+    MAX_WAIT_SECONDS = 3600  # Re-check the wall clock at least hourly (suspend, clock changes)
+    MAX_DEFER_SECONDS = 600  # Give up on a run if sales keep the till busy this long
+    IDLE_POLL_SECONDS = 1.0  # How often a deferred run checks whether the scheduler was stopped
+    
+    def __init__(self, db_path: str = "pos_database.db", backup_dir: str = "backups",
+                 db_manager=None, writers: Iterable = ()):
+        """Initialize backup manager.
+        
+        Args:
+            db_path: Path of the live database file
+            backup_dir: Directory holding backup archives
+            db_manager: Optional DatabaseManager whose pooled connections are
+                closed before a restore swaps the database file
+            writers: Background writers of the same database (objects with a
+                paused() context manager) held off while a restore swaps it
+        """
         self.db_path = db_path
+        self.db_manager = db_manager
+        self.writers = list(writers)
         self.backup_dir = Path(backup_dir)
         self.backup_dir.mkdir(exist_ok=True)
+        self.index_file = self.backup_dir / self.INDEX_FILENAME
+        self.metrics_file = self.backup_dir / "metrics.jsonl"
+        self.store = BackupStore(str(self.backup_dir / "store"))
         self.settings_file = "config/backup_settings.json"
         self.backup_settings = self.load_backup_settings()
+        settings_store.subscribe(self.settings_file, self._on_settings_changed)
         self.scheduler_running = False
         self.scheduler_thread = None
+        self.next_run: Optional[datetime] = None
+        self._wakeup = threading.Event()  # Set on settings change or stop
+        
+        # Sale activity tracking so backups never compete with checkout
+        self._activity_lock = threading.Lock()
+        self._active_sales = 0
+        self._sales_started = 0
+        self._idle = threading.Event()
+        self._idle.set()
+        
+        # Recent backup duration/size measurements
+        self.backup_metrics = deque(maxlen=50)
+        self.last_backup_time, self.last_scheduled_backup_time = self._load_last_backup_times()
         
         # Start scheduler if auto-backup is enabled
         if self.backup_settings.get("auto_backup_enabled", False):
             self.start_scheduler()
     
     def load_backup_settings(self) -> Dict:
-        """Load backup settings from file."""
+        """Load backup settings from the settings store snapshot."""
         default_settings = {
             "auto_backup_enabled": False,
             "backup_frequency": "daily",  # daily, weekly, monthly
             "backup_time": "02:00",  # HH:MM format
             "max_backups": 30,  # Maximum number of backups to keep
             "compression": True,
-            "include_images": False
+            "include_images": False,
+            "deduplicated_store": False  # Chunked, content-addressed backups
         }
-        
-        try:
-            if os.path.exists(self.settings_file):
-                with open(self.settings_file, 'r', encoding='utf-8') as f:
-                    settings = json.load(f)
-                    # Merge with defaults to ensure all keys exist
-                    default_settings.update(settings)
-            return default_settings
-        except Exception as e:
-            print(f"Error loading backup settings: {e}")
-            return default_settings
+        return settings_store.load(self.settings_file, default_settings)
     
     def save_backup_settings(self, settings: Dict):
-        """Save backup settings to file."""
+        """Save backup settings and write them now; every BackupManager reschedules from the change."""
         try:
-            # Ensure config directory exists
-            config_dir = os.path.dirname(self.settings_file)
-            if config_dir:
-                os.makedirs(config_dir, exist_ok=True)
-                
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(settings, f, indent=2, ensure_ascii=False)
-            self.backup_settings = settings
-            
-            # Restart scheduler if needed
-            if settings.get("auto_backup_enabled", False):
-                self.start_scheduler()
-            else:
-                self.stop_scheduler()
-                
+            settings_store.update(self.settings_file, settings)
+            settings_store.write(self.settings_file)
         except Exception as e:
             print(f"Error saving backup settings: {e}")
             raise
     
-    def create_backup(self, custom_name: str = None) -> str:
-        """Create a backup of the database."""
+    def _on_settings_changed(self, settings: Dict, version: int):
+        """Settings store callback: start/stop the scheduler, or wake it to recompute the next run."""
+        self.backup_settings = settings
+        if settings.get("auto_backup_enabled", False):
+            self.start_scheduler()
+        else:
+            self.stop_scheduler()
+    
+    def create_backup(self, custom_name: str = None, trigger: str = "manual") -> str:
+        """Create a backup of the database, recording duration and size metrics.
+        
+        Args:
+            custom_name: Prefix of the backup file name
+            trigger: "manual", "automatic" (scheduler) or "pre_restore"; only
+                automatic backups move the schedule forward
+        """
+        started = datetime.now()
+        start_time = time.perf_counter()
+        sales_before = self._sales_started
+        
+        backup_path = self._create_backup(custom_name, trigger)
+        
+        self._record_backup_metrics({
+            "started": started.isoformat(),
+            "name": Path(backup_path).name,
+            "trigger": trigger,
+            "duration_seconds": round(time.perf_counter() - start_time, 3),
+            "size_bytes": os.path.getsize(backup_path) if os.path.exists(backup_path) else 0,
+            "sales_during_backup": self._sales_started - sales_before
+        })
+        self.last_backup_time = started
+        if trigger == "automatic":
+            self.last_scheduled_backup_time = started
+        
+        return backup_path
+    
+    def _create_backup(self, custom_name: str = None, trigger: str = "manual") -> str:
+        """Write the backup file (archive, copy or store manifest)."""
         try:
             # Generate backup filename
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -88,23 +141,33 @@ class BackupManager:
             else:
                 backup_name = f"backup_{timestamp}"
             
-            if self.backup_settings.get("compression", True):
+            if self.backup_settings.get("deduplicated_store", False):
+                backup_path = self._create_store_backup(backup_name, trigger)
+            elif self.backup_settings.get("compression", True):
                 backup_filename = f"{backup_name}.zip"
                 backup_path = self.backup_dir / backup_filename
                 
+                # Metadata is stored both in the archive and in the sidecar index
+                metadata = {
+                    "backup_date": datetime.now().isoformat(),
+                    "database_size": os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0,
+                    "backup_type": trigger,
+                    "version": "1.0"
+                }
+                
                 # Create compressed backup
                 with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    # Add database file
+                    # Add a consistent snapshot of the database (includes WAL content)
                     if os.path.exists(self.db_path):
-                        zipf.write(self.db_path, "database.db")
+                        snapshot_path = self.backup_dir / f"{backup_name}.snapshot.tmp"
+                        try:
+                            self._snapshot_database(snapshot_path)
+                            zipf.write(snapshot_path, "database.db")
+                        finally:
+                            if snapshot_path.exists():
+                                snapshot_path.unlink()
                     
                     # Add metadata
-                    metadata = {
-                        "backup_date": datetime.now().isoformat(),
-                        "database_size": os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0,
-                        "backup_type": "automatic" if custom_name is None else "manual",
-                        "version": "1.0"
-                    }
                     zipf.writestr("backup_info.json", json.dumps(metadata, indent=2))
                     
                     # Add images if enabled
@@ -118,7 +181,11 @@ class BackupManager:
                 # Simple file copy
                 backup_filename = f"{backup_name}.db"
                 backup_path = self.backup_dir / backup_filename
-                shutil.copy2(self.db_path, backup_path)
+                self._snapshot_database(backup_path)
+                metadata = {}
+            
+            if backup_path.suffix != BackupStore.MANIFEST_SUFFIX:
+                self._index_backup(backup_path, metadata)
             
             # Clean old backups
             self.cleanup_old_backups()
@@ -129,64 +196,232 @@ class BackupManager:
             print(f"Error creating backup: {e}")
             raise
     
-    def restore_backup(self, backup_path: str) -> bool:
-        """Restore database from backup."""
+    def _create_store_backup(self, backup_name: str, trigger: str = "manual") -> Path:
+        """Create a backup in the deduplicated chunk store."""
+        snapshot_path = self.backup_dir / f"{backup_name}.snapshot.tmp"
+        try:
+            self._snapshot_database(snapshot_path)
+            metadata = {
+                "backup_date": datetime.now().isoformat(),
+                "database_size": snapshot_path.stat().st_size,
+                "backup_type": trigger,
+                "version": "1.0"
+            }
+            summary = self.store.create_snapshot(str(snapshot_path), backup_name, metadata)
+        finally:
+            if snapshot_path.exists():
+                snapshot_path.unlink()
+        
+        manifest_path = self.store.manifest_path(backup_name)
+        metadata["size"] = summary["size"]
+        metadata["new_bytes"] = summary["new_bytes"]
+        self._index_backup(manifest_path, metadata)
+        return manifest_path
+    
+    def _snapshot_database(self, target_path: Path):
+        """Copy the live database with the SQLite online backup API.
+        
+        A plain file copy misses pages still held in the WAL file.
+        """
+        source = sqlite3.connect(self.db_path)
+        target = sqlite3.connect(str(target_path))
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+    
+    def restore_backup(self, backup_path: str, quick_check: bool = False) -> bool:
+        """Restore database from backup.
+        
+        The archived database is stream-decompressed into a temporary file next
+        to the live database, verified with ``PRAGMA integrity_check`` (or
+        ``quick_check``), and only then atomically swapped in. A corrupt backup
+        never replaces the live database.
+        
+        The background writers are paused from the pre-restore backup to the
+        swap, so that backup holds every commit, and an exclusive lock on the
+        live database is held across the swap, so no commit is in flight
+        while its WAL is discarded.
+        """
+        backup_file = Path(backup_path)
+        temp_path = Path(f"{self.db_path}.restore.tmp")
+        
         try:
-            backup_file = Path(backup_path)
-            
             if not backup_file.exists():
                 raise FileNotFoundError(f"Backup file not found: {backup_path}")
             
-            # Create backup of current database before restore
-            current_backup = self.create_backup("pre_restore")
-            print(f"Current database backed up to: {current_backup}")
-            
-            if backup_file.suffix == '.zip':
-                # Extract from compressed backup
+            # Stage the backup next to the live database (same filesystem for os.replace)
+            if backup_file.suffix == BackupStore.MANIFEST_SUFFIX:
+                self.store.restore_snapshot(backup_file.stem, str(temp_path))
+            elif backup_file.suffix == '.zip':
                 with zipfile.ZipFile(backup_file, 'r') as zipf:
-                    # Extract database
-                    zipf.extract("database.db", path="temp_restore")
-                    shutil.move("temp_restore/database.db", self.db_path)
-                    
-                    # Clean up temp directory
-                    shutil.rmtree("temp_restore", ignore_errors=True)
+                    with zipf.open("database.db") as source, open(temp_path, 'wb') as target:
+                        shutil.copyfileobj(source, target, 1024 * 1024)
             else:
-                # Direct file copy
-                shutil.copy2(backup_file, self.db_path)
+                shutil.copyfile(backup_file, temp_path)
+            
+            self._verify_database(temp_path, quick_check)
+            
+            with ExitStack() as stack:
+                for writer in self.writers:
+                    stack.enter_context(writer.paused())
+                
+                # Release every pooled handle before swapping the file
+                if self.db_manager is not None:
+                    self.db_manager.close_all_connections()
+                
+                # Create backup of current database before restore (writers are paused)
+                current_backup = self.create_backup("pre_restore", trigger="pre_restore")
+                print(f"Current database backed up to: {current_backup}")
+                
+                # Waits out a transaction still in progress and holds off any other writer
+                lock = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+                stack.callback(lock.close)
+                lock.execute("BEGIN EXCLUSIVE")
+                
+                # Stale WAL/SHM files belong to the old database and must not be replayed
+                for suffix in ("-wal", "-shm"):
+                    sidecar = Path(f"{self.db_path}{suffix}")
+                    if sidecar.exists():
+                        sidecar.unlink()
+                
+                os.replace(temp_path, self.db_path)
             
             return True
             
         except Exception as e:
             print(f"Error restoring backup: {e}")
             raise
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+    
+    def _verify_database(self, db_file: Path, quick_check: bool = False):
+        """Run an SQLite integrity check on a database file, raising on failure."""
+        pragma = "quick_check" if quick_check else "integrity_check"
+        conn = sqlite3.connect(str(db_file))
+        try:
+            rows = conn.execute(f"PRAGMA {pragma}").fetchall()
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"Backup is not a valid database: {e}")
+        finally:
+            conn.close()
+        
+        if not rows or rows[0][0] != "ok":
+            problems = "; ".join(str(row[0]) for row in rows[:5])
+            raise ValueError(f"Backup failed {pragma}: {problems}")
+    
+    def _load_index(self) -> Dict:
+        """Load the sidecar backup index (filename -> metadata)."""
+        try:
+            if self.index_file.exists():
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading backup index, rebuilding: {e}")
+        return {}
+    
+    def _save_index(self, index: Dict):
+        """Atomically write the sidecar backup index."""
+        temp_file = self.index_file.with_suffix(".json.tmp")
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(index, f, indent=2, ensure_ascii=False)
+            os.replace(temp_file, self.index_file)
+        except IOError as e:
+            print(f"Error saving backup index: {e}")
+    
+    def _index_entry(self, backup_file: Path, stat, metadata: Dict) -> Dict:
+        """Build an index entry from a file stat and its backup metadata."""
+        if backup_file.suffix == BackupStore.MANIFEST_SUFFIX:
+            backup_type = "deduplicated"
+        elif backup_file.suffix == '.zip':
+            backup_type = "compressed"
+        else:
+            backup_type = "uncompressed"
+        
+        entry = {
+            "size": stat.st_size,
+            "file_size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "type": backup_type
+        }
+        entry.update(metadata)
+        return entry
+    
+    def _index_backup(self, backup_path: Path, metadata: Dict):
+        """Record a newly created backup in the sidecar index."""
+        index = self._load_index()
+        index[backup_path.name] = self._index_entry(backup_path, backup_path.stat(), metadata)
+        self._save_index(index)
+    
+    def _read_archive_metadata(self, backup_file: Path) -> Dict:
+        """Read backup metadata from an archive or manifest (slow path)."""
+        if backup_file.suffix == BackupStore.MANIFEST_SUFFIX:
+            try:
+                manifest = self.store.load_manifest(backup_file.stem)
+                metadata = dict(manifest.get("metadata", {}))
+                metadata["size"] = manifest.get("size", 0)
+                return metadata
+            except (json.JSONDecodeError, KeyError, IOError):
+                return {}
+        
+        try:
+            with zipfile.ZipFile(backup_file, 'r') as zipf:
+                if "backup_info.json" in zipf.namelist():
+                    return json.loads(zipf.read("backup_info.json"))
+        except (zipfile.BadZipFile, json.JSONDecodeError, KeyError, IOError):
+            pass
+        return {}
     
     def get_backup_list(self) -> List[Dict]:
-        """Get list of available backups."""
+        """Get list of available backups.
+        
+        Metadata comes from the sidecar index; archives are only opened for
+        backups missing from the index (or modified since they were indexed).
+        """
         backups = []
         
         try:
-            for backup_file in self.backup_dir.glob("backup_*"):
-                if backup_file.is_file():
-                    stat = backup_file.stat()
-                    backup_info = {
-                        "filename": backup_file.name,
-                        "path": str(backup_file),
-                        "size": stat.st_size,
-                        "created": datetime.fromtimestamp(stat.st_mtime),
-                        "type": "compressed" if backup_file.suffix == '.zip' else "uncompressed"
-                    }
-                    
-                    # Try to read metadata for compressed backups
-                    if backup_file.suffix == '.zip':
-                        try:
-                            with zipfile.ZipFile(backup_file, 'r') as zipf:
-                                if "backup_info.json" in zipf.namelist():
-                                    metadata = json.loads(zipf.read("backup_info.json"))
-                                    backup_info.update(metadata)
-                        except:
-                            pass
-                    
-                    backups.append(backup_info)
+            index = self._load_index()
+            index_changed = False
+            seen = set()
+            
+            # Every backup counts (backup_, auto_, pre_restore_ and custom names)
+            candidates = [path for path in self.backup_dir.iterdir() if path.suffix in self.ARCHIVE_SUFFIXES]
+            candidates.extend(self.store.manifest_dir.glob(f"*{BackupStore.MANIFEST_SUFFIX}"))
+            
+            for backup_file in candidates:
+                if not backup_file.is_file():
+                    continue
+                
+                stat = backup_file.stat()
+                entry = index.get(backup_file.name)
+                if not entry or entry.get("file_size") != stat.st_size or entry.get("mtime") != stat.st_mtime:
+                    has_metadata = backup_file.suffix in ('.zip', BackupStore.MANIFEST_SUFFIX)
+                    metadata = self._read_archive_metadata(backup_file) if has_metadata else {}
+                    entry = self._index_entry(backup_file, stat, metadata)
+                    index[backup_file.name] = entry
+                    index_changed = True
+                seen.add(backup_file.name)
+                
+                backup_info = {
+                    "filename": backup_file.name,
+                    "path": str(backup_file),
+                    "created": datetime.fromtimestamp(entry["mtime"])
+                }
+                backup_info.update({k: v for k, v in entry.items() if k not in ("mtime", "file_size")})
+                backups.append(backup_info)
+            
+            # Forget backups whose files no longer exist
+            for filename in list(index):
+                if filename not in seen and not self.get_backup_path(filename).exists():
+                    del index[filename]
+                    index_changed = True
+            
+            if index_changed:
+                self._save_index(index)
             
             # Sort by creation date (newest first)
             backups.sort(key=lambda x: x["created"], reverse=True)
@@ -196,6 +431,31 @@ class BackupManager:
         
         return backups
     
+    def get_backup_path(self, filename: str) -> Path:
+        """Resolve a listed backup filename to its file (archive or manifest)."""
+        if filename.endswith(BackupStore.MANIFEST_SUFFIX):
+            return self.store.manifest_dir / filename
+        return self.backup_dir / filename
+    
+    def delete_backup(self, filename: str, collect: bool = True) -> bool:
+        """Delete a backup file and its index entry.
+        
+        For deduplicated backups, chunks no longer referenced by any manifest
+        are swept unless ``collect`` is False (batch deletes sweep once).
+        """
+        backup_path = self.get_backup_path(filename)
+        index = self._load_index()
+        if index.pop(filename, None) is not None:
+            self._save_index(index)
+        
+        if backup_path.suffix == BackupStore.MANIFEST_SUFFIX:
+            return self.store.delete_snapshot(backup_path.stem, collect=collect)
+        
+        if backup_path.exists():
+            backup_path.unlink()
+            return True
+        return False
+    
     def cleanup_old_backups(self):
         """Remove old backups based on settings."""
         try:
@@ -205,44 +465,56 @@ class BackupManager:
             if len(backups) > max_backups:
                 # Remove oldest backups
                 for backup in backups[max_backups:]:
-                    backup_path = Path(backup["path"])
-                    if backup_path.exists():
-                        backup_path.unlink()
+                    if self.delete_backup(backup["filename"], collect=False):
                         print(f"Removed old backup: {backup['filename']}")
+                
+                # Sweep chunks orphaned by the removed manifests in one pass
+                removed_chunks = self.store.garbage_collect()
+                if removed_chunks:
+                    print(f"Removed {removed_chunks} unreferenced backup chunks")
                         
         except Exception as e:
             print(f"Error cleaning up old backups: {e}")
     
+    @contextmanager
+    def sale_transaction(self):
+        """Mark a sale as in progress; scheduled backups wait until it ends.
+        
+        Only defers backups; atomicity comes from save_sale's own transaction.
+        
+        Usage:
+            with backup_manager.sale_transaction():
+                db_manager.save_sale(sale, apply_stock=True)
+        """
+        with self._activity_lock:
+            self._active_sales += 1
+            self._sales_started += 1
+            self._idle.clear()
+        try:
+            yield
+        finally:
+            with self._activity_lock:
+                self._active_sales -= 1
+                if self._active_sales == 0:
+                    self._idle.set()
+    
     def start_scheduler(self):
-        """Start the backup scheduler."""
+        """Start the backup scheduler (or wake it if already running)."""
         try:
-            # Stop existing scheduler first
-            self.stop_scheduler()
-            
-            # Clear any existing scheduled jobs
-            schedule.clear()
-            
-            frequency = self.backup_settings.get("backup_frequency", "daily")
-            backup_time = self.backup_settings.get("backup_time", "02:00")
-            
-            # Convert time format if needed (handle AM/PM)
-            formatted_time = self._format_time_for_scheduler(backup_time)
-            
-            print(f"Setting up backup scheduler: {frequency} at {formatted_time}")
-            
-            if frequency == "daily":
-                schedule.every().day.at(formatted_time).do(self._scheduled_backup)
-            elif frequency == "weekly":
-                schedule.every().week.at(formatted_time).do(self._scheduled_backup)
-            elif frequency == "monthly":
-                schedule.every(30).days.at(formatted_time).do(self._scheduled_backup)
+            if self.scheduler_thread and self.scheduler_thread.is_alive():
+                # Settings changed: recompute the next run without restarting
+                self._wakeup.set()
+                return
             
             self.scheduler_running = True
-            self.scheduler_thread = threading.Thread(target=self._run_scheduler, daemon=True)
+            self._wakeup.clear()
+            self.scheduler_thread = threading.Thread(target=self._run_scheduler,
+                                                     name="BackupScheduler", daemon=True)
             self.scheduler_thread.start()
             
-            print(f"Backup scheduler started successfully: {frequency} at {formatted_time}")
-            print(f"Next backup scheduled for: {schedule.next_run()}")
+            frequency = self.backup_settings.get("backup_frequency", "daily")
+            backup_time = self._format_time_for_scheduler(self.backup_settings.get("backup_time", "02:00"))
+            print(f"Backup scheduler started successfully: {frequency} at {backup_time}")
             
         except Exception as e:
             print(f"Error starting backup scheduler: {e}")
@@ -252,7 +524,8 @@ class BackupManager:
         """Stop the backup scheduler."""
         try:
             self.scheduler_running = False
-            schedule.clear()
+            self.next_run = None
+            self._wakeup.set()
             
             if self.scheduler_thread and self.scheduler_thread.is_alive():
                 self.scheduler_thread.join(timeout=2)
@@ -278,32 +551,92 @@ class BackupManager:
             print(f"Invalid time format: {time_str}, using default 02:00")
             return "02:00"
     
+    def compute_next_run(self, now: datetime = None) -> datetime:
+        """Compute when the next scheduled backup is due.
+        
+        The next run is the first configured HH:MM at or after both ``now``
+        and one backup interval after the last scheduled backup (with an hour
+        of slack so a slightly early wake-up does not trigger a second run).
+        Manual and pre-restore backups do not move the schedule.
+        """
+        now = now or datetime.now()
+        interval_days = self.FREQUENCY_DAYS.get(self.backup_settings.get("backup_frequency", "daily"), 1)
+        hour, minute = map(int, self._format_time_for_scheduler(
+            self.backup_settings.get("backup_time", "02:00")).split(":"))
+        
+        earliest = now
+        if self.last_scheduled_backup_time:
+            earliest = max(earliest, self.last_scheduled_backup_time + timedelta(days=interval_days, hours=-1))
+        
+        candidate = earliest.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if candidate < earliest:
+            candidate += timedelta(days=1)
+        return candidate
+    
     def _run_scheduler(self):
-        """Run the scheduler in a separate thread."""
+        """Sleep until the next backup is due, then run it on a worker thread."""
         print("Backup scheduler thread started")
         
         while self.scheduler_running:
             try:
-                schedule.run_pending()
-                time.sleep(30)  # Check every 30 seconds for better responsiveness
+                self.next_run = self.compute_next_run()
+                delay = (self.next_run - datetime.now()).total_seconds()
                 
-                # Log scheduler status periodically (every hour)
-                if int(time.time()) % 3600 == 0:
-                    next_run = schedule.next_run()
-                    if next_run:
-                        print(f"Backup scheduler running. Next backup: {next_run}")
+                if delay > 0:
+                    if self._wakeup.wait(timeout=min(delay, self.MAX_WAIT_SECONDS)):
+                        self._wakeup.clear()  # Settings changed or stopping
+                        continue
+                    if delay > self.MAX_WAIT_SECONDS:
+                        continue  # Periodic wall-clock re-check, not yet due
+                
+                if not self.scheduler_running:
+                    break
+                
+                # Defer while a sale is being completed
+                if not self._wait_until_idle(self.MAX_DEFER_SECONDS):
+                    if not self.scheduler_running:
+                        break
+                    self._log_backup_event("WARNING", "Scheduled backup skipped: sales in progress")
+                    self.last_scheduled_backup_time = datetime.now()  # Move on to the next slot
+                    continue
+                
+                worker = threading.Thread(target=self._scheduled_backup,
+                                          name="BackupWorker", daemon=True)
+                worker.start()
+                worker.join()
                         
             except Exception as e:
                 print(f"Error in backup scheduler: {e}")
-                time.sleep(60)  # Wait a minute before retrying
+                self._wakeup.wait(timeout=60)  # Wait a minute before retrying
+                self._wakeup.clear()
         
         print("Backup scheduler thread stopped")
     
+    def _wait_until_idle(self, timeout: float) -> bool:
+        """Wait until no sale is in progress; False on timeout or once the scheduler is stopped."""
+        deadline = time.monotonic() + timeout
+        while self.scheduler_running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self._idle.wait(timeout=min(remaining, self.IDLE_POLL_SECONDS)):
+                return True
+        return False
+    
+    def _lower_thread_priority(self):
+        """Lower the current thread's CPU priority where the OS supports it."""
+        try:
+            # On Linux, PRIO_PROCESS with a native thread id applies to that thread only
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (AttributeError, OSError):
+            pass  # Not supported (e.g. Windows); run at normal priority
+    
     def _scheduled_backup(self):
         """Perform a scheduled backup."""
+        self._lower_thread_priority()
         try:
             print(f"Starting automatic backup at {datetime.now()}")
-            backup_path = self.create_backup("auto")
+            backup_path = self.create_backup("auto", trigger="automatic")
             print(f"Automatic backup completed successfully: {backup_path}")
             
             # Log backup success to a file
@@ -313,6 +646,31 @@ class BackupManager:
             error_msg = f"Automatic backup failed: {e}"
             print(error_msg)
             self._log_backup_event("ERROR", error_msg)
+            self.last_scheduled_backup_time = datetime.now()  # Retry at the next slot, not in a loop
+    
+    def _record_backup_metrics(self, metrics: Dict):
+        """Keep backup metrics in memory and append them to the metrics log."""
+        self.backup_metrics.append(metrics)
+        try:
+            with open(self.metrics_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(metrics) + "\n")
+        except IOError as e:
+            print(f"Error writing backup metrics: {e}")
+    
+    def _load_last_backup_times(self) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """Read the times of the most recent backup and scheduled backup from the metrics log."""
+        last_backup = last_scheduled = None
+        try:
+            if self.metrics_file.exists():
+                with open(self.metrics_file, "r", encoding="utf-8") as f:
+                    for line in f:
+                        metrics = json.loads(line)
+                        last_backup = datetime.fromisoformat(metrics["started"])
+                        if metrics.get("trigger") == "automatic":
+                            last_scheduled = last_backup
+        except (IOError, ValueError, KeyError) as e:
+            print(f"Error reading backup metrics: {e}")
+        return last_backup, last_scheduled
     
     def _log_backup_event(self, level: str, message: str):
         """Log backup events to a file."""
@@ -332,13 +690,15 @@ class BackupManager:
     def get_scheduler_status(self) -> dict:
         """Get current scheduler status."""
         try:
-            next_run = schedule.next_run() if schedule.jobs else None
-            
             return {
                 "running": self.scheduler_running,
-                "next_run": next_run.isoformat() if next_run else None,
-                "jobs_count": len(schedule.jobs),
+                "next_run": self.next_run.isoformat() if self.next_run else None,
+                "last_backup": self.last_backup_time.isoformat() if self.last_backup_time else None,
+                "last_scheduled_backup": (self.last_scheduled_backup_time.isoformat()
+                                          if self.last_scheduled_backup_time else None),
                 "thread_alive": self.scheduler_thread.is_alive() if self.scheduler_thread else False,
+                "sale_in_progress": not self._idle.is_set(),
+                "recent_metrics": list(self.backup_metrics)[-5:],
                 "settings": self.backup_settings
             }
         except Exception as e:
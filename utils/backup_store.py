@@ -0,0 +1,259 @@
+"""
+Backup Store
+============
+
+Content-deduplicated backup repository for the POS database.
+
+The database is split into fixed-size chunks (a multiple of the SQLite page
+size, so unchanged pages always produce identical chunks). Each unique chunk is
+stored once, compressed, under its SHA-256 hash; every backup is a small
+manifest listing the chunk hashes needed to rebuild the file. Daily backups of
+a mostly-historical database therefore cost little more than one full copy,
+and retention is just deleting manifests and sweeping unreferenced chunks.
+
+A snapshot writes its chunks before its manifest, so a sweep running at the
+same time must not take those chunks for orphans. Within a process, snapshots
+and sweeps of one store are serialized by a lock; across processes, a sweep
+leaves alone chunks written or reused (a snapshot touches the chunks it
+reuses) within the last ``GC_GRACE_SECONDS``.
+
+Layout::
+    
+    <root>/chunks/ab/ab12...ef     zlib-compressed chunk data
+    <root>/manifests/<name>.manifest
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+# One lock per store directory, shared by every BackupStore instance on it
+_store_locks: Dict[str, threading.RLock] = {}
+_store_locks_guard = threading.Lock()
+
+def _store_lock(root_dir: Path) -> threading.RLock:
+    """Get the lock serializing snapshots and sweeps of a store directory."""
+    key = os.path.abspath(root_dir)
+    with _store_locks_guard:
+        return _store_locks.setdefault(key, threading.RLock())
+
+class BackupStore:
+    """Stores database backups as deduplicated, content-addressed chunks."""
+    
+    MANIFEST_SUFFIX = ".manifest"
+    PAGES_PER_CHUNK = 16  # 64 KiB chunks with the default 4 KiB page size
+    GC_GRACE_SECONDS = 3600  # Chunks this recent may belong to a snapshot still being written
+    
+    def __init__(self, root_dir: str = "backups/store"):
+        """Initialize the backup store."""
+        self.root_dir = Path(root_dir)
+        self.chunk_dir = self.root_dir / "chunks"
+        self.manifest_dir = self.root_dir / "manifests"
+        self.chunk_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = _store_lock(self.root_dir)
+    
+    def _chunk_path(self, chunk_hash: str) -> Path:
+        """Get the storage path of a chunk."""
+        return self.chunk_dir / chunk_hash[:2] / chunk_hash
+    
+    def manifest_path(self, name: str) -> Path:
+        """Get the manifest path of a snapshot."""
+        return self.manifest_dir / f"{name}{self.MANIFEST_SUFFIX}"
+    
+    def _chunk_size_for(self, db_file: Path) -> int:
+        """Pick a chunk size aligned to the database page size."""
+        try:
+            conn = sqlite3.connect(str(db_file))
+            try:
+                page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            page_size = 4096
+        return page_size * self.PAGES_PER_CHUNK
+    
+    def _write_atomic(self, path: Path, data: bytes):
+        """Write bytes to a file via a temp file and rename."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    
+    def create_snapshot(self, db_file: str, name: str, metadata: Optional[Dict] = None) -> Dict:
+        """Store a database file as a snapshot, writing only new chunks.
+        
+        Args:
+            db_file: Path of a consistent copy of the database to store
+            name: Snapshot name (becomes the manifest filename)
+            metadata: Extra backup metadata kept in the manifest
+        
+        Returns:
+            The manifest (without the chunk list) plus dedup statistics
+        """
+        with self._lock:
+            return self._create_snapshot(Path(db_file), name, metadata)
+    
+    def _create_snapshot(self, db_path: Path, name: str, metadata: Optional[Dict]) -> Dict:
+        """Write the chunks, then the manifest, of a snapshot (store lock held)."""
+        chunk_size = self._chunk_size_for(db_path)
+        file_hash = hashlib.sha256()
+        chunks = []
+        new_chunks = 0
+        new_bytes = 0
+        
+        with open(db_path, 'rb') as f:
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                file_hash.update(data)
+                chunk_hash = hashlib.sha256(data).hexdigest()
+                chunks.append(chunk_hash)
+                
+                chunk_path = self._chunk_path(chunk_hash)
+                try:
+                    os.utime(chunk_path)  # Reused: fresh mtime keeps other processes' sweeps off it
+                except FileNotFoundError:
+                    compressed = zlib.compress(data, 6)
+                    self._write_atomic(chunk_path, compressed)
+                    new_chunks += 1
+                    new_bytes += len(compressed)
+        
+        manifest = {
+            "name": name,
+            "created": datetime.now().isoformat(),
+            "size": db_path.stat().st_size,
+            "sha256": file_hash.hexdigest(),
+            "chunk_size": chunk_size,
+            "metadata": metadata or {},
+            "chunks": chunks
+        }
+        self._write_atomic(self.manifest_path(name), json.dumps(manifest).encode('utf-8'))
+        
+        summary = {k: v for k, v in manifest.items() if k != "chunks"}
+        summary.update({
+            "chunk_count": len(chunks),
+            "new_chunks": new_chunks,
+            "new_bytes": new_bytes
+        })
+        return summary
+    
+    def load_manifest(self, name: str) -> Dict:
+        """Load a snapshot manifest."""
+        with open(self.manifest_path(name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def list_snapshots(self) -> List[str]:
+        """List snapshot names, oldest first."""
+        return sorted(path.name[:-len(self.MANIFEST_SUFFIX)]
+                      for path in self.manifest_dir.glob(f"*{self.MANIFEST_SUFFIX}"))
+    
+    def restore_snapshot(self, name: str, target_path: str):
+        """Rebuild a snapshot into target_path, verifying every chunk.
+        
+        Raises:
+            ValueError: If a chunk is missing or does not match its hash
+        """
+        manifest = self.load_manifest(name)
+        file_hash = hashlib.sha256()
+        
+        with open(target_path, 'wb') as target:
+            for chunk_hash in manifest["chunks"]:
+                chunk_path = self._chunk_path(chunk_hash)
+                if not chunk_path.exists():
+                    raise ValueError(f"Missing chunk {chunk_hash} for snapshot {name}")
+                
+                with open(chunk_path, 'rb') as f:
+                    data = zlib.decompress(f.read())
+                if hashlib.sha256(data).hexdigest() != chunk_hash:
+                    raise ValueError(f"Corrupt chunk {chunk_hash} for snapshot {name}")
+                
+                file_hash.update(data)
+                target.write(data)
+        
+        if file_hash.hexdigest() != manifest["sha256"]:
+            raise ValueError(f"Snapshot {name} checksum mismatch")
+    
+    def delete_snapshot(self, name: str, collect: bool = True) -> bool:
+        """Delete a snapshot manifest, optionally sweeping orphaned chunks."""
+        manifest_path = self.manifest_path(name)
+        if not manifest_path.exists():
+            return False
+        
+        manifest_path.unlink()
+        if collect:
+            self.garbage_collect()
+        return True
+    
+    def _referenced_chunks(self) -> Set[str]:
+        """Collect the hashes referenced by all manifests."""
+        referenced = set()
+        for name in self.list_snapshots():
+            try:
+                referenced.update(self.load_manifest(name)["chunks"])
+            except (json.JSONDecodeError, KeyError, IOError) as e:
+                # Never sweep while a manifest is unreadable
+                raise RuntimeError(f"Cannot read manifest {name}: {e}")
+        return referenced
+    
+    def garbage_collect(self, grace_seconds: Optional[float] = None) -> int:
+        """Remove chunks no longer referenced by any manifest.
+        
+        Args:
+            grace_seconds: Keep unreferenced chunks modified this recently
+                (default GC_GRACE_SECONDS), as a snapshot in another process
+                may not have written its manifest yet
+        
+        Returns:
+            Number of chunks removed
+        """
+        if grace_seconds is None:
+            grace_seconds = self.GC_GRACE_SECONDS
+        
+        with self._lock:
+            cutoff = time.time() - grace_seconds
+            referenced = self._referenced_chunks()
+            removed = 0
+            
+            for chunk_path in self.chunk_dir.glob("*/*"):
+                if chunk_path.name in referenced:
+                    continue
+                try:
+                    if chunk_path.stat().st_mtime >= cutoff:
+                        continue
+                    chunk_path.unlink()
+                    removed += 1
+                except FileNotFoundError:
+                    pass  # Renamed into place or removed meanwhile
+            
+            return removed
+    
+    def get_stats(self) -> Dict:
+        """Get logical versus stored size of the repository."""
+        logical_size = 0
+        snapshots = self.list_snapshots()
+        for name in snapshots:
+            logical_size += self.load_manifest(name).get("size", 0)
+        
+        stored_size = 0
+        chunk_count = 0
+        for chunk_path in self.chunk_dir.glob("*/*"):
+            stored_size += chunk_path.stat().st_size
+            chunk_count += 1
+        
+        return {
+            "snapshots": len(snapshots),
+            "unique_chunks": chunk_count,
+            "logical_size": logical_size,
+            "stored_size": stored_size,
+            "dedup_ratio": (logical_size / stored_size) if stored_size else 0.0
+        }
@@ -296,10 +296,10 @@ class CSVProductImporter:
                             if barcode:
                                 existing_product.barcode = barcode
                             existing_product.category = category
-                            existing_product.stock_quantity = stock_quantity
+                            existing_product.set_stock_quantity(stock_quantity)
                             existing_product.cost_price = cost_price
                             
-                            self.db_manager.save_product(existing_product)
+                            self.db_manager.save_product(existing_product, movement_type="import")
                             updated_count += 1
                             
                         elif not existing_product:
@@ -315,7 +315,7 @@ class CSVProductImporter:
                                 cost_price=cost_price
                             )
                             
-                            self.db_manager.save_product(new_product)
+                            self.db_manager.save_product(new_product, movement_type="import")
                             imported_count += 1
                         
                         # If product exists but update_existing is False, skip silently
@@ -0,0 +1,355 @@
+"""
+Synthetic Data Generator
+========================
+
+Fills a register database with realistic volumes for load testing and
+capacity planning: products, cashiers, sales with their items and payments,
+and the user activity log the register writes alongside them.
+
+- Sales follow the year (December and summer peaks), busier weekends, a
+  slow growth trend, and lunch and evening rushes within the day.
+- Product popularity is Zipf-like: a few best sellers make most lines.
+- Each register runs a morning and an evening shift, each worked by one of
+  the generated cashiers, who log in, ring up sales and log out.
+
+The same seed and end date always produce the same rows. Rows go in with
+``executemany`` in large batches while the sales indexes are dropped, and
+the indexes are rebuilt once at the end, so millions of sale lines take
+minutes. An existing database is appended to; ``--overwrite`` starts over.
+
+Usage::
+    
+    python -m utils.data_generator --db load_test.db --products 20000 --sales 1500000
+    python -m utils.data_generator --db load_test.db --sales 50000 --registers 3 --cashiers 12
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+from database.user_manager import UserManager
+from utils.password_hasher import get_password_hasher
+
+# Category -> (product names, median price in DH)
+CATEGORIES = {
+    "Boissons": (["Eau minérale", "Soda", "Jus d'orange", "Thé glacé", "Café moulu"], 12.0),
+    "Boulangerie": (["Pain", "Baguette", "Msemen", "Harcha", "Pain complet"], 4.0),
+    "Pâtisserie": (["Croissant", "Pain au chocolat", "Gâteau", "Cornes de gazelle", "Chebakia"], 15.0),
+    "Snacks": (["Chips", "Biscuits", "Barre chocolatée", "Cacahuètes", "Sandwich"], 10.0),
+    "Épicerie": (["Huile d'olive", "Sucre", "Farine", "Riz", "Pâtes", "Lentilles"], 25.0),
+    "Crèmerie": (["Lait", "Yaourt", "Fromage", "Beurre", "Lben"], 14.0),
+    "Fruits": (["Oranges", "Bananes", "Pommes", "Dattes", "Raisins"], 18.0),
+    "Légumes": (["Tomates", "Pommes de terre", "Oignons", "Carottes", "Courgettes"], 9.0),
+    "Hygiène": (["Savon", "Shampooing", "Dentifrice", "Mouchoirs", "Déodorant"], 30.0),
+    "Entretien": (["Javel", "Liquide vaisselle", "Lessive", "Éponges", "Sacs poubelle"], 35.0),
+    "Surgelés": (["Frites surgelées", "Poisson pané", "Crème glacée", "Légumes surgelés"], 40.0),
+    "Conserves": (["Thon", "Sardines", "Tomates pelées", "Pois chiches", "Olives"], 16.0),
+}
+
+MONTH_WEIGHTS = [0.85, 0.8, 0.9, 0.95, 1.0, 1.05, 1.2, 1.25, 1.0, 0.95, 1.0, 1.35]
+WEEKDAY_WEIGHTS = [0.85, 0.85, 0.9, 0.95, 1.1, 1.35, 1.2]  # Monday .. Sunday
+HOUR_WEIGHTS = {8: 3, 9: 5, 10: 6, 11: 8, 12: 12, 13: 11, 14: 7, 15: 6,
+                16: 7, 17: 10, 18: 12, 19: 11, 20: 7, 21: 3}  # Opening hours only
+SHIFT_CHANGE_HOUR = 15
+YEARLY_GROWTH = 0.10
+
+LINE_COUNTS = list(range(1, 26))
+LINE_COUNT_WEIGHTS = [0.72 ** n for n in range(25)]  # About 3.3 lines per basket
+QUANTITIES = [1, 2, 3, 4, 5, 6]
+QUANTITY_WEIGHTS = [70, 18, 6, 3, 2, 1]
+PAYMENT_METHODS = ["cash", "card"]
+PAYMENT_METHOD_WEIGHTS = [65, 35]
+CASH_NOTES = [10, 20, 50, 100, 200]
+
+ZIPF_EXPONENT = 1.1
+CASHIER_PASSWORD = "cashier123"
+BATCH_SIZE = 50000
+
+# Indexes dropped during the load and rebuilt at the end
+BULK_TABLES = ("sales", "sale_items", "payments", "user_activities")
+
+class DataGenerator:
+    """Bulk loads reproducible synthetic data into a register database."""
+    
+    def __init__(self, db_path: str, seed: int = 42):
+        """Initialize the generator for a database (created if missing)."""
+        self.db_path = db_path
+        self.seed = seed
+        self.rng = random.Random(seed)
+    
+    def generate(self, products: int = 1000, sales: int = 10000, days: int = 365,
+                 cashiers: int = 6, registers: int = 1, end_date: Optional[date] = None,
+                 verbose: bool = False) -> Dict[str, int]:
+        """Generate the data and return the number of rows written per table."""
+        end_date = end_date or date.today()
+        self._prepare_schema()
+        counts = {}
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("PRAGMA cache_size=-200000")  # 200 MB while loading
+            cursor = conn.cursor()
+            
+            start_time = datetime.combine(end_date - timedelta(days=days), datetime.min.time())
+            counts["products"] = self.generate_products(cursor, products, start_time)
+            users = self.generate_users(cursor, cashiers)
+            counts["users"] = len(users)
+            conn.commit()
+            
+            indexes = self._drop_indexes(cursor)
+            try:
+                counts.update(self.generate_sales(conn, sales, start_time.date(), days,
+                                                  users, registers, verbose))
+            finally:
+                if verbose:
+                    print("Rebuilding indexes...")
+                for sql in indexes:
+                    cursor.execute(sql)
+                conn.commit()
+            conn.execute("ANALYZE")
+        finally:
+            conn.close()
+        return counts
+    
+    def _prepare_schema(self):
+        """Let the application create its tables, indexes and triggers."""
+        DatabaseManager(self.db_path).close_all_connections()
+        UserManager(self.db_path, async_activity_log=False)
+    
+    def _drop_indexes(self, cursor) -> List[str]:
+        """Drop the indexes of the bulk-loaded tables and return their definitions."""
+        placeholders = ", ".join("?" for _ in BULK_TABLES)
+        cursor.execute(f'''
+            SELECT name, sql FROM sqlite_master
+            WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+        ''', BULK_TABLES)
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {name}")
+        return [sql for _, sql in indexes]
+    
+    def generate_products(self, cursor, count: int, created_at: datetime) -> int:
+        """Insert count products with EAN-13 barcodes and an opening stock movement."""
+        rng = self.rng
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM products")
+        first_id = cursor.fetchone()[0] + 1
+        timestamp = created_at.isoformat(sep=" ")
+        
+        rows, movements = [], []
+        categories = list(CATEGORIES.items())
+        for product_id in range(first_id, first_id + count):
+            category, (names, median_price) = rng.choice(categories)
+            price = round(max(0.5, rng.lognormvariate(0, 0.5) * median_price), 2)
+            stock = rng.randint(0, 300)
+            rows.append((product_id, f"{rng.choice(names)} {product_id}", "", price,
+                         self._ean13(f"20{product_id:010d}"), category, stock,
+                         f"Fournisseur {rng.randint(1, 40)}", round(price * rng.uniform(0.55, 0.8), 2),
+                         timestamp, timestamp))
+            movements.append((product_id, timestamp, stock, stock))
+        
+        cursor.executemany('''
+            INSERT INTO products (id, name, description, price, barcode, category, stock_quantity,
+                                  is_active, supplier, cost_price, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?)
+        ''', rows)
+        cursor.executemany('''
+            INSERT INTO stock_movements (product_id, timestamp, movement_type, quantity_delta,
+                                         balance_after, reason)
+            VALUES (?, ?, 'initial', ?, ?, 'Generated data')
+        ''', movements)
+        return count
+    
+    @staticmethod
+    def _ean13(digits: str) -> str:
+        """Append the EAN-13 check digit to 12 digits."""
+        total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits))
+        return digits + str((10 - total % 10) % 10)
+    
+    def generate_users(self, cursor, count: int) -> List[Tuple[int, str]]:
+        """Insert count cashier accounts (the first is a manager); returns (id, name) pairs."""
+        password_hash = get_password_hasher().hash(CASHIER_PASSWORD)  # Hashed once, shared
+        usernames = [f"cashier{n:03d}" for n in range(1, count + 1)]
+        cursor.executemany('''
+            INSERT OR IGNORE INTO users (username, password_hash, name, role, status)
+            VALUES (?, ?, ?, ?, 'active')
+        ''', [(username, password_hash, f"Caissier {n}", "manager" if n == 1 else "cashier")
+              for n, username in enumerate(usernames, 1)])
+        
+        cursor.execute(f'''
+            SELECT id, name FROM users WHERE username IN ({", ".join("?" for _ in usernames)})
+            ORDER BY id
+        ''', usernames)
+        return cursor.fetchall()
+    
+    def _day_weights(self, start: date, days: int) -> List[float]:
+        """Relative sales volume of each day: season, weekday and growth."""
+        return [MONTH_WEIGHTS[day.month - 1] * WEEKDAY_WEIGHTS[day.weekday()] *
+                (1 + YEARLY_GROWTH * offset / 365)
+                for offset, day in ((offset, start + timedelta(days=offset)) for offset in range(days))]
+    
+    def generate_sales(self, conn, count: int, start: date, days: int,
+                       users: List[Tuple[int, str]], registers: int = 1,
+                       verbose: bool = False) -> Dict[str, int]:
+        """Insert count sales with items, payments and cashier activities."""
+        rng = self.rng
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name, price FROM products WHERE is_active = 1 ORDER BY id")
+        catalog = cursor.fetchall()
+        if not catalog or not users:
+            return {"sales": 0, "sale_items": 0, "payments": 0, "user_activities": 0}
+        
+        # Zipf-like popularity over a shuffled catalog
+        ranked = list(range(len(catalog)))
+        rng.shuffle(ranked)
+        popularity = [0.0] * len(catalog)
+        for rank, index in enumerate(ranked, 1):
+            popularity[index] = 1 / rank ** ZIPF_EXPONENT
+        popularity_cum = list(accumulate(popularity))
+        catalog_indexes = range(len(catalog))
+        
+        hours = list(HOUR_WEIGHTS)
+        hour_cum = list(accumulate(HOUR_WEIGHTS.values()))
+        line_cum = list(accumulate(LINE_COUNT_WEIGHTS))
+        quantity_cum = list(accumulate(QUANTITY_WEIGHTS))
+        method_cum = list(accumulate(PAYMENT_METHOD_WEIGHTS))
+        
+        day_counts = [0] * days
+        for day in rng.choices(range(days), cum_weights=list(accumulate(self._day_weights(start, days))), k=count):
+            day_counts[day] += 1
+        
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM sales")
+        sale_id = cursor.fetchone()[0]
+        totals = {"sales": 0, "sale_items": 0, "payments": 0, "user_activities": 0}
+        sale_rows, item_rows, payment_rows, activity_rows = [], [], [], []
+        
+        def flush():
+            cursor.executemany('''
+                INSERT INTO sales (id, timestamp, subtotal, total, item_count, cashier_id,
+                                   status, register_id, sync_id)
+                VALUES (?, ?, ?, ?, ?, ?, 'completed', ?, ?)
+            ''', sale_rows)
+            cursor.executemany('''
+                INSERT INTO sale_items (sale_id, product_id, product_name, quantity, unit_price, subtotal, total)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', item_rows)
+            cursor.executemany('''
+                INSERT INTO payments (sale_id, method, amount, status, timestamp, change_amount)
+                VALUES (?, ?, ?, 'completed', ?, ?)
+            ''', payment_rows)
+            cursor.executemany('''
+                INSERT INTO user_activities (user_id, activity_type, description, timestamp,
+                                             sale_id, amount, details)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', activity_rows)
+            conn.commit()
+            totals["sales"] += len(sale_rows)
+            totals["sale_items"] += len(item_rows)
+            totals["payments"] += len(payment_rows)
+            totals["user_activities"] += len(activity_rows)
+            for rows in (sale_rows, item_rows, payment_rows, activity_rows):
+                rows.clear()
+        
+        started = time.perf_counter()
+        for offset, day_count in enumerate(day_counts):
+            if not day_count:
+                continue
+            day = (start + timedelta(days=offset)).isoformat()
+            
+            # Morning and evening cashier of each register
+            shifts = [(rng.choice(users), rng.choice(users)) for _ in range(registers)]
+            day_activities = []
+            for morning, evening in shifts:
+                for (user_id, name), login, logout in ((morning, "07:55:00", f"{SHIFT_CHANGE_HOUR}:00:00"),
+                                                       (evening, f"{SHIFT_CHANGE_HOUR}:00:30", "22:05:00")):
+                    day_activities.append((user_id, "LOGIN", f"User logged in: {name}", f"{day} {login}", None, None, None))
+                    day_activities.append((user_id, "LOGOUT", f"User logged out: {name}", f"{day} {logout}", None, None, None))
+            
+            seconds = sorted(hour * 3600 + rng.randrange(3600)
+                             for hour in rng.choices(hours, cum_weights=hour_cum, k=day_count))
+            line_counts = rng.choices(LINE_COUNTS, cum_weights=line_cum, k=day_count)
+            picks = rng.choices(catalog_indexes, cum_weights=popularity_cum, k=sum(line_counts))
+            quantities = rng.choices(QUANTITIES, cum_weights=quantity_cum, k=len(picks))
+            methods = rng.choices(PAYMENT_METHODS, cum_weights=method_cum, k=day_count)
+            
+            pick = 0
+            for second, lines, method in zip(seconds, line_counts, methods):
+                sale_id += 1
+                timestamp = f"{day} {second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}"
+                register = rng.randrange(registers)
+                user_id, _ = shifts[register][0 if second < SHIFT_CHANGE_HOUR * 3600 else 1]
+                
+                # Scanning a product twice adds to its line, as the cart does
+                basket: Dict[int, int] = {}
+                for index, quantity in zip(picks[pick:pick + lines], quantities[pick:pick + lines]):
+                    basket[index] = basket.get(index, 0) + quantity
+                pick += lines
+                
+                total, item_count = 0.0, 0
+                for index, quantity in basket.items():
+                    product_id, name, price = catalog[index]
+                    line_total = round(price * quantity, 2)
+                    item_rows.append((sale_id, product_id, name, quantity, price, line_total, line_total))
+                    total += line_total
+                    item_count += quantity
+                total = round(total, 2)
+                
+                if method == "cash":
+                    note = next((n for n in CASH_NOTES if n >= total), None)
+                    tendered = total if note is None or rng.random() < 0.3 else note
+                else:
+                    tendered = total
+                sale_rows.append((sale_id, timestamp, total, total, item_count, str(user_id),
+                                  f"register-{register + 1}", f"{rng.getrandbits(128):032x}"))
+                payment_rows.append((sale_id, method, tendered, timestamp, round(tendered - total, 2)))
+                day_activities.append((user_id, "SALE_COMPLETED", f"Completed sale #{sale_id} - Total: {total:.2f} DH",
+                                       timestamp, sale_id, total, f"Items: {len(basket)}, Payment: {method}"))
+            
+            day_activities.sort(key=lambda row: row[3])
+            activity_rows.extend(day_activities)
+            if len(sale_rows) >= BATCH_SIZE:
+                flush()
+                if verbose:
+                    print(f"  {totals['sales']:>10,} sales, {totals['sale_items']:>11,} lines "
+                          f"({time.perf_counter() - started:.0f} s)")
+        flush()
+        return totals
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Fill a register database with synthetic data")
+    parser.add_argument("--db", required=True, help="Database to create or append to")
+    parser.add_argument("--products", type=int, default=1000, help="Products to add")
+    parser.add_argument("--sales", type=int, default=10000, help="Sales to add")
+    parser.add_argument("--days", type=int, default=365, help="Days of history")
+    parser.add_argument("--end-date", default=None, help="Last day of history, YYYY-MM-DD (default: today)")
+    parser.add_argument("--cashiers", type=int, default=6, help="Cashier accounts")
+    parser.add_argument("--registers", type=int, default=1, help="Registers ringing up sales")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--overwrite", action="store_true", help="Delete the database first")
+    args = parser.parse_args()
+    
+    if args.overwrite and os.path.exists(args.db):
+        os.remove(args.db)
+    end_date = date.fromisoformat(args.end_date) if args.end_date else None
+    
+    started = time.perf_counter()
+    counts = DataGenerator(args.db, args.seed).generate(
+        products=args.products, sales=args.sales, days=args.days, cashiers=args.cashiers,
+        registers=args.registers, end_date=end_date, verbose=True
+    )
+    print(f"Generated in {time.perf_counter() - started:.1f} s:")
+    for table, rows in counts.items():
+        print(f"  {table:<16} {rows:>12,}")
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,8 @@ Common utility functions for the POS system.
 """
 
 import re
-from typing import Union
+import unicodedata
+from typing import Union, Tuple
 from datetime import datetime
 
 def format_currency(amount: float, currency: str = "د.م") -> str:
@@ -71,3 +72,19 @@ def sanitize_filename(filename: str) -> str:
     # Remove extra spaces and dots
     sanitized = re.sub(r'\s+', ' ', sanitized).strip()
     return sanitized[:255]  # Limit filename length
+
+# Arabic letter forms that sort as their base letter (hamza/madda alef variants, tatweel)
+_ARABIC_SORT_FOLD = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ـ": None})
+
+def collation_key(text: str) -> Tuple[str, str]:
+    """Get a locale-aware sort key for French and Arabic text.
+    
+    Case, French accents and Arabic diacritics are ignored on the first
+    level (so "école" sorts with "ecole" and not after "z"); the case-folded
+    text breaks ties so the order is deterministic.
+    """
+    if not text:
+        return ("", "")
+    folded = text.casefold()
+    base = "".join(c for c in unicodedata.normalize("NFKD", folded) if not unicodedata.combining(c))
+    return (base.translate(_ARABIC_SORT_FOLD), folded)
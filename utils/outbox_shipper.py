@@ -0,0 +1,378 @@
+"""
+Outbox Shipper
+==============
+
+Ships committed sales from the ``sale_outbox`` table to head office.
+
+``DatabaseManager.save_sale`` writes the outbox row in the same transaction
+as the sale, so checkout never waits on the network and a sale cannot be
+committed without being queued. ``OutboxShipper`` drains the outbox in the
+background, in batches, to a sink:
+
+* ``FileDropSink`` writes one JSON file per sale into a directory;
+* ``HttpSink`` POSTs the batch to an HTTP endpoint (the store sync hub's
+  ``/sales`` endpoint accepts it as is);
+* ``SQLiteSink`` inserts the sales into another SQLite file.
+
+Every sale carries its ``sync_id`` as idempotency key and every sink ignores
+keys it already has, so a batch resent after a crash or a lost reply is
+harmless, even if it was regrouped with newer sales. Failed batches are
+retried with exponential backoff while newer sales keep shipping, so sales
+do not necessarily arrive in the order they were rung up; consumers order
+them by their timestamp. Shipped rows are kept for ``retention_days`` (to
+resend by hand if head office loses data) and purged once a day by the
+background loop.
+
+A sale the sink keeps rejecting must not hold back the sales batched with
+it. A sink rejects a batch by answering it with an error (HTTP 400, 413 or
+422, or a ``ValueError``/``TypeError``/``KeyError``/``sqlite3.IntegrityError``
+from the sink); every rejection of a row halves the batch it is retried in,
+so the culprit ends up alone, and a sale rejected on its own once it has
+``max_rejections`` rejections is parked and no longer retried automatically
+(see ``requeue_parked``). Any other error means the sink is unavailable: the
+batch backs off at full size and the drain stops, so an outage costs one
+request per drain and neither shrinks batches nor parks anything.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Any, Set
+
+# HTTP statuses meaning the hub refused the batch itself, not that it is unavailable
+REJECTION_STATUSES = (400, 413, 422)
+
+def is_rejection(error: Exception) -> bool:
+    """Whether a sink error means the batch was refused (as opposed to the sink being unavailable)."""
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code in REJECTION_STATUSES
+    return isinstance(error, (ValueError, TypeError, KeyError, sqlite3.IntegrityError))
+
+class FileDropSink:
+    """Writes each sale as a JSON file, named after its idempotency key, into a drop directory."""
+    
+    def __init__(self, directory: str):
+        """Initialize the sink on a drop directory."""
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+    
+    def send(self, records: List[Dict[str, Any]]):
+        """Write a batch; sales whose file already exists are skipped, however they are batched."""
+        for record in records:
+            path = os.path.join(self.directory, f"sale_{record['key']}.json")
+            if os.path.exists(path):
+                continue
+            temp_path = path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"sales": [record["sale"]]}, f, ensure_ascii=False)
+            os.replace(temp_path, path)  # Readers never see a partial file
+
+class HttpSink:
+    """POSTs each batch to an HTTP endpoint."""
+    
+    def __init__(self, url: str, token: str = None, timeout: float = 10.0):
+        """Initialize the sink on an endpoint URL."""
+        self.url = url
+        self.token = token
+        self.timeout = timeout
+    
+    def send(self, records: List[Dict[str, Any]]):
+        """POST a batch; raises on network errors and non-2xx replies."""
+        body = json.dumps({"sales": [record["sale"] for record in records]}).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body)
+        request.add_header("Content-Type", "application/json")
+        if self.token:
+            request.add_header("X-Sync-Token", self.token)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+class SQLiteSink:
+    """Inserts each batch into another SQLite database."""
+    
+    def __init__(self, db_path: str):
+        """Initialize the sink and its table."""
+        self.db_path = db_path
+        conn = sqlite3.connect(db_path, timeout=30.0)
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS replicated_sales (
+                    idempotency_key TEXT PRIMARY KEY,
+                    register_id TEXT,
+                    sale_timestamp TEXT,
+                    total REAL,
+                    payload TEXT NOT NULL,
+                    received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def send(self, records: List[Dict[str, Any]]):
+        """Insert a batch in one transaction (known keys are ignored)."""
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        try:
+            conn.executemany('''
+                INSERT OR IGNORE INTO replicated_sales
+                    (idempotency_key, register_id, sale_timestamp, total, payload)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(r["key"], r["sale"].get("register_id"), r["sale"].get("timestamp"),
+                   r["sale"].get("total"), json.dumps(r["sale"], ensure_ascii=False)) for r in records])
+            conn.commit()
+        finally:
+            conn.close()
+
+def create_sink(spec: str, token: str = None):
+    """Create a sink from a spec: "http(s)://...", "sqlite:<path>" or "file:<directory>"."""
+    if spec.startswith(("http://", "https://")):
+        return HttpSink(spec, token)
+    if spec.startswith("sqlite:"):
+        return SQLiteSink(spec[len("sqlite:"):])
+    if spec.startswith("file:"):
+        return FileDropSink(spec[len("file:"):])
+    raise ValueError(f"Unknown outbox sink: {spec}")
+
+class OutboxShipper:
+    """Drains the sale outbox to a sink in the background."""
+    
+    def __init__(self, db_path: str, sink, batch_size: int = 100, interval: float = 5.0,
+                 base_backoff: float = 2.0, max_backoff: float = 300.0,
+                 retention_days: int = 30, purge_interval: float = 86400.0,
+                 max_rejections: int = 5):
+        """Initialize the shipper.
+        
+        Args:
+            db_path: Register database holding the sale_outbox table
+            sink: Object with a send(records) method that raises on failure
+            batch_size: Maximum sales per batch
+            interval: Seconds between drains when the outbox is idle
+            base_backoff: Delay before the first retry of a failed batch
+            max_backoff: Upper bound of the retry delay
+            retention_days: Days shipped rows are kept before being purged
+            purge_interval: Seconds between purges of shipped rows
+            max_rejections: Rejections after which a sale rejected on its
+                own is parked
+        """
+        self.db_path = db_path
+        self.sink = sink
+        self.batch_size = batch_size
+        self.interval = interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.retention_days = retention_days
+        self.purge_interval = purge_interval
+        self.max_rejections = max_rejections
+        self.last_error = None
+        self._next_purge = 0.0  # Monotonic time of the next purge; the first runs at startup
+        
+        self._drain_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the register database."""
+        return sqlite3.connect(self.db_path, timeout=30.0)
+    
+    def _next_batch(self, tried: Set[int] = frozenset()) -> List[Dict[str, Any]]:
+        """Get the oldest unshipped rows that are due, except those already tried in this drain.
+        
+        Each rejection of a row halves the batch it is sent in, so a sale
+        the sink rejects is eventually sent on its own.
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, idempotency_key, payload, attempts, rejections
+                FROM sale_outbox INDEXED BY idx_sale_outbox_pending
+                WHERE shipped_at IS NULL AND parked_at IS NULL AND next_attempt_at <= ?
+                ORDER BY id
+                LIMIT ?
+            ''', (time.time(), self.batch_size + len(tried)))
+            rows = [row for row in cursor.fetchall() if row[0] not in tried]
+        finally:
+            conn.close()
+        
+        batch = []
+        limit = self.batch_size
+        for row in rows:
+            limit = min(limit, max(1, self.batch_size >> row[4]))
+            if len(batch) >= limit:
+                break
+            batch.append({"outbox_id": row[0], "key": row[1], "sale": json.loads(row[2]),
+                          "attempts": row[3], "rejections": row[4]})
+        return batch
+    
+    def _mark_shipped(self, records: List[Dict[str, Any]]):
+        """Mark a batch as delivered."""
+        conn = self._connect()
+        try:
+            conn.executemany("UPDATE sale_outbox SET shipped_at = ?, last_error = NULL WHERE id = ?",
+                             [(datetime.now().isoformat(sep=" "), r["outbox_id"]) for r in records])
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def _mark_failed(self, records: List[Dict[str, Any]], error: str):
+        """Schedule a batch for retry with exponential backoff."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.executemany('''
+                UPDATE sale_outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?
+            ''', [(r["attempts"] + 1,
+                   now + min(self.max_backoff, self.base_backoff * 2 ** r["attempts"]),
+                   error, r["outbox_id"]) for r in records])
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def _record_rejection(self, records: List[Dict[str, Any]]):
+        """Count a rejection of a batch; a sale rejected on its own is parked after max_rejections."""
+        parked_at = datetime.now().isoformat(sep=" ")
+        alone = len(records) == 1
+        conn = self._connect()
+        try:
+            conn.executemany('''
+                UPDATE sale_outbox SET rejections = ?, parked_at = ? WHERE id = ?
+            ''', [(r["rejections"] + 1,
+                   parked_at if alone and r["rejections"] + 1 >= self.max_rejections else None,
+                   r["outbox_id"]) for r in records])
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def drain(self) -> int:
+        """Ship every due batch now.
+        
+        A failed batch waits for its retry time while newer sales ship. A
+        rejected batch lets the drain go on with the next one; an unavailable
+        sink stops it.
+        
+        Returns:
+            The number of sales shipped
+        """
+        shipped = 0
+        tried = set()
+        with self._drain_lock:
+            while True:
+                records = self._next_batch(tried)
+                if not records:
+                    break
+                tried.update(r["outbox_id"] for r in records)
+                
+                try:
+                    self.sink.send(records)
+                except Exception as e:
+                    # Any sink failure is retried later; the outbox still holds the batch
+                    self.last_error = str(e)
+                    self._mark_failed(records, self.last_error)
+                    if not is_rejection(e):
+                        break
+                    self._record_rejection(records)
+                    continue
+                
+                self._mark_shipped(records)
+                self.last_error = None
+                shipped += len(records)
+        return shipped
+    
+    @contextmanager
+    def paused(self):
+        """Hold off drains (waiting for a running one), e.g. while a restore swaps the database."""
+        with self._drain_lock:
+            yield
+    
+    def pending_count(self) -> int:
+        """Get the number of sales not yet shipped."""
+        conn = self._connect()
+        try:
+            return conn.execute('''
+                SELECT COUNT(*) FROM sale_outbox INDEXED BY idx_sale_outbox_pending WHERE shipped_at IS NULL
+            ''').fetchone()[0]
+        finally:
+            conn.close()
+    
+    def parked_count(self) -> int:
+        """Get the number of sales parked after repeated rejections."""
+        conn = self._connect()
+        try:
+            return conn.execute('''
+                SELECT COUNT(*) FROM sale_outbox WHERE shipped_at IS NULL AND parked_at IS NOT NULL
+            ''').fetchone()[0]
+        finally:
+            conn.close()
+    
+    def requeue_parked(self) -> int:
+        """Retry parked sales from scratch (e.g. once head office accepts them again)."""
+        conn = self._connect()
+        try:
+            cursor = conn.execute('''
+                UPDATE sale_outbox
+                SET parked_at = NULL, rejections = 0, attempts = 0, next_attempt_at = 0
+                WHERE shipped_at IS NULL AND parked_at IS NOT NULL
+            ''')
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
+    
+    def purge_shipped(self, older_than_days: int = 30) -> int:
+        """Delete outbox rows shipped more than older_than_days ago."""
+        conn = self._connect()
+        try:
+            cursor = conn.execute('''
+                DELETE FROM sale_outbox
+                WHERE shipped_at IS NOT NULL AND shipped_at < datetime('now', 'localtime', ?)
+            ''', (f"-{older_than_days} days",))
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
+    
+    def purge_if_due(self) -> int:
+        """Purge shipped rows if purge_interval has elapsed since the last purge."""
+        now = time.monotonic()
+        if now < self._next_purge:
+            return 0
+        self._next_purge = now + self.purge_interval
+        return self.purge_shipped(self.retention_days)
+    
+    def notify(self):
+        """Wake the shipper after a sale is committed."""
+        self._wakeup.set()
+    
+    def _run(self):
+        """Background loop draining on notification or every interval."""
+        while not self._stop.is_set():
+            self._wakeup.wait(timeout=self.interval)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.drain()
+                self.purge_if_due()
+            except sqlite3.Error as e:
+                print(f"Error shipping sale outbox: {e}")
+    
+    def start(self):
+        """Ship in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="OutboxShipper", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=10)
@@ -0,0 +1,227 @@
+"""
+Password Hasher
+===============
+
+Password hashing with a slow key-derivation function (scrypt or PBKDF2).
+
+Hashes are self-describing strings, so the cost parameters can be raised at
+any time and existing accounts upgrade on their next login::
+    
+    scrypt$<n>$<r>$<p>$<salt>$<hash>
+    pbkdf2_sha256$<iterations>$<salt>$<hash>
+    <salt>:<sha256>                      legacy single-round format
+
+The cost is chosen once per till by ``benchmark`` (so a login stays under a
+target latency on that hardware) and saved in ``config/password_settings.json``;
+it is never measured at login time.
+
+Usage::
+    
+    python -m utils.password_hasher --benchmark --target-ms 150
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from typing import Dict, Any, Optional
+
+class PasswordHasher:
+    """Hashes and verifies passwords with a configurable KDF."""
+    
+    SCHEMES = ("scrypt", "pbkdf2_sha256")
+    MIN_SCRYPT_N = 2 ** 12
+    MAX_SCRYPT_N = 2 ** 20
+    MIN_PBKDF2_ITERATIONS = 50000
+    MAX_PBKDF2_ITERATIONS = 5000000
+    
+    DEFAULT_SETTINGS = {
+        "scheme": "scrypt",
+        "scrypt_n": 2 ** 14,
+        "scrypt_r": 8,
+        "scrypt_p": 1,
+        "pbkdf2_iterations": 200000,
+        "target_ms": 150,
+        "benchmarked_at": None
+    }
+    
+    def __init__(self, settings_file: str = "config/password_settings.json"):
+        """Initialize the hasher with the saved cost settings."""
+        self.settings_file = settings_file
+        self.settings = self.load_settings()
+    
+    def load_settings(self) -> Dict[str, Any]:
+        """Load hashing settings, falling back to defaults."""
+        settings = dict(self.DEFAULT_SETTINGS)
+        try:
+            if os.path.exists(self.settings_file):
+                with open(self.settings_file, 'r', encoding='utf-8') as f:
+                    settings.update(json.load(f))
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading password settings: {e}")
+        
+        if settings["scheme"] not in self.SCHEMES or not self._scrypt_available():
+            settings["scheme"] = "pbkdf2_sha256"
+        return settings
+    
+    def save_settings(self):
+        """Save hashing settings."""
+        try:
+            os.makedirs(os.path.dirname(self.settings_file) or ".", exist_ok=True)
+            with open(self.settings_file, 'w', encoding='utf-8') as f:
+                json.dump(self.settings, f, indent=2)
+        except IOError as e:
+            print(f"Error saving password settings: {e}")
+    
+    @staticmethod
+    def _scrypt_available() -> bool:
+        """Check whether this Python build provides hashlib.scrypt."""
+        return hasattr(hashlib, "scrypt")
+    
+    @staticmethod
+    def _scrypt_maxmem(n: int, r: int, p: int) -> int:
+        """Memory limit for scrypt with some headroom over 128*n*r*p."""
+        return 128 * n * r * p + 2 * 1024 * 1024
+    
+    def _derive_scrypt(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        """Derive a scrypt key."""
+        return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                              maxmem=self._scrypt_maxmem(n, r, p), dklen=32)
+    
+    def _derive_pbkdf2(self, password: str, salt: bytes, iterations: int) -> bytes:
+        """Derive a PBKDF2-HMAC-SHA256 key."""
+        return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    
+    def hash(self, password: str) -> str:
+        """Hash a password with the configured scheme and cost."""
+        salt = secrets.token_bytes(16)
+        if self.settings["scheme"] == "scrypt":
+            n, r, p = self.settings["scrypt_n"], self.settings["scrypt_r"], self.settings["scrypt_p"]
+            key = self._derive_scrypt(password, salt, n, r, p)
+            return f"scrypt${n}${r}${p}${salt.hex()}${key.hex()}"
+        
+        iterations = self.settings["pbkdf2_iterations"]
+        key = self._derive_pbkdf2(password, salt, iterations)
+        return f"pbkdf2_sha256${iterations}${salt.hex()}${key.hex()}"
+    
+    def verify(self, password: str, password_hash: str) -> bool:
+        """Verify a password against a hash in any supported format."""
+        try:
+            if password_hash.startswith("scrypt$"):
+                _, n, r, p, salt, expected = password_hash.split('$')
+                key = self._derive_scrypt(password, bytes.fromhex(salt), int(n), int(r), int(p))
+                return hmac.compare_digest(key.hex(), expected)
+            
+            if password_hash.startswith("pbkdf2_sha256$"):
+                _, iterations, salt, expected = password_hash.split('$')
+                key = self._derive_pbkdf2(password, bytes.fromhex(salt), int(iterations))
+                return hmac.compare_digest(key.hex(), expected)
+            
+            # Legacy format: salt:sha256(password + salt)
+            salt, expected = password_hash.split(':')
+            digest = hashlib.sha256((password + salt).encode()).hexdigest()
+            return hmac.compare_digest(digest, expected)
+        except (ValueError, TypeError):
+            return False
+    
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Check whether a hash is legacy or weaker than the current settings."""
+        parts = password_hash.split('$')
+        if self.settings["scheme"] == "scrypt":
+            return not (parts[0] == "scrypt" and len(parts) == 6 and
+                        int(parts[1]) >= self.settings["scrypt_n"] and
+                        int(parts[2]) == self.settings["scrypt_r"] and
+                        int(parts[3]) == self.settings["scrypt_p"])
+        
+        return not (parts[0] == "pbkdf2_sha256" and len(parts) == 4 and
+                    int(parts[1]) >= self.settings["pbkdf2_iterations"])
+    
+    def _time_hash(self, rounds: int = 3) -> float:
+        """Best-of-N time in milliseconds for one hash at the current settings."""
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            self.hash("benchmark-password")
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+    
+    def benchmark(self, target_ms: float = None, scheme: str = None, save: bool = True) -> Dict[str, Any]:
+        """Pick the highest cost whose hash time stays within target_ms.
+        
+        Args:
+            target_ms: Login latency budget for one verification
+            scheme: Scheme to tune (defaults to the configured one)
+            save: Persist the chosen cost to the settings file
+        
+        Returns:
+            The chosen parameters and measured time
+        """
+        target_ms = target_ms or self.settings["target_ms"]
+        if scheme:
+            self.settings["scheme"] = scheme
+        if self.settings["scheme"] == "scrypt" and not self._scrypt_available():
+            self.settings["scheme"] = "pbkdf2_sha256"
+        
+        if self.settings["scheme"] == "scrypt":
+            # Doubling n doubles the time; stop at the last power of two within budget
+            n = self.MIN_SCRYPT_N
+            self.settings["scrypt_n"] = n
+            elapsed = self._time_hash()
+            while n < self.MAX_SCRYPT_N:
+                self.settings["scrypt_n"] = n * 2
+                doubled = self._time_hash()
+                if doubled > target_ms:
+                    break
+                n, elapsed = n * 2, doubled
+            self.settings["scrypt_n"] = n
+            result = {"scheme": "scrypt", "scrypt_n": n, "scrypt_r": self.settings["scrypt_r"],
+                      "scrypt_p": self.settings["scrypt_p"]}
+        else:
+            # PBKDF2 time is linear in the iteration count
+            self.settings["pbkdf2_iterations"] = self.MIN_PBKDF2_ITERATIONS
+            per_iteration = self._time_hash() / self.MIN_PBKDF2_ITERATIONS
+            iterations = int(target_ms / per_iteration) if per_iteration else self.MIN_PBKDF2_ITERATIONS
+            iterations = max(self.MIN_PBKDF2_ITERATIONS, min(self.MAX_PBKDF2_ITERATIONS, iterations))
+            self.settings["pbkdf2_iterations"] = iterations
+            elapsed = self._time_hash()
+            result = {"scheme": "pbkdf2_sha256", "pbkdf2_iterations": iterations}
+        
+        self.settings["target_ms"] = target_ms
+        self.settings["benchmarked_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        if save:
+            self.save_settings()
+        
+        result.update({"target_ms": target_ms, "measured_ms": round(elapsed, 1)})
+        return result
+
+_hasher: Optional[PasswordHasher] = None
+
+def get_password_hasher() -> PasswordHasher:
+    """Get the shared password hasher (settings are read once)."""
+    global _hasher
+    if _hasher is None:
+        _hasher = PasswordHasher()
+    return _hasher
+
+def main():
+    """Command line entry point for tuning the hashing cost."""
+    parser = argparse.ArgumentParser(description="Tune password hashing cost for this till")
+    parser.add_argument("--benchmark", action="store_true", help="Measure and save the hashing cost")
+    parser.add_argument("--target-ms", type=float, default=None, help="Login latency budget in milliseconds")
+    parser.add_argument("--scheme", choices=PasswordHasher.SCHEMES, default=None, help="Hashing scheme")
+    parser.add_argument("--settings", default="config/password_settings.json", help="Settings file")
+    args = parser.parse_args()
+    
+    hasher = PasswordHasher(args.settings)
+    if args.benchmark:
+        result = hasher.benchmark(args.target_ms, args.scheme)
+        print(f"Selected {result['scheme']} cost: {json.dumps(result)}")
+    else:
+        print(json.dumps(hasher.settings, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -3,43 +3,206 @@ Session Manager
 ===============
 
 Manages POS sessions, cash drawer opening, and daily operations.
+
+Cash sessions and cash movements are stored in the ``cash_sessions`` and
+``cash_transactions`` tables of the POS database. Each cash movement is a
+single-row insert plus a balance update in one transaction, so recording it
+costs the same no matter how much history has accumulated. Data from the
+legacy ``pos_session.json`` file is imported once by the register at startup
+(``migrate_json_sessions``); constructing a SessionManager never touches it.
+
+A register can have several sessions on the same day: opening over a
+session that was never closed marks it ``'replaced'`` and keeps its cash
+movements. The latest session of a day is the current one.
 """
 
 import json
 import os
+import sqlite3
 from datetime import datetime, date
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 class SessionManager:
     """Manages POS sessions and cash drawer operations."""
     
-    def __init__(self, session_file: str = "pos_session.json"):
-        """Initialize session manager."""
+    SESSION_COLUMNS = ("id", "register_id", "session_date", "start_time", "restart_time",
+                       "cash_drawer_amount", "opening_reason", "restart_reason", "status",
+                       "logout_time", "closing_reason", "cashier")
+    
+    def __init__(self, session_file: str = "pos_session.json", db_path: str = "pos_database.db",
+                 register_id: str = "default"):
+        """Initialize session manager.
+        
+        Args:
+            session_file: Legacy JSON session file, imported by migrate_json_sessions()
+            db_path: Database holding the cash session tables
+            register_id: Identifier of this register (sessions are per register)
+        """
         self.session_file = session_file
+        self.db_path = db_path
+        self.register_id = register_id
         self.logout_flag_file = "logout_flag.txt"
         self.current_session = None
+        self._init_tables()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the session database."""
+        return sqlite3.connect(self.db_path, timeout=30.0)
+    
+    def _init_tables(self):
+        """Create cash session tables and indexes."""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS cash_sessions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    register_id TEXT NOT NULL,
+                    session_date TEXT NOT NULL,
+                    start_time TIMESTAMP,
+                    restart_time TIMESTAMP,
+                    cash_drawer_amount REAL DEFAULT 0.0,
+                    opening_reason TEXT,
+                    restart_reason TEXT,
+                    status TEXT DEFAULT 'open',
+                    logout_time TIMESTAMP,
+                    closing_reason TEXT,
+                    cashier TEXT
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS cash_transactions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id INTEGER NOT NULL,
+                    register_id TEXT NOT NULL,
+                    timestamp TIMESTAMP NOT NULL,
+                    type TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    new_balance REAL NOT NULL,
+                    reason TEXT,
+                    FOREIGN KEY (session_id) REFERENCES cash_sessions (id)
+                )
+            ''')
+            
+            # Latest session of a register and day, plus date-first lookups
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_cash_sessions_register ON cash_sessions(register_id, session_date, id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_cash_sessions_date ON cash_sessions(session_date, register_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_cash_transactions_session ON cash_transactions(session_id, timestamp)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_cash_transactions_register ON cash_transactions(register_id, timestamp)")
+            
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def migrate_json_sessions(self):
+        """Import the legacy JSON session file into the database (once).
         
+        Called by the register at startup; the file is renamed to
+        ``<session_file>.migrated`` afterwards.
+        """
+        if not os.path.exists(self.session_file):
+            return
+        
+        try:
+            with open(self.session_file, 'r', encoding='utf-8') as f:
+                legacy_data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error reading legacy session file: {e}")
+            return
+        
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            for session_date, session in legacy_data.items():
+                cursor.execute('''
+                    SELECT 1 FROM cash_sessions WHERE register_id = ? AND session_date = ?
+                ''', (self.register_id, session.get('date', session_date)))
+                if cursor.fetchone():
+                    continue  # Already imported
+                
+                cursor.execute('''
+                    INSERT INTO cash_sessions
+                        (register_id, session_date, start_time, restart_time, cash_drawer_amount,
+                         opening_reason, restart_reason, status, logout_time, closing_reason, cashier)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (self.register_id, session.get('date', session_date), session.get('start_time'),
+                      session.get('restart_time'), session.get('cash_drawer_amount', 0.0),
+                      session.get('opening_reason'), session.get('restart_reason'),
+                      session.get('status', 'closed'), session.get('logout_time'),
+                      session.get('closing_reason'), session.get('cashier')))
+                
+                session_id = cursor.lastrowid
+                cursor.executemany('''
+                    INSERT INTO cash_transactions
+                        (session_id, register_id, timestamp, type, amount, new_balance, reason)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', [(session_id, self.register_id, t.get('timestamp'), t.get('type'),
+                       t.get('amount', 0.0), t.get('new_balance', 0.0), t.get('reason'))
+                      for t in session.get('cash_transactions', [])])
+            
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error migrating session data: {e}")
+            conn.rollback()
+            return
+        finally:
+            conn.close()
+        
+        # Keep the original file for reference but never import it twice
+        os.replace(self.session_file, self.session_file + ".migrated")
+        print(f"Session data migrated from {self.session_file} to database")
+    
     def get_today_date(self) -> str:
         """Get today's date as string."""
         return date.today().isoformat()
     
+    def _row_to_session(self, row) -> Dict[str, Any]:
+        """Convert a cash_sessions row into the session dictionary."""
+        session = dict(zip(self.SESSION_COLUMNS, row))
+        session['date'] = session.pop('session_date')
+        return session
+    
+    def _load_session(self, session_date: str) -> Optional[Dict[str, Any]]:
+        """Load this register's latest session for a date."""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {", ".join(self.SESSION_COLUMNS)}
+                FROM cash_sessions
+                WHERE register_id = ? AND session_date = ?
+                ORDER BY id DESC
+                LIMIT 1
+            ''', (self.register_id, session_date))
+            row = cursor.fetchone()
+            return self._row_to_session(row) if row else None
+        finally:
+            conn.close()
+    
     def load_session_data(self) -> Dict[str, Any]:
-        """Load session data from file."""
-        if os.path.exists(self.session_file):
-            try:
-                with open(self.session_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return {}
-        return {}
-    
-    def save_session_data(self, data: Dict[str, Any]):
-        """Save session data to file."""
+        """Export all sessions of this register in the legacy per-day format.
+        
+        This reads the whole history and is meant for reports and tools only;
+        the register itself never needs it. Each day holds its latest session.
+        """
+        data = {}
+        conn = self._connect()
         try:
-            with open(self.session_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except IOError as e:
-            print(f"Error saving session data: {e}")
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {", ".join(self.SESSION_COLUMNS)}
+                FROM cash_sessions
+                WHERE register_id = ?
+                ORDER BY session_date, id
+            ''', (self.register_id,))
+            for row in cursor.fetchall():
+                session = self._row_to_session(row)
+                session['cash_transactions'] = self.get_cash_transactions(session['date'])
+                data[session['date']] = session
+        finally:
+            conn.close()
+        return data
     
     def needs_cash_drawer_opening(self) -> bool:
         """Check if cash drawer opening is needed."""
@@ -48,14 +211,11 @@ class SessionManager:
             return True
         
         # Also check if no session exists for today (first time running)
-        session_data = self.load_session_data()
-        today = self.get_today_date()
-        
-        if today not in session_data:
+        today_session = self._load_session(self.get_today_date())
+        if not today_session:
             return True
         
         # Load existing session if available
-        today_session = session_data[today]
         if not today_session.get('logout_time'):
             self.current_session = today_session
             return False
@@ -68,37 +228,45 @@ class SessionManager:
         if os.path.exists(self.logout_flag_file):
             os.remove(self.logout_flag_file)
         
-        session_data = self.load_session_data()
         today = self.get_today_date()
+        now = datetime.now().isoformat()
+        existing = self._load_session(today)
+        
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            if existing and existing.get('logout_time'):
+                # Update existing session after logout
+                cursor.execute('''
+                    UPDATE cash_sessions
+                    SET restart_time = ?, cash_drawer_amount = ?, restart_reason = ?,
+                        status = 'open', logout_time = NULL
+                    WHERE id = ?
+                ''', (now, cash_amount, reason, existing['id']))
+            else:
+                if existing:
+                    # Replacing an unclosed session: close it, keeping its cash
+                    # movements, and start over with a fresh one
+                    cursor.execute('''
+                        UPDATE cash_sessions
+                        SET status = 'replaced', logout_time = ?, closing_reason = ?
+                        WHERE id = ?
+                    ''', (now, reason, existing['id']))
+                
+                # Create a new session for today
+                cursor.execute('''
+                    INSERT INTO cash_sessions
+                        (register_id, session_date, start_time, cash_drawer_amount,
+                         opening_reason, status, logout_time, cashier)
+                    VALUES (?, ?, ?, ?, ?, 'open', NULL, ?)
+                ''', (self.register_id, today, now, cash_amount, reason,
+                      'Admin'))  # You can modify this to track actual cashier
+            conn.commit()
+        finally:
+            conn.close()
         
-        # Check if updating existing session or creating new one
-        if today in session_data and session_data[today].get('logout_time'):
-            # Update existing session after logout
-            session_info = session_data[today].copy()
-            session_info.update({
-                'restart_time': datetime.now().isoformat(),
-                'cash_drawer_amount': cash_amount,
-                'restart_reason': reason,
-                'status': 'open',
-                'logout_time': None,  # Clear logout time
-            })
-        else:
-            # Create completely new session
-            session_info = {
-                'date': today,
-                'start_time': datetime.now().isoformat(),
-                'cash_drawer_amount': cash_amount,
-                'opening_reason': reason,
-                'status': 'open',
-                'logout_time': None,
-                'cashier': 'Admin'  # You can modify this to track actual cashier
-            }
-        
-        session_data[today] = session_info
-        self.save_session_data(session_data)
-        self.current_session = session_info
-        
-        return session_info
+        self.current_session = self._load_session(today)
+        return self.current_session
     
     def end_session(self, reason: str = "Déconnexion"):
         """End current session (logout)."""
@@ -106,25 +274,16 @@ class SessionManager:
         with open(self.logout_flag_file, 'w') as f:
             f.write("logged_out")
         
-        # Update session data
-        if not self.current_session:
-            # Try to load current session
-            session_data = self.load_session_data()
-            today = self.get_today_date()
-            if today in session_data:
-                self.current_session = session_data[today]
-            
-        if self.current_session:
-            session_data = self.load_session_data()
-            today = self.get_today_date()
-            
-            if today in session_data:
-                session_data[today].update({
-                    'logout_time': datetime.now().isoformat(),
-                    'status': 'closed',
-                    'closing_reason': reason
-                })
-                self.save_session_data(session_data)
+        conn = self._connect()
+        try:
+            conn.execute('''
+                UPDATE cash_sessions
+                SET logout_time = ?, status = 'closed', closing_reason = ?
+                WHERE register_id = ? AND session_date = ? AND status = 'open'
+            ''', (datetime.now().isoformat(), reason, self.register_id, self.get_today_date()))
+            conn.commit()
+        finally:
+            conn.close()
         
         self.current_session = None
     
@@ -136,10 +295,9 @@ class SessionManager:
     def get_current_session(self) -> Optional[Dict[str, Any]]:
         """Get current session information."""
         if not self.current_session:
-            session_data = self.load_session_data()
-            today = self.get_today_date()
-            if today in session_data and session_data[today].get('status') == 'open':
-                self.current_session = session_data[today]
+            session = self._load_session(self.get_today_date())
+            if session and session.get('status') == 'open':
+                self.current_session = session
         
         return self.current_session
     
@@ -148,37 +306,67 @@ class SessionManager:
         session = self.get_current_session()
         return session.get('cash_drawer_amount', 0.0) if session else 0.0
     
+    def get_cash_transactions(self, session_date: str = None, session_id: int = None) -> List[Dict[str, Any]]:
+        """Get the cash movements of a session.
+        
+        Args:
+            session_date: Day whose latest session is read (today by default)
+            session_id: Read this session instead, e.g. a replaced one
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            if session_id is None:
+                cursor.execute('''
+                    SELECT id FROM cash_sessions
+                    WHERE register_id = ? AND session_date = ?
+                    ORDER BY id DESC
+                    LIMIT 1
+                ''', (self.register_id, session_date or self.get_today_date()))
+                row = cursor.fetchone()
+                if not row:
+                    return []
+                session_id = row[0]
+            cursor.execute('''
+                SELECT timestamp, type, amount, new_balance, reason
+                FROM cash_transactions
+                WHERE session_id = ?
+                ORDER BY timestamp, id
+            ''', (session_id,))
+            return [
+                {'timestamp': row[0], 'type': row[1], 'amount': row[2],
+                 'new_balance': row[3], 'reason': row[4]}
+                for row in cursor.fetchall()
+            ]
+        finally:
+            conn.close()
+    
     def update_cash_amount(self, new_amount: float, operation_type: str, reason: str, transaction_amount: float):
         """Update cash amount in current session and log the transaction."""
         if not self.current_session:
             self.get_current_session()  # Try to load current session
-            
+        
         if not self.current_session:
             raise ValueError("No active session found")
         
-        session_data = self.load_session_data()
-        today = self.get_today_date()
+        conn = self._connect()
+        try:
+            # Append the movement and update the balance atomically
+            conn.execute('''
+                INSERT INTO cash_transactions
+                    (session_id, register_id, timestamp, type, amount, new_balance, reason)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (self.current_session['id'], self.register_id, datetime.now().isoformat(),
+                  operation_type, transaction_amount, new_amount, reason))
+            conn.execute('''
+                UPDATE cash_sessions SET cash_drawer_amount = ? WHERE id = ?
+            ''', (new_amount, self.current_session['id']))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
         
-        if today in session_data:
-            # Update cash amount
-            session_data[today]['cash_drawer_amount'] = new_amount
-            
-            # Add transaction to history
-            if 'cash_transactions' not in session_data[today]:
-                session_data[today]['cash_transactions'] = []
-            
-            transaction = {
-                'timestamp': datetime.now().isoformat(),
-                'type': operation_type,
-                'amount': transaction_amount,
-                'new_balance': new_amount,
-                'reason': reason
-            }
-            
-            session_data[today]['cash_transactions'].append(transaction)
-            
-            # Update current session
-            self.current_session['cash_drawer_amount'] = new_amount
-            
-            # Save changes
-            self.save_session_data(session_data)
+        # Update current session
+        self.current_session['cash_drawer_amount'] = new_amount
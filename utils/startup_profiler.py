@@ -0,0 +1,118 @@
+"""
+Startup Profiler
+================
+
+Import-time and init-time breakdown of the register's startup.
+
+Disabled by default: ``phase`` and ``mark`` then cost a function call, so the
+startup code can stay instrumented. ``python main.py --profile-startup``
+enables it before ``pos_system`` is imported; the report is printed once the
+main window is on screen.
+
+Time spent waiting for the user (the login dialog) is recorded as a wait and
+left out of the startup budget.
+"""
+
+import builtins
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+class StartupProfiler:
+    """Records startup phases and first-time module imports."""
+    
+    def __init__(self):
+        """Initialize a disabled profiler."""
+        self.enabled = False
+        self.start_time = time.perf_counter()
+        self.phases: List[Tuple[str, float, bool]] = []  # (name, seconds, is_user_wait)
+        self.marks: List[Tuple[str, float]] = []  # (name, seconds since start, minus user waits)
+        self.import_times: Dict[str, float] = {}  # Module -> own import time in seconds
+        self._wait_time = 0.0
+        self._import_stack: List[float] = []
+        self._original_import = None
+        self._main_thread = threading.main_thread()
+    
+    def enable(self):
+        """Start recording (call before the modules to profile are imported)."""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.start_time = time.perf_counter()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+    
+    def disable(self):
+        """Stop recording imports."""
+        if self._original_import:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+    
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        """__import__ wrapper timing the first import of each module (main thread only)."""
+        if (level or name in sys.modules or
+                threading.current_thread() is not self._main_thread):
+            return self._original_import(name, globals, locals, fromlist, level)
+        
+        self._import_stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = self._import_stack.pop()
+            # Exclusive time: nested imports are reported on their own lines
+            self.import_times[name] = self.import_times.get(name, 0.0) + elapsed - nested
+            if self._import_stack:
+                self._import_stack[-1] += elapsed
+    
+    @contextmanager
+    def phase(self, name: str, user_wait: bool = False):
+        """Time a startup phase; user_wait phases are excluded from the budget."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.phases.append((name, elapsed, user_wait))
+            if user_wait:
+                self._wait_time += elapsed
+    
+    def mark(self, name: str):
+        """Record a milestone (e.g. "main window shown")."""
+        if self.enabled:
+            self.marks.append((name, time.perf_counter() - self.start_time - self._wait_time))
+    
+    def report(self, budget_ms: float = None, top_imports: int = 15) -> str:
+        """Format the startup breakdown."""
+        lines = ["=== Startup profile ==="]
+        
+        lines.append("Phases:")
+        for name, elapsed, user_wait in self.phases:
+            suffix = "  (waiting for user, not counted)" if user_wait else ""
+            lines.append(f"  {elapsed * 1000:9.1f} ms  {name}{suffix}")
+        
+        lines.append(f"Slowest imports (own time, {len(self.import_times)} modules):")
+        by_package: Dict[str, float] = {}
+        for module, elapsed in self.import_times.items():
+            package = module.split('.')[0]
+            by_package[package] = by_package.get(package, 0.0) + elapsed
+        for package, elapsed in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top_imports]:
+            lines.append(f"  {elapsed * 1000:9.1f} ms  {package}")
+        
+        lines.append("Milestones:")
+        for name, elapsed in self.marks:
+            status = ""
+            if budget_ms is not None:
+                status = "  OK" if elapsed * 1000 <= budget_ms else f"  OVER BUDGET ({budget_ms:.0f} ms)"
+            lines.append(f"  {elapsed * 1000:9.1f} ms  {name}{status}")
+        
+        return "\n".join(lines)
+
+# Shared profiler instrumented throughout startup
+startup_profiler = StartupProfiler()
@@ -0,0 +1,382 @@
+"""
+Sync Service
+============
+
+Keeps several registers of a store on one catalog with combined sales.
+
+One machine runs the hub (``SyncServer``), a small HTTP service in front of
+the store database. Each register keeps selling against its own SQLite
+database and a ``SyncClient`` reconciles with the hub whenever it is
+reachable:
+
+* sales are pushed in batches, oldest first; the hub stores them under their
+  ``sync_id`` so a batch retried after a lost reply is not counted twice, and
+  decrements its stock for them;
+* catalog changes are pulled by version number: every product write bumps
+  the product's ``version``, and a register asks for everything above the
+  last version it applied. Deleted products leave a tombstone with its own
+  version, so registers delete them too.
+
+The hub owns the catalog and the stock figures. A register's stock is the
+hub's figure minus the sales it has not pushed yet, so it stays correct while
+offline and converges when the link returns.
+
+Usage::
+    
+    python -m utils.sync_service --serve --db store.db --port 8765
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse, parse_qs
+
+from database.db_manager import DatabaseManager
+from models.sale import Sale
+from models.product import Product
+from config import REGISTER_ID, SYNC_INTERVAL_SECONDS
+
+class SyncServer:
+    """HTTP hub that receives register sales and serves catalog changes."""
+    
+    MAX_PAGE_SIZE = 1000
+    
+    def __init__(self, db_path: str = "pos_database.db", host: str = "127.0.0.1",
+                 port: int = 8765, token: str = None):
+        """Initialize the hub on the store database.
+        
+        Args:
+            db_path: Store database holding the shared catalog and combined sales
+            host: Interface to listen on ("0.0.0.0" for the store network)
+            port: TCP port (0 picks a free one)
+            token: Shared secret registers must send, if set
+        """
+        self.db_manager = DatabaseManager(db_path, register_id="hub")
+        self.token = token
+        self._import_lock = threading.Lock()  # One batch at a time keeps sync_id checks exact
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+    
+    @property
+    def url(self) -> str:
+        """Base URL the hub is listening on."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def _make_handler(self):
+        """Build the request handler class bound to this server."""
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # Registers poll constantly; keep the console quiet
+            
+            def _send_json(self, status: int, payload: Dict[str, Any]):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def _authorized(self) -> bool:
+                if server.token and self.headers.get("X-Sync-Token") != server.token:
+                    self._send_json(403, {"error": "invalid token"})
+                    return False
+                return True
+            
+            def do_GET(self):
+                if not self._authorized():
+                    return
+                url = urlparse(self.path)
+                if url.path == "/health":
+                    self._send_json(200, {"status": "ok"})
+                elif url.path == "/catalog":
+                    query = parse_qs(url.query)
+                    try:
+                        since = int(query.get("since", ["0"])[0])
+                        limit = min(int(query.get("limit", ["500"])[0]), server.MAX_PAGE_SIZE)
+                    except ValueError:
+                        self._send_json(400, {"error": "invalid since/limit"})
+                        return
+                    self._send_json(200, server.get_catalog(since, limit))
+                else:
+                    self._send_json(404, {"error": "not found"})
+            
+            def do_POST(self):
+                if not self._authorized():
+                    return
+                if urlparse(self.path).path != "/sales":
+                    self._send_json(404, {"error": "not found"})
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    payload = json.loads(self.rfile.read(length).decode('utf-8'))
+                    sales = [Sale.from_dict(data) for data in payload.get("sales", [])]
+                except (ValueError, KeyError, TypeError) as e:
+                    self._send_json(400, {"error": f"invalid sales batch: {e}"})
+                    return
+                self._send_json(200, server.receive_sales(sales, payload.get("register_id")))
+        
+        return Handler
+    
+    def get_catalog(self, since: int, limit: int) -> Dict[str, Any]:
+        """Get products changed or deleted after a catalog version."""
+        products = self.db_manager.get_products_changed_since(since, limit)
+        deleted = self.db_manager.get_products_deleted_since(since, limit)
+        
+        # A full page of either kind ends the reply at its last version
+        page_ends = []
+        if len(products) == limit:
+            page_ends.append(products[-1].version)
+        if len(deleted) == limit:
+            page_ends.append(deleted[-1][1])
+        if page_ends:
+            version = min(page_ends)
+            products = [product for product in products if product.version <= version]
+            deleted = [entry for entry in deleted if entry[1] <= version]
+        else:
+            version = max([since] + [product.version for product in products] +
+                          [entry[1] for entry in deleted])
+        
+        return {
+            "products": [product.to_dict() for product in products],
+            "deleted": [{"id": product_id, "version": deleted_version}
+                        for product_id, deleted_version in deleted],
+            "version": version,
+            "more": bool(page_ends)
+        }
+    
+    def receive_sales(self, sales, register_id: str = None) -> Dict[str, Any]:
+        """Store a batch of register sales (already known ones are skipped)."""
+        accepted, duplicates = [], 0
+        with self._import_lock:
+            for sale in sales:
+                if not sale.sync_id:
+                    continue
+                sale.register_id = sale.register_id or register_id
+                if self.db_manager.import_sale(sale):
+                    accepted.append(sale.sync_id)
+                else:
+                    duplicates += 1
+        return {"accepted": accepted, "duplicates": duplicates}
+    
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="SyncServer", daemon=True)
+        self._thread.start()
+    
+    def serve_forever(self):
+        """Serve in the calling thread until interrupted."""
+        self._httpd.serve_forever()
+    
+    def stop(self):
+        """Stop serving and release the database."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self.db_manager.stock_ledger.stop()
+        self.db_manager.close_all_connections()
+
+class SyncClient:
+    """Pushes this register's sales to the hub and pulls catalog changes."""
+    
+    PUSH_BATCH_SIZE = 100
+    PULL_PAGE_SIZE = 500
+    REQUEST_TIMEOUT = 10.0
+    
+    def __init__(self, db_manager: DatabaseManager, server_url: str, register_id: str = REGISTER_ID,
+                 interval: float = SYNC_INTERVAL_SECONDS, token: str = None):
+        """Initialize the client for this register's database.
+        
+        Args:
+            db_manager: This register's database manager
+            server_url: Base URL of the hub, e.g. "http://192.168.1.10:8765"
+            register_id: Identifier of this register
+            interval: Seconds between background sync cycles
+            token: Shared secret expected by the hub
+        """
+        self.db_manager = db_manager
+        self.server_url = server_url.rstrip("/")
+        self.register_id = register_id
+        self.interval = interval
+        self.token = token
+        self.online = False
+        self.last_error = None
+        
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._init_state()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the register database."""
+        return sqlite3.connect(self.db_manager.db_path, timeout=30.0)
+    
+    def _init_state(self):
+        """Create the table holding sync progress."""
+        conn = self._connect()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def _get_state(self, key: str) -> int:
+        """Read a sync progress counter."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else 0
+        finally:
+            conn.close()
+    
+    def _set_state(self, key: str, value: int):
+        """Store a sync progress counter."""
+        conn = self._connect()
+        try:
+            conn.execute('''
+                INSERT INTO sync_state (key, value) VALUES (?, ?)
+                ON CONFLICT (key) DO UPDATE SET value = excluded.value
+            ''', (key, value))
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def _request(self, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Send a request to the hub and decode the JSON reply."""
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(self.server_url + path, data=data)
+        request.add_header("Content-Type", "application/json")
+        if self.token:
+            request.add_header("X-Sync-Token", self.token)
+        with urllib.request.urlopen(request, timeout=self.REQUEST_TIMEOUT) as response:
+            return json.loads(response.read().decode('utf-8'))
+    
+    def push_sales(self) -> int:
+        """Push sales not yet acknowledged by the hub.
+        
+        Returns:
+            The number of sales pushed
+        """
+        pushed = 0
+        while True:
+            last_pushed = self._get_state("sales_pushed_through")
+            sales = self.db_manager.get_sales_after(last_pushed, self.PUSH_BATCH_SIZE)
+            if not sales:
+                return pushed
+            
+            self._request("/sales", {"register_id": self.register_id,
+                                     "sales": [sale.to_dict() for sale in sales]})
+            # Only advance once the hub has the whole batch
+            self._set_state("sales_pushed_through", sales[-1].id)
+            pushed += len(sales)
+    
+    def pull_catalog(self) -> int:
+        """Pull catalog changes above the last applied version.
+        
+        Returns:
+            The number of products applied
+        """
+        pulled = 0
+        while True:
+            since = self._get_state("catalog_version")
+            reply = self._request(f"/catalog?since={since}&limit={self.PULL_PAGE_SIZE}")
+            products = [Product.from_dict(data) for data in reply["products"]]
+            deleted = [(entry["id"], entry["version"]) for entry in reply.get("deleted", [])]
+            
+            pulled += self.db_manager.apply_catalog_changes(
+                products, unpushed_after_sale_id=self._get_state("sales_pushed_through"),
+                deleted=deleted)
+            self._set_state("catalog_version", reply["version"])
+            if not reply.get("more"):
+                return pulled
+    
+    @contextmanager
+    def paused(self):
+        """Hold off sync cycles (waiting for a running one), e.g. while a restore swaps the database."""
+        with self._sync_lock:
+            yield
+    
+    def sync_once(self) -> Dict[str, Any]:
+        """Run one sync cycle: push sales first so pulled stock includes them."""
+        with self._sync_lock:
+            try:
+                pushed = self.push_sales()
+                pulled = self.pull_catalog()
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                # Offline or hub unavailable: keep selling locally and retry next cycle
+                self.online = False
+                self.last_error = str(e)
+                return {"online": False, "error": self.last_error}
+            except sqlite3.Error as e:
+                # Local database busy or rejected a change: nothing advanced, retry next cycle
+                self.last_error = f"Local database error: {e}"
+                print(f"Sync failed: {self.last_error}")
+                return {"online": self.online, "error": self.last_error}
+            
+            self.online = True
+            self.last_error = None
+            return {"online": True, "pushed": pushed, "pulled": pulled}
+    
+    def _run(self):
+        """Background loop syncing every interval."""
+        while not self._stop.is_set():
+            try:
+                self.sync_once()
+            except Exception as e:
+                # Never let one bad cycle end background sync
+                self.last_error = str(e)
+                print(f"Error in sync loop: {e}")
+            self._stop.wait(self.interval)
+    
+    def start(self):
+        """Sync in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="SyncClient", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.REQUEST_TIMEOUT)
+
+def main():
+    """Command line entry point for running the store hub."""
+    parser = argparse.ArgumentParser(description="Run the store sync hub for multiple registers")
+    parser.add_argument("--serve", action="store_true", help="Run the sync hub")
+    parser.add_argument("--db", default="pos_database.db", help="Store database")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port")
+    parser.add_argument("--token", default=None, help="Shared secret registers must send")
+    args = parser.parse_args()
+    
+    if not args.serve:
+        parser.print_help()
+        return
+    
+    server = SyncServer(args.db, args.host, args.port, args.token)
+    print(f"Sync hub listening on {server.url} (database: {args.db})")
+    server.db_manager.stock_ledger.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+UI Monitor
+==========
+
+Measures how responsive the register's Tk event loop is.
+
+- A heartbeat is scheduled with ``root.after`` every ``HEARTBEAT_MS``; the
+  delay between when it was due and when it ran is the event-loop lag.
+- A watchdog thread watches the heartbeat. While the loop is blocked for
+  longer than the lag threshold it samples the main thread's stack, so a
+  "frozen" screen comes with the code that froze it.
+- ``@ui_monitor.trace("name")`` times UI operations (product grid, cart
+  refresh, completing a sale, ...).
+
+Stalls, stack samples and slow operations are appended as JSON lines to a
+rotating trace file; everything is also kept in memory for the diagnostics
+panel. Until ``start`` is called, traced methods only pay a flag check.
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from config import UI_LAG_THRESHOLD_MS, UI_SLOW_OPERATION_MS, UI_TRACE_FILE
+
+HEARTBEAT_MS = 100
+STACK_SAMPLES_PER_STALL = 5
+SAMPLES_KEPT = 1000  # Latest lag / duration samples kept for percentiles
+STALLS_KEPT = 50
+TRACE_MAX_BYTES = 1024 * 1024
+TRACE_BACKUP_COUNT = 3
+
+def _percentile(samples, fraction: float) -> float:
+    """Percentile of a sample collection (0 when empty)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+class UIMonitor:
+    """Event-loop lag watchdog and UI operation timer."""
+    
+    def __init__(self, trace_file: str = UI_TRACE_FILE, lag_threshold_ms: float = UI_LAG_THRESHOLD_MS,
+                 slow_operation_ms: float = UI_SLOW_OPERATION_MS):
+        """Initialize a stopped monitor."""
+        self.trace_file = trace_file
+        self.lag_threshold_ms = lag_threshold_ms
+        self.slow_operation_ms = slow_operation_ms
+        self.enabled = False
+        self.root = None
+        
+        self.heartbeats = 0
+        self.max_lag = 0.0
+        self.lag_samples = deque(maxlen=SAMPLES_KEPT)
+        self.stalls = deque(maxlen=STALLS_KEPT)
+        self.operations: Dict[str, Dict[str, Any]] = {}
+        
+        self._main_thread_id = None
+        self._expected_beat = 0.0
+        self._last_beat = 0.0
+        self._stall_stacks: List[Dict[str, Any]] = []  # Samples of the stall in progress
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+    
+    def start(self, root):
+        """Start the heartbeat on a Tk root (call from the main thread)."""
+        if self.enabled:
+            return
+        self.root = root
+        self.enabled = True
+        self._main_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._expected_beat = self._last_beat + HEARTBEAT_MS / 1000
+        self._stop_event.clear()
+        self.root.after(HEARTBEAT_MS, self._heartbeat)
+        
+        self._watchdog = threading.Thread(target=self._watch, name="ui-watchdog", daemon=True)
+        self._watchdog.start()
+    
+    def stop(self):
+        """Stop the heartbeat and the watchdog."""
+        self.enabled = False
+        self._stop_event.set()
+        if self._watchdog and self._watchdog is not threading.current_thread():
+            self._watchdog.join(timeout=1)
+        self._watchdog = None
+    
+    def _heartbeat(self):
+        """Record how late this beat ran and schedule the next one."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        lag = max(0.0, now - self._expected_beat)
+        
+        with self._lock:
+            self.heartbeats += 1
+            self.lag_samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            stacks, self._stall_stacks = self._stall_stacks, []
+            self._last_beat = now
+        
+        if lag * 1000 >= self.lag_threshold_ms:
+            stall = {
+                "time": datetime.now().isoformat(timespec="milliseconds"),
+                "event": "stall",
+                "lag_ms": round(lag * 1000, 1),
+                "operations": self._recent_operation_names(),
+                "stacks": stacks
+            }
+            self.stalls.append(stall)
+            self._write(stall)
+        
+        self._expected_beat = now + HEARTBEAT_MS / 1000
+        try:
+            self.root.after(HEARTBEAT_MS, self._heartbeat)
+        except Exception:
+            self.stop()  # Window destroyed
+    
+    def _watch(self):
+        """Sample the main thread's stack while the event loop is blocked."""
+        interval = self.lag_threshold_ms / 1000
+        while not self._stop_event.wait(interval / 2):
+            blocked = time.perf_counter() - self._last_beat - HEARTBEAT_MS / 1000
+            if blocked * 1000 < self.lag_threshold_ms:
+                continue
+            
+            with self._lock:
+                if len(self._stall_stacks) >= STACK_SAMPLES_PER_STALL:
+                    continue
+                frame = sys._current_frames().get(self._main_thread_id)
+                if frame is None:
+                    continue
+                sample = {
+                    "blocked_ms": round(blocked * 1000, 1),
+                    "stack": "".join(traceback.format_stack(frame))
+                }
+                self._stall_stacks.append(sample)
+            
+            # Written right away: if the loop never recovers this is all we get
+            self._write({"time": datetime.now().isoformat(timespec="milliseconds"),
+                         "event": "stall_sample", **sample})
+    
+    def trace(self, name: str) -> Callable:
+        """Decorator timing a UI operation under name."""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record_operation(name, time.perf_counter() - started)
+            return wrapper
+        return decorator
+    
+    def record_operation(self, name: str, elapsed: float):
+        """Add one timed operation to the statistics."""
+        with self._lock:
+            stats = self.operations.get(name)
+            if stats is None:
+                stats = self.operations[name] = {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0,
+                                                 "samples": deque(maxlen=SAMPLES_KEPT)}
+            stats["count"] += 1
+            stats["total"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+            stats["last"] = time.perf_counter()
+            stats["samples"].append(elapsed)
+        
+        if elapsed * 1000 >= self.slow_operation_ms:
+            self._write({"time": datetime.now().isoformat(timespec="milliseconds"),
+                         "event": "slow_operation", "operation": name,
+                         "duration_ms": round(elapsed * 1000, 1)})
+    
+    def _recent_operation_names(self, window: float = 2.0) -> List[str]:
+        """Operations that finished in the last window seconds (likely stall causes)."""
+        since = time.perf_counter() - window
+        return [name for name, stats in self.operations.items() if stats["last"] >= since]
+    
+    def get_lag_summary(self) -> Dict[str, Any]:
+        """Heartbeat count, stall count and lag percentiles in milliseconds."""
+        with self._lock:
+            samples = list(self.lag_samples)
+            return {
+                "heartbeats": self.heartbeats,
+                "stalls": len(self.stalls),
+                "p50_lag_ms": round(_percentile(samples, 0.5) * 1000, 1),
+                "p95_lag_ms": round(_percentile(samples, 0.95) * 1000, 1),
+                "max_lag_ms": round(self.max_lag * 1000, 1)
+            }
+    
+    def get_operation_stats(self) -> List[Dict[str, Any]]:
+        """Per-operation timings in milliseconds, slowest total first."""
+        with self._lock:
+            rows = [{
+                "operation": name,
+                "count": stats["count"],
+                "avg_ms": round(stats["total"] * 1000 / stats["count"], 1),
+                "p95_ms": round(_percentile(stats["samples"], 0.95) * 1000, 1),
+                "max_ms": round(stats["max"] * 1000, 1),
+                "total_ms": round(stats["total"] * 1000, 1)
+            } for name, stats in self.operations.items()]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+    
+    def get_recent_stalls(self) -> List[Dict[str, Any]]:
+        """Recent stalls with their stack samples, newest first."""
+        return list(reversed(self.stalls))
+    
+    def _write(self, event: Dict[str, Any]):
+        """Append an event to the trace file, rotating it when full."""
+        if not self.trace_file:
+            return
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        with self._write_lock:
+            try:
+                if os.path.exists(self.trace_file) and os.path.getsize(self.trace_file) + len(line) > TRACE_MAX_BYTES:
+                    self._rotate()
+                with open(self.trace_file, 'a', encoding='utf-8') as f:
+                    f.write(line)
+            except OSError as e:
+                print(f"Error writing UI trace: {e}")
+    
+    def _rotate(self):
+        """Shift trace.log -> trace.log.1 -> ... keeping TRACE_BACKUP_COUNT files."""
+        for index in range(TRACE_BACKUP_COUNT - 1, 0, -1):
+            older = f"{self.trace_file}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.trace_file}.{index + 1}")
+        os.replace(self.trace_file, f"{self.trace_file}.1")
+
+# Shared monitor for the register window
+ui_monitor = UIMonitor()